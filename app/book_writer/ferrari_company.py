@@ -14,7 +14,10 @@ from datetime import datetime
 import json
 import asyncio
 from app.llm.client import LLMClient
+from app.core.message_bus import IndexedMessageBus
 from app.book_writer.config import get_config
+from app.book_writer.qa_engine import ManuscriptQA, QAWindowCache, get_qa_cache, manuscript_chapters
+from app.core.step_graph import Step, backend_limit, run_step_graph
 
 
 class Phase(Enum):
@@ -55,6 +58,18 @@ class AgentMessage:
             "timestamp": self.timestamp.isoformat(),
             "message_type": self.message_type
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AgentMessage":
+        """Recreate a message serialized with to_dict."""
+        return cls(
+            from_agent=data["from_agent"],
+            to_agent=data["to_agent"],
+            phase=Phase(data["phase"]),
+            content=data["content"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            message_type=data.get("message_type", "internal")
+        )
 
 
 @dataclass
@@ -85,13 +100,9 @@ class BookProject:
     owner_edits: Dict[str, Any] = field(default_factory=dict)
 
 
-class MessageBus:
+class MessageBus(IndexedMessageBus):
     """Central message bus for all agent communications."""
     
-    def __init__(self):
-        self.messages: List[AgentMessage] = []
-        self.subscribers: Dict[str, List[callable]] = {}
-    
     def send(self, from_agent: str, to_agent: str, phase: Phase, content: str, 
              message_type: str = "internal"):
         """Send a message and log it."""
@@ -102,27 +113,12 @@ class MessageBus:
             content=content,
             message_type=message_type
         )
-        self.messages.append(message)
-        
-        # Notify subscribers
-        if to_agent in self.subscribers:
-            for callback in self.subscribers[to_agent]:
-                callback(message)
-        
+        self.append(message)
         return message
     
     def get_chat_log(self, phase: Optional[Phase] = None) -> List[Dict[str, Any]]:
-        """Get full chat log, optionally filtered by phase."""
-        messages = self.messages
-        if phase:
-            messages = [m for m in messages if m.phase == phase]
-        return [m.to_dict() for m in messages]
-    
-    def subscribe(self, agent_name: str, callback: callable):
-        """Subscribe an agent to receive messages."""
-        if agent_name not in self.subscribers:
-            self.subscribers[agent_name] = []
-        self.subscribers[agent_name].append(callback)
+        """Get the chat log in memory, optionally filtered by phase."""
+        return [m.to_dict() for m in self.get_messages(phase)]
 
 
 class BaseAgent:
@@ -133,11 +129,30 @@ class BaseAgent:
         self.role = role
         self.llm_client = llm_client
         self.message_bus = message_bus
+        # Concurrent LLM calls of this agent; None shares the backend's configured limit
+        self.max_concurrency: Optional[int] = None
     
     async def send_message(self, to_agent: str, phase: Phase, content: str):
         """Send a message via the message bus."""
         return self.message_bus.send(self.name, to_agent, phase, content)
     
+    def llm_limit(self) -> asyncio.Semaphore:
+        """Semaphore bounding this agent's concurrent LLM calls."""
+        if self.max_concurrency:
+            return asyncio.Semaphore(self.max_concurrency)
+        return backend_limit(self.llm_client)
+    
+    async def run_steps(self, phase: Phase, steps: List[Step], progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """Run independent steps concurrently, reporting each one as it ends."""
+        async def on_step(step: Step, error: Optional[str], finished: int, total: int):
+            label = step.label or step.name.replace('_', ' ').capitalize()
+            if error:
+                await self.send_message("CEO", phase, f"{label} failed: {error}")
+            if progress_callback:
+                await progress_callback(f"{label} {'failed' if error else 'completed'}", f"{finished} of {total} steps")
+        
+        return await run_step_graph(steps, self.llm_limit(), on_step)
+    
     async def receive_message(self, message: AgentMessage):
         """Handle received message (override in subclasses)."""
         pass
@@ -455,26 +470,26 @@ class StoryDesignDirectorAgent(BaseAgent):
         self.character_designers = []
         self.tone_mood_agents = []
     
-    async def run_design_workshop(self, book_brief: Dict[str, Any], premise: str) -> Dict[str, Any]:
-        """Run the design workshop with all design agents."""
-        # Coordinate worldbuilding
-        world_dossier = await self._create_world_dossier(book_brief, premise)
-        
-        # Coordinate character design
-        character_bible = await self._create_character_bible(book_brief, premise)
+    async def run_design_workshop(self, book_brief: Dict[str, Any], premise: str,
+                                  progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """Run the design workshop with all design agents.
         
-        # Coordinate tone & mood
-        tone_mood = await self._create_tone_mood_guide(book_brief, premise)
-        
-        # Create plot arc
-        plot_arc = await self._create_plot_arc(book_brief, premise, world_dossier, character_bible)
-        
-        result = {
-            "world_dossier": world_dossier,
-            "character_bible": character_bible,
-            "tone_mood": tone_mood,
-            "plot_arc": plot_arc
-        }
+        World, characters and tone are designed concurrently; the plot arc
+        starts once the world and characters it builds on are ready.
+        """
+        result = await self.run_steps(Phase.EARLY_DESIGN, [
+            # Coordinate worldbuilding
+            Step("world_dossier", lambda: self._create_world_dossier(book_brief, premise), label="World dossier"),
+            # Coordinate character design
+            Step("character_bible", lambda: self._create_character_bible(book_brief, premise), label="Character bible"),
+            # Coordinate tone & mood
+            Step("tone_mood", lambda: self._create_tone_mood_guide(book_brief, premise), label="Tone & mood guide",
+                 fallback={"overall_tone": book_brief.get('tone', 'narrative'), "mood_variations": []}),
+            # Create plot arc
+            Step("plot_arc", lambda world_dossier, character_bible: self._create_plot_arc(
+                book_brief, premise, world_dossier, character_bible
+            ), requires=("world_dossier", "character_bible"), label="Plot arc"),
+        ], progress_callback)
         
         await self.send_message("CEO", Phase.EARLY_DESIGN, 
                               f"Design workshop complete. Created world, characters, and plot arc.")
@@ -659,12 +674,25 @@ class NarrativeEngineeringDirectorAgent(BaseAgent):
 
 
 class ProductionDirectorAgent(BaseAgent):
-    """Production Director - Coordinates drafting and assembly."""
-    
-    def __init__(self, llm_client: LLMClient, message_bus: MessageBus):
+    """Production Director - Coordinates drafting and assembly.
+
+    Chapters are drafted concurrently: each prompt depends only on the
+    project and its own outline entry, so up to `max_concurrency` chapters
+    are generated at once (the backend's shared limit by default).
+    Finished chapters are reported as they land and assembled in chapter
+    order. A failed chapter is retried on its own; the first chapter to
+    exhaust its attempts, or cancelling the phase, cancels the chapters
+    still in flight.
+    """
+    
+    def __init__(self, llm_client: LLMClient, message_bus: MessageBus,
+                 max_concurrency: Optional[int] = None, max_attempts: int = 3, retry_delay: float = 2.0):
         super().__init__("ProductionDirector", "Production Director", llm_client, message_bus)
         self.drafting_agents = []
         self.assembly_agents = []
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
     
     async def create_draft(self, project: BookProject, mid_phase_callback: Optional[callable] = None) -> Dict[int, str]:
         """Create full draft using drafting agents."""
@@ -674,19 +702,29 @@ class ProductionDirectorAgent(BaseAgent):
             return draft_chapters
         
         total_chapters = len(project.outline)
-        for idx, chapter_data in enumerate(project.outline, 1):
-            chapter_num = chapter_data.get('chapter_number', 0)
-            
-            # Drafting agent writes chapter
-            chapter_text = await self._draft_chapter(chapter_data, project)
-            draft_chapters[chapter_num] = chapter_text
-            
-            await self.send_message("CEO", Phase.PROTOTYPES_TESTING, 
-                                  f"Drafted Chapter {chapter_num}")
-            
-            # Save progress after each chapter is completed
-            if mid_phase_callback:
-                await mid_phase_callback(f"Chapter {chapter_num} draft completed", f"Chapter {idx} of {total_chapters}")
+        semaphore = self.llm_limit()
+        
+        async def draft(chapter_data: Dict[str, Any]) -> Tuple[int, str]:
+            chapter_text = await self._draft_chapter_with_retry(chapter_data, project, semaphore)
+            return chapter_data.get('chapter_number', 0), chapter_text
+        
+        tasks = [asyncio.create_task(draft(chapter_data)) for chapter_data in project.outline]
+        try:
+            # Callbacks run here, one at a time, never concurrently from the drafting tasks
+            for completed, next_done in enumerate(asyncio.as_completed(tasks), 1):
+                chapter_num, chapter_text = await next_done
+                draft_chapters[chapter_num] = chapter_text
+                
+                await self.send_message("CEO", Phase.PROTOTYPES_TESTING, 
+                                      f"Drafted Chapter {chapter_num}")
+                
+                # Save progress after each chapter is completed
+                if mid_phase_callback:
+                    await mid_phase_callback(f"Chapter {chapter_num} draft completed", f"{completed} of {total_chapters} chapters")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
         # Assembly agent combines chapters
         full_draft = await self._assemble_draft(draft_chapters)
@@ -697,6 +735,29 @@ class ProductionDirectorAgent(BaseAgent):
         
         return draft_chapters
     
+    async def _draft_chapter_with_retry(
+        self,
+        chapter_data: Dict[str, Any],
+        project: BookProject,
+        limit: asyncio.Semaphore
+    ) -> str:
+        """Draft one chapter, retrying only this chapter when generation fails.
+        
+        Each attempt holds a slot of `limit`; the backoff between attempts
+        does not, so other chapters draft meanwhile.
+        """
+        chapter_num = chapter_data.get('chapter_number', 0)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with limit:
+                    return await self._draft_chapter(chapter_data, project)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise Exception(f"Failed to draft Chapter {chapter_num} after {attempt} attempts: {e}") from e
+                await self.send_message("CEO", Phase.PROTOTYPES_TESTING,
+                                      f"Chapter {chapter_num} draft failed ({e}); retrying ({attempt + 1}/{self.max_attempts})")
+                await asyncio.sleep(self.retry_delay * attempt)
+    
     async def _draft_chapter(self, chapter_data: Dict[str, Any], project: BookProject) -> str:
         """Drafting Agent writes a chapter."""
         system_prompt = """You are a Drafting Agent. Write engaging narrative prose following the provided outline."""
@@ -734,131 +795,50 @@ class QADirectorAgent(BaseAgent):
         self.test_readers = []
         self.logic_consistency_agents = []
         self.sensitivity_agents = []
+        # Window findings cache; None uses the shared one from settings
+        self.qa_cache: Optional[QAWindowCache] = None
     
-    async def test_and_review(self, project: BookProject) -> Dict[str, Any]:
-        """Run full QA testing."""
-        revision_report = {
-            "test_reader_feedback": await self._test_reader_evaluation(project),
-            "logic_consistency_issues": await self._logic_consistency_check(project),
-            "sensitivity_issues": await self._sensitivity_review(project),
-            "overall_assessment": "",
-            "recommended_changes": []
-        }
+    async def test_and_review(self, project: BookProject, progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """Run full QA testing.
+        
+        Test reader, logic & consistency and sensitivity reviewers read the
+        whole manuscript window by window (see qa_engine). A window that
+        fails is listed in `failed_checks` and every other window is kept.
+        """
+        from app.core.config import settings
+        
+        engine = ManuscriptQA(self.llm_client, self.qa_cache or get_qa_cache(), window_chars=settings.QA_WINDOW_CHARS)
+        revision_report = await engine.review(
+            manuscript_chapters(project.draft_chapters, project.full_draft),
+            self.llm_limit(),
+            outline=project.outline,
+            character_bible=project.character_bible,
+            progress_callback=progress_callback
+        )
+        revision_report["overall_assessment"] = ""
+        revision_report["recommended_changes"] = []
+        if revision_report.get("failed_checks"):
+            await self.send_message("CEO", Phase.PROTOTYPES_TESTING,
+                                  f"QA could not review {len(revision_report['failed_checks'])} windows: "
+                                  f"{next(iter(revision_report['failed_checks'].values()))}")
         
         # Create overall assessment
         revision_report["overall_assessment"] = await self._create_assessment(revision_report)
         revision_report["recommended_changes"] = await self._identify_changes(revision_report)
         
+        coverage = revision_report["coverage"]
         await self.send_message("CEO", Phase.PROTOTYPES_TESTING, 
-                              f"QA testing complete. Found {len(revision_report['recommended_changes'])} recommended changes.")
+                              f"QA testing complete: {coverage['chapters_reviewed']} of {coverage['chapters']} chapters reviewed "
+                              f"({coverage['cached_reviews']} window reviews reused). "
+                              f"Found {len(revision_report['recommended_changes'])} recommended changes.")
         
         return revision_report
     
-    async def _test_reader_evaluation(self, project: BookProject) -> Dict[str, Any]:
-        """Test Reader Agent evaluation."""
-        system_prompt = """You are a Test Reader Agent. Evaluate pacing, emotional impact, and reader engagement."""
-        
-        draft_sample = project.full_draft[:2000] if project.full_draft else "No draft available"
-        
-        user_prompt = f"""Evaluate this book draft:
-
-Title: {project.title}
-Premise: {project.premise}
-
-Draft Sample:
-{draft_sample}
-
-Evaluate:
-1. Pacing (too fast, too slow, just right)
-2. Emotional impact
-3. Reader engagement
-4. Clarity
-5. Overall reading experience
-
-Format as JSON."""
-        
-        response = await self.llm_client.complete(system=system_prompt, user=user_prompt)
-        
-        try:
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
-        except:
-            pass
-        
-        return {"pacing": "good", "emotional_impact": "moderate", "engagement": "good"}
-    
-    async def _logic_consistency_check(self, project: BookProject) -> List[str]:
-        """Logic & Consistency Agent checks for plot holes."""
-        system_prompt = """You are a Logic & Consistency Agent. Hunt for plot holes and inconsistencies."""
-        
-        outline_text = json.dumps(project.outline, indent=2)[:1000] if project.outline else "No outline"
-        draft_sample = project.full_draft[:2000] if project.full_draft else "No draft"
-        
-        user_prompt = f"""Check for plot holes and inconsistencies:
-
-Outline:
-{outline_text}
-
-Draft Sample:
-{draft_sample}
-
-Identify:
-1. Plot holes
-2. Character inconsistencies
-3. World-building contradictions
-4. Timeline issues
-5. Logic errors
-
-Return as JSON array of issues."""
-        
-        response = await self.llm_client.complete(system=system_prompt, user=user_prompt)
-        
-        try:
-            json_start = response.find('[')
-            json_end = response.rfind(']') + 1
-            if json_start >= 0 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
-        except:
-            pass
-        
-        return []
-    
-    async def _sensitivity_review(self, project: BookProject) -> List[str]:
-        """Sensitivity/Alignment Agent review."""
-        system_prompt = """You are a Sensitivity/Alignment Agent. Review for problematic content."""
-        
-        draft_sample = project.full_draft[:2000] if project.full_draft else "No draft"
-        
-        user_prompt = f"""Review for sensitivity and alignment issues:
-
-Draft Sample:
-{draft_sample}
-
-Check for:
-1. Problematic stereotypes
-2. Offensive content
-3. Misrepresentation
-4. Ethical concerns
-5. Content warnings needed
-
-Return as JSON array of issues (empty if none found)."""
-        
-        response = await self.llm_client.complete(system=system_prompt, user=user_prompt)
-        
-        try:
-            json_start = response.find('[')
-            json_end = response.rfind(']') + 1
-            if json_start >= 0 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
-        except:
-            pass
-        
-        return []
-    
     async def _create_assessment(self, report: Dict[str, Any]) -> str:
         """Create overall QA assessment."""
+        if report.get('failed_checks'):
+            return f"QA incomplete: {len(report['failed_checks'])} checks failed and should be re-run."
+        
         issues_count = len(report.get('logic_consistency_issues', [])) + len(report.get('sensitivity_issues', []))
         
         if issues_count == 0:
@@ -871,6 +851,8 @@ Return as JSON array of issues (empty if none found)."""
     async def _identify_changes(self, report: Dict[str, Any]) -> List[str]:
         """Identify recommended changes."""
         changes = []
+        if report.get('failed_checks'):
+            changes.append(f"Re-run QA: {len(report['failed_checks'])} window reviews failed")
         
         if report.get('logic_consistency_issues'):
             changes.extend([f"Fix: {issue}" for issue in report['logic_consistency_issues'][:5]])
@@ -879,7 +861,9 @@ Return as JSON array of issues (empty if none found)."""
             changes.extend([f"Review: {issue}" for issue in report['sensitivity_issues'][:3]])
         
         test_feedback = report.get('test_reader_feedback', {})
-        if test_feedback.get('pacing') == 'too slow':
+        if test_feedback.get('slow_chapters'):
+            changes.append(f"Improve pacing in slower chapters: {', '.join(map(str, test_feedback['slow_chapters'][:10]))}")
+        elif test_feedback.get('pacing') == 'too slow':
             changes.append("Improve pacing in slower sections")
         elif test_feedback.get('pacing') == 'too fast':
             changes.append("Add more detail and development")
@@ -1166,18 +1150,22 @@ class LaunchDirectorAgent(BaseAgent):
         super().__init__("LaunchDirector", "Launch Director", llm_client, message_bus)
         self.marketing_agents = []
     
-    async def create_launch_package(self, project: BookProject) -> Dict[str, Any]:
-        """Create complete launch package."""
-        package = {
-            "title_options": await self._generate_title_options(project),
-            "subtitle": await self._generate_subtitle(project),
-            "tagline": await self._generate_tagline(project),
-            "back_cover_blurb": await self._generate_back_cover(project),
-            "store_description": await self._generate_store_description(project),
-            "keywords": await self._generate_keywords(project),
-            "categories": await self._generate_categories(project),
-            "short_synopsis": await self._generate_synopsis(project)
-        }
+    async def create_launch_package(self, project: BookProject, progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """Create complete launch package.
+        
+        Every component is generated concurrently; a component that fails
+        is left empty (reported to the CEO) instead of failing the package.
+        """
+        package = await self.run_steps(Phase.MARKETING_LAUNCH, [
+            Step("title_options", lambda: self._generate_title_options(project), fallback=[project.title or "Untitled"]),
+            Step("subtitle", lambda: self._generate_subtitle(project), fallback=""),
+            Step("tagline", lambda: self._generate_tagline(project), fallback=""),
+            Step("back_cover_blurb", lambda: self._generate_back_cover(project), fallback=""),
+            Step("store_description", lambda: self._generate_store_description(project), fallback=""),
+            Step("keywords", lambda: self._generate_keywords(project), fallback=[]),
+            Step("categories", lambda: self._generate_categories(project), fallback=[]),
+            Step("short_synopsis", lambda: self._generate_synopsis(project), fallback=""),
+        ], progress_callback)
         
         await self.send_message("CEO", Phase.MARKETING_LAUNCH, 
                               f"Launch package created with {len(package)} components")
@@ -1460,7 +1448,8 @@ class FerrariBookCompany:
             # Story Design Director runs workshop
             design_results = await self.story_design_director.run_design_workshop(
                 self.project.book_brief or {},
-                self.project.premise
+                self.project.premise,
+                getattr(self, '_mid_phase_save_callback', None)
             )
             self.project.world_dossier = design_results.get('world_dossier')
             self.project.character_bible = design_results.get('character_bible')
@@ -1487,7 +1476,7 @@ class FerrariBookCompany:
                 await mid_phase_callback(f"Draft chapters updated: {len(draft_chapters)} chapters completed")
             
             # QA Director tests
-            revision_report = await self.qa_director.test_and_review(self.project)
+            revision_report = await self.qa_director.test_and_review(self.project, mid_phase_callback)
             self.project.revision_report = revision_report
         
         elif phase == Phase.INDUSTRIALIZATION_PACKAGING:
@@ -1501,7 +1490,9 @@ class FerrariBookCompany:
         
         elif phase == Phase.MARKETING_LAUNCH:
             # Launch Director creates package
-            launch_package = await self.launch_director.create_launch_package(self.project)
+            launch_package = await self.launch_director.create_launch_package(
+                self.project, getattr(self, '_mid_phase_save_callback', None)
+            )
             self.project.launch_package = launch_package
     
     def _assemble_final_package(self) -> Dict[str, Any]:
@@ -1,17 +1,151 @@
 """Generate book outlines using LLM agents."""
+import asyncio
 import re
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 from app.book_writer.agents import BookAgents
 from app.book_writer.config import get_config
+from app.core.step_graph import backend_limit
 from app.llm.client import LLMClient
 
 
 class OutlineGenerator:
-    """Generates book outlines from initial prompts."""
+    """Generates book outlines from initial prompts.
+
+    Sections left with placeholder or too-short content are repaired in one
+    pass once the whole outline is parsed: each depends only on its chapter's
+    skeleton, so up to `max_concurrency` sections are regenerated at once
+    (the backend's shared limit by default). A section that still fails
+    validation is retried on its own, up to `max_attempts` times with a
+    growing delay, while the others carry on; the repaired sections are
+    written back into the outline together, in order.
+    """
     
-    def __init__(self, agents: BookAgents, agent_config: Dict):
+    def __init__(self, agents: BookAgents, agent_config: Dict,
+                 max_concurrency: Optional[int] = None, max_attempts: int = 3, retry_delay: float = 2.0):
         self.agents = agents
         self.agent_config = agent_config
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+
+    def _llm_limit(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent section regenerations."""
+        if self.max_concurrency:
+            return asyncio.Semaphore(self.max_concurrency)
+        return backend_limit(self.agents.llm_client)
+
+    @staticmethod
+    def _section_needs_repair(section: Dict) -> bool:
+        """Whether a section still has placeholder or too-short titles or main points."""
+        title = (section.get("title") or "").strip()
+        if not title or (title.startswith("Section ") and len(title) < 15):
+            return True
+        subsections = section.get("subsections") or []
+        if not subsections:
+            return True
+        for subsection in subsections:
+            sub_title = (subsection.get("title") or "").strip()
+            if sub_title.startswith("Subsection ") or len(sub_title) < 5:
+                return True
+            main_points = subsection.get("main_points") or []
+            if not main_points:
+                return True
+            for mp in main_points:
+                mp_text = (mp.get("text", "") if isinstance(mp, dict) else str(mp)).strip()
+                # Main points must be full sentences, not "Main point for paragraph X"
+                if len(mp_text) < 10 or "main point for paragraph" in mp_text.lower() or (
+                        mp_text.lower().startswith("main point") and len(mp_text) < 30):
+                    return True
+        return False
+
+    @staticmethod
+    def _sections_text(sections: List[Dict]) -> str:
+        """Sections, subsections and main points as listed in a chapter prompt."""
+        parts = []
+        for sec_idx, sec in enumerate(sections, 1):
+            section_text = f"  Section {sec_idx}: {sec['title']}"
+            for sub_idx, sub in enumerate(sec.get('subsections') or [], 1):
+                section_text += f"\n    - Subsection {sec_idx}.{sub_idx}: {sub.get('title', '')}"
+                if sub.get('main_points'):
+                    section_text += "\n      Main Points:"
+                    for mp in sub['main_points']:
+                        # Handle both string and object formats
+                        mp_text = mp.get('text', mp) if isinstance(mp, dict) else mp
+                        section_text += f"\n        * {mp_text}"
+            parts.append(section_text)
+        return "\n".join(parts)
+
+    async def _repair_section(self, chapter: Dict, section_num: int,
+                              limit: asyncio.Semaphore) -> Tuple[Dict, bool]:
+        """Regenerate one section until it validates or its attempts run out; returns (section, repaired)."""
+        section = None
+        for attempt in range(1, self.max_attempts + 1):
+            async with limit:
+                section = await self._generate_section_content(chapter, section_num)
+            if not self._section_needs_repair(section):
+                return section, True
+            if attempt < self.max_attempts:
+                print(f"Chapter {chapter['chapter_number']} Section {section_num} still incomplete; "
+                      f"retrying ({attempt + 1}/{self.max_attempts})")
+                # Back off outside the limit, so other sections use the slot meanwhile
+                await asyncio.sleep(self.retry_delay * attempt)
+        return section, False
+
+    async def _repair_sections(self, chapters: List[Dict], progress_callback: Optional[Callable] = None) -> None:
+        """Regenerate every weak section of the outline concurrently, then write them back in order.
+
+        `progress_callback(message, sub_item)` is awaited as each section
+        is finished, one call at a time.
+        """
+        for chapter in chapters:
+            if not chapter.get("sections"):
+                print(f"Generating sections for Chapter {chapter['chapter_number']} using LLM")
+                chapter["sections"] = [{"title": f"Section {j+1}", "subsections": []} for j in range(3)]
+
+        weak = [(chapter_idx, section_idx)
+                for chapter_idx, chapter in enumerate(chapters)
+                for section_idx, section in enumerate(chapter["sections"])
+                if self._section_needs_repair(section)]
+        if not weak:
+            return
+
+        total = len(weak)
+        print(f"Regenerating {total} sections with placeholder or missing content")
+        limit = self._llm_limit()
+
+        async def repair(chapter_idx: int, section_idx: int) -> Tuple[int, int, Dict, bool]:
+            section, repaired = await self._repair_section(chapters[chapter_idx], section_idx + 1, limit)
+            return chapter_idx, section_idx, section, repaired
+
+        regenerated: Dict[Tuple[int, int], Dict] = {}
+        repaired_count = 0
+        tasks = [asyncio.create_task(repair(chapter_idx, section_idx)) for chapter_idx, section_idx in weak]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                chapter_idx, section_idx, section, repaired = await next_done
+                regenerated[(chapter_idx, section_idx)] = section
+                chapter_num = chapters[chapter_idx]['chapter_number']
+                if repaired:
+                    repaired_count += 1
+                    message = f"Repaired Chapter {chapter_num} Section {section_idx + 1}"
+                else:
+                    message = (f"Chapter {chapter_num} Section {section_idx + 1} still incomplete "
+                               f"after {self.max_attempts} attempts")
+                    print(message)
+                if progress_callback:
+                    await progress_callback(message, f"{repaired_count} of {total} sections repaired")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Every section is in: update the outline in one go, keeping section order
+        for chapter_idx in sorted({chapter_idx for chapter_idx, _ in weak}):
+            chapter = chapters[chapter_idx]
+            chapter["sections"] = [regenerated.get((chapter_idx, section_idx), section)
+                                   for section_idx, section in enumerate(chapter["sections"])]
+            chapter["prompt"] = chapter.get("prompt", "").split("\n- Sections:", 1)[0]
+        print(f"Repaired {repaired_count} of {total} sections")
 
     async def _generate_section_content(self, chapter_info: Dict, section_num: int) -> Dict:
         """Generate section content using LLM when missing - creates fully descriptive content."""
@@ -143,8 +277,13 @@ Main Points:
                 ]
             }
 
-    async def generate_outline(self, initial_prompt: str, num_chapters: int = 25) -> List[Dict]:
-        """Generate a book outline based on initial prompt."""
+    async def generate_outline(self, initial_prompt: str, num_chapters: int = 25,
+                               progress_callback: Optional[Callable] = None) -> List[Dict]:
+        """Generate a book outline based on initial prompt.
+
+        `progress_callback(message, sub_item)` is awaited as weak sections
+        are repaired.
+        """
         print("\nGenerating outline...")
 
         try:
@@ -161,14 +300,15 @@ Main Points:
             outline_text = await self.agents.outline_creator(initial_prompt, story_arc, world_elements, num_chapters)
             
             # Extract and process the outline
-            return await self._process_outline_results(outline_text, num_chapters)
+            return await self._process_outline_results(outline_text, num_chapters, progress_callback)
             
         except Exception as e:
             print(f"Error generating outline: {str(e)}")
             # Try to salvage any outline content we can find
             return await self._emergency_outline_processing(outline_text if 'outline_text' in locals() else "", num_chapters)
 
-    async def _process_outline_results(self, outline_content: str, num_chapters: int) -> List[Dict]:
+    async def _process_outline_results(self, outline_content: str, num_chapters: int,
+                                       progress_callback: Optional[Callable] = None) -> List[Dict]:
         """Extract and process the outline with strict format requirements."""
         if not outline_content:
             print("No structured outline found, attempting emergency processing...")
@@ -356,21 +496,7 @@ Main Points:
                 ]
                 
                 if sections_list:
-                    sections_text_parts = []
-                    for sec_idx, sec in enumerate(sections_list, 1):
-                        section_text = f"  Section {sec_idx}: {sec['title']}"
-                        if sec.get('subsections'):
-                            for sub_idx, sub in enumerate(sec['subsections'], 1):
-                                section_text += f"\n    - Subsection {sec_idx}.{sub_idx}: {sub.get('title', '')}"
-                                if sub.get('main_points'):
-                                    section_text += "\n      Main Points:"
-                                    for mp_idx, mp in enumerate(sub['main_points'], 1):
-                                        # Handle both string and object formats
-                                        mp_text = mp.get('text', mp) if isinstance(mp, dict) else mp
-                                        section_text += f"\n        * {mp_text}"
-                        sections_text_parts.append(section_text)
-                    
-                    chapter_prompt_parts.append(f"- Sections:\n" + "\n".join(sections_text_parts))
+                    chapter_prompt_parts.append(f"- Sections:\n" + self._sections_text(sections_list))
                 
                 # Ensure sections_list is not empty - generate using LLM if needed
                 if not sections_list:
@@ -392,34 +518,6 @@ Main Points:
                         } for j in range(3)
                     ]
                 
-                # If sections_list is empty or has placeholder text, generate real content
-                needs_regeneration = False
-                if not sections_list:
-                    needs_regeneration = True
-                else:
-                    # Check if sections have placeholder text
-                    for sec in sections_list:
-                        sec_title = sec.get("title", "")
-                        if sec_title.startswith("Section ") and len(sec_title) < 15:
-                            needs_regeneration = True
-                            break
-                        for sub in sec.get("subsections", []):
-                            sub_title = sub.get("title", "")
-                            if sub_title.startswith("Subsection ") or len(sub_title) < 5:
-                                needs_regeneration = True
-                                break
-                            # Check main points - they must be full sentences (10+ words)
-                            for mp in sub.get("main_points", []):
-                                mp_text = mp.get("text", "") if isinstance(mp, dict) else str(mp)
-                                # Check if it's a placeholder or too short
-                                if (mp_text.lower().startswith("main point") and len(mp_text) < 30) or len(mp_text) < 10:
-                                    needs_regeneration = True
-                                    break
-                            if needs_regeneration:
-                                break
-                        if needs_regeneration:
-                            break
-                
                 chapter_info = {
                     "chapter_number": i,
                     "title": title_match.group(1).strip(),
@@ -427,14 +525,6 @@ Main Points:
                     "sections": sections_list
                 }
                 
-                # If we need to regenerate sections, do it now
-                if needs_regeneration:
-                    print(f"Regenerating sections for Chapter {i} with actual content")
-                    chapter_info["sections"] = []
-                    for j in range(3):
-                        section = await self._generate_section_content(chapter_info, j + 1)
-                        chapter_info["sections"].append(section)
-                
                 # Verify events (at least 3)
                 events = re.findall(r'-\s*(.+?)(?=\n|$)', events_match.group(1))
                 if len(events) < 3:
@@ -447,101 +537,12 @@ Main Points:
                 print(f"Error processing Chapter {i}: {str(e)}")
                 continue
 
-        # Post-process: Ensure all chapters have fully descriptive content
-        # Check for placeholder text and regenerate if needed
+        # Post-process: regenerate sections with placeholder text, all chapters at once
+        await self._repair_sections(chapters, progress_callback)
         for chapter in chapters:
-            # Check if sections exist
-            if not chapter.get("sections") or len(chapter.get("sections", [])) == 0:
-                print(f"Generating sections for Chapter {chapter['chapter_number']} using LLM")
-                chapter["sections"] = []
-                for j in range(3):
-                    section = await self._generate_section_content(chapter, j + 1)
-                    chapter["sections"].append(section)
-            else:
-                # Check for placeholder text in existing sections and regenerate if needed
-                needs_regeneration = False
-                for section in chapter.get("sections", []):
-                    # Check section title
-                    if not section.get("title") or section["title"].strip() in ["Section 1", "Section 2", "Section 3"] or (section["title"].startswith("Section ") and len(section["title"]) < 15):
-                        needs_regeneration = True
-                        break
-                    
-                    # Check subsections
-                    for subsection in section.get("subsections", []):
-                        # Check subsection title
-                        if not subsection.get("title") or subsection["title"].startswith("Subsection "):
-                            needs_regeneration = True
-                            break
-                        
-                        # Check main points for placeholder text
-                        for mp in subsection.get("main_points", []):
-                            mp_text = mp.get("text", "") if isinstance(mp, dict) else str(mp)
-                            if "main point for paragraph" in mp_text.lower() or ("main point" in mp_text.lower() and len(mp_text) < 30 and "paragraph" in mp_text.lower()):
-                                needs_regeneration = True
-                                break
-                    
-                    if needs_regeneration:
-                        break
-                
-                # Regenerate sections if they have placeholder text
-                if needs_regeneration:
-                    print(f"Regenerating sections for Chapter {chapter['chapter_number']} - placeholder text detected")
-                    chapter["sections"] = []
-                    for j in range(3):
-                        section = await self._generate_section_content(chapter, j + 1)
-                        chapter["sections"].append(section)
-                
-                # Final pass: Ensure all main points are full sentences (10+ words)
-                for section in chapter.get("sections", []):
-                    for subsection in section.get("subsections", []):
-                        for mp_idx, mp in enumerate(subsection.get("main_points", [])):
-                            mp_text = mp.get("text", "") if isinstance(mp, dict) else str(mp)
-                            # If main point is too short or is a placeholder, regenerate it
-                            if len(mp_text) < 10 or (mp_text.lower().startswith("main point") and len(mp_text) < 30):
-                                print(f"Regenerating main point {mp_idx + 1} for Chapter {chapter['chapter_number']}, {section['title']} - {subsection['title']}")
-                                # Generate a single main point
-                                mp_prompt = f"""Chapter {chapter['chapter_number']}: {chapter['title']}
-Section: {section['title']}
-Subsection: {subsection['title']}
-Chapter Context: {chapter.get('prompt', '')[:500]}
-
-Generate a FULL SENTENCE (10+ words minimum) describing what happens in paragraph {mp_idx + 1} of this subsection.
-Make it specific to the story and descriptive.
-Return ONLY the sentence, no labels, prefixes, or "Main point for paragraph X:"."""
-                                
-                                try:
-                                    mp_response = await self.agents.llm_client.complete(
-                                        system="Generate a full descriptive sentence for a paragraph main point. Return only the sentence.",
-                                        user=mp_prompt
-                                    )
-                                    new_mp = mp_response.strip()
-                                    # Clean up response
-                                    new_mp = new_mp.lstrip('*-').strip()
-                                    if ':' in new_mp and 'main point' in new_mp.lower():
-                                        new_mp = new_mp.split(':', 1)[1].strip()
-                                    # Remove quotes if present
-                                    new_mp = new_mp.strip('"\'')
-                                    if len(new_mp) > 10:
-                                        if isinstance(mp, dict):
-                                            mp["text"] = new_mp
-                                        else:
-                                            subsection["main_points"][mp_idx] = {"text": new_mp}
-                                    else:
-                                        print(f"Warning: Generated main point too short: {new_mp}")
-                                except Exception as e:
-                                    print(f"Error regenerating main point: {e}")
-                # Update prompt to include sections
-                if "- Sections:" not in chapter["prompt"]:
-                    sections_text = "\n".join([
-                        f"  Section {j+1}: {sec['title']}" + 
-                        "\n    " + "\n    ".join([
-                            f"- Subsection {j+1}.{k+1}: {sub['title']}\n      Main Points:\n        " +
-                            "\n        ".join([f"* {mp.get('text', mp) if isinstance(mp, dict) else mp}" for mp in sub['main_points']])
-                            for k, sub in enumerate(sec['subsections'])
-                        ])
-                        for j, sec in enumerate(chapter["sections"])
-                    ])
-                    chapter["prompt"] += f"\n- Sections:\n{sections_text}"
+            # Update prompt to include sections
+            if "- Sections:" not in chapter["prompt"]:
+                chapter["prompt"] += f"\n- Sections:\n{self._sections_text(chapter['sections'])}"
 
         # If we don't have enough valid chapters, create placeholders
         if len(chapters) < num_chapters:
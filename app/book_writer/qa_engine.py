@@ -0,0 +1,384 @@
+"""Map-reduce QA over a whole manuscript.
+
+A novel does not fit in one review prompt, so the manuscript is split into
+chapter-aligned windows: a window never spans two chapters, and a long
+chapter is split at paragraph breaks. Every reviewer reads every window
+concurrently, bounded by the LLM backend's concurrency limit, and returns
+compact findings that are pinned to a chapter and a character offset in
+it. A reduce step then merges the windows' findings, deduplicating issues
+reported by several windows, into the revision report.
+
+Each window's findings are cached in SQLite. The cache key is a hash of the
+reviewer, the prompt version, the model and the window's content and
+context. Re-running QA after editing two chapters re-reviews only the
+windows of those two chapters.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import structlog
+
+from app.core.step_graph import Step, StepGraphError, run_step_graph
+
+logger = structlog.get_logger(__name__)
+
+# Bump when a reviewer prompt changes, so cached findings are not reused
+PROMPT_VERSION = 1
+
+DEFAULT_WINDOW_CHARS = 12000
+SEVERITIES = ("low", "medium", "high")
+
+_FINDINGS_FORMAT = """Return JSON only:
+{"findings": [{"issue": "one sentence", "quote": "a short exact quote from the text", "severity": "low|medium|high"}]}
+Return {"findings": []} if there is nothing to report."""
+
+REVIEWERS = {
+    "test_reader": (
+        "You are a Test Reader Agent. Evaluate pacing, emotional impact, and reader engagement.",
+        """Read this passage of the book and report where pacing, clarity or engagement suffer.
+Also rate the passage: "pacing" is "too slow", "too fast" or "just right"; "engagement" is "low", "moderate" or "high".
+Return JSON only:
+{"pacing": "...", "engagement": "...", "findings": [{"issue": "one sentence", "quote": "a short exact quote from the text", "severity": "low|medium|high"}]}"""
+    ),
+    "logic_consistency": (
+        "You are a Logic & Consistency Agent. Hunt for plot holes and inconsistencies.",
+        """Check this passage against its chapter outline and the characters for plot holes, character
+inconsistencies, world-building contradictions, timeline issues and logic errors.
+""" + _FINDINGS_FORMAT
+    ),
+    "sensitivity": (
+        "You are a Sensitivity/Alignment Agent. Review for problematic content.",
+        """Review this passage for problematic stereotypes, offensive content, misrepresentation,
+ethical concerns and content that needs a warning.
+""" + _FINDINGS_FORMAT
+    ),
+}
+
+_CHAPTER_HEADING = re.compile(r"^# Chapter (\d+)[^\n]*\n", re.MULTILINE)
+
+
+@dataclass
+class ManuscriptWindow:
+    """A passage of one chapter, at a character offset in that chapter."""
+    chapter: int
+    offset: int
+    text: str
+
+
+def manuscript_chapters(draft_chapters: Optional[Dict[Any, str]], full_draft: Optional[str]) -> Dict[int, str]:
+    """Chapter texts by number, from the drafted chapters or else the assembled draft's headings."""
+    if draft_chapters:
+        return {int(number): text for number, text in sorted(draft_chapters.items(), key=lambda item: int(item[0]))}
+    if not full_draft:
+        return {}
+    headings = list(_CHAPTER_HEADING.finditer(full_draft))
+    if not headings:
+        return {1: full_draft.strip()}
+    chapters = {}
+    for heading, following in zip(headings, headings[1:] + [None]):
+        end = following.start() if following else len(full_draft)
+        chapters[int(heading.group(1))] = full_draft[heading.end():end].strip()
+    return chapters
+
+
+def split_windows(chapters: Dict[int, str], max_chars: int = DEFAULT_WINDOW_CHARS) -> List[ManuscriptWindow]:
+    """Split chapters into windows of at most max_chars, breaking long chapters at paragraphs."""
+    windows = []
+    for number, text in chapters.items():
+        start = 0
+        while len(text) - start > max_chars:
+            end = text.rfind("\n\n", start + 1, start + max_chars)
+            if end <= start:
+                end = start + max_chars  # a single paragraph longer than a window
+            windows.append(ManuscriptWindow(number, start, text[start:end]))
+            start = end
+            while text.startswith("\n", start):
+                start += 1
+        if start < len(text) or not windows or windows[-1].chapter != number:
+            windows.append(ManuscriptWindow(number, start, text[start:]))
+    return windows
+
+
+class QAWindowCache:
+    """Findings per reviewed window, keyed by content hash (SQLite)."""
+
+    # Puts between checks of the size bound
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite database file
+            max_entries: Least recently used windows are dropped beyond this
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._puts = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS windows (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                used_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_windows_used_at ON windows (used_at);
+        """)
+
+    @staticmethod
+    def key(reviewer: str, model: str, window: ManuscriptWindow, context: str) -> str:
+        material = json.dumps([PROMPT_VERSION, reviewer, model, window.chapter, context, window.text])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM windows WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE windows SET used_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO windows (key, result, used_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time())
+            )
+            self._puts += 1
+            if self._puts % self.PRUNE_EVERY == 0:
+                self.prune()
+
+    def prune(self) -> int:
+        """Drop the least recently used windows beyond max_entries."""
+        with self._lock:
+            excess = self._conn.execute("SELECT COUNT(*) FROM windows").fetchone()[0] - self.max_entries
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                "DELETE FROM windows WHERE key IN (SELECT key FROM windows ORDER BY used_at LIMIT ?)", (excess,)
+            )
+        return excess
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _parse_review(response: str) -> Optional[Dict[str, Any]]:
+    """The JSON object of a reviewer response, or None if there is none."""
+    start, end = response.find('{'), response.rfind('}') + 1
+    if start < 0 or end <= start:
+        return None
+    try:
+        review = json.loads(response[start:end])
+    except ValueError:
+        return None
+    if not isinstance(review, dict):
+        return None
+    findings = review.get("findings")
+    review["findings"] = [f for f in findings if isinstance(f, dict) and f.get("issue")] if isinstance(findings, list) else []
+    return review
+
+
+def _normalize_issue(issue: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", issue.lower()).split())
+
+
+class ManuscriptQA:
+    """Review every window of a manuscript with every reviewer, then merge the findings."""
+
+    def __init__(
+        self,
+        llm_client: Any,
+        cache: Optional[QAWindowCache] = None,
+        window_chars: int = DEFAULT_WINDOW_CHARS,
+        reviewers: Optional[List[str]] = None
+    ):
+        self.llm_client = llm_client
+        self.cache = cache
+        self.window_chars = window_chars
+        self.reviewers = reviewers or list(REVIEWERS)
+        self.stats: Dict[str, int] = {}
+
+    @staticmethod
+    def context(reviewer: str, window: ManuscriptWindow, outline: Dict[int, Any], characters: str) -> str:
+        """What a reviewer needs besides the passage; part of the cache key."""
+        if reviewer != "logic_consistency":
+            return ""
+        chapter_outline = json.dumps(outline.get(window.chapter, {}), indent=2)[:1500]
+        return f"Chapter Outline:\n{chapter_outline}\n\nCharacters:\n{characters}"
+
+    async def review(
+        self,
+        chapters: Dict[int, str],
+        limit: asyncio.Semaphore,
+        outline: Optional[List[Dict[str, Any]]] = None,
+        character_bible: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        """Map the reviewers over the windows and reduce their findings into a report.
+
+        `progress_callback(message, sub_item)` is awaited once per chapter
+        whose windows have all been reviewed.
+        """
+        windows = split_windows(chapters, self.window_chars)
+        outline_by_chapter = {entry.get('chapter_number'): entry for entry in outline or [] if isinstance(entry, dict)}
+        characters = json.dumps(character_bible, indent=2)[:1000] if character_bible else "N/A"
+        model = getattr(self.llm_client, "model", "")
+
+        reviews: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        steps: List[Step] = []
+        remaining = Counter()
+        for index, window in enumerate(windows):
+            for reviewer in self.reviewers:
+                context = self.context(reviewer, window, outline_by_chapter, characters)
+                key = QAWindowCache.key(reviewer, model, window, context)
+                cached = self.cache.get(key) if self.cache else None
+                if cached is not None:
+                    reviews[(reviewer, index)] = cached
+                    continue
+                remaining[window.chapter] += 1
+                steps.append(Step(
+                    f"{reviewer}:{index}", self._reviewer_step(reviewer, window, context, key),
+                    label=f"{reviewer} chapter {window.chapter} offset {window.offset}"
+                ))
+
+        self.stats = {"windows": len(windows), "reviews": len(windows) * len(self.reviewers),
+                      "cached": len(reviews), "reviewed": len(steps)}
+        logger.info("Manuscript QA started", chapters=len(chapters), **self.stats)
+
+        async def on_step(step: Step, error: Optional[str], finished: int, total: int):
+            chapter = windows[int(step.name.split(":")[1])].chapter
+            remaining[chapter] -= 1
+            if remaining[chapter] == 0 and progress_callback:
+                await progress_callback(f"QA reviewed chapter {chapter}", f"{finished} of {total} window reviews")
+
+        failed: Dict[str, str] = {}
+        try:
+            results = await run_step_graph(steps, limit, on_step)
+        except StepGraphError as e:
+            # Windows that failed are reported; every other window's findings are kept
+            results = e.results
+            labels = {step.name: step.label for step in steps}
+            failed = {labels[name]: error for name, error in e.errors.items()}
+        for name, review in results.items():
+            reviewer, index = name.split(":")
+            reviews[(reviewer, int(index))] = review
+
+        return self.reduce(windows, reviews, failed)
+
+    def _reviewer_step(self, reviewer: str, window: ManuscriptWindow, context: str, key: str):
+        system_prompt, instructions = REVIEWERS[reviewer]
+        user_prompt = f"{instructions}\n\n{context}\n\nPassage of Chapter {window.chapter}:\n{window.text}"
+
+        async def run() -> Dict[str, Any]:
+            response = await self.llm_client.complete(system=system_prompt, user=user_prompt)
+            review = _parse_review(response)
+            if review is None:
+                raise ValueError("Reviewer returned no JSON")
+            # Cached as soon as it lands, so an interrupted QA run keeps its finished windows
+            if self.cache:
+                self.cache.put(key, review)
+            return review
+        return run
+
+    def reduce(
+        self,
+        windows: List[ManuscriptWindow],
+        reviews: Dict[Tuple[str, int], Dict[str, Any]],
+        failed: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """Merge window reviews into a revision report, deduplicating repeated issues."""
+        merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        pacing, engagement = Counter(), Counter()
+        slow, fast = set(), set()
+        for (reviewer, index), review in sorted(reviews.items(), key=lambda item: (item[0][1], item[0][0])):
+            window = windows[index]
+            if reviewer == "test_reader":
+                if review.get("pacing"):
+                    pacing[review["pacing"]] += 1
+                    if review["pacing"] == "too slow":
+                        slow.add(window.chapter)
+                    elif review["pacing"] == "too fast":
+                        fast.add(window.chapter)
+                if review.get("engagement"):
+                    engagement[review["engagement"]] += 1
+            for finding in review["findings"]:
+                quote = str(finding.get("quote") or "")
+                position = window.text.find(quote) if quote else -1
+                location = {"chapter": window.chapter, "offset": window.offset + max(position, 0)}
+                severity = finding.get("severity") if finding.get("severity") in SEVERITIES else "medium"
+                key = (reviewer, _normalize_issue(str(finding["issue"])))
+                if key in merged:
+                    entry = merged[key]
+                    entry["locations"].append(location)
+                    entry["severity"] = max(entry["severity"], severity, key=SEVERITIES.index)
+                else:
+                    merged[key] = {"reviewer": reviewer, "issue": str(finding["issue"]).strip(),
+                                   "severity": severity, "locations": [location]}
+
+        findings = sorted(merged.values(), key=lambda f: (f["locations"][0]["chapter"], f["locations"][0]["offset"]))
+
+        def issues(reviewer: str) -> List[str]:
+            """One line per issue, most severe first."""
+            ranked = sorted((f for f in findings if f["reviewer"] == reviewer),
+                            key=lambda f: -SEVERITIES.index(f["severity"]))
+            return [
+                f"Chapter {', '.join(str(c) for c in sorted({l['chapter'] for l in f['locations']}))}: {f['issue']}"
+                for f in ranked
+            ]
+
+        chapters = sorted({window.chapter for window in windows})
+        reviewed = sorted({windows[index].chapter for (_, index) in reviews})
+        report = {
+            "test_reader_feedback": {
+                "pacing": pacing.most_common(1)[0][0] if pacing else None,
+                "engagement": engagement.most_common(1)[0][0] if engagement else None,
+                "slow_chapters": sorted(slow),
+                "fast_chapters": sorted(fast),
+            },
+            "logic_consistency_issues": issues("logic_consistency"),
+            "sensitivity_issues": issues("sensitivity"),
+            "findings": findings,
+            "coverage": {
+                "chapters": len(chapters),
+                "chapters_reviewed": len(reviewed),
+                "windows": len(windows),
+                "window_reviews": len(reviews),
+                "cached_reviews": self.stats.get("cached", 0),
+            },
+        }
+        if failed:
+            report["failed_checks"] = failed
+        return report
+
+
+# Global instance
+_cache: Optional[QAWindowCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_qa_cache(path: Optional[str] = None) -> QAWindowCache:
+    """Get or create the global QA window cache."""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from app.core.config import settings
+                _cache = QAWindowCache(path or settings.QA_CACHE_PATH)
+
+    return _cache
@@ -7,6 +7,7 @@ import httpx
 import structlog
 
 from app.core.config import settings
+from app.calendar.sync import SyncTokenExpired
 from app.security.tokens import decrypt_token, encrypt_token
 
 logger = structlog.get_logger(__name__)
@@ -109,6 +110,61 @@ class GoogleCalendarClient:
         data = response.json()
         return data.get("items", [])
     
+    async def list_events_page(
+        self,
+        access_token: str,
+        calendar_id: str = "primary",
+        sync_token: Optional[str] = None,
+        page_token: Optional[str] = None,
+        etag: Optional[str] = None,
+        time_min: Optional[datetime] = None,
+        max_results: int = 250
+    ) -> Dict[str, Any]:
+        """Get one page of an incremental or full event listing.
+        
+        Recurring series come back as their masters. With a sync token only
+        changes since that token are listed, deletions included; without
+        one the whole calendar from time_min is listed. The etag is sent as
+        If-None-Match.
+        
+        Raises:
+            SyncTokenExpired: The sync token is no longer valid (410 Gone)
+        """
+        params = {"maxResults": max_results}
+        if page_token:
+            params["pageToken"] = page_token
+        if sync_token:
+            params["syncToken"] = sync_token
+        elif time_min is not None:
+            params["timeMin"] = time_min.replace(tzinfo=time_min.tzinfo or timezone.utc).isoformat()
+        
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json"
+        }
+        if etag:
+            headers["If-None-Match"] = etag
+        
+        response = await self.client.get(
+            f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
+            params=params,
+            headers=headers
+        )
+        if response.status_code == 304:
+            return {"not_modified": True, "items": [], "etag": etag}
+        if response.status_code == 410:
+            raise SyncTokenExpired(f"Sync token rejected for calendar {calendar_id}")
+        response.raise_for_status()
+        
+        data = response.json()
+        return {
+            "not_modified": False,
+            "items": data.get("items", []),
+            "next_page_token": data.get("nextPageToken"),
+            "next_sync_token": data.get("nextSyncToken"),
+            "etag": response.headers.get("ETag") or data.get("etag")
+        }
+    
     async def create_event(
         self,
         access_token: str,
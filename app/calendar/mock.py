@@ -0,0 +1,121 @@
+"""Mock calendar provider for testing incremental sync without real API calls."""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import structlog
+
+from app.calendar.google import GoogleCalendarClient
+from app.calendar.sync import SyncTokenExpired
+from app.scheduling.jobstore import to_utc_naive
+
+logger = structlog.get_logger(__name__)
+
+
+class MockCalendarProvider:
+    """In-memory calendar with Google's paging, sync token and ETag semantics.
+
+    Every change bumps a version number. Sync tokens and list ETags name the
+    version they were issued at, so an unchanged calendar answers a
+    conditional request with 304, and `expire_sync_tokens` makes every
+    token issued so far fail with 410 Gone.
+    """
+
+    # Items are Google-shaped, so normalization is Google's
+    normalize_event = GoogleCalendarClient.normalize_event
+    _create_event_hash = GoogleCalendarClient._create_event_hash
+
+    def __init__(self, page_size: int = 250):
+        self.page_size = page_size
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.versions: Dict[str, int] = {}
+        self.version = 0
+        self.token_epoch = 0
+        self.requests = 0
+        self.pages_served = 0
+
+    def put(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Create or replace an event."""
+        self.version += 1
+        item = dict(item, etag=f'"{self.version}"', status=item.get("status", "confirmed"))
+        self.items[item["id"]] = item
+        self.versions[item["id"]] = self.version
+        return item
+
+    def delete(self, event_id: str):
+        """Delete an event; sync tokens report it as cancelled."""
+        item = {"id": event_id, "status": "cancelled"}
+        if "recurringEventId" in self.items.get(event_id, {}):
+            item["recurringEventId"] = self.items[event_id]["recurringEventId"]
+        self.put(item)
+
+    def expire_sync_tokens(self):
+        """Invalidate every sync token issued so far."""
+        self.token_epoch += 1
+
+    def _listing(self, since: Optional[int], snapshot: int, time_min: Optional[datetime]) -> List[str]:
+        event_ids = []
+        for event_id, version in self.versions.items():
+            if version > snapshot:
+                continue
+            item = self.items[event_id]
+            if since is not None:
+                if version > since:
+                    event_ids.append(event_id)
+            elif item["status"] != "cancelled" and (
+                time_min is None or item.get("recurrence") or self._end(item) >= time_min
+            ):
+                event_ids.append(event_id)
+        return sorted(event_ids)
+
+    @staticmethod
+    def _end(item: Dict[str, Any]) -> datetime:
+        end = item["end"]
+        if "dateTime" in end:
+            return to_utc_naive(datetime.fromisoformat(end["dateTime"].replace("Z", "+00:00")))
+        return datetime.fromisoformat(end["date"])
+
+    async def list_events_page(
+        self,
+        access_token: str,
+        calendar_id: str = "primary",
+        sync_token: Optional[str] = None,
+        page_token: Optional[str] = None,
+        etag: Optional[str] = None,
+        time_min: Optional[datetime] = None,
+        max_results: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Serve one page like `GoogleCalendarClient.list_events_page`."""
+        self.requests += 1
+        if page_token:
+            since, snapshot, offset = page_token.split(":")
+            since = int(since) if since else None
+            snapshot, offset = int(snapshot), int(offset)
+        else:
+            since = None
+            if sync_token:
+                epoch, since = map(int, sync_token.split("-"))
+                if epoch != self.token_epoch:
+                    raise SyncTokenExpired(f"Sync token {sync_token} expired")
+            snapshot, offset = self.version, 0
+            if etag == f'"{snapshot}"':
+                return {"not_modified": True, "items": [], "etag": etag}
+
+        event_ids = self._listing(since, snapshot, to_utc_naive(time_min) if time_min else None)
+        page_size = max_results or self.page_size
+        page_ids = event_ids[offset:offset + page_size]
+        self.pages_served += 1
+
+        page = {
+            "not_modified": False,
+            "items": [dict(self.items[event_id]) for event_id in page_ids],
+            "next_page_token": None,
+            "next_sync_token": None,
+            "etag": f'"{snapshot}"'
+        }
+        if offset + page_size < len(event_ids):
+            page["next_page_token"] = f"{'' if since is None else since}:{snapshot}:{offset + page_size}"
+        else:
+            page["next_sync_token"] = f"{self.token_epoch}-{snapshot}"
+        return page
+
+    async def close(self):
+        """Nothing to close."""
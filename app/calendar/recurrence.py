@@ -0,0 +1,157 @@
+"""Lazy expansion of recurring calendar series.
+
+Series masters are stored once with their RFC 5545 recurrence lines and
+only the occurrences inside the planning window are materialized as
+events. Supported: RRULE with FREQ DAILY/WEEKLY/MONTHLY/YEARLY, INTERVAL,
+COUNT, UNTIL and (weekly) BYDAY, plus EXDATE. Unsupported rule parts are
+ignored with a warning, so a series degrades to its base frequency
+instead of failing the sync.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+import calendar
+import structlog
+
+from app.scheduling.jobstore import to_utc_naive
+
+logger = structlog.get_logger(__name__)
+
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+# Safety cap on occurrences generated for one series in one window
+MAX_OCCURRENCES = 1000
+
+_SUPPORTED_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "WKST"}
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse an iCalendar DATE or DATE-TIME value to naive UTC.
+
+    Floating and TZID-qualified times are taken as UTC.
+    """
+    value = value.strip()
+    if len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+    return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+
+
+def parse_rrule(line: str) -> Dict[str, Any]:
+    """Parse an RRULE line into its parts."""
+    parts = dict(
+        part.split("=", 1) for part in line.split(":", 1)[-1].split(";") if "=" in part
+    )
+    unsupported = set(parts) - _SUPPORTED_PARTS
+    if unsupported:
+        logger.warning("Ignoring unsupported recurrence rule parts", parts=sorted(unsupported))
+    return {
+        "freq": parts.get("FREQ", "DAILY"),
+        "interval": max(int(parts.get("INTERVAL", 1)), 1),
+        "count": int(parts["COUNT"]) if "COUNT" in parts else None,
+        "until": _parse_datetime(parts["UNTIL"]) if "UNTIL" in parts else None,
+        "byday": sorted(
+            WEEKDAYS[day[-2:]] for day in parts["BYDAY"].split(",") if day[-2:] in WEEKDAYS
+        ) if "BYDAY" in parts else None,
+    }
+
+
+def parse_exdates(lines: List[str]) -> set:
+    """Excluded start times from EXDATE lines."""
+    excluded = set()
+    for line in lines:
+        if line.startswith("EXDATE"):
+            excluded.update(_parse_datetime(value) for value in line.split(":", 1)[-1].split(","))
+    return excluded
+
+
+def _add_months(value: datetime, months: int) -> Optional[datetime]:
+    """Same day and time `months` later, or None if that month has no such day."""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None
+    return value.replace(year=year, month=month)
+
+
+def _candidates(start: datetime, rule: Dict[str, Any], skip_to: Optional[datetime]) -> Iterator[datetime]:
+    """Occurrence starts of one rule in order, ignoring COUNT and UNTIL.
+
+    Without COUNT, whole periods before `skip_to` are jumped over, so
+    expanding a years-old series costs no more than a new one.
+    """
+    freq, interval = rule["freq"], rule["interval"]
+    if freq in ("DAILY", "WEEKLY"):
+        step = timedelta(days=interval * (7 if freq == "WEEKLY" else 1))
+        base = start
+        if freq == "WEEKLY":
+            base = start - timedelta(days=start.weekday())
+        period = 0
+        if skip_to is not None and skip_to > base:
+            period = max((skip_to - base) // step - 1, 0)
+        while True:
+            anchor = base + step * period
+            if freq == "WEEKLY":
+                days = rule["byday"] or [start.weekday()]
+                for weekday in days:
+                    candidate = anchor + timedelta(days=weekday)
+                    if candidate >= start:
+                        yield candidate
+            else:
+                yield anchor
+            period += 1
+    elif freq in ("MONTHLY", "YEARLY"):
+        months = interval * (12 if freq == "YEARLY" else 1)
+        period = 0
+        while True:
+            candidate = _add_months(start, months * period)
+            if candidate is not None:
+                yield candidate
+            period += 1
+            if period > 12 * 200:
+                return
+    else:
+        logger.warning("Unsupported recurrence frequency", freq=freq)
+        yield start
+
+
+def expand(
+    start: datetime,
+    recurrence: Dict[str, Any],
+    window_start: datetime,
+    window_end: datetime
+) -> List[datetime]:
+    """Occurrence starts of a series that fall in [window_start, window_end].
+
+    Args:
+        start: Start of the series' first occurrence
+        recurrence: Stored series data; `rules` holds RRULE/EXDATE lines
+        window_start: Start of the window to materialize
+        window_end: End of the window to materialize
+
+    Returns:
+        Naive UTC occurrence starts in order
+    """
+    start = to_utc_naive(start)
+    window_start, window_end = to_utc_naive(window_start), to_utc_naive(window_end)
+    lines = recurrence.get("rules") or []
+    excluded = parse_exdates(lines)
+    occurrences = set()
+    for line in lines:
+        if not line.startswith("RRULE"):
+            continue
+        rule = parse_rrule(line)
+        skip_to = window_start if rule["count"] is None else None
+        for index, candidate in enumerate(_candidates(start, rule, skip_to)):
+            if candidate > window_end or (rule["until"] is not None and candidate > rule["until"]):
+                break
+            if rule["count"] is not None and index >= rule["count"]:
+                break
+            if candidate >= window_start and candidate not in excluded:
+                occurrences.add(candidate)
+                if len(occurrences) >= MAX_OCCURRENCES:
+                    break
+    return sorted(occurrences)
+
+
+def instance_id(master_id: str, occurrence: datetime) -> str:
+    """Provider id of one occurrence, in Google's `<master>_<UTC start>` form."""
+    return f"{master_id}_{occurrence.strftime('%Y%m%dT%H%M%SZ')}"
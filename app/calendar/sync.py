@@ -0,0 +1,332 @@
+"""Incremental calendar synchronisation.
+
+Each connected calendar keeps the provider's sync token and the ETag of
+the last response on its OAuth account. A sync asks only for what changed
+since that token, sending the ETag as If-None-Match so an unchanged
+calendar costs one conditional request answered with 304 and no database
+writes. Deltas are applied page by page through the planner's hash-keyed
+upsert, so memory stays flat however many events arrive.
+
+When the provider rejects the token (410 Gone) the calendar is listed
+again in full, still page by page; only the ids seen are kept so stored
+events missing from the listing can be cancelled at the end.
+
+Recurring series are stored once as their master with the recurrence
+rules, and only occurrences inside the planning window are materialized.
+Occurrences the provider sent itself (moved or cancelled single
+instances) take precedence over generated ones.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+import hashlib
+import json
+import structlog
+
+from sqlalchemy import select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.calendar.recurrence import expand, instance_id
+from app.models import Event, OAuthAccount
+from app.scheduling.jobstore import to_utc_naive
+from app.scheduling.planner import NotificationPlanner, PLANNING_HORIZON, compute_event_hash, _chunks
+
+logger = structlog.get_logger(__name__)
+
+# How far back a full listing reaches
+FULL_SYNC_LOOKBACK = timedelta(days=2)
+
+# Master fields copied onto generated occurrences
+_SERIES_FIELDS = ("title", "location", "conf_link", "organizer", "attendees", "description")
+
+
+class SyncTokenExpired(Exception):
+    """The provider no longer accepts the stored sync token (HTTP 410 Gone)."""
+
+
+def _series_hash(event_hash: Optional[str], rules: List[str]) -> str:
+    """Change-detection hash of a series master, covering its recurrence rules."""
+    data = json.dumps({"event": event_hash, "rules": rules}, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CalendarSync:
+    """Applies provider changes for one connected calendar.
+
+    The client must provide `list_events_page` and `normalize_event` like
+    `GoogleCalendarClient`; `MockCalendarProvider` does the same in memory.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        planner: NotificationPlanner,
+        provider: str = "google",
+        lookback: timedelta = FULL_SYNC_LOOKBACK,
+        horizon: timedelta = PLANNING_HORIZON,
+        clock=datetime.utcnow
+    ):
+        self.client = client
+        self.planner = planner
+        self.provider = provider
+        self.lookback = lookback
+        self.horizon = horizon
+        self.clock = clock
+
+    async def sync(self, db: AsyncSession, account: OAuthAccount, access_token: str) -> Dict[str, Any]:
+        """Sync the account's calendar and replan what changed.
+
+        Args:
+            db: Database session the account was loaded in
+            account: OAuth account holding the sync token
+            access_token: Decrypted provider access token
+
+        Returns:
+            Summary with request counts and the accumulated planner diff
+        """
+        summary = self._summary(account.user_id)
+        full = not account.sync_token
+        if not full:
+            try:
+                await self._pull(db, account, access_token, summary, account.sync_token, account.sync_etag)
+            except SyncTokenExpired:
+                logger.info("Sync token expired, running full resync", user_id=account.user_id, provider=self.provider)
+                full = True
+        if full:
+            summary["full_resync"] = True
+            await self._pull(db, account, access_token, summary, None, None)
+
+        await self._extend_series(db, account.user_id, summary)
+        logger.info("Calendar synced", **summary)
+        return summary
+
+    @staticmethod
+    def _summary(user_id: str) -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "full_resync": False,
+            "not_modified": False,
+            "requests": 0,
+            "pages": 0,
+            "events": {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0},
+            "notifications": {"created": 0, "updated": 0, "cancelled": 0}
+        }
+
+    @staticmethod
+    def _merge(summary: Dict[str, Any], diff: Dict[str, Any]):
+        if "error" in diff:
+            raise ValueError(diff["error"])
+        for section in ("events", "notifications"):
+            for key, value in diff[section].items():
+                summary[section][key] += value
+
+    async def _pull(
+        self,
+        db: AsyncSession,
+        account: OAuthAccount,
+        access_token: str,
+        summary: Dict[str, Any],
+        sync_token: Optional[str],
+        etag: Optional[str]
+    ):
+        """Page through a delta (with a sync token) or a full listing and apply it."""
+        full = sync_token is None
+        time_min = self.clock() - self.lookback if full else None
+        seen: Optional[Set[str]] = set() if full else None
+        page_token = None
+        response_etag = None
+        while True:
+            summary["requests"] += 1
+            page = await self.client.list_events_page(
+                access_token,
+                sync_token=sync_token,
+                page_token=page_token,
+                etag=etag if page_token is None else None,
+                time_min=time_min
+            )
+            if page["not_modified"]:
+                summary["not_modified"] = True
+                return
+            summary["pages"] += 1
+            if page_token is None:
+                response_etag = page.get("etag")
+            await self._apply_page(db, account.user_id, page["items"], summary, seen)
+            page_token = page.get("next_page_token")
+            if not page_token:
+                break
+
+        if full:
+            await self._cancel_unseen(db, account.user_id, seen, time_min, summary)
+
+        next_sync_token = page.get("next_sync_token")
+        if (next_sync_token, response_etag) != (account.sync_token, account.sync_etag):
+            account.sync_token = next_sync_token
+            account.sync_etag = response_etag
+            await db.commit()
+
+    async def _apply_page(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        items: List[Dict[str, Any]],
+        summary: Dict[str, Any],
+        seen: Optional[Set[str]]
+    ):
+        incoming: List[Dict[str, Any]] = []
+        removed: List[str] = []
+        for item in items:
+            if item.get("status") == "cancelled":
+                removed.append(item["id"])
+                continue
+            event = self.client.normalize_event(item, user_id)
+            if item.get("recurrence"):
+                event["recurrence"] = {"rules": list(item["recurrence"])}
+                event["hash"] = _series_hash(event.get("hash"), event["recurrence"]["rules"])
+            incoming.append(event)
+            if seen is not None:
+                seen.add(item["id"])
+
+        if not incoming and not removed:
+            return
+        removed += await self._series_instances(db, user_id, removed)
+        self._merge(summary, await self.planner.sync_events(
+            db, user_id, self.provider, incoming, removed=removed
+        ))
+        changed_series = [event for event in incoming if event.get("recurrence")]
+        if changed_series:
+            await self._drop_stale_instances(db, user_id, changed_series, summary)
+
+    def _stored(self, user_id: str):
+        return select(Event.provider_event_id).where(
+            and_(Event.user_id == user_id, Event.provider == self.provider)
+        )
+
+    async def _series_instances(self, db: AsyncSession, user_id: str, provider_ids: List[str]) -> List[str]:
+        """Live stored occurrences of the series masters among `provider_ids`."""
+        masters: List[str] = []
+        for chunk in _chunks(provider_ids):
+            result = await db.execute(
+                self._stored(user_id).where(Event.provider_event_id.in_(chunk), Event.recurrence.is_not(None))
+            )
+            masters += result.scalars().all()
+
+        instances: List[str] = []
+        for master_id in masters:
+            result = await db.execute(
+                self._stored(user_id).where(
+                    Event.provider_event_id.like(f"{master_id}\\_%", escape="\\"),
+                    Event.status != "cancelled"
+                )
+            )
+            instances += result.scalars().all()
+        return instances
+
+    async def _cancel_unseen(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        seen: Set[str],
+        time_min: datetime,
+        summary: Dict[str, Any]
+    ):
+        """Cancel provider-sent events a full listing no longer returned.
+
+        Generated occurrences are left to their series.
+        """
+        result = await db.execute(
+            self._stored(user_id).where(
+                Event.status != "cancelled",
+                Event.etag.is_not(None),
+                or_(Event.start_ts >= time_min, Event.recurrence.is_not(None))
+            )
+        )
+        unseen = [provider_event_id for provider_event_id in result.scalars() if provider_event_id not in seen]
+        if unseen:
+            unseen += await self._series_instances(db, user_id, unseen)
+            self._merge(summary, await self.planner.sync_events(db, user_id, self.provider, [], removed=unseen))
+
+    def _window(self):
+        now = self.clock()
+        return now - self.lookback, now + self.horizon
+
+    def _occurrences(self, master: Any) -> List[Dict[str, Any]]:
+        """Generated events for one series master inside the planning window."""
+        start = to_utc_naive(master.start_ts)
+        duration = to_utc_naive(master.end_ts) - start
+        events = []
+        for occurrence in expand(start, master.recurrence, *self._window()):
+            event = {field: getattr(master, field) for field in _SERIES_FIELDS}
+            event.update(
+                provider_event_id=instance_id(master.provider_event_id, occurrence),
+                start_ts=occurrence,
+                end_ts=occurrence + duration,
+                status="confirmed",
+                etag=None,
+                recurrence=None
+            )
+            event["hash"] = compute_event_hash(event)
+            events.append(event)
+        return events
+
+    async def _overridden(self, db: AsyncSession, user_id: str, provider_ids: Iterable[str]) -> Set[str]:
+        """Occurrences the provider sent or cancelled itself, which generation must not overwrite."""
+        overridden: Set[str] = set()
+        for chunk in _chunks(list(provider_ids)):
+            result = await db.execute(
+                self._stored(user_id).where(
+                    Event.provider_event_id.in_(chunk),
+                    or_(Event.etag.is_not(None), Event.status == "cancelled")
+                )
+            )
+            overridden.update(result.scalars())
+        return overridden
+
+    async def _extend_series(self, db: AsyncSession, user_id: str, summary: Dict[str, Any]):
+        """Materialize the occurrences of stored series that fall in the planning window.
+
+        Runs on every sync so the window moves forward with time; already
+        stored occurrences compare equal by hash and are not written.
+        """
+        result = await db.execute(
+            select(
+                Event.provider_event_id, Event.start_ts, Event.end_ts, Event.recurrence,
+                *(getattr(Event, field) for field in _SERIES_FIELDS)
+            ).where(
+                Event.user_id == user_id,
+                Event.provider == self.provider,
+                Event.recurrence.is_not(None),
+                Event.status != "cancelled"
+            )
+        )
+        incoming = [event for master in result for event in self._occurrences(master)]
+        if not incoming:
+            return
+        overridden = await self._overridden(db, user_id, (event["provider_event_id"] for event in incoming))
+        incoming = [event for event in incoming if event["provider_event_id"] not in overridden]
+        if incoming:
+            self._merge(summary, await self.planner.sync_events(db, user_id, self.provider, incoming))
+
+    async def _drop_stale_instances(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        series: List[Dict[str, Any]],
+        summary: Dict[str, Any]
+    ):
+        """Cancel generated occurrences that changed series no longer produce."""
+        window_start, window_end = self._window()
+        stale: List[str] = []
+        for master in series:
+            current = {
+                instance_id(master["provider_event_id"], occurrence)
+                for occurrence in expand(master["start_ts"], master["recurrence"], window_start, window_end)
+            }
+            result = await db.execute(
+                self._stored(user_id).where(
+                    Event.provider_event_id.like(f"{master['provider_event_id']}\\_%", escape="\\"),
+                    Event.etag.is_(None),
+                    Event.status != "cancelled"
+                )
+            )
+            stale += [provider_event_id for provider_event_id in result.scalars() if provider_event_id not in current]
+        if stale:
+            self._merge(summary, await self.planner.sync_events(db, user_id, self.provider, [], removed=stale))
@@ -0,0 +1,288 @@
+"""Cursor reads and server-sent events over a project's chat log.
+
+Observers of a running phase used to poll the whole chat log every few
+seconds, re-serializing every message for every poll. A ChatFeed mirrors
+a project's chat log instead: each message is serialized once, when it is
+appended, both as a JSON object and as a ready-made SSE frame, and every
+page and stream after that only joins those bytes.
+
+Messages are addressed by their sequence number, their index in the log.
+Readers ask for the messages after the last sequence number they saw,
+so an up-to-date poll costs the same however long the log is, and a
+stream reconnecting with Last-Event-ID resumes exactly where it stopped.
+A per-phase index of sequence numbers serves phase-filtered reads without
+scanning the log. A feed over a bounded log (a message bus, a ChatLog)
+holds only the messages the log still holds, from its `first_seq` on, and
+drops the others as the log evicts them; older ones are read from the
+project's stored log.
+
+Status transitions of the phase are pushed on the same streams. Status is
+state rather than history: a stream sends the latest status when it
+connects and whenever it changes, and skips intermediate ones it was too
+slow to see.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+import asyncio
+import json
+
+from app.core.config import settings
+
+# Key of the ChatFeed in the routes' in-memory project dicts
+FEED_KEY = "chat_feed"
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15.0
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+
+class ChatLog:
+    """A project's chat log by sequence number, with a bounded in-memory window.
+
+    len() is the number of entries ever appended, so code reading the
+    entries past a count it keeps (the chat feed, project saves) sees every
+    new entry. Once entries are in the durable store (`mark_durable`) only
+    the latest `window` of them stay in memory, from `first_seq` on; older
+    ones are read from the project's stored log.
+    """
+
+    def __init__(self, entries: Sequence[Dict[str, Any]] = (), window: Optional[int] = None):
+        self.window = max(1, settings.MESSAGE_BUS_WINDOW if window is None else window)
+        # Entries from sequence number _base on; slots before first_seq were evicted and
+        # are cut off in bulk, as on the message bus
+        self._entries: List[Optional[Dict[str, Any]]] = list(entries)
+        self._base = 0
+        self.first_seq = 0
+        self._durable = 0  # Entries with a lower sequence number are in the durable store
+
+    def __len__(self) -> int:
+        return self._base + len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._entries[self.first_seq - self._base:])
+
+    def __getitem__(self, seq: int) -> Dict[str, Any]:
+        if seq < 0:
+            seq += len(self)
+        if not self.first_seq <= seq < len(self):
+            raise IndexError(f"Chat entry {seq} is not in memory")
+        return self._entries[seq - self._base]
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self._entries.append(entry)
+        self._evict()
+
+    def mark_durable(self, count: int) -> None:
+        """Record that the first `count` entries are in the durable store, so they may leave memory."""
+        self._durable = max(self._durable, count)
+        self._evict()
+
+    def _evict(self) -> None:
+        first_seq = max(self.first_seq, min(self._durable, len(self) - self.window))
+        for slot in range(self.first_seq - self._base, first_seq - self._base):
+            self._entries[slot] = None
+        self.first_seq = first_seq
+        if self.first_seq - self._base > len(self._entries) // 2:
+            del self._entries[:self.first_seq - self._base]
+            self._base = self.first_seq
+
+
+class ChatFeed:
+    """Serialized chat log of one project, shared by all of its readers."""
+
+    def __init__(self, entries: Sequence[Any] = ()):
+        # Messages from sequence number _base on; those before first_seq left the
+        # log and are cut off in bulk, so trimming costs O(1) per message
+        self._messages: List[bytes] = []  # JSON object per message, seq included
+        self._frames: List[bytes] = []  # SSE frame per message
+        self._base = 0
+        self.first_seq = 0
+        self._phases: Dict[Optional[str], List[int]] = {}  # phase -> seqs, ascending
+        self._status: Optional[bytes] = None  # SSE frame of the latest status
+        self._status_version = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self.sync(entries)
+
+    def __len__(self) -> int:
+        return self._base + len(self._messages)
+
+    def sync(self, entries: Sequence[Any]) -> int:
+        """Serialize the entries appended to the log since the last sync; returns how many.
+
+        Entries are dicts or messages with to_dict(). Only the part of the
+        log past the feed's length is read, so a sync costs the number of
+        new entries. Messages a bounded log no longer holds are dropped.
+        """
+        log_first_seq = getattr(entries, "first_seq", 0)
+        if log_first_seq > len(self):
+            # A bounded log no longer holds the messages up to its first_seq
+            self._messages.clear()
+            self._frames.clear()
+            self._phases.clear()
+            self._base = self.first_seq = log_first_seq
+        start = len(self)
+        for seq in range(start, len(entries)):
+            entry = entries[seq]
+            if hasattr(entry, "to_dict"):
+                entry = entry.to_dict()
+            data = json.dumps({"seq": seq, **entry}, ensure_ascii=False).encode("utf-8")
+            self._messages.append(data)
+            self._frames.append(_message_frame(seq, data))
+            self._phases.setdefault(entry.get("phase"), []).append(seq)
+        added = len(self) - start
+        self._trim(log_first_seq)
+        if added:
+            self._notify()
+        return added
+
+    def _trim(self, first_seq: int) -> None:
+        """Drop the messages before first_seq, which the log no longer holds."""
+        first_seq = min(first_seq, len(self))
+        if first_seq <= self.first_seq:
+            return
+        self.first_seq = first_seq
+        if first_seq - self._base > len(self._messages) // 2:
+            cut = first_seq - self._base
+            del self._messages[:cut]
+            del self._frames[:cut]
+            for phase, seqs in list(self._phases.items()):
+                del seqs[:bisect_left(seqs, first_seq)]
+                if not seqs:
+                    del self._phases[phase]
+            self._base = first_seq
+
+    def set_status(self, status: Dict[str, Any]) -> None:
+        """Publish the phase's execution status to the streams."""
+        data = json.dumps(status, ensure_ascii=False, default=str).encode("utf-8")
+        self._status = b"event: status\ndata: %s\n\n" % data
+        self._status_version += 1
+        self._notify()
+
+    @property
+    def has_status(self) -> bool:
+        return self._status is not None
+
+    def _seqs_after(self, after: int, phase: Optional[str], limit: Optional[int]) -> Sequence[int]:
+        """Sequence numbers after `after`, of one phase or of all."""
+        after = max(after, self.first_seq - 1)
+        if phase is None:
+            stop = len(self) if limit is None else min(len(self), after + 1 + limit)
+            return range(after + 1, stop)
+        seqs = self._phases.get(phase, [])
+        start = bisect_right(seqs, after)
+        return seqs[start:] if limit is None else seqs[start:start + limit]
+
+    def page(self, after: int = -1, phase: Optional[str] = None, limit: int = 500) -> bytes:
+        """JSON body of the messages after `after`, at most `limit` of them.
+
+        The body is {"chat_log": [...], "next_after": seq, "has_more": bool};
+        next_after is the cursor to send on the next read.
+        """
+        seqs = self._seqs_after(after, phase, limit + 1)
+        has_more = len(seqs) > limit
+        seqs = seqs[:limit]
+        next_after = seqs[-1] if len(seqs) else max(after, -1)
+        return b'{"chat_log":[%s],"next_after":%d,"has_more":%s}' % (
+            b",".join(self._messages[seq - self._base] for seq in seqs), next_after, b"true" if has_more else b"false"
+        )
+
+    def _notify(self) -> None:
+        """Wake every stream waiting for news."""
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            # Thread-safe, in case an agent sends from an executor thread
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    def _wait(self) -> asyncio.Future:
+        if self._waiter is None or self._waiter.done():
+            self._waiter = asyncio.get_running_loop().create_future()
+        return self._waiter
+
+    async def stream(
+        self,
+        after: int = -1,
+        phase: Optional[str] = None,
+        heartbeat: float = HEARTBEAT_SECONDS,
+        backfill: Sequence[Dict[str, Any]] = ()
+    ) -> AsyncIterator[bytes]:
+        """SSE frames of the messages after `after`, then of new messages and status changes as they happen.
+
+        `backfill` holds stored entries (with their seq) that the feed no
+        longer holds, sent first. If messages after `after` left the feed
+        all the same, e.g. while the reader was too slow, a reset event
+        {"after": seq, "first_seq": seq} tells the client to read the ones
+        in between from the chat log before going on.
+
+        Frames are shared by every stream; nothing is serialized per reader.
+        The stream runs until the reader stops iterating it.
+        """
+        for entry in backfill:
+            yield _message_frame(entry["seq"], json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+            after = max(after, entry["seq"])
+        status_seen = 0
+        while True:
+            if self._status_version != status_seen and self._status is not None:
+                status_seen = self._status_version
+                yield self._status
+            if after < self.first_seq - 1:
+                yield b'event: reset\ndata: {"after":%d,"first_seq":%d}\n\n' % (after, self.first_seq)
+                after = self.first_seq - 1
+            # Everything up to `end` that matches is in `seqs`, whatever is
+            # appended while the frames are being sent
+            end = len(self) - 1
+            seqs = self._seqs_after(after, phase, None)
+            for seq in seqs:
+                if seq < self._base:
+                    # Trimmed while this stream was behind; the reset above covers it
+                    after = seq - 1
+                    break
+                yield self._frames[seq - self._base]
+            else:
+                after = max(after, end)
+                if len(self) - 1 > after or self._status_version != status_seen:
+                    continue
+                waiter = self._wait()
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+
+
+def _message_frame(seq: int, data: bytes) -> bytes:
+    return b"id: %d\nevent: message\ndata: %s\n\n" % (seq, data)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def project_feed(project_data: Dict[str, Any], entries: Sequence[Any]) -> ChatFeed:
+    """ChatFeed of an in-memory project, created on first use and caught up with its log."""
+    feed = project_data.get(FEED_KEY)
+    if feed is None:
+        feed = project_data[FEED_KEY] = ChatFeed()
+    feed.sync(entries)
+    return feed
+
+
+def sync_project_feed(project_data: Dict[str, Any], entries: Sequence[Any]) -> None:
+    """Push entries appended to a project's log to its feed, if it has one."""
+    feed = project_data.get(FEED_KEY)
+    if feed is not None:
+        feed.sync(entries)
+
+
+def resume_cursor(last_event_id: Optional[str], after: Optional[int]) -> int:
+    """Cursor of a (re)connecting stream: Last-Event-ID wins over the query parameter."""
+    if last_event_id:
+        try:
+            return int(last_event_id)
+        except ValueError:
+            pass
+    return -1 if after is None else after
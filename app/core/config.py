@@ -16,6 +16,19 @@ class Settings(BaseSettings):
     NEO4J_URI: str = "bolt://localhost:7687"
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str = "neo4jpassword"
+    GRAPH_COMMAND_JOURNAL_PATH: str = "graph_data/command_journal.db"  # Undo/redo history (SQLite)
+
+    # Long-running route jobs (PDF Q&A, book phases), shared by all workers
+    JOB_REGISTRY_PATH: str = "data/job_registry.db"  # Job status registry (SQLite); results stored beside it
+    JOB_TTL_SECONDS: int = 86400  # Finished jobs are evicted after this long
+    ACTIVE_PROJECTS_CACHE_SIZE: int = 32  # Book projects kept loaded in memory per worker
+
+    # Uploaded document ingestion (PDF Q&A, writer documents)
+    DOCUMENT_STORE_DIR: str = "data/documents"  # Text layer (by sha256) and catalog (SQLite)
+    DOCUMENT_EXTRACT_WORKERS: int = 0  # Page extraction processes; 0 uses every CPU
+    DOCUMENT_EXTRACT_CHUNK_PAGES: int = 16  # Pages per extraction task
+    TTS_CACHE_DIR: str = "data/tts_cache"  # Synthesized audio per text chunk
+    TTS_CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # Least recently used chunks are evicted beyond this
     
     # LLM Configuration - Supports both local (Ollama) and OpenAI
     LLM_PROVIDER: str = "local"  # Options: "local" (Ollama) or "openai"
@@ -25,6 +38,13 @@ class Settings(BaseSettings):
     # Note: OPENAI_API_KEY is read directly from environment variable, not from config
     OPENAI_MODEL: str = "gpt-4o"  # Default OpenAI model (gpt-4o, gpt-4o-mini, etc.)
     USE_MOCK_LLM: bool = False  # Set to True for testing with instant mock responses
+    LLM_CONCURRENCY_LOCAL: int = 2  # Concurrent generations per Ollama server (match OLLAMA_NUM_PARALLEL)
+    LLM_CONCURRENCY_OPENAI: int = 8  # Concurrent requests to a cloud provider
+    QA_CACHE_PATH: str = "data/qa_cache.db"  # Book QA findings per manuscript window (SQLite)
+    QA_WINDOW_CHARS: int = 12000  # Longest manuscript passage one QA review reads
+    RESEARCH_REPORT_WORKERS: int = 1  # Processes rendering Research Team reports
+    MESSAGE_BUS_WINDOW: int = 5000  # Agent messages a company's message bus keeps in memory once saved
+    MESSAGE_BUS_QUEUE_SIZE: int = 1000  # Messages queued per bus subscriber before the oldest are dropped
     # Legacy fields (deprecated, kept for backwards compatibility)
     ANTHROPIC_API_KEY: Optional[str] = None  # Deprecated - not used
     LLM_BASE_URL: Optional[str] = None  # Deprecated - not used
@@ -48,7 +68,15 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     
     # Scheduler
-    SCHEDULER: str = "apscheduler"  # apscheduler or celery
+    SCHEDULER: str = "durable"  # durable (database job store), apscheduler (in-memory) or celery
+    SCHEDULER_BATCH_SIZE: int = 100  # Due jobs claimed per poll
+    SCHEDULER_POLL_SECONDS: float = 5.0  # Longest sleep between polls of the job store
+    SCHEDULER_LEASE_SECONDS: int = 300  # How long a claimed job is reserved for one instance
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = 300  # Jobs later than this are skipped as misfired
+    NOTIFICATION_BATCH_SIZE: int = 500  # Due notifications claimed per worker batch
+    NOTIFICATION_CLAIM_LEASE_SECONDS: int = 300  # Claimed notifications still "sending" after this are claimed again
+    NOTIFICATION_CALL_CONCURRENCY: int = 10  # Concurrent Twilio calls
+    NOTIFICATION_EMAIL_CONCURRENCY: int = 50  # Concurrent SendGrid sends
     
     # Base URL for webhooks
     BASE_URL: str = "http://localhost:8000"
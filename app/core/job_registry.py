@@ -0,0 +1,444 @@
+"""Shared registry for long-running route jobs.
+
+Job state lives in a small SQLite database instead of process memory, so
+several uvicorn workers see the same jobs and a restart does not lose
+them. Only compact status rows are stored; finished results are written
+to files next to the database and referenced by path, so large payloads
+never sit in memory or in the table.
+
+Status reads go through an in-process LRU. Like the graph command
+journal, the cache is dropped whenever SQLite reports that another
+connection committed (PRAGMA data_version), which keeps it correct across
+workers.
+
+Each registry instance owns the jobs it creates and records a heartbeat.
+A running job whose owner stopped heartbeating (the process died or was
+restarted) is reported as interrupted instead of running forever, and
+`close()` marks the instance's own running jobs interrupted on a clean
+shutdown. Finished jobs expire after a TTL and are evicted with their
+result files.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL,
+    message TEXT,
+    data TEXT,
+    error TEXT,
+    result_ref TEXT,
+    owner TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_jobs_expires_at ON jobs (expires_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_owner_status ON jobs (owner, status);
+CREATE TABLE IF NOT EXISTS job_owners (
+    id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = "id, kind, status, progress, message, data, error, result_ref, owner, created_at, updated_at"
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+FINISHED = (COMPLETED, FAILED, INTERRUPTED)
+
+
+class LRUCache(OrderedDict):
+    """Dict that keeps at most `maxsize` entries, evicting the least recently used.
+
+    Entries for which `pinned(key, value)` is true are skipped by eviction,
+    so the cache may hold more than `maxsize` while they stay pinned.
+    """
+
+    def __init__(self, maxsize: int = 128, pinned: Optional[Callable[[Any, Any], bool]] = None):
+        super().__init__()
+        self.maxsize = maxsize
+        self.pinned = pinned
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) <= self.maxsize:
+            return
+        if self.pinned is None:
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
+            return
+        # Oldest first, never the entry just set
+        for candidate in list(self)[:-1]:
+            if len(self) <= self.maxsize:
+                break
+            if not self.pinned(candidate, super().__getitem__(candidate)):
+                del self[candidate]
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+class JobRegistry:
+    """SQLite-backed job registry shared by every process using the same file."""
+
+    def __init__(
+        self,
+        path: str,
+        results_dir: Optional[str] = None,
+        ttl_seconds: float = 86400,
+        heartbeat_seconds: float = 15,
+        cache_size: int = 1024,
+        clock: Callable[[], float] = time.time,
+        instance_id: Optional[str] = None
+    ):
+        """Initialize the registry.
+
+        Args:
+            path: SQLite database file, or ":memory:" for a private registry
+            results_dir: Directory for result files (defaults to next to the database)
+            ttl_seconds: How long finished jobs are kept
+            heartbeat_seconds: Owner heartbeat interval; owners silent for three
+                intervals are considered dead
+            cache_size: Status rows kept in the in-process cache
+            clock: Returns the current time in seconds
+            instance_id: Owner id of this instance (random by default)
+        """
+        self.ttl = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after = heartbeat_seconds * 3
+        self.clock = clock
+        self.instance_id = instance_id or uuid.uuid4().hex
+        self._lock = threading.RLock()
+        self._cache = LRUCache(cache_size)
+        self._data_version: Optional[int] = None
+        self._last_sweep = 0.0
+        self._heartbeat_stop: Optional[threading.Event] = None
+
+        if path == ":memory:":
+            default_results = Path("job_results")
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            default_results = Path(path).parent / "job_results"
+        self.results_dir = Path(results_dir) if results_dir else default_results
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self._results_path = str(self.results_dir)
+
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.heartbeat()
+
+    # ------------------------------------------------------------------
+    # Owners
+    # ------------------------------------------------------------------
+
+    def heartbeat(self) -> None:
+        """Record that this instance is alive."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_owners (id, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (self.instance_id, self.clock())
+            )
+
+    def start_heartbeat(self) -> None:
+        """Heartbeat from a daemon thread until `close()`."""
+        if self._heartbeat_stop is not None:
+            return
+        stop = self._heartbeat_stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_seconds):
+                try:
+                    self.heartbeat()
+                except sqlite3.Error as e:
+                    logger.warning("Job registry heartbeat failed", error=str(e))
+
+        threading.Thread(target=beat, name="job-registry-heartbeat", daemon=True).start()
+
+    def _owner_alive(self, owner: str) -> bool:
+        if owner == self.instance_id:
+            return True
+        row = self._conn.execute("SELECT heartbeat_at FROM job_owners WHERE id = ?", (owner,)).fetchone()
+        return row is not None and row[0] >= self.clock() - self.stale_after
+
+    def recover(self) -> int:
+        """Mark running jobs of dead owners as interrupted; returns how many.
+
+        An owner is dead when its heartbeat is stale or its row is gone
+        (another instance's recover deleted it while it had no running jobs).
+        """
+        now = self.clock()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, expires_at = ? "
+                "WHERE status = ? AND owner != ? AND owner NOT IN "
+                "(SELECT id FROM job_owners WHERE heartbeat_at >= ?)",
+                (INTERRUPTED, "Interrupted by a server restart", now, now + self.ttl, RUNNING,
+                 self.instance_id, now - self.stale_after)
+            )
+            self._conn.execute(
+                "DELETE FROM job_owners WHERE heartbeat_at < ? AND id NOT IN "
+                "(SELECT owner FROM jobs WHERE status = ?)",
+                (now - self.stale_after, RUNNING)
+            )
+            self._cache.clear()
+        if cursor.rowcount:
+            logger.warning("Interrupted jobs recovered", count=cursor.rowcount)
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Stop heartbeating and mark this instance's running jobs as interrupted."""
+        if self._heartbeat_stop is not None:
+            self._heartbeat_stop.set()
+            self._heartbeat_stop = None
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, expires_at = ? WHERE owner = ? AND status = ?",
+                (INTERRUPTED, "Interrupted by a server shutdown", now, now + self.ttl, self.instance_id, RUNNING)
+            )
+            self._conn.execute("DELETE FROM job_owners WHERE id = ?", (self.instance_id,))
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def create(self, kind: str, job_id: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> str:
+        """Register a running job owned by this instance; an existing job with the id is replaced."""
+        old = None
+        now = self.clock()
+        with self._lock:
+            if job_id is None:
+                job_id = str(uuid.uuid4())
+            else:
+                old = self._conn.execute("SELECT result_ref FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            # Re-register in case another instance's recover removed this owner since its last heartbeat
+            self.heartbeat()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, kind, status, progress, message, data, error, result_ref, "
+                "owner, created_at, updated_at, expires_at) VALUES (?, ?, ?, 0, NULL, ?, NULL, NULL, ?, ?, ?, NULL)",
+                (job_id, kind, RUNNING, json.dumps(data) if data is not None else None, self.instance_id, now, now)
+            )
+            self._cache.pop(job_id, None)
+        if old and old[0]:
+            self._remove_result(old[0])
+        self._maybe_sweep(now)
+        return job_id
+
+    def update(
+        self,
+        job_id: str,
+        progress: Optional[float] = None,
+        message: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Record progress of a running job; returns False if it is not running."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET progress = COALESCE(?, progress), message = COALESCE(?, message), "
+                "data = COALESCE(?, data), updated_at = ? WHERE id = ? AND status = ?",
+                (progress, message, json.dumps(data) if data is not None else None, self.clock(), job_id, RUNNING)
+            )
+            self._cache.pop(job_id, None)
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, result: Any = None) -> bool:
+        """Mark a job completed, storing its result (any JSON value) by reference."""
+        result_ref = None
+        if result is not None:
+            result_ref = self._write_result(job_id, result)
+        return self._finish(job_id, COMPLETED, None, result_ref)
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """Mark a job failed."""
+        return self._finish(job_id, FAILED, error, None)
+
+    def _finish(self, job_id: str, status: str, error: Optional[str], result_ref: Optional[str]) -> bool:
+        now = self.clock()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, result_ref = ?, progress = CASE WHEN ? THEN 1 ELSE progress END, "
+                "updated_at = ?, expires_at = ? WHERE id = ?",
+                (status, error, result_ref, status == COMPLETED, now, now + self.ttl, job_id)
+            )
+            self._cache.pop(job_id, None)
+        if cursor.rowcount == 0 and result_ref:
+            self._remove_result(result_ref)
+        self._maybe_sweep(now)
+        return cursor.rowcount > 0
+
+    def delete(self, job_id: str) -> bool:
+        """Forget a job and its result."""
+        with self._lock:
+            row = self._conn.execute("SELECT result_ref FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._cache.pop(job_id, None)
+        if row and row[0]:
+            self._remove_result(row[0])
+        return row is not None
+
+    def evict_expired(self) -> int:
+        """Delete finished jobs past their TTL together with their result files."""
+        now = self.clock()
+        with self._lock:
+            self._last_sweep = now
+            refs = [
+                ref for (ref,) in self._conn.execute(
+                    "SELECT result_ref FROM jobs WHERE expires_at < ? AND result_ref IS NOT NULL", (now,)
+                )
+            ]
+            cursor = self._conn.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+        for ref in refs:
+            self._remove_result(ref)
+        return cursor.rowcount
+
+    def _maybe_sweep(self, now: float) -> None:
+        # Sweep at most every tenth of the TTL, so eviction costs O(1) amortized per write
+        if now - self._last_sweep >= min(self.ttl / 10, 60):
+            self.evict_expired()
+
+    def _write_result(self, job_id: str, result: Any) -> str:
+        # Plain string paths: pathlib interns every new file name
+        path = os.path.join(self._results_path, f"{job_id}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(path + ".tmp", path)
+        return path
+
+    @staticmethod
+    def _remove_result(ref: str) -> None:
+        try:
+            os.remove(ref)
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _sync_cache(self):
+        """Drop cached rows if another connection wrote to the registry."""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Compact job status, or None if the job is unknown or evicted."""
+        with self._lock:
+            self._sync_cache()
+            job = self._cache.get(job_id)
+            if job is None:
+                row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    return None
+                job = self._row_to_dict(row)
+                self._cache[job_id] = job
+            if job["status"] == RUNNING and not self._owner_alive(job["owner"]):
+                self.recover()
+                row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    return None
+                job = self._cache[job_id] = self._row_to_dict(row)
+        return dict(job)
+
+    def get_result(self, job_id: str) -> Any:
+        """Load a completed job's result from its file (None if there is none)."""
+        with self._lock:
+            row = self._conn.execute("SELECT result_ref FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row or not row[0]:
+            return None
+        try:
+            with open(row[0], "r", encoding="utf-8") as f:
+                return json.load(f)
+        except OSError:
+            return None
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Number of stored jobs, optionally with one status."""
+        query, params = "SELECT COUNT(*) FROM jobs", ()
+        if status is not None:
+            query, params = query + " WHERE status = ?", (status,)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        job_id, kind, status, progress, message, data, error, result_ref, owner, created_at, updated_at = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "progress": progress,
+            "message": message,
+            "data": json.loads(data) if data else None,
+            "error": error,
+            "has_result": result_ref is not None,
+            "owner": owner,
+            "created_at": _iso(created_at),
+            "updated_at": _iso(updated_at),
+        }
+
+
+# Global instance
+_registry: Optional[JobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_job_registry(path: Optional[str] = None) -> JobRegistry:
+    """Get or create the global job registry."""
+    global _registry
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from app.core.config import settings
+                _registry = JobRegistry(
+                    path or settings.JOB_REGISTRY_PATH,
+                    ttl_seconds=settings.JOB_TTL_SECONDS
+                )
+                _registry.start_heartbeat()
+
+    return _registry
+
+
+def close_job_registry() -> None:
+    """Close the global job registry, interrupting this instance's running jobs."""
+    global _registry
+
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
@@ -0,0 +1,99 @@
+"""Keyset pagination of project listings.
+
+Listings are ordered newest first on (updated_at, id) and paged by an
+opaque cursor holding the last row's key, so every page is one indexed
+range scan however deep into the listing it is, and rows updated while a
+client pages do not shift the later pages the way an OFFSET does.
+
+A request with neither a cursor nor a limit gets the whole listing in one
+reply, as the listings returned before they were paged; clients that page
+pass a limit, or the cursor of the previous page.
+
+Listings select only their summary columns; the heavy columns of project
+rows are deferred on the models and never travel with a listing. Each
+listed table has an index on (updated_at, id) and its short summary
+columns, so a page is read from the index without touching the rows and
+their payloads. updated_at is set on every insert and update, so rows
+without one are not expected.
+"""
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(updated_at: datetime, row_id: str) -> str:
+    """Encode the key of the last row of a page as an opaque cursor."""
+    key = {"u": updated_at.isoformat(), "i": row_id}
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """Decode a cursor back into (updated_at, id); None for the first page."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        updated_at = datetime.fromisoformat(key["u"])
+        row_id = key["i"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(row_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return updated_at, row_id
+
+
+def page_size(limit: int) -> int:
+    """Clamp a requested page size."""
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+async def list_page(
+    db: AsyncSession,
+    model,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """One page of a model's rows, newest first, as rows of the given columns.
+
+    Args:
+        db: Database session
+        model: Mapped class with updated_at and id columns
+        columns: Columns or expressions to select; the key columns are added
+        cursor: Cursor returned with the previous page
+        limit: Page size, clamped to MAX_PAGE_SIZE; None reads every row when
+            there is no cursor, and DEFAULT_PAGE_SIZE rows after a cursor
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    key = decode_cursor(cursor)
+    statement = (
+        select(*columns, model.updated_at.label("_key_updated_at"), model.id.label("_key_id"))
+        .order_by(model.updated_at.desc(), model.id.desc())
+    )
+    if limit is None and key is None:
+        return (await db.execute(statement)).all(), None
+    limit = page_size(DEFAULT_PAGE_SIZE if limit is None else limit)
+    statement = statement.limit(limit + 1)
+    if key is not None:
+        updated_at, row_id = key
+        statement = statement.where(or_(
+            model.updated_at < updated_at,
+            and_(model.updated_at == updated_at, model.id < row_id),
+        ))
+    rows = (await db.execute(statement)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]._key_updated_at, rows[-1]._key_id)
@@ -0,0 +1,287 @@
+"""Indexed, bounded message bus of the Core Devices and Ferrari companies.
+
+A company's agents used to log every message in one list for the life of
+the project, filter it with full scans on every read and call subscribers
+inside `send`. The bus now:
+
+- numbers messages with a sequence number that never repeats; `messages`
+  is a view of the log indexed by sequence number
+- keeps the sequence numbers of each phase and each agent (sender or
+  recipient), so a filtered read costs the size of its result
+- keeps at most `window` messages in memory; older ones are dropped once
+  their owner reports them written to the durable store (`mark_durable`),
+  and are read back from there
+- delivers to subscribers from a queue per subscriber, outside `send`; a
+  subscriber that falls `maxsize` messages behind loses the oldest ones,
+  and its subscription counts what it dropped
+
+Listeners are still called inside `send`, with every message; they are
+for cheap in-process mirrors of the log such as the chat feed.
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Union
+import asyncio
+import inspect
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+
+class Subscription:
+    """Queue of the messages for one subscriber, delivered apart from `send`.
+
+    With a callback, the messages are passed to it (awaited if it is a
+    coroutine function) by a task on the running event loop that lives
+    while messages are queued; without one, the subscriber reads them with
+    `get`.
+    """
+
+    def __init__(self, agent: Optional[str], callback: Optional[Callable[[Any], Union[None, Awaitable[None]]]],
+                 maxsize: int):
+        self.agent = agent  # Recipient whose messages are delivered; None for every message
+        self.callback = callback
+        self.maxsize = max(1, maxsize)
+        self.delivered = 0
+        self.dropped = 0  # Messages discarded because the subscriber was maxsize behind
+        self._pending: Deque[Any] = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    @property
+    def lag(self) -> int:
+        """Messages queued but not yet delivered."""
+        return len(self._pending)
+
+    def offer(self, message: Any) -> None:
+        """Queue a message without waiting; drops the oldest queued message when full."""
+        if self.closed:
+            return
+        if len(self._pending) >= self.maxsize:
+            self._pending.popleft()
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % self.maxsize == 0:
+                logger.warning("Message bus subscriber is falling behind", agent=self.agent,
+                               dropped=self.dropped, lag=len(self._pending))
+        self._pending.append(message)
+        self._wake()
+        if self.callback is not None:
+            self._start()
+
+    async def get(self) -> Any:
+        """Next queued message, waiting for one if there is none."""
+        while not self._pending:
+            if self.closed:
+                raise RuntimeError("Subscription closed")
+            await self._wait()
+        self.delivered += 1
+        return self._pending.popleft()
+
+    def close(self) -> None:
+        """Stop delivery and discard the queued messages."""
+        self.closed = True
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._wake()
+
+    def _start(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Delivered once a message is sent from a running loop
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._deliver())
+
+    async def _deliver(self) -> None:
+        # Runs while messages are queued; the next offer starts it again
+        while self._pending and not self.closed:
+            message = self._pending.popleft()
+            self.delivered += 1
+            try:
+                result = self.callback(message)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("Message bus subscriber failed", agent=self.agent, error=str(e))
+
+    def _wait(self) -> asyncio.Future:
+        if self._waiter is None or self._waiter.done() or self._waiter.get_loop() is not asyncio.get_running_loop():
+            self._waiter = asyncio.get_running_loop().create_future()
+        return self._waiter
+
+    def _wake(self) -> None:
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            # Thread-safe, in case an agent sends from an executor thread
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class MessageLog:
+    """The bus's messages by sequence number.
+
+    len() is the number of messages ever sent, so code reading the entries
+    past a count it keeps (the chat feed, project saves) sees every new
+    message; only messages from `first_seq` on are still in memory.
+    """
+
+    def __init__(self, bus: "IndexedMessageBus"):
+        self._bus = bus
+
+    @property
+    def first_seq(self) -> int:
+        return self._bus.first_seq
+
+    def __len__(self) -> int:
+        return self._bus.get_total_message_count()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._bus.get_messages())
+
+    def __getitem__(self, key):
+        bus = self._bus
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            return bus._at(range(max(start, bus.first_seq), stop, step))
+        seq = key + len(self) if key < 0 else key
+        if not bus.first_seq <= seq < len(self):
+            raise IndexError(f"Message {key} is not in memory")
+        return bus._messages[seq - bus._base]
+
+
+class IndexedMessageBus:
+    """Sequence-numbered message log with phase and agent indexes, a bounded window and queued subscribers.
+
+    Subclasses build their message type in `send` and log it with `append`;
+    messages need `phase`, `from_agent` and `to_agent` attributes.
+    """
+
+    def __init__(self, window: Optional[int] = None, queue_size: Optional[int] = None):
+        self.window = max(1, settings.MESSAGE_BUS_WINDOW if window is None else window)
+        self.queue_size = settings.MESSAGE_BUS_QUEUE_SIZE if queue_size is None else queue_size
+        # Messages from sequence number _base on; slots before _first_seq were evicted and
+        # are cut off in bulk, so an eviction costs O(1) and a lookup stays a list index
+        self._messages: List[Any] = []
+        self._base = 0
+        self._first_seq = 0
+        self._durable = 0  # Messages with a lower sequence number are in the durable store
+        self._by_phase: Dict[Any, Deque[int]] = {}
+        self._by_agent: Dict[str, Deque[int]] = {}
+        self._subscriptions: List[Subscription] = []
+        self.listeners: List[callable] = []  # Called with every message, whoever it is for
+
+    @property
+    def messages(self) -> MessageLog:
+        return MessageLog(self)
+
+    @messages.setter
+    def messages(self, messages: List[Any]) -> None:
+        self.restore(messages)
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest message in memory."""
+        return self._first_seq
+
+    def restore(self, messages: List[Any], first_seq: int = 0) -> None:
+        """Replace the log with messages read back from the durable store, without delivering them."""
+        self._messages = []
+        self._by_phase.clear()
+        self._by_agent.clear()
+        self._base = self._first_seq = first_seq
+        for message in messages:
+            self._index(message, first_seq + len(self._messages))
+            self._messages.append(message)
+        self.mark_durable(first_seq + len(self._messages))
+
+    def append(self, message: Any) -> int:
+        """Log a message, queue it for its subscribers and call the listeners; returns its sequence number."""
+        seq = self.get_total_message_count()
+        self._index(message, seq)
+        self._messages.append(message)
+        self._evict()
+
+        for subscription in self._subscriptions:
+            if subscription.agent is None or subscription.agent == message.to_agent:
+                subscription.offer(message)
+        for callback in list(self.listeners):
+            callback(message)
+        return seq
+
+    def mark_durable(self, count: int) -> None:
+        """Record that the first `count` messages are in the durable store, so they may leave memory."""
+        self._durable = max(self._durable, count)
+        self._evict()
+
+    def _index(self, message: Any, seq: int) -> None:
+        self._by_phase.setdefault(message.phase, deque()).append(seq)
+        for agent in {message.from_agent, message.to_agent}:
+            self._by_agent.setdefault(agent, deque()).append(seq)
+
+    def _evict(self) -> None:
+        evicted = False
+        while self.get_total_message_count() - self._first_seq > self.window and self._first_seq < self._durable:
+            slot = self._first_seq - self._base
+            message, self._messages[slot] = self._messages[slot], None
+            for index, key in [(self._by_phase, message.phase)] + [
+                (self._by_agent, agent) for agent in {message.from_agent, message.to_agent}
+            ]:
+                seqs = index[key]
+                seqs.popleft()  # The oldest message in memory is the oldest of each of its indexes
+                if not seqs:
+                    del index[key]
+            self._first_seq += 1
+            evicted = True
+        if evicted and self._first_seq - self._base > len(self._messages) // 2:
+            del self._messages[:self._first_seq - self._base]
+            self._base = self._first_seq
+
+    def get_messages(self, phase: Optional[Any] = None, agent: Optional[str] = None) -> List[Any]:
+        """Messages in memory, filtered by phase and/or agent (sender or recipient)."""
+        if phase is None and agent is None:
+            return self._messages[self._first_seq - self._base:]
+        if phase is None:
+            seqs = self._by_agent.get(agent, ())
+        elif agent is None:
+            seqs = self._by_phase.get(phase, ())
+        else:
+            by_phase = self._by_phase.get(phase, ())
+            by_agent = self._by_agent.get(agent, ())
+            if len(by_phase) <= len(by_agent):
+                return [m for m in self._at(by_phase) if m.from_agent == agent or m.to_agent == agent]
+            return [m for m in self._at(by_agent) if m.phase == phase]
+        return self._at(seqs)
+
+    def _at(self, seqs) -> List[Any]:
+        base, messages = self._base, self._messages
+        return [messages[seq - base] for seq in seqs]
+
+    def get_messages_since(self, index: int) -> List[Any]:
+        """Get all messages since the specified sequence number that are still in memory."""
+        return self._messages[max(index, self._first_seq) - self._base:]
+
+    def get_total_message_count(self) -> int:
+        """Get total number of messages sent on the bus, in memory or not."""
+        return self._base + len(self._messages)
+
+    def subscribe(self, agent_name: Optional[str] = None,
+                  callback: Optional[Callable[[Any], Union[None, Awaitable[None]]]] = None,
+                  maxsize: Optional[int] = None) -> Subscription:
+        """Subscribe to the messages for an agent (every message if None), delivered from a queue."""
+        subscription = Subscription(agent_name, callback, self.queue_size if maxsize is None else maxsize)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop a subscription."""
+        subscription.close()
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
@@ -0,0 +1,54 @@
+"""Shared pools of spawned worker processes for CPU-bound work.
+
+PDF extraction and research report rendering are pure CPU work, so they
+run in process pools and leave the event loop free. A pool starts on
+first use, with its workers spawned rather than forked from the server,
+and is discarded when a worker dies so the next call starts a fresh one.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional
+import multiprocessing
+import threading
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class SpawnedPool:
+    """A process pool started on first use.
+
+    `workers` is called when the pool starts, so settings are read then
+    rather than at import.
+    """
+
+    def __init__(self, name: str, workers: Callable[[], int]):
+        self.name = name
+        self._workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        """The running pool, started if needed."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    workers = max(1, self._workers())
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                    logger.info(f"{self.name} pool started", workers=workers)
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; the next get starts new ones."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def discard(self, pool: Executor) -> None:
+        """Shut the pool down if it is still `pool`, e.g. after one of its workers died."""
+        if pool is self._pool:
+            self.shutdown()
@@ -0,0 +1,373 @@
+"""Incremental persistence of Core Devices and Ferrari project state.
+
+A project used to be saved by rewriting its JSON blobs (project_data,
+artifacts, owner_decisions, chat_log, progress_log) on every save, so a
+phase that saves every few seconds wrote the whole history each time.
+Now the project row keeps only small scalar fields and:
+
+- chat, progress and error logs are append-only rows in
+  `project_log_entries`; a save inserts only the entries added since the
+  previous save, in one bulk insert
+- the rest of the state is split into pieces in `project_artifacts`
+  (`state.<field>`, `artifacts.<phase>`, `owner_decisions`), and a save
+  rewrites only the pieces whose content hash changed
+
+What has already been written is tracked per project in a PersistedState
+kept with the in-memory project. Saves of one project are serialized on
+its lock, and log inserts ignore entries that already exist, so a save
+that failed or raced another one never duplicates entries.
+
+Rows saved before this layout still carry the blobs; `load_project_state`
+splits them into the new tables the first time a project is loaded, and
+`migrate_legacy_projects` does so for every project at once.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import hashlib
+import json
+
+import structlog
+from sqlalchemy import delete, func, inspect, null, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.database import dialect_insert
+from app.models import BookPublishingHouseProject, CoreDevicesProject, ProjectArtifact, ProjectLogEntry
+
+logger = structlog.get_logger(__name__)
+
+# Project kinds and the tables of their rows
+PROJECT_MODELS = {
+    "core_devices": CoreDevicesProject,
+    "ferrari": BookPublishingHouseProject,
+}
+
+LOGS = ("chat", "progress", "error")
+
+# Key of the PersistedState in the routes' in-memory project dicts
+PERSISTED_KEY = "persisted_state"
+
+# Project row columns of the layout before project_artifacts and project_log_entries
+LEGACY_COLUMNS = ("project_data", "artifacts", "owner_decisions", "chat_log", "progress_log", "error_log")
+
+# Rows per insert statement
+_CHUNK_SIZE = 1000
+
+
+@dataclass
+class PersistedState:
+    """What of a project's in-memory state is already in the database."""
+    log_counts: Dict[str, int] = field(default_factory=dict)  # log -> entries written
+    hashes: Dict[str, str] = field(default_factory=dict)  # piece key -> content hash written
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+
+    def update(self, written: "PersistedState") -> None:
+        """Record a committed write."""
+        for log, count in written.log_counts.items():
+            self.log_counts[log] = max(self.log_counts.get(log, 0), count)
+        self.hashes.update(written.hashes)
+
+
+@dataclass
+class StoredProject:
+    """Project state read back from the new tables."""
+    project_state: Optional[Dict[str, Any]]
+    artifacts: Dict[str, Any]
+    owner_decisions: Dict[str, Any]
+    logs: Dict[str, List[Dict[str, Any]]]
+    persisted: PersistedState
+
+
+def persisted_state(project_data: Dict[str, Any]) -> PersistedState:
+    """PersistedState of an in-memory project, created empty for a new project."""
+    if PERSISTED_KEY not in project_data:
+        project_data[PERSISTED_KEY] = PersistedState()
+    return project_data[PERSISTED_KEY]
+
+
+def content_hash(value: Any) -> str:
+    """Hash of a piece's canonical JSON, independent of dict ordering."""
+    data = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def split_state(
+    project_state: Optional[Dict[str, Any]],
+    artifacts: Optional[Dict[str, Any]],
+    owner_decisions: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Split project state into the pieces stored in project_artifacts."""
+    pieces = {}
+    for name, value in (project_state or {}).items():
+        pieces[f"state.{name}"] = value
+    for phase, value in (artifacts or {}).items():
+        pieces[f"artifacts.{phase}"] = value
+    if owner_decisions is not None:
+        pieces["owner_decisions"] = owner_decisions
+    return pieces
+
+
+def _join_state(pieces: Dict[str, Any]):
+    """Inverse of split_state."""
+    project_state: Dict[str, Any] = {}
+    artifacts: Dict[str, Any] = {}
+    for key, value in pieces.items():
+        if key.startswith("state."):
+            project_state[key[len("state."):]] = value
+        elif key.startswith("artifacts."):
+            artifacts[key[len("artifacts."):]] = value
+    return project_state or None, artifacts, pieces.get("owner_decisions") or {}
+
+
+def _as_entry(item: Any) -> Dict[str, Any]:
+    """Log entries are dicts or messages serialized with to_dict()."""
+    return item.to_dict() if hasattr(item, "to_dict") else item
+
+
+def _artifact_upsert(db: AsyncSession):
+    """Upsert of state pieces that only rewrites rows whose hash changed."""
+    statement = dialect_insert(db, ProjectArtifact)
+    return statement.on_conflict_do_update(
+        index_elements=[ProjectArtifact.project_kind, ProjectArtifact.project_id, ProjectArtifact.key],
+        set_={
+            "content_hash": statement.excluded.content_hash,
+            "content": statement.excluded.content,
+            "updated_at": statement.excluded.updated_at,
+        },
+        where=ProjectArtifact.content_hash.is_distinct_from(statement.excluded.content_hash)
+    )
+
+
+def _entry_insert(db: AsyncSession):
+    """Insert of log entries that skips entries already written."""
+    return dialect_insert(db, ProjectLogEntry).on_conflict_do_nothing(
+        index_elements=[ProjectLogEntry.project_kind, ProjectLogEntry.project_id,
+                        ProjectLogEntry.log, ProjectLogEntry.seq]
+    )
+
+
+async def stage_project_state(
+    db: AsyncSession,
+    kind: str,
+    project_id: str,
+    persisted: PersistedState,
+    pieces: Optional[Dict[str, Any]] = None,
+    logs: Optional[Dict[str, Sequence[Any]]] = None
+) -> PersistedState:
+    """Write the log entries and state pieces not yet in the database, without committing.
+
+    Call it holding `persisted.lock` and pass the result to
+    `persisted.update` once the session committed.
+
+    Args:
+        db: Session to write with
+        kind: Project kind (see PROJECT_MODELS)
+        project_id: Project id
+        persisted: What was written by earlier saves
+        pieces: State pieces by key (see split_state)
+        logs: Complete in-memory logs by name; only entries past the
+            persisted count are written
+
+    Returns:
+        What this call wrote
+    """
+    now = datetime.utcnow()
+    written = PersistedState()
+
+    rows = []
+    for log, entries in (logs or {}).items():
+        start = persisted.log_counts.get(log, 0)
+        for seq in range(start, len(entries)):
+            entry = _as_entry(entries[seq])
+            rows.append({
+                "project_kind": kind,
+                "project_id": project_id,
+                "log": log,
+                "seq": seq,
+                "phase": entry.get("phase") if isinstance(entry, dict) else None,
+                "entry": entry,
+                "created_at": now,
+            })
+        if len(entries) > start:
+            written.log_counts[log] = len(entries)
+    for start in range(0, len(rows), _CHUNK_SIZE):
+        await db.execute(_entry_insert(db), rows[start:start + _CHUNK_SIZE])
+
+    changed = []
+    for key, value in (pieces or {}).items():
+        digest = content_hash(value)
+        if persisted.hashes.get(key) != digest:
+            changed.append({
+                "project_kind": kind,
+                "project_id": project_id,
+                "key": key,
+                "content_hash": digest,
+                "content": value,
+                "updated_at": now,
+            })
+            written.hashes[key] = digest
+    for start in range(0, len(changed), _CHUNK_SIZE):
+        await db.execute(_artifact_upsert(db), changed[start:start + _CHUNK_SIZE])
+
+    if rows or changed:
+        logger.debug("Staged project state", kind=kind, project_id=project_id,
+                     log_entries=len(rows), pieces=len(changed))
+    return written
+
+
+async def append_log_entry(db: AsyncSession, kind: str, project_id: str, log: str, entry: Dict[str, Any]) -> None:
+    """Append one entry to the log of a project that is not loaded in memory, without committing."""
+    result = await db.execute(
+        select(func.max(ProjectLogEntry.seq)).where(
+            ProjectLogEntry.project_kind == kind,
+            ProjectLogEntry.project_id == project_id,
+            ProjectLogEntry.log == log,
+        )
+    )
+    last = result.scalar()
+    await db.execute(_entry_insert(db), [{
+        "project_kind": kind,
+        "project_id": project_id,
+        "log": log,
+        "seq": 0 if last is None else last + 1,
+        "phase": entry.get("phase"),
+        "entry": entry,
+        "created_at": datetime.utcnow(),
+    }])
+
+
+async def _has_legacy_state(db: AsyncSession, db_project) -> bool:
+    # The blobs are deferred; fetch them only if this row's weren't loaded
+    unloaded = [column for column in LEGACY_COLUMNS if column in inspect(db_project).unloaded]
+    if unloaded:
+        await db.refresh(db_project, attribute_names=unloaded)
+    return any(getattr(db_project, column) is not None for column in LEGACY_COLUMNS)
+
+
+async def migrate_legacy_state(db: AsyncSession, kind: str, db_project) -> bool:
+    """Split a project row's legacy JSON blobs into the new tables and clear them, without committing.
+
+    Entries already in the new tables come first in each log, so a row
+    written by old and new code alike keeps every entry.
+
+    Returns:
+        False if the row had nothing to migrate
+    """
+    if not await _has_legacy_state(db, db_project):
+        return False
+
+    counts = dict(
+        (await db.execute(
+            select(ProjectLogEntry.log, func.count())
+            .where(ProjectLogEntry.project_kind == kind, ProjectLogEntry.project_id == db_project.id)
+            .group_by(ProjectLogEntry.log)
+        )).all()
+    )
+    logs = {}
+    for log in LOGS:
+        entries = getattr(db_project, f"{log}_log") or []
+        # Pad with placeholders so legacy entries get seqs after the existing ones
+        logs[log] = [None] * counts.get(log, 0) + list(entries)
+    persisted = PersistedState(log_counts=counts)
+    pieces = split_state(db_project.project_data, db_project.artifacts, db_project.owner_decisions)
+    await stage_project_state(db, kind, db_project.id, persisted, pieces, logs)
+
+    # SQL NULL rather than JSON null, and without leaving the row's attributes expired
+    model = type(db_project)
+    await db.execute(
+        update(model).where(model.id == db_project.id).values({column: null() for column in LEGACY_COLUMNS})
+    )
+    for column in LEGACY_COLUMNS:
+        set_committed_value(db_project, column, None)
+    logger.info("Migrated legacy project state", kind=kind, project_id=db_project.id,
+                log_entries={log: len(entries) - counts.get(log, 0) for log, entries in logs.items()},
+                pieces=len(pieces))
+    return True
+
+
+async def read_log_entries(
+    db: AsyncSession,
+    kind: str,
+    project_id: str,
+    log: str,
+    after: int = -1,
+    before: Optional[int] = None,
+    phase: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Entries of a project's log with after < seq < before, oldest first, each with its seq."""
+    statement = (
+        select(ProjectLogEntry.seq, ProjectLogEntry.entry)
+        .where(
+            ProjectLogEntry.project_kind == kind,
+            ProjectLogEntry.project_id == project_id,
+            ProjectLogEntry.log == log,
+            ProjectLogEntry.seq > after,
+        )
+        .order_by(ProjectLogEntry.seq)
+    )
+    if before is not None:
+        statement = statement.where(ProjectLogEntry.seq < before)
+    if phase is not None:
+        statement = statement.where(ProjectLogEntry.phase == phase)
+    if limit is not None:
+        statement = statement.limit(limit)
+    result = await db.execute(statement)
+    return [{"seq": seq, **entry} for seq, entry in result.all()]
+
+
+async def load_project_state(db: AsyncSession, kind: str, db_project) -> StoredProject:
+    """Read a project's state, first migrating its legacy blobs if it has any."""
+    if await migrate_legacy_state(db, kind, db_project):
+        await db.commit()
+
+    result = await db.execute(
+        select(ProjectArtifact.key, ProjectArtifact.content, ProjectArtifact.content_hash).where(
+            ProjectArtifact.project_kind == kind, ProjectArtifact.project_id == db_project.id
+        )
+    )
+    pieces = {}
+    persisted = PersistedState()
+    for key, content, digest in result.all():
+        pieces[key] = content
+        persisted.hashes[key] = digest
+
+    result = await db.execute(
+        select(ProjectLogEntry.log, ProjectLogEntry.entry)
+        .where(ProjectLogEntry.project_kind == kind, ProjectLogEntry.project_id == db_project.id)
+        .order_by(ProjectLogEntry.log, ProjectLogEntry.seq)
+    )
+    logs: Dict[str, List[Dict[str, Any]]] = {log: [] for log in LOGS}
+    for log, entry in result.all():
+        logs.setdefault(log, []).append(entry)
+    persisted.log_counts = {log: len(entries) for log, entries in logs.items()}
+
+    project_state, artifacts, owner_decisions = _join_state(pieces)
+    return StoredProject(project_state, artifacts, owner_decisions, logs, persisted)
+
+
+async def delete_project_state(db: AsyncSession, kind: str, project_id: str) -> None:
+    """Delete a project's log entries and state pieces, without committing."""
+    for model in (ProjectLogEntry, ProjectArtifact):
+        await db.execute(delete(model).where(model.project_kind == kind, model.project_id == project_id))
+
+
+async def migrate_legacy_projects(db: AsyncSession) -> int:
+    """Split the legacy blobs of every Core Devices and Ferrari project; returns the projects migrated.
+
+    Each project is committed on its own, so an interrupted run resumes
+    where it stopped.
+    """
+    migrated = 0
+    for kind, model in PROJECT_MODELS.items():
+        result = await db.execute(
+            select(model.id).where(or_(*(getattr(model, column).is_not(None) for column in LEGACY_COLUMNS)))
+        )
+        for project_id in result.scalars().all():
+            db_project = await db.get(model, project_id)
+            if await migrate_legacy_state(db, kind, db_project):
+                await db.commit()
+                migrated += 1
+    return migrated
@@ -0,0 +1,154 @@
+"""Run the independent LLM steps of a phase concurrently.
+
+A phase is a small dependency graph of steps. Every step starts as soon
+as the steps it requires have finished, and all steps share one
+concurrency limit per LLM backend, so phases running side by side never
+send a backend more generations than it is configured to serve.
+
+A failed step with a fallback takes the fallback as its result; one
+without a fallback fails the steps that require it. Either way the other
+steps run to completion, and StepGraphError carries their results.
+"""
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import weakref
+
+from app.core.config import settings
+
+# No fallback: failure propagates to dependent steps
+NO_FALLBACK = object()
+
+# Backend limits per event loop, so tests running many loops never share a semaphore
+_backend_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@dataclass
+class Step:
+    """One unit of work in a phase.
+
+    `run` is called with the results of the required steps as keyword
+    arguments, in the order they are listed in `requires`. A step runs
+    holding a slot of the graph's limit unless `limited` is False; such a
+    step takes the limit itself, e.g. once per retry attempt so that its
+    backoff leaves the slot to other steps.
+    """
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    requires: Tuple[str, ...] = ()
+    fallback: Any = NO_FALLBACK
+    label: Optional[str] = None
+    limited: bool = True
+
+
+class StepGraphError(Exception):
+    """Raised when steps without a fallback failed; the other steps' results are kept."""
+
+    def __init__(self, errors: Dict[str, str], results: Dict[str, Any]):
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()))
+        self.errors = errors
+        self.results = results
+
+
+def get_llm_concurrency(provider: str) -> int:
+    """Concurrent generations an LLM backend of this provider is configured to serve."""
+    if provider.lower() in ("openai", "anthropic"):
+        return max(1, settings.LLM_CONCURRENCY_OPENAI)
+    return max(1, settings.LLM_CONCURRENCY_LOCAL)
+
+
+def backend_limit(llm_client: Any) -> asyncio.Semaphore:
+    """Semaphore shared by every step and agent calling the same LLM backend."""
+    provider = getattr(llm_client, "provider", "local")
+    key = (provider, getattr(llm_client, "base_url", "") or "")
+    limits = _backend_limits.setdefault(asyncio.get_running_loop(), {})
+    if key not in limits:
+        limits[key] = asyncio.Semaphore(get_llm_concurrency(provider))
+    return limits[key]
+
+
+async def run_step_graph(
+    steps: List[Step],
+    limit: asyncio.Semaphore,
+    on_step: Optional[Callable[[Step, Optional[str], int, int], Awaitable[None]]] = None
+) -> Dict[str, Any]:
+    """Run steps as soon as their requirements are met and return results by step name, in step order.
+
+    Args:
+        steps: Steps of the graph, in any order
+        limit: Semaphore bounding concurrent steps (see backend_limit)
+        on_step: Awaited as (step, error, finished, total) after each step
+            ends; calls never overlap, so it may write to a shared session
+
+    Raises:
+        StepGraphError: If a step without a fallback failed
+        ValueError: If a requirement is unknown or the steps form a cycle
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        unknown = [name for name in step.requires if name not in by_name]
+        if unknown:
+            raise ValueError(f"Step {step.name!r} requires unknown steps {unknown}")
+
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    pending = dict(by_name)
+    running: Dict[asyncio.Task, Step] = {}
+
+    async def run(step: Step) -> Any:
+        inputs = {name: results[name] for name in step.requires}
+        if not step.limited:
+            return await step.run(**inputs)
+        async with limit:
+            return await step.run(**inputs)
+
+    async def finish(step: Step, error: Optional[str]) -> None:
+        if on_step:
+            await on_step(step, error, len(results) + len(errors), len(steps))
+
+    try:
+        while pending or running:
+            changed = True
+            while changed:
+                changed = False
+                for step in list(pending.values()):
+                    failed = [name for name in step.requires if name in errors]
+                    if failed:
+                        del pending[step.name]
+                        errors[step.name] = f"requires failed step {failed[0]}"
+                        await finish(step, errors[step.name])
+                        changed = True
+                    elif all(name in results for name in step.requires):
+                        del pending[step.name]
+                        running[asyncio.create_task(run(step))] = step
+            if not running:
+                if pending:
+                    raise ValueError(f"Steps form a cycle: {sorted(pending)}")
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step = running.pop(task)
+                error = None
+                try:
+                    results[step.name] = task.result()
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    if step.fallback is NO_FALLBACK:
+                        errors[step.name] = error
+                    else:
+                        results[step.name] = step.fallback
+                await finish(step, error)
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    # Results in step order, whatever order the steps finished in
+    results = {step.name: results[step.name] for step in steps if step.name in results}
+    if errors:
+        raise StepGraphError(errors, results)
+    return results
@@ -24,6 +24,18 @@ class Base(DeclarativeBase):
     pass
 
 
+def dialect_insert(db, model):
+    """INSERT construct supporting ON CONFLICT for the session's dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Upsert is not supported on dialect: {dialect}")
+    return insert(model)
+
+
 async def get_db() -> AsyncSession:
     """Get database session."""
     async with AsyncSessionLocal() as session:
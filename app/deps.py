@@ -54,7 +54,10 @@ _scheduler: Optional[NotificationScheduler] = None
 def get_scheduler() -> Optional[NotificationScheduler]:
     """Get notification scheduler."""
     global _scheduler
-    if _scheduler is None and settings.SCHEDULER == "apscheduler":
+    if _scheduler is None and settings.SCHEDULER == "durable":
+        from app.scheduling.durable import DurableScheduler
+        _scheduler = DurableScheduler()
+    elif _scheduler is None and settings.SCHEDULER == "apscheduler":
         from app.scheduling.apscheduler import APSchedulerScheduler
         _scheduler = APSchedulerScheduler()
     return _scheduler
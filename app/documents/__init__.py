@@ -0,0 +1 @@
+"""Shared ingestion of uploaded documents: page extraction, text layer and catalog."""
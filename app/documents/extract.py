@@ -0,0 +1,179 @@
+"""Parallel page extraction for uploaded PDFs.
+
+Text extraction is pure CPU work in PyMuPDF or PyPDF2, so pages are
+extracted in chunks by a process pool: the event loop stays free and a
+large document uses every core. Chunks are yielded in page order as soon
+as each one is ready, so callers can index the first pages while later
+ones are still being extracted. Documents of a single chunk are extracted
+in a thread, where handing them to the pool would cost more than it saves.
+
+Everything a pool worker runs lives in this module and imports nothing
+heavy, because workers are spawned rather than forked from the server.
+"""
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple, Union
+import asyncio
+import os
+import re
+
+import structlog
+
+from app.core.process_pool import SpawnedPool
+
+logger = structlog.get_logger(__name__)
+
+PYMUPDF = "pymupdf"
+PYPDF2 = "pypdf2"
+
+
+def _extract_workers() -> int:
+    from app.core.config import settings
+    return settings.DOCUMENT_EXTRACT_WORKERS or os.cpu_count() or 1
+
+
+_pool = SpawnedPool("Document extraction", _extract_workers)
+
+
+class ExtractionError(Exception):
+    """Raised when a document's text cannot be extracted."""
+
+
+class ExtractorUnavailable(ExtractionError):
+    """Raised when neither PyMuPDF nor PyPDF2 is installed."""
+
+
+def clean_pdf_text(text: str) -> str:
+    """Post-process extracted PDF text to improve readability."""
+    if not text:
+        return ""
+    # Remove soft-hyphen and zero-width chars that often appear mid-word.
+    text = text.replace("\u00ad", "")  # soft hyphen
+    text = text.replace("\u200b", "").replace("\u200c", "").replace("\u200d", "")
+    # Normalize non-breaking spaces
+    text = text.replace("\u00a0", " ")
+    # De-hyphenate at line breaks: "com-\nputer" -> "computer"
+    text = re.sub(r"([A-Za-z0-9])-\s*\n\s*([A-Za-z0-9])", r"\1\2", text)
+    # Normalize newlines and whitespace
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+@lru_cache(maxsize=None)
+def preferred_extractor() -> Optional[str]:
+    """Best installed extractor; PyMuPDF preserves word boundaries better than PyPDF2."""
+    try:
+        import fitz  # type: ignore  # noqa: F401
+        return PYMUPDF
+    except ImportError:
+        pass
+    try:
+        import PyPDF2  # type: ignore  # noqa: F401
+        return PYPDF2
+    except ImportError:
+        return None
+
+
+def _require_extractor() -> str:
+    extractor = preferred_extractor()
+    if extractor is None:
+        raise ExtractorUnavailable(
+            "PDF extraction requires PyMuPDF or PyPDF2. Install with: pip install pymupdf PyPDF2"
+        )
+    return extractor
+
+
+def page_count(path: str) -> int:
+    """Number of pages in a PDF."""
+    try:
+        if _require_extractor() == PYMUPDF:
+            import fitz  # type: ignore
+            with fitz.open(path) as doc:
+                return doc.page_count
+        import PyPDF2  # type: ignore
+        return len(PyPDF2.PdfReader(path).pages)
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"Failed to extract text from PDF: {e}")
+
+
+def extract_range(path: str, start: int, stop: int) -> Tuple[List[str], str]:
+    """Extract pages [start, stop) of a PDF; returns (pages, extractor_name)."""
+    if _require_extractor() == PYMUPDF:
+        try:
+            import fitz  # type: ignore
+            with fitz.open(path) as doc:
+                # sort=True improves reading order in many PDFs
+                return [
+                    clean_pdf_text(doc[i].get_text("text", sort=True) or "") for i in range(start, stop)
+                ], PYMUPDF
+        except Exception as e:
+            logger.warning("PyMuPDF extraction failed; falling back to PyPDF2", error=str(e))
+
+    try:
+        import PyPDF2  # type: ignore
+    except ImportError:
+        raise ExtractorUnavailable("PyMuPDF failed and PyPDF2 is not installed. Install with: pip install PyPDF2")
+    try:
+        reader = PyPDF2.PdfReader(path)
+        return [clean_pdf_text(reader.pages[i].extract_text() or "") for i in range(start, stop)], PYPDF2
+    except Exception as e:
+        raise ExtractionError(f"Failed to extract text from PDF: {e}")
+
+
+def extract_pages(path: Union[str, Path]) -> Tuple[List[str], str]:
+    """Extract every page synchronously in this process."""
+    path = str(path)
+    return extract_range(path, 0, page_count(path))
+
+
+def shutdown_pool() -> None:
+    """Stop the extraction worker processes."""
+    _pool.shutdown()
+
+
+async def iter_page_chunks(
+    path: Union[str, Path],
+    chunk_pages: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> AsyncIterator[Tuple[int, List[str], str]]:
+    """Extract a PDF in parallel chunks, yielding (first_page_index, pages, extractor) in page order.
+
+    Args:
+        path: PDF file
+        chunk_pages: Pages per task (defaults to DOCUMENT_EXTRACT_CHUNK_PAGES)
+        executor: Executor for the chunks (defaults to the shared process pool)
+    """
+    if chunk_pages is None:
+        from app.core.config import settings
+        chunk_pages = settings.DOCUMENT_EXTRACT_CHUNK_PAGES
+    path = str(path)
+    loop = asyncio.get_running_loop()
+    total = await loop.run_in_executor(None, page_count, path)
+
+    if total <= chunk_pages and executor is None:
+        pages, extractor = await loop.run_in_executor(None, extract_range, path, 0, total)
+        yield 0, pages, extractor
+        return
+
+    pool = executor or _pool.get()
+    futures = [
+        loop.run_in_executor(pool, extract_range, path, start, min(start + chunk_pages, total))
+        for start in range(0, total, chunk_pages)
+    ]
+    try:
+        for n, future in enumerate(futures):
+            pages, extractor = await future
+            yield n * chunk_pages, pages, extractor
+    except BrokenProcessPool as e:
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        _pool.discard(pool)
+        raise ExtractionError(f"PDF extraction worker failed: {e}")
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,321 @@
+"""Content-addressed text layer and metadata catalog for uploaded documents.
+
+Extracted pages are stored once per file content, keyed by the sha256 of
+the uploaded bytes, so uploading the same document again reuses its text
+instead of extracting it. A text layer produced by a weaker extractor
+than the best installed one is ignored, which re-extracts it on demand.
+
+Document metadata lives in one SQLite catalog instead of a `.meta.json`
+per upload. Listings are keyset-paginated over an index on (namespace,
+sort column, id), so each page of results costs the same however many
+documents there are or how deep the page is.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import base64
+import json
+import os
+import sqlite3
+import threading
+
+import structlog
+
+from app.documents.extract import extract_pages, iter_page_chunks, preferred_extractor
+
+logger = structlog.get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    content_type TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    pages INTEGER,
+    extractor TEXT,
+    text_preview TEXT,
+    uploaded_at TEXT NOT NULL,
+    meta TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_documents_uploaded ON documents (namespace, uploaded_at, id);
+CREATE INDEX IF NOT EXISTS idx_documents_name ON documents (namespace, name, id);
+CREATE INDEX IF NOT EXISTS idx_documents_sha256 ON documents (sha256);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = "id, namespace, name, content_type, size, sha256, pages, extractor, text_preview, uploaded_at, meta"
+
+# Sort keys allowed in listings, each backed by an index
+SORT_COLUMNS = {"uploaded_at": "uploaded_at", "name": "name"}
+
+
+class DocumentStore:
+    """Text layer files plus the SQLite document catalog under one directory."""
+
+    def __init__(self, root: str):
+        """Initialize the store.
+
+        Args:
+            root: Directory holding `text/` (the text layer) and `catalog.db`
+        """
+        self.root = Path(root)
+        self.text_dir = self.root / "text"
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.root / "catalog.db"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Text layer
+    # ------------------------------------------------------------------
+
+    def text_layer_path(self, sha256: str) -> Path:
+        return self.text_dir / sha256[:2] / f"{sha256}.pages.json"
+
+    def get_text_layer(self, sha256: str) -> Optional[Tuple[List[str], str]]:
+        """Stored (pages, extractor) for a file's content, unless missing or extracted by a weaker extractor."""
+        try:
+            with open(self.text_layer_path(sha256), "r", encoding="utf-8") as f:
+                layer = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if layer.get("extractor") != preferred_extractor():
+            return None
+        return layer["pages"], layer["extractor"]
+
+    def put_text_layer(self, sha256: str, pages: List[str], extractor: str) -> None:
+        """Store a file's extracted pages atomically."""
+        path = self.text_layer_path(sha256)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"extractor": extractor, "pages": pages}, f)
+        os.replace(tmp_path, path)
+
+    async def extract_pdf(
+        self,
+        path: Union[str, Path],
+        sha256: str,
+        on_chunk: Optional[Callable[[List[str]], None]] = None
+    ) -> Tuple[List[str], str]:
+        """Pages of a PDF from the text layer, extracting and storing them on a miss.
+
+        `on_chunk` receives the pages in order as they are extracted (or all
+        at once from the text layer), so indexing can overlap extraction.
+        """
+        layer = self.get_text_layer(sha256)
+        if layer is not None:
+            pages, extractor = layer
+            logger.info("Text layer reused", sha256=sha256, pages=len(pages))
+            if on_chunk:
+                on_chunk(pages)
+            return pages, extractor
+
+        pages: List[str] = []
+        extractors = set()
+        async for _start, chunk, extractor in iter_page_chunks(path):
+            pages.extend(chunk)
+            extractors.add(extractor)
+            if on_chunk:
+                on_chunk(chunk)
+        # A chunk PyMuPDF failed on was read by PyPDF2; record the weaker one
+        extractor = extractors.pop() if len(extractors) == 1 else "pypdf2"
+        self.put_text_layer(sha256, pages, extractor)
+        return pages, extractor
+
+    def extract_pdf_sync(self, path: Union[str, Path], sha256: str) -> Tuple[List[str], str]:
+        """Blocking `extract_pdf` for callers outside the event loop."""
+        layer = self.get_text_layer(sha256)
+        if layer is None:
+            layer = extract_pages(path)
+            self.put_text_layer(sha256, *layer)
+        return layer
+
+    # ------------------------------------------------------------------
+    # Catalog
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        namespace: str,
+        doc_id: str,
+        name: str,
+        uploaded_at: str,
+        content_type: Optional[str] = None,
+        size: Optional[int] = None,
+        sha256: Optional[str] = None,
+        pages: Optional[int] = None,
+        extractor: Optional[str] = None,
+        text_preview: str = "",
+        meta: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Add or replace a document in the catalog."""
+        row = (
+            doc_id, namespace, name or "", content_type, size, sha256, pages, extractor,
+            text_preview, uploaded_at, json.dumps(meta) if meta else None
+        )
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO documents ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+            )
+        return self._row_to_dict(row)
+
+    def update(self, doc_id: str, **fields) -> bool:
+        """Change catalog columns of a document."""
+        if not fields:
+            return False
+        columns = set(_COLUMNS.split(", ")) - {"id"}
+        unknown = set(fields) - columns
+        if unknown:
+            raise ValueError(f"Unknown catalog columns: {sorted(unknown)}")
+        if "meta" in fields and fields["meta"] is not None:
+            fields["meta"] = json.dumps(fields["meta"])
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE documents SET {assignments} WHERE id = ?", (*fields.values(), doc_id)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def delete(self, doc_id: str) -> bool:
+        """Remove a document from the catalog; its text layer is shared and kept."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+        return cursor.rowcount > 0
+
+    def list(
+        self,
+        namespace: str,
+        limit: Optional[int] = 50,
+        cursor: Optional[str] = None,
+        sort: str = "uploaded_at",
+        descending: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of a namespace's documents and the cursor of the next page (None at the end).
+
+        A limit of None lists every document from the cursor on.
+
+        Raises:
+            ValueError: If the sort key or cursor is invalid
+        """
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Cannot sort documents by {sort!r}; use one of {sorted(SORT_COLUMNS)}")
+        direction, op = ("DESC", "<") if descending else ("ASC", ">")
+        query = f"SELECT {_COLUMNS} FROM documents WHERE namespace = ?"
+        params: List[Any] = [namespace]
+        if cursor:
+            query += f" AND ({column}, id) {op} (?, ?)"
+            params.extend(self._decode_cursor(cursor))
+        query += f" ORDER BY {column} {direction}, id {direction}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        documents = [self._row_to_dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            last = documents[-1]
+            next_cursor = self._encode_cursor(last[column], last["id"])
+        return documents, next_cursor
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE namespace = ?", (namespace,)
+            ).fetchone()[0]
+
+    def import_meta_files(self, namespace: str, directory: Union[str, Path]) -> int:
+        """Add legacy `*.meta.json` files of a directory to the catalog, once per directory."""
+        source = f"{namespace}:{Path(directory).resolve()}"
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone():
+                return 0
+            imported = 0
+            for meta_file in Path(directory).glob("*.meta.json"):
+                try:
+                    with open(meta_file, "r", encoding="utf-8") as f:
+                        metadata = json.load(f)
+                    doc_id = metadata.get("id") or metadata.get("doc_id")
+                    if not doc_id or self.get(doc_id):
+                        continue
+                    self.add(
+                        namespace, doc_id,
+                        name=metadata.get("name") or metadata.get("filename") or "",
+                        uploaded_at=metadata["uploaded_at"],
+                        content_type=metadata.get("type"),
+                        size=metadata.get("size") or metadata.get("bytes"),
+                        pages=metadata.get("pages"),
+                        extractor=metadata.get("extractor"),
+                        text_preview=metadata.get("text_preview", ""),
+                        meta={"file_path": metadata["file_path"]} if metadata.get("file_path") else None
+                    )
+                    imported += 1
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Skipping unreadable document metadata", file=str(meta_file), error=str(e))
+            self._conn.execute("INSERT INTO imports (source, documents) VALUES (?, ?)", (source, imported))
+        if imported:
+            logger.info("Imported document metadata into catalog", namespace=namespace, documents=imported)
+        return imported
+
+    @staticmethod
+    def _encode_cursor(value: Any, doc_id: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([value, doc_id]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List[Any]:
+        try:
+            value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+        return [value, doc_id]
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        doc_id, namespace, name, content_type, size, sha256, pages, extractor, preview, uploaded_at, meta = row
+        return {
+            "id": doc_id,
+            "namespace": namespace,
+            "name": name,
+            "type": content_type,
+            "size": size,
+            "sha256": sha256,
+            "pages": pages,
+            "extractor": extractor,
+            "text_preview": preview or "",
+            "uploaded_at": uploaded_at,
+            "meta": json.loads(meta) if meta else {},
+        }
+
+
+# Global instance
+_store: Optional[DocumentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_document_store(root: Optional[str] = None) -> DocumentStore:
+    """Get or create the global document store."""
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from app.core.config import settings
+                _store = DocumentStore(root or settings.DOCUMENT_STORE_DIR)
+
+    return _store
@@ -0,0 +1,377 @@
+"""Chunked text-to-speech with a content-addressed audio cache.
+
+Long documents are spoken in chunks of about 600 characters. Each chunk's
+audio is cached under a key derived from its normalized text, the voice
+preset, the model version and the sampling settings, so asking for audio
+again after editing one paragraph only synthesizes the chunks that
+changed. Finished chunks are cached as they complete, which makes the
+cache the job's checkpoint: an interrupted conversion that is started
+again resumes at the first chunk that is not cached yet.
+
+The output WAV is assembled by streaming the cached chunks into the file
+block by block, so memory stays at one chunk however long the document
+is. The cache is bounded in bytes and evicts the least recently used
+chunks, never those of a conversion in progress in the same process;
+a chunk that another worker evicted before assembly is synthesized again.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+MAX_CHUNK_LENGTH = 600  # characters per chunk (optimal for Bark coherence)
+MIN_CHUNK_LENGTH = 100  # minimum chunk size to avoid too many tiny chunks
+
+# Samples copied from a cached chunk into the output per write
+_WRITE_BLOCK = 1 << 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_chunks_last_used ON chunks (last_used);
+"""
+
+
+def _split_long_sentence(sentence: str, current_chunk: str, chunks: List[str], max_chunk_length: int) -> str:
+    """Split a sentence longer than a chunk by commas or semicolons; returns the open chunk."""
+    for part in re.split(r'[,;]\s+', sentence):
+        part = part.strip()
+        if not part:
+            continue
+        if not re.search(r'[.!?]$', part):
+            part += '.'
+        if current_chunk and len(current_chunk) + len(part) + 1 <= max_chunk_length:
+            current_chunk += ' ' + part
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = part
+    return current_chunk
+
+
+def split_tts_chunks(
+    text: str,
+    max_chunk_length: int = MAX_CHUNK_LENGTH,
+    min_chunk_length: int = MIN_CHUNK_LENGTH
+) -> List[str]:
+    """Split text into sentence-aligned chunks of at most max_chunk_length characters.
+
+    Bark works well with ~13-15 seconds of spoken text per chunk, so chunks
+    are large enough to keep the voice coherent and never cut a sentence
+    unless the sentence alone is too long. Chunks do not span paragraphs,
+    except that short paragraphs join the next one, which keeps chunk
+    boundaries (and so cached audio) stable when other paragraphs change.
+    """
+    # Remove excessive whitespace and normalize line breaks
+    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Max 2 consecutive newlines
+    text = re.sub(r'[ \t]+', ' ', text)  # Normalize spaces
+    text = text.strip()
+
+    chunks: List[str] = []
+    current_chunk = ""
+    # Split text into paragraphs first to preserve structure
+    for paragraph in text.split('\n\n'):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        # Split by sentence endings followed by a capital letter or the end of the text,
+        # which avoids splitting on abbreviations like "Dr.", "U.S.", "etc."
+        sentence_pattern = r'(?<=[.!?])\s+(?=[A-Z])|(?<=[.!?])\s*$'
+        for sentence in re.split(sentence_pattern, paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+
+            # Ensure sentence ends with punctuation
+            if not re.search(r'[.!?]$', sentence):
+                sentence += '.'
+
+            potential_chunk = (current_chunk + ' ' + sentence).strip() if current_chunk else sentence
+            if len(potential_chunk) <= max_chunk_length:
+                current_chunk = potential_chunk
+                continue
+            if current_chunk and (len(current_chunk) >= min_chunk_length or len(sentence) <= max_chunk_length):
+                # Current chunk is full, save it and start a new one
+                chunks.append(current_chunk)
+                current_chunk = ""
+            if len(sentence) <= max_chunk_length:
+                current_chunk = sentence
+            else:
+                # Sentence too long: split it, continuing a chunk too short to keep alone
+                current_chunk = _split_long_sentence(sentence, current_chunk, chunks, max_chunk_length)
+
+        # End the chunk with its paragraph unless it is too short to stand alone (e.g. a
+        # heading), so an edit only changes the chunks of its own paragraph
+        if len(current_chunk) >= min_chunk_length:
+            chunks.append(current_chunk)
+            current_chunk = ""
+
+    # Add final chunk if it exists
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    # Fallback: if no chunks created, use entire text (or first part if too long)
+    if not chunks and text:
+        if len(text) <= max_chunk_length:
+            chunks = [text]
+        else:
+            current = ""
+            for sent in re.split(r'(?<=[.!?])\s+', text):
+                if len(current + sent) <= max_chunk_length:
+                    current += ' ' + sent if current else sent
+                else:
+                    if current:
+                        chunks.append(current.strip())
+                    current = sent
+            if current:
+                chunks.append(current.strip())
+    return chunks
+
+
+def normalize_chunk(text: str) -> str:
+    """Chunk text as it affects speech: whitespace differences do not."""
+    return " ".join(text.split())
+
+
+class AudioChunkCache:
+    """Size-bounded, LRU cache of synthesized chunk audio on disk.
+
+    Audio is stored as float32 `.npy` files; recency and sizes live in a
+    small SQLite index beside them, so the cache can be shared by workers.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int, clock: Callable[[], float] = time.time):
+        """Initialize the cache.
+
+        Args:
+            directory: Where chunk files and the index are kept
+            max_bytes: Total size of cached audio to keep
+            clock: Returns the current time in seconds
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._pinned: Counter = Counter()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "index.db"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(text: str, voice: Optional[str], model_version: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key of a chunk's audio."""
+        material = json.dumps([model_version, voice, params or {}, normalize_chunk(text)], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npy"
+
+    def has(self, key: str) -> bool:
+        """Whether a chunk is cached; a hit counts as a use."""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE chunks SET last_used = ? WHERE key = ?", (self.clock(), key))
+        if cursor.rowcount and self._path(key).exists():
+            return True
+        if cursor.rowcount:
+            # The file went missing; forget the entry
+            with self._lock:
+                self._conn.execute("DELETE FROM chunks WHERE key = ?", (key,))
+        return False
+
+    def put(self, key: str, audio: np.ndarray) -> None:
+        """Store a chunk's audio, evicting least recently used chunks beyond the size bound."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(audio, dtype=np.float32))
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks (key, size, last_used) VALUES (?, ?, ?)",
+                (key, path.stat().st_size, self.clock())
+            )
+            self.evict()
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """A chunk's audio, memory-mapped, or None if it is not cached."""
+        try:
+            return np.load(self._path(key), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM chunks").fetchone()[0]
+
+    def evict(self) -> int:
+        """Delete least recently used chunks until the cache fits; returns how many."""
+        evicted = 0
+        with self._lock:
+            excess = self.size() - self.max_bytes
+            if excess <= 0:
+                return 0
+            for key, size in self._conn.execute("SELECT key, size FROM chunks ORDER BY last_used").fetchall():
+                if excess <= 0:
+                    break
+                if self._pinned[key]:
+                    continue
+                self._conn.execute("DELETE FROM chunks WHERE key = ?", (key,))
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+                excess -= size
+                evicted += 1
+        return evicted
+
+    @contextmanager
+    def pin(self, keys: Iterable[str]) -> Iterator[None]:
+        """Protect chunks from eviction, e.g. while a conversion still needs them."""
+        keys = set(keys)
+        with self._lock:
+            self._pinned.update(keys)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pinned.subtract(keys)
+                self._pinned += Counter()  # drop zero counts
+
+
+def synthesize_to_wav(
+    chunks: List[str],
+    generate: Callable[[str], Optional[np.ndarray]],
+    cache: AudioChunkCache,
+    output_path: Union[str, Path],
+    sample_rate: int,
+    model_version: str,
+    voice: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    progress_callback: Optional[Callable[[str], None]] = None
+) -> Dict[str, int]:
+    """Speak chunks in order into a WAV file, synthesizing only chunks missing from the cache.
+
+    Args:
+        chunks: Text chunks, in reading order
+        generate: Synthesizes one chunk, returning mono float audio at sample_rate
+        cache: Chunk audio cache
+        output_path: WAV file to write (replaced atomically)
+        sample_rate: Sample rate of generated audio
+        model_version: Identifies the model, so cached audio is not reused across models
+        voice: Voice preset passed to the model
+        params: Sampling settings passed to the model
+        progress_callback: Optional callback function(message: str) for progress updates
+
+    Returns:
+        {"chunks", "cached", "synthesized", "failed", "samples"} counts
+
+    Raises:
+        ValueError: If no chunk produced audio, or a chunk that left the
+            cache before assembly could not be synthesized again
+    """
+    import soundfile as sf
+
+    keys = [cache.key(chunk, voice, model_version, params) for chunk in chunks]
+    stats = {"chunks": len(chunks), "cached": 0, "synthesized": 0, "failed": 0, "samples": 0}
+    ready = set()  # keys whose audio is in the cache
+    with cache.pin(keys):
+        # Process chunks in strict order; each finished chunk is a checkpoint
+        for chunk_idx, (chunk, key) in enumerate(zip(chunks, keys)):
+            if not chunk.strip():
+                continue
+            if cache.has(key):
+                stats["cached"] += 1
+                ready.add(key)
+                continue
+            if progress_callback:
+                progress_callback(f"Generating audio chunk {chunk_idx + 1}/{len(chunks)}...")
+            try:
+                audio = generate(chunk)
+            except Exception as e:
+                logger.error(f"TTS chunk {chunk_idx + 1} failed: {e}", exc_info=True)
+                # Continue with next chunk instead of failing entirely
+                stats["failed"] += 1
+                continue
+            if audio is None or len(audio) == 0:
+                logger.warning(f"Empty audio generated for chunk {chunk_idx + 1}")
+                stats["failed"] += 1
+                continue
+            cache.put(key, audio)
+            ready.add(key)
+            stats["synthesized"] += 1
+            logger.info(
+                f"Generated audio chunk {chunk_idx + 1}/{len(chunks)}: "
+                f"{len(audio)} samples ({len(audio) / sample_rate:.2f}s)"
+            )
+
+        if progress_callback:
+            progress_callback("Saving audio file...")
+        output_path = Path(output_path)
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            with sf.SoundFile(str(tmp_path), "w", samplerate=sample_rate, channels=1, format="WAV", subtype="PCM_16") as out:
+                for chunk_idx, (chunk, key) in enumerate(zip(chunks, keys)):
+                    if key not in ready:
+                        continue
+                    audio = cache.load(key)
+                    if audio is None:
+                        # Pins hold in this process only, so another worker may have evicted it
+                        logger.warning(f"TTS chunk {chunk_idx + 1} left the cache; generating it again")
+                        audio = generate(chunk)
+                        if audio is None or len(audio) == 0:
+                            raise ValueError(f"Chunk {chunk_idx + 1} left the cache and could not be generated again")
+                        cache.put(key, audio)
+                        stats["synthesized"] += 1
+                    for start in range(0, len(audio), _WRITE_BLOCK):
+                        out.write(np.asarray(audio[start:start + _WRITE_BLOCK]))
+                    stats["samples"] += len(audio)
+                    del audio
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    if not stats["samples"]:
+        tmp_path.unlink(missing_ok=True)
+        raise ValueError("No audio generated from any chunks")
+    os.replace(tmp_path, output_path)
+    logger.info("TTS audio assembled", output_path=str(output_path), **stats)
+    return stats
+
+
+# Global instance
+_cache: Optional[AudioChunkCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioChunkCache:
+    """Get or create the global TTS chunk cache."""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from app.core.config import settings
+                _cache = AudioChunkCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES)
+
+    return _cache
@@ -0,0 +1,255 @@
+"""Append-only command journal backing graph undo/redo history.
+
+Commands are stored in a small SQLite database instead of the graph, keyed by
+(project_id, seq) where seq increases monotonically per project. The journal
+runs in WAL mode so readers in other processes never wait on appends, and the
+last command of each project is cached in memory for constant-time undo
+lookups. The cache is dropped whenever SQLite reports that another connection
+committed (PRAGMA data_version), so several app processes can share the file.
+"""
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import uuid
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    project_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    inverse_payload TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    undone INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, seq)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_commands_id ON commands (id);
+CREATE TABLE IF NOT EXISTS project_seqs (
+    project_id TEXT PRIMARY KEY,
+    last_seq INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = "seq, id, user_id, type, payload, inverse_payload, timestamp, undone"
+
+# Sentinel for "no command" in the last-command cache
+_NONE = object()
+
+
+class CommandJournal:
+    """SQLite-backed, per-project append-only command log."""
+
+    def __init__(self, path: str):
+        """Initialize the journal.
+
+        Args:
+            path: SQLite database file, or ":memory:" for a private in-memory journal
+        """
+        self._path = path
+        self._lock = threading.RLock()
+        self._last: Dict[str, Any] = {}  # project_id -> last active command dict or _NONE
+        self._data_version: Optional[int] = None
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _sync_cache(self):
+        """Drop cached last commands if another connection wrote to the journal."""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._last.clear()
+            self._data_version = version
+
+    @staticmethod
+    def _row_to_dict(project_id: str, row) -> Dict[str, Any]:
+        seq, command_id, user_id, command_type, payload, inverse_payload, timestamp, undone = row
+        return {
+            "id": command_id,
+            "seq": seq,
+            "project_id": project_id,
+            "user_id": user_id,
+            "type": command_type,
+            "payload": json.loads(payload),
+            "inverse_payload": json.loads(inverse_payload),
+            "timestamp": timestamp,
+            "undone": bool(undone)
+        }
+
+    def append(
+        self,
+        project_id: str,
+        user_id: str,
+        command_type: str,
+        payload: Dict[str, Any],
+        inverse_payload: Dict[str, Any],
+        command_id: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Append a command and return it with its sequence number.
+
+        Appending after an undo starts a new branch, so the undone commands
+        (the redo stack) are compacted away in the same transaction. Their
+        sequence numbers are not handed out again: each project keeps the
+        highest number it has issued.
+        """
+        command = {
+            "id": command_id or str(uuid.uuid4()),
+            "project_id": project_id,
+            "user_id": user_id,
+            "type": command_type,
+            "payload": payload,
+            "inverse_payload": inverse_payload,
+            "timestamp": timestamp or datetime.utcnow().isoformat(),
+            "undone": False
+        }
+        conn = self._conn
+        with self._lock:
+            self._sync_cache()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM commands WHERE project_id = ? AND undone = 1", (project_id,))
+                row = conn.execute(
+                    "SELECT last_seq FROM project_seqs WHERE project_id = ?", (project_id,)
+                ).fetchone()
+                if row is None:
+                    # Journals written before the high-water mark existed continue from their newest command
+                    row = conn.execute(
+                        "SELECT COALESCE(MAX(seq), 0) FROM commands WHERE project_id = ?", (project_id,)
+                    ).fetchone()
+                command["seq"] = row[0] + 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO project_seqs (project_id, last_seq) VALUES (?, ?)",
+                    (project_id, command["seq"])
+                )
+                conn.execute(
+                    f"INSERT INTO commands (project_id, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (
+                        project_id,
+                        command["seq"],
+                        command["id"],
+                        user_id,
+                        command_type,
+                        json.dumps(payload, default=str),
+                        json.dumps(inverse_payload, default=str),
+                        command["timestamp"]
+                    )
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._last[project_id] = command
+        return dict(command)
+
+    def last(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent command that has not been undone."""
+        with self._lock:
+            self._sync_cache()
+            cached = self._last.get(project_id)
+            if cached is None:
+                row = self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM commands WHERE project_id = ? AND undone = 0 ORDER BY seq DESC LIMIT 1",
+                    (project_id,)
+                ).fetchone()
+                cached = self._row_to_dict(project_id, row) if row else _NONE
+                self._last[project_id] = cached
+        return None if cached is _NONE else dict(cached)
+
+    def entries_between(
+        self,
+        project_id: str,
+        limit: int = 100,
+        before_seq: Optional[int] = None,
+        after_seq: Optional[int] = None,
+        include_undone: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Read a page of history, newest first.
+
+        Args:
+            before_seq: Only return commands with a smaller sequence number
+            after_seq: Only return commands with a larger sequence number
+        """
+        clauses = ["project_id = ?"]
+        params: List[Any] = [project_id]
+        if before_seq is not None:
+            clauses.append("seq < ?")
+            params.append(before_seq)
+        if after_seq is not None:
+            clauses.append("seq > ?")
+            params.append(after_seq)
+        if not include_undone:
+            clauses.append("undone = 0")
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM commands WHERE {' AND '.join(clauses)} ORDER BY seq DESC LIMIT ?",
+                params
+            ).fetchall()
+        return [self._row_to_dict(project_id, row) for row in rows]
+
+    def _set_undone(self, project_id: str, seq: int, undone: bool) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE commands SET undone = ? WHERE project_id = ? AND seq = ? AND undone = ?",
+                (int(undone), project_id, seq, int(not undone))
+            )
+            self._last.pop(project_id, None)
+        return cursor.rowcount > 0
+
+    def mark_undone(self, project_id: str, seq: int) -> bool:
+        """Flag a command as undone; it stays available for redo."""
+        return self._set_undone(project_id, seq, True)
+
+    def mark_redone(self, project_id: str, seq: int) -> bool:
+        """Flag an undone command as applied again."""
+        return self._set_undone(project_id, seq, False)
+
+    def contains(self, command_id: str) -> bool:
+        """Whether a command with this id is in the journal."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM commands WHERE id = ?", (command_id,)).fetchone()
+        return row is not None
+
+    def compact(self, project_id: str) -> int:
+        """Drop the undone branch of a project's history; returns commands removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM commands WHERE project_id = ? AND undone = 1", (project_id,))
+        return cursor.rowcount
+
+    def count(self, project_id: str) -> int:
+        """Number of commands stored for a project."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM commands WHERE project_id = ?", (project_id,)
+            ).fetchone()
+        return row[0]
+
+
+# Global instance
+_journal: Optional[CommandJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_command_journal(path: Optional[str] = None) -> CommandJournal:
+    """Get or create the global command journal."""
+    global _journal
+
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                if path is None:
+                    from app.core.config import settings
+                    path = settings.GRAPH_COMMAND_JOURNAL_PATH
+                _journal = CommandJournal(path)
+
+    return _journal
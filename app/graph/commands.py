@@ -1,10 +1,9 @@
 """Command log for undo/redo functionality."""
 from typing import Dict, Any, List, Optional
-from neo4j import Session
 from datetime import datetime
 import uuid
 import structlog
-from app.graph.connection import get_neo4j_session
+from app.graph.command_journal import get_command_journal
 
 logger = structlog.get_logger(__name__)
 
@@ -41,7 +40,12 @@ class Command:
 
 
 class CommandLog:
-    """Manages command log for undo/redo."""
+    """Manages command log for undo/redo.
+    
+    History lives in the append-only command journal rather than as
+    Command nodes in the graph, so browsing history and traversing the
+    project graph do not slow each other down.
+    """
     
     @staticmethod
     def log_command(
@@ -52,63 +56,98 @@ class CommandLog:
         inverse_payload: Dict[str, Any]
     ) -> str:
         """Log a command."""
-        command_id = str(uuid.uuid4())
+        command = get_command_journal().append(
+            project_id=project_id,
+            user_id=user_id,
+            command_type=command_type,
+            payload=payload,
+            inverse_payload=inverse_payload
+        )
+        return command["id"]
+    
+    @staticmethod
+    def get_commands(
+        project_id: str,
+        limit: int = 100,
+        before_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get recent commands for a project, newest first.
+        
+        Args:
+            before_seq: Page further back from this sequence number
+        """
+        return get_command_journal().entries_between(project_id, limit=limit, before_seq=before_seq)
+    
+    @staticmethod
+    def get_last_command(project_id: str) -> Optional[Dict[str, Any]]:
+        """Get the last command for undo."""
+        return get_command_journal().last(project_id)
+    
+    @staticmethod
+    def mark_undone(project_id: str, seq: int) -> bool:
+        """Record that a command was undone."""
+        return get_command_journal().mark_undone(project_id, seq)
+    
+    @staticmethod
+    def mark_redone(project_id: str, seq: int) -> bool:
+        """Record that an undone command was re-applied."""
+        return get_command_journal().mark_redone(project_id, seq)
+    
+    @staticmethod
+    def migrate_all_graph_commands() -> int:
+        """Move the legacy Command nodes of every project into the journal.
+        
+        Returns:
+            Number of commands migrated
+        """
+        from app.graph.connection import get_neo4j_session
         
         with get_neo4j_session() as session:
-            query = """
-            MATCH (project:Project {id: $project_id})
-            CREATE (cmd:Command {
-                id: $command_id,
-                userId: $user_id,
-                type: $command_type,
-                payload: $payload,
-                inversePayload: $inverse_payload,
-                timestamp: datetime()
-            })
-            CREATE (project)-[:HAS_COMMAND]->(cmd)
-            RETURN cmd.id as id
-            """
             result = session.run(
-                query,
-                project_id=project_id,
-                command_id=command_id,
-                user_id=user_id,
-                command_type=command_type,
-                payload=payload,
-                inverse_payload=inverse_payload
+                "MATCH (project:Project)-[:HAS_COMMAND]->(:Command) RETURN DISTINCT project.id AS project_id"
             )
-            record = result.single()
-            if record:
-                return record["id"]
-            raise ValueError("Failed to log command")
+            project_ids = [record["project_id"] for record in result]
+        return sum(CommandLog.migrate_graph_commands(project_id) for project_id in project_ids)
     
     @staticmethod
-    def get_commands(project_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent commands for a project."""
+    def migrate_graph_commands(project_id: str) -> int:
+        """Move a project's legacy Command nodes from Neo4j into the journal.
+        
+        Returns:
+            Number of commands migrated
+        """
+        from app.graph.connection import get_neo4j_session
+        
+        journal = get_command_journal()
         with get_neo4j_session() as session:
             query = """
             MATCH (project:Project {id: $project_id})-[:HAS_COMMAND]->(cmd:Command)
             RETURN cmd
-            ORDER BY cmd.timestamp DESC
-            LIMIT $limit
+            ORDER BY cmd.timestamp ASC
             """
-            result = session.run(query, project_id=project_id, limit=limit)
-            commands = []
+            result = session.run(query, project_id=project_id)
+            migrated = []
             for record in result:
                 cmd = record["cmd"]
-                commands.append({
-                    "id": cmd["id"],
-                    "user_id": cmd["userId"],
-                    "type": cmd["type"],
-                    "payload": cmd["payload"],
-                    "inverse_payload": cmd["inversePayload"],
-                    "timestamp": cmd["timestamp"]
-                })
-            return commands
-    
-    @staticmethod
-    def get_last_command(project_id: str) -> Optional[Dict[str, Any]]:
-        """Get the last command for undo."""
-        commands = CommandLog.get_commands(project_id, limit=1)
-        return commands[0] if commands else None
-
+                # A run that stopped before deleting the nodes already journaled some of them
+                if journal.contains(cmd["id"]):
+                    migrated.append(cmd["id"])
+                    continue
+                journal.append(
+                    project_id=project_id,
+                    user_id=cmd["userId"],
+                    command_type=cmd["type"],
+                    payload=cmd["payload"],
+                    inverse_payload=cmd["inversePayload"],
+                    command_id=cmd["id"],
+                    timestamp=str(cmd["timestamp"])
+                )
+                migrated.append(cmd["id"])
+            
+            if migrated:
+                session.run(
+                    "MATCH (cmd:Command) WHERE cmd.id IN $ids DETACH DELETE cmd",
+                    ids=migrated
+                )
+        logger.info(f"Migrated {len(migrated)} graph commands for project {project_id}")
+        return len(migrated)
@@ -1,11 +1,14 @@
 """In-memory graph storage to replace Neo4j when unavailable."""
-from typing import List, Dict, Any, Optional
-from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import defaultdict, deque
 import structlog
 import json
 from pathlib import Path
 import threading
 
+from app.graph.search_index import InvertedIndex
+from app.graph.subgraph import shape_subgraph
+
 logger = structlog.get_logger(__name__)
 
 
@@ -20,13 +23,18 @@ class MemoryGraphStore:
         """
         self._nodes: Dict[str, Dict[str, Any]] = {}  # node_id -> {labels, properties}
         self._relationships: List[Dict[str, Any]] = []  # List of relationships
+        self._rel_by_key: Dict[Tuple[str, str, str], Dict[str, Any]] = {}  # (from, type, to) -> relationship
+        self._adjacency: Dict[str, Set[Tuple[str, str, str]]] = defaultdict(set)  # node_id -> relationship keys
         self._project_nodes: Dict[str, str] = {}  # project_id -> node_id
+        self._search_indexes: Dict[str, InvertedIndex] = defaultdict(InvertedIndex)  # project_id -> index
         self._lock = threading.RLock()
         self._persist_path = persist_path
         
         # Load persisted data if available
         if persist_path:
             self._load_from_file()
+        self._index_relationships()
+        self._rebuild_search_indexes()
     
     def _load_from_file(self):
         """Load graph data from JSON file."""
@@ -47,6 +55,93 @@ class MemoryGraphStore:
         except Exception as e:
             logger.warning(f"Failed to load graph data from {self._persist_path}: {e}")
     
+    @staticmethod
+    def _rel_key(rel: Dict[str, Any]) -> Tuple[str, str, str]:
+        return rel.get("from"), rel.get("type", ""), rel.get("to")
+    
+    def _index_relationships(self):
+        """Build the relationship lookup and adjacency indexes."""
+        self._rel_by_key.clear()
+        self._adjacency.clear()
+        for rel in self._relationships:
+            key = self._rel_key(rel)
+            self._rel_by_key[key] = rel
+            self._adjacency[key[0]].add(key)
+            self._adjacency[key[2]].add(key)
+    
+    def _remove_relationships(self, keys: Set[Tuple[str, str, str]]):
+        """Drop relationships from the list and the indexes."""
+        if not keys:
+            return
+        for key in keys:
+            self._rel_by_key.pop(key, None)
+            for node_id in (key[0], key[2]):
+                adjacent = self._adjacency.get(node_id)
+                if adjacent is not None:
+                    adjacent.discard(key)
+                    if not adjacent:
+                        del self._adjacency[node_id]
+        self._relationships = [rel for rel in self._relationships if self._rel_key(rel) not in keys]
+    
+    def _assign_legacy_projects(self):
+        """Attribute nodes persisted before project ownership was recorded.
+        
+        Nodes are assigned to the project they are connected to; if there is
+        only a single project, every unowned node belongs to it.
+        """
+        unowned = {node_id for node_id, node in self._nodes.items() if not node.get("project_id")}
+        if not unowned:
+            return
+        
+        if len(self._project_nodes) == 1:
+            project_id = next(iter(self._project_nodes))
+            for node_id in unowned:
+                self._nodes[node_id]["project_id"] = project_id
+            return
+        
+        neighbours: Dict[str, List[str]] = defaultdict(list)
+        for rel in self._relationships:
+            neighbours[rel.get("from")].append(rel.get("to"))
+            neighbours[rel.get("to")].append(rel.get("from"))
+        
+        for project_id, project_node_id in self._project_nodes.items():
+            queue = [project_node_id]
+            while queue:
+                current = queue.pop()
+                for neighbour in neighbours.get(current, []):
+                    if neighbour in unowned:
+                        unowned.discard(neighbour)
+                        self._nodes[neighbour]["project_id"] = project_id
+                        queue.append(neighbour)
+        
+        if unowned:
+            logger.warning(f"{len(unowned)} graph nodes are not attached to any project and will not be searchable")
+    
+    def _rebuild_search_indexes(self):
+        """Build the per-project search indexes from the loaded nodes."""
+        for project_id, node_id in self._project_nodes.items():
+            if node_id in self._nodes:
+                self._nodes[node_id]["project_id"] = project_id
+        self._assign_legacy_projects()
+        
+        self._search_indexes.clear()
+        for node_id, node in self._nodes.items():
+            self._index_node(node_id)
+    
+    def _index_node(self, node_id: str):
+        """Add or refresh a node in its project's search index."""
+        node = self._nodes[node_id]
+        project_id = node.get("project_id")
+        if project_id:
+            self._search_indexes[project_id].add(node_id, node.get("labels", []), node.get("properties", {}))
+    
+    def _unindex_node(self, node_id: str):
+        """Remove a node from its project's search index."""
+        project_id = self._nodes[node_id].get("project_id")
+        index = self._search_indexes.get(project_id) if project_id else None
+        if index is not None:
+            index.remove(node_id)
+    
     def _save_to_file(self):
         """Save graph data to JSON file."""
         if not self._persist_path:
@@ -79,6 +174,7 @@ class MemoryGraphStore:
             
             node = {
                 "labels": ["Project"],
+                "project_id": project_id,
                 "properties": {
                     "id": project_id,
                     "title": title,
@@ -89,6 +185,7 @@ class MemoryGraphStore:
             }
             self._nodes[node_id] = node
             self._project_nodes[project_id] = node_id
+            self._index_node(node_id)
             self._save_to_file()
             
             return {
@@ -104,9 +201,16 @@ class MemoryGraphStore:
         depth: int = 2,
         labels: Optional[List[str]] = None,
         stage: Optional[str] = None,
-        chapter: Optional[int] = None
+        chapter: Optional[int] = None,
+        projection: str = "full",
+        max_nodes: Optional[int] = None,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get subgraph for a project."""
+        """Get subgraph for a project.
+        
+        See app.graph.subgraph.shape_subgraph for projection, pruning and paging.
+        """
         with self._lock:
             project_node_id = self._project_nodes.get(project_id)
             if not project_node_id or project_node_id not in self._nodes:
@@ -115,14 +219,14 @@ class MemoryGraphStore:
             # Start from project node or focus node
             start_node_id = focus_node_id if focus_node_id else project_node_id
             
-            # Collect nodes and relationships
+            # Breadth-first walk over the adjacency index
             visited_nodes = set()
-            nodes_to_process = [(start_node_id, 0)]  # (node_id, current_depth)
+            nodes_to_process = deque([(start_node_id, 0)])  # (node_id, current_depth)
             result_nodes = []
-            result_edges = []
+            edge_keys = set()
             
             while nodes_to_process:
-                current_node_id, current_depth = nodes_to_process.pop(0)
+                current_node_id, current_depth = nodes_to_process.popleft()
                 
                 if current_node_id in visited_nodes or current_depth > depth:
                     continue
@@ -143,33 +247,47 @@ class MemoryGraphStore:
                         "properties": node.get("properties", {})
                     })
                     
-                    # Find relationships from this node
+                    # Follow relationships in both directions
                     if current_depth < depth:
-                        for rel in self._relationships:
-                            if rel.get("from") == current_node_id:
-                                target_id = rel.get("to")
-                                if target_id not in visited_nodes:
-                                    nodes_to_process.append((target_id, current_depth + 1))
-                                result_edges.append({
-                                    "id": rel.get("id", f"{rel['from']}_{rel['type']}_{rel['to']}"),
-                                    "type": rel.get("type", ""),
-                                    "from": rel["from"],
-                                    "to": rel["to"],
-                                    "properties": rel.get("properties", {})
-                                })
-                            elif rel.get("to") == current_node_id:
-                                source_id = rel.get("from")
-                                if source_id not in visited_nodes:
-                                    nodes_to_process.append((source_id, current_depth + 1))
-                                result_edges.append({
-                                    "id": rel.get("id", f"{rel['from']}_{rel['type']}_{rel['to']}"),
-                                    "type": rel.get("type", ""),
-                                    "from": rel["from"],
-                                    "to": rel["to"],
-                                    "properties": rel.get("properties", {})
-                                })
+                        for key in self._adjacency.get(current_node_id, ()):
+                            edge_keys.add(key)
+                            other_id = key[2] if key[0] == current_node_id else key[0]
+                            if other_id not in visited_nodes:
+                                nodes_to_process.append((other_id, current_depth + 1))
+            
+            result_edges = []
+            for key in edge_keys:
+                rel = self._rel_by_key[key]
+                result_edges.append({
+                    "id": rel.get("id", f"{rel['from']}_{rel['type']}_{rel['to']}"),
+                    "type": rel.get("type", ""),
+                    "from": rel["from"],
+                    "to": rel["to"],
+                    "properties": rel.get("properties", {})
+                })
             
-            return {"nodes": result_nodes, "edges": result_edges}
+            return shape_subgraph(
+                result_nodes,
+                result_edges,
+                projection=projection,
+                max_nodes=max_nodes,
+                page_size=page_size,
+                cursor=cursor,
+                pinned=[start_node_id]
+            )
+    
+    def get_nodes(self, project_id: str, node_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get full details of a project's nodes by id; ids of other projects' nodes are skipped."""
+        with self._lock:
+            return [
+                {
+                    "id": node_id,
+                    "labels": self._nodes[node_id].get("labels", []),
+                    "properties": self._nodes[node_id].get("properties", {})
+                }
+                for node_id in node_ids
+                if node_id in self._nodes and self._nodes[node_id].get("project_id") == project_id
+            ]
     
     def create_node(
         self,
@@ -185,11 +303,16 @@ class MemoryGraphStore:
                 node_id = f"{labels[0].lower()}_{len(self._nodes)}"
                 properties["id"] = node_id
             
+            if node_id in self._nodes:
+                self._unindex_node(node_id)
+            
             node = {
                 "labels": labels,
+                "project_id": project_id,
                 "properties": properties
             }
             self._nodes[node_id] = node
+            self._index_node(node_id)
             self._save_to_file()
             
             return {
@@ -206,6 +329,7 @@ class MemoryGraphStore:
             
             node = self._nodes[node_id]
             node["properties"].update(properties)
+            self._index_node(node_id)
             self._save_to_file()
             
             return {
@@ -221,12 +345,10 @@ class MemoryGraphStore:
                 return False
             
             # Remove relationships
-            self._relationships = [
-                rel for rel in self._relationships
-                if rel.get("from") != node_id and rel.get("to") != node_id
-            ]
+            self._remove_relationships(set(self._adjacency.get(node_id, ())))
             
             # Remove node
+            self._unindex_node(node_id)
             del self._nodes[node_id]
             self._save_to_file()
             return True
@@ -246,18 +368,18 @@ class MemoryGraphStore:
             rel_id = f"{source_id}_{rel_type}_{target_id}"
             
             # Check if relationship already exists
-            for rel in self._relationships:
-                if rel.get("from") == source_id and rel.get("to") == target_id and rel.get("type") == rel_type:
-                    # Update existing relationship
-                    rel["properties"].update(properties or {})
-                    self._save_to_file()
-                    return {
-                        "id": rel_id,
-                        "type": rel_type,
-                        "from": source_id,
-                        "to": target_id,
-                        "properties": rel["properties"]
-                    }
+            rel = self._rel_by_key.get((source_id, rel_type, target_id))
+            if rel is not None:
+                # Update existing relationship
+                rel.setdefault("properties", {}).update(properties or {})
+                self._save_to_file()
+                return {
+                    "id": rel_id,
+                    "type": rel_type,
+                    "from": source_id,
+                    "to": target_id,
+                    "properties": rel["properties"]
+                }
             
             # Create new relationship
             rel = {
@@ -268,6 +390,10 @@ class MemoryGraphStore:
                 "properties": properties or {}
             }
             self._relationships.append(rel)
+            key = self._rel_key(rel)
+            self._rel_by_key[key] = rel
+            self._adjacency[source_id].add(key)
+            self._adjacency[target_id].add(key)
             self._save_to_file()
             
             return rel
@@ -275,46 +401,96 @@ class MemoryGraphStore:
     def delete_relationship(self, source_id: str, target_id: str, rel_type: str) -> bool:
         """Delete a relationship."""
         with self._lock:
-            initial_count = len(self._relationships)
-            self._relationships = [
-                rel for rel in self._relationships
-                if not (rel.get("from") == source_id and rel.get("to") == target_id and rel.get("type") == rel_type)
-            ]
-            deleted = len(self._relationships) < initial_count
+            key = (source_id, rel_type, target_id)
+            deleted = key in self._rel_by_key
             if deleted:
+                self._remove_relationships({key})
                 self._save_to_file()
             return deleted
     
-    def search(self, project_id: str, query: str, labels: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-        """Search nodes using text matching."""
+    def get_project_graph(self, project_id: str, node_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get a project's nodes and the relationships touching them.
+        
+        Args:
+            project_id: Project ID
+            node_ids: Restrict the result to these nodes (if they still belong
+                to the project) and their relationships
+        """
         with self._lock:
-            project_node_id = self._project_nodes.get(project_id)
-            if not project_node_id:
-                return []
-            
-            query_lower = query.lower()
-            results = []
+            if node_ids is None:
+                members = {
+                    node_id for node_id, node in self._nodes.items()
+                    if node.get("project_id") == project_id
+                }
+            else:
+                members = {
+                    node_id for node_id in node_ids
+                    if self._nodes.get(node_id, {}).get("project_id") == project_id
+                }
             
-            for node_id, node in self._nodes.items():
-                # Apply label filter
-                if labels:
-                    node_labels = node.get("labels", [])
-                    if not any(label in node_labels for label in labels):
-                        continue
-                
-                # Search in properties
-                properties = node.get("properties", {})
-                for key, value in properties.items():
-                    if isinstance(value, str) and query_lower in value.lower():
-                        results.append({
-                            "id": node_id,
-                            "labels": node.get("labels", []),
-                            "properties": properties,
-                            "score": 1.0  # Simple scoring
-                        })
-                        break
+            nodes = {
+                node_id: {
+                    "labels": list(self._nodes[node_id].get("labels", [])),
+                    "properties": dict(self._nodes[node_id].get("properties", {}))
+                }
+                for node_id in members
+            }
+            if node_ids is None:
+                relationships = [
+                    dict(rel) for rel in self._relationships
+                    if rel.get("from") in members and rel.get("to") in members
+                ]
+            else:
+                keys = set()
+                for node_id in node_ids:
+                    keys |= self._adjacency.get(node_id, set())
+                relationships = [dict(self._rel_by_key[key]) for key in keys]
+            return {"nodes": nodes, "relationships": relationships}
+    
+    def search(
+        self,
+        project_id: str,
+        query: str,
+        labels: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0,
+        prefix: bool = True,
+        fuzzy: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Search a project's nodes with BM25 ranking.
+        
+        Query terms also match index terms they are a prefix of and, for
+        longer terms, terms within a small edit distance.
+        """
+        return self.search_page(project_id, query, labels, limit, offset, prefix, fuzzy)["results"]
+    
+    def search_page(
+        self,
+        project_id: str,
+        query: str,
+        labels: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0,
+        prefix: bool = True,
+        fuzzy: bool = True
+    ) -> Dict[str, Any]:
+        """Search a project's nodes and return one page plus the total match count."""
+        with self._lock:
+            index = self._search_indexes.get(project_id)
+            if project_id not in self._project_nodes or index is None:
+                return {"results": [], "total": 0}
             
-            return results[:50]  # Limit results
+            total, ranked = index.search(query, labels, limit=limit, offset=offset, prefix=prefix, fuzzy=fuzzy)
+            results = []
+            for node_id, score in ranked:
+                node = self._nodes[node_id]
+                results.append({
+                    "id": node_id,
+                    "labels": node.get("labels", []),
+                    "properties": node.get("properties", {}),
+                    "score": score
+                })
+            return {"results": results, "total": total}
 
 
 # Global instance
@@ -0,0 +1,137 @@
+"""Per-project cache of rendered manuscript fragments.
+
+Each project keeps a graph version counter that is bumped by every mutation
+routed through the repository. Rendered chapters are cached individually,
+together with the ids of the nodes they were built from, so a mutation only
+invalidates the chapters whose subtree it touched.
+"""
+from typing import Dict, Any, List, Optional, Set, Iterable
+from collections import defaultdict
+import threading
+
+
+class ProjectRenderState:
+    """Cached render state for a single project."""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.version = 0
+        self.lock = threading.Lock()  # Serializes renders of this project
+
+        self.project: Optional[Dict[str, Any]] = None
+        self.header_dirty = True
+        self.structure_dirty = True  # Chapter list/order must be re-read
+        self.chapter_order: List[str] = []
+        self.chapters: Dict[str, Dict[str, Any]] = {}  # chapter_id -> outline entry
+        self.fragments: Dict[str, str] = {}  # chapter_id -> rendered markdown
+        self.dirty_chapters: Set[str] = set()
+        self.node_chapters: Dict[str, Set[str]] = defaultdict(set)  # node_id -> chapter_ids
+        self.chapter_nodes: Dict[str, Set[str]] = {}  # chapter_id -> node_ids
+
+        self.result: Optional[Dict[str, Any]] = None
+        self.result_version = -1
+
+    def set_chapter(self, chapter_id: str, entry: Dict[str, Any], fragment: str, node_ids: Iterable[str]):
+        """Store a freshly rendered chapter and index the nodes it depends on."""
+        self.drop_chapter(chapter_id)
+        self.chapters[chapter_id] = entry
+        self.fragments[chapter_id] = fragment
+        self.chapter_nodes[chapter_id] = {node_id for node_id in node_ids if node_id}
+        for node_id in self.chapter_nodes[chapter_id]:
+            self.node_chapters[node_id].add(chapter_id)
+
+    def drop_chapter(self, chapter_id: str):
+        """Forget a chapter and its node references."""
+        self.chapters.pop(chapter_id, None)
+        self.fragments.pop(chapter_id, None)
+        for node_id in self.chapter_nodes.pop(chapter_id, set()):
+            chapters = self.node_chapters.get(node_id)
+            if chapters is not None:
+                chapters.discard(chapter_id)
+                if not chapters:
+                    del self.node_chapters[node_id]
+
+
+class RenderCache:
+    """Registry of per-project render states."""
+
+    def __init__(self):
+        self._states: Dict[str, ProjectRenderState] = {}
+        self._lock = threading.RLock()
+
+    def state(self, project_id: str) -> ProjectRenderState:
+        """Get or create the render state of a project."""
+        with self._lock:
+            state = self._states.get(project_id)
+            if state is None:
+                state = ProjectRenderState(project_id)
+                self._states[project_id] = state
+            return state
+
+    def version(self, project_id: str) -> int:
+        """Current graph version of a project."""
+        with self._lock:
+            state = self._states.get(project_id)
+            return state.version if state else 0
+
+    def begin_render(self, state: ProjectRenderState):
+        """Claim the pending work of a project's render.
+
+        Dirty flags are reset here, before the graph is read, so that a
+        mutation landing while the render is in progress marks its chapters
+        dirty again instead of being lost.
+
+        Returns:
+            Tuple of (version, header_dirty, structure_dirty, dirty_chapters)
+        """
+        with self._lock:
+            work = (state.version, state.header_dirty, state.structure_dirty, set(state.dirty_chapters))
+            state.header_dirty = False
+            state.structure_dirty = False
+            state.dirty_chapters.clear()
+            return work
+
+    def invalidate_project(self, project_id: str):
+        """Drop everything cached for a project (e.g. after a bulk sync)."""
+        with self._lock:
+            self._states.pop(project_id, None)
+
+    def invalidate_nodes(self, node_ids: Iterable[str], project_id: Optional[str] = None):
+        """Invalidate the cached fragments that depend on the given nodes.
+
+        Args:
+            node_ids: Ids of nodes created, updated or deleted, or the
+                endpoints of a relationship that was changed
+            project_id: Project the mutation belongs to, if known. When
+                omitted every cached project is checked.
+        """
+        node_ids = [node_id for node_id in node_ids if node_id]
+        with self._lock:
+            if project_id is not None:
+                states = [self._states[project_id]] if project_id in self._states else []
+            else:
+                states = list(self._states.values())
+
+            for state in states:
+                touched = False
+                for node_id in node_ids:
+                    if node_id == state.project_id:
+                        # Project properties or its set of chapters changed
+                        state.header_dirty = True
+                        state.structure_dirty = True
+                        touched = True
+                    if node_id in state.chapters:
+                        # Chapter number/title also feed the table of contents
+                        state.structure_dirty = True
+                        state.dirty_chapters.add(node_id)
+                        touched = True
+                    chapters = state.node_chapters.get(node_id)
+                    if chapters:
+                        state.dirty_chapters.update(chapters)
+                        touched = True
+                if touched or project_id is not None:
+                    state.version += 1
+
+
+# Global instance
+render_cache = RenderCache()
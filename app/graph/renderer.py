@@ -3,6 +3,7 @@ from typing import Dict, Any, List, Optional
 from neo4j import Session
 import structlog
 from app.graph.connection import get_neo4j_session
+from app.graph.render_cache import render_cache
 
 logger = structlog.get_logger(__name__)
 
@@ -12,26 +13,72 @@ class GraphRenderer:
     
     @staticmethod
     def render_manuscript(project_id: str) -> Dict[str, Any]:
-        """Render complete manuscript from graph."""
-        with get_neo4j_session() as session:
-            # Get project
-            project = GraphRenderer._get_project(session, project_id)
-            if not project:
-                raise ValueError(f"Project not found: {project_id}")
+        """Render complete manuscript from graph.
+        
+        Chapters are rendered once and cached; only chapters whose subtree
+        changed since the last render are re-read from the graph.
+        """
+        state = render_cache.state(project_id)
+        with state.lock:
+            version, header_dirty, structure_dirty, dirty_chapters = render_cache.begin_render(state)
+            if state.result is not None and state.result_version == version:
+                return dict(state.result)
             
-            # Build outline structure
-            outline = GraphRenderer._build_outline(session, project_id)
+            try:
+                with get_neo4j_session() as session:
+                    # Get project
+                    if header_dirty or state.project is None:
+                        project = GraphRenderer._get_project(session, project_id)
+                        if not project:
+                            raise ValueError(f"Project not found: {project_id}")
+                        state.project = project
+                    
+                    # Refresh the chapter list and order
+                    if structure_dirty:
+                        chapter_ids = GraphRenderer._list_chapter_ids(session, project_id)
+                        for chapter_id in set(state.chapter_order) - set(chapter_ids):
+                            state.drop_chapter(chapter_id)
+                        dirty_chapters |= {cid for cid in chapter_ids if cid not in state.fragments}
+                        state.chapter_order = chapter_ids
+                    
+                    # Re-render only the chapters that changed
+                    stale = [cid for cid in state.chapter_order if cid in dirty_chapters]
+                    if stale:
+                        fetched = set()
+                        for chapter in GraphRenderer._build_outline(session, project_id, stale):
+                            node_ids = GraphRenderer._pop_chapter_node_ids(chapter)
+                            state.set_chapter(
+                                chapter["id"],
+                                chapter,
+                                GraphRenderer._render_chapter(chapter),
+                                node_ids
+                            )
+                            fetched.add(chapter["id"])
+                        for chapter_id in set(stale) - fetched:
+                            state.drop_chapter(chapter_id)
+                        state.chapter_order = [cid for cid in state.chapter_order if cid in state.fragments]
+            except Exception:
+                # Partially applied work cannot be trusted; start over next time
+                render_cache.invalidate_project(project_id)
+                raise
             
-            # Generate markdown
-            markdown = GraphRenderer._generate_markdown(project, outline)
+            outline = [state.chapters[cid] for cid in state.chapter_order]
+            markdown = GraphRenderer._assemble_markdown(
+                state.project,
+                outline,
+                [state.fragments[cid] for cid in state.chapter_order]
+            )
             
-            return {
+            state.result = {
                 "project_id": project_id,
-                "title": project.get("title", "Untitled"),
+                "title": state.project.get("title", "Untitled"),
                 "outline": outline,
                 "markdown": markdown,
-                "word_count": len(markdown.split())
+                "word_count": len(markdown.split()),
+                "graph_version": version
             }
+            state.result_version = version
+            return dict(state.result)
     
     @staticmethod
     def _get_project(session: Session, project_id: str) -> Optional[Dict[str, Any]]:
@@ -47,10 +94,27 @@ class GraphRenderer:
         return None
     
     @staticmethod
-    def _build_outline(session: Session, project_id: str) -> List[Dict[str, Any]]:
-        """Build outline structure from graph."""
+    def _list_chapter_ids(session: Session, project_id: str) -> List[str]:
+        """Get the project's chapter ids in reading order."""
         query = """
         MATCH (project:Project {id: $project_id})-[:HAS_CHAPTER]->(ch:Chapter)
+        RETURN ch.id as id
+        ORDER BY ch.number
+        """
+        result = session.run(query, project_id=project_id)
+        return [record["id"] for record in result if record["id"]]
+    
+    @staticmethod
+    def _build_outline(
+        session: Session,
+        project_id: str,
+        chapter_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Build outline structure from graph, optionally for a subset of chapters."""
+        chapter_filter = "WHERE ch.id IN $chapter_ids" if chapter_ids is not None else ""
+        query = f"""
+        MATCH (project:Project {{id: $project_id}})-[:HAS_CHAPTER]->(ch:Chapter)
+        {chapter_filter}
         OPTIONAL MATCH (ch)-[has_scene:HAS_SCENE]->(s:Scene)
         OPTIONAL MATCH (s)-[:OCCURS_IN]->(l:Location)
         OPTIONAL MATCH (s)-[:USES_ENVIRONMENT]->(e:Environment)
@@ -62,7 +126,7 @@ class GraphRenderer:
              collect(DISTINCT event) as events,
              collect(DISTINCT theme) as themes
         ORDER BY ch.number, has_scene.order
-        WITH ch, collect({
+        WITH ch, collect({{
             id: s.id,
             title: s.title,
             synopsis: s.synopsis,
@@ -72,29 +136,55 @@ class GraphRenderer:
             timeStart: s.timeStart,
             timeEnd: s.timeEnd,
             location: l.name,
+            locationId: l.id,
             environment: e.name,
-            characters: [char in characters WHERE char IS NOT NULL | {id: char.id, name: char.name}],
-            events: [ev in events WHERE ev IS NOT NULL | {id: ev.id, name: ev.name}],
-            themes: [th in themes WHERE th IS NOT NULL | {id: th.id, name: th.name}]
-        }) as scenes
+            environmentId: e.id,
+            characters: [char in characters WHERE char IS NOT NULL | {{id: char.id, name: char.name}}],
+            events: [ev in events WHERE ev IS NOT NULL | {{id: ev.id, name: ev.name}}],
+            themes: [th in themes WHERE th IS NOT NULL | {{id: th.id, name: th.name}}]
+        }}) as scenes
         ORDER BY ch.number
-        RETURN {
+        RETURN {{
             id: ch.id,
             number: ch.number,
             title: ch.title,
             synopsis: ch.synopsis,
             scenes: scenes
-        } as chapter
+        }} as chapter
         """
-        result = session.run(query, project_id=project_id)
+        result = session.run(query, project_id=project_id, chapter_ids=chapter_ids)
         chapters = []
         for record in result:
             chapters.append(record["chapter"])
         return chapters
     
+    @staticmethod
+    def _pop_chapter_node_ids(chapter: Dict[str, Any]) -> List[str]:
+        """Collect the ids of every node a chapter was rendered from.
+        
+        Location and environment ids are only fetched for cache bookkeeping
+        and are removed from the outline entry.
+        """
+        node_ids = [chapter.get("id")]
+        for scene in chapter.get("scenes", []):
+            if not scene:
+                continue
+            node_ids.append(scene.get("id"))
+            node_ids.append(scene.pop("locationId", None))
+            node_ids.append(scene.pop("environmentId", None))
+            for key in ("characters", "events", "themes"):
+                node_ids.extend(item.get("id") for item in scene.get(key, []) if item)
+        return [node_id for node_id in node_ids if node_id]
+    
     @staticmethod
     def _generate_markdown(project: Dict[str, Any], outline: List[Dict[str, Any]]) -> str:
         """Generate markdown from outline."""
+        fragments = [GraphRenderer._render_chapter(chapter) for chapter in outline]
+        return GraphRenderer._assemble_markdown(project, outline, fragments)
+    
+    @staticmethod
+    def _assemble_markdown(project: Dict[str, Any], outline: List[Dict[str, Any]], fragments: List[str]) -> str:
+        """Join the title, table of contents and rendered chapter fragments."""
         lines = []
         
         # Title
@@ -113,87 +203,90 @@ class GraphRenderer:
         lines.append("---")
         lines.append("")
         
-        # Chapters
-        for chapter in outline:
-            ch_num = chapter.get("number", 0)
-            ch_title = chapter.get("title", f"Chapter {ch_num}")
-            ch_synopsis = chapter.get("synopsis", "")
-            scenes = chapter.get("scenes", [])
+        return "\n".join(lines + fragments)
+    
+    @staticmethod
+    def _render_chapter(chapter: Dict[str, Any]) -> str:
+        """Render a single chapter to markdown."""
+        lines = []
+        ch_num = chapter.get("number", 0)
+        ch_title = chapter.get("title", f"Chapter {ch_num}")
+        ch_synopsis = chapter.get("synopsis", "")
+        scenes = chapter.get("scenes", [])
+        
+        lines.append(f"## Chapter {ch_num}: {ch_title}")
+        lines.append("")
+        if ch_synopsis:
+            lines.append(f"*{ch_synopsis}*")
+            lines.append("")
+        
+        # Scenes
+        for scene in scenes:
+            if not scene or not scene.get("id"):
+                continue
             
-            lines.append(f"## Chapter {ch_num}: {ch_title}")
+            scene_title = scene.get("title", "Untitled Scene")
+            scene_synopsis = scene.get("synopsis", "")
+            scene_status = scene.get("status", "draft")
+            location = scene.get("location")
+            environment = scene.get("environment")
+            characters = scene.get("characters", [])
+            events = scene.get("events", [])
+            themes = scene.get("themes", [])
+            pov = scene.get("pov")
+            time_start = scene.get("timeStart")
+            time_end = scene.get("timeEnd")
+            
+            lines.append(f"### {scene_title}")
             lines.append("")
-            if ch_synopsis:
-                lines.append(f"*{ch_synopsis}*")
+            
+            # Scene metadata (as comments)
+            metadata = []
+            if location:
+                metadata.append(f"Location: {location}")
+            if environment:
+                metadata.append(f"Environment: {environment}")
+            if pov:
+                metadata.append(f"POV: {pov}")
+            if time_start or time_end:
+                time_str = f"{time_start or '?'} - {time_end or '?'}"
+                metadata.append(f"Time: {time_str}")
+            if characters:
+                char_names = [c.get("name", "Unknown") for c in characters]
+                metadata.append(f"Characters: {', '.join(char_names)}")
+            if events:
+                event_names = [e.get("name", "Unknown") for e in events]
+                metadata.append(f"Events: {', '.join(event_names)}")
+            if themes:
+                theme_names = [t.get("name", "Unknown") for t in themes]
+                metadata.append(f"Themes: {', '.join(theme_names)}")
+            
+            if metadata:
+                lines.append("<!--")
+                for meta in metadata:
+                    lines.append(f"  {meta}")
+                lines.append(f"  Status: {scene_status}")
+                lines.append("-->")
                 lines.append("")
             
-            # Scenes
-            for scene in scenes:
-                if not scene or not scene.get("id"):
-                    continue
-                
-                scene_title = scene.get("title", "Untitled Scene")
-                scene_synopsis = scene.get("synopsis", "")
-                scene_status = scene.get("status", "draft")
-                location = scene.get("location")
-                environment = scene.get("environment")
-                characters = scene.get("characters", [])
-                events = scene.get("events", [])
-                themes = scene.get("themes", [])
-                pov = scene.get("pov")
-                time_start = scene.get("timeStart")
-                time_end = scene.get("timeEnd")
-                
-                lines.append(f"### {scene_title}")
+            # Scene content
+            if scene_synopsis:
+                lines.append(scene_synopsis)
                 lines.append("")
-                
-                # Scene metadata (as comments)
-                metadata = []
-                if location:
-                    metadata.append(f"Location: {location}")
-                if environment:
-                    metadata.append(f"Environment: {environment}")
-                if pov:
-                    metadata.append(f"POV: {pov}")
-                if time_start or time_end:
-                    time_str = f"{time_start or '?'} - {time_end or '?'}"
-                    metadata.append(f"Time: {time_str}")
-                if characters:
-                    char_names = [c.get("name", "Unknown") for c in characters]
-                    metadata.append(f"Characters: {', '.join(char_names)}")
-                if events:
-                    event_names = [e.get("name", "Unknown") for e in events]
-                    metadata.append(f"Events: {', '.join(event_names)}")
-                if themes:
-                    theme_names = [t.get("name", "Unknown") for t in themes]
-                    metadata.append(f"Themes: {', '.join(theme_names)}")
-                
-                if metadata:
-                    lines.append("<!--")
-                    for meta in metadata:
-                        lines.append(f"  {meta}")
-                    lines.append(f"  Status: {scene_status}")
-                    lines.append("-->")
-                    lines.append("")
-                
-                # Scene content
-                if scene_synopsis:
-                    lines.append(scene_synopsis)
-                    lines.append("")
-                
-                if scene_status == "draft":
-                    lines.append("*[Draft content to be generated]*")
-                    lines.append("")
-                elif scene_status == "idea":
-                    lines.append("*[Scene idea - outline pending]*")
-                    lines.append("")
-                else:
-                    # If scene has full content, it would be stored in properties
-                    lines.append("*[Scene content]*")
-                    lines.append("")
             
-            lines.append("")
-            lines.append("---")
-            lines.append("")
+            if scene_status == "draft":
+                lines.append("*[Draft content to be generated]*")
+                lines.append("")
+            elif scene_status == "idea":
+                lines.append("*[Scene idea - outline pending]*")
+                lines.append("")
+            else:
+                # If scene has full content, it would be stored in properties
+                lines.append("*[Scene content]*")
+                lines.append("")
+        
+        lines.append("")
+        lines.append("---")
+        lines.append("")
         
         return "\n".join(lines)
-
@@ -1,5 +1,7 @@
 """Neo4j repository for graph operations with fallback to memory store."""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import functools
+import inspect
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -16,12 +18,42 @@ except (ImportError, Exception):
 # Import memory store as fallback
 from app.graph.memory_store import get_memory_store
 from app.graph.schema import validate_relationship, NODE_LABELS, RELATIONSHIP_TYPES
+from app.graph.render_cache import render_cache
+from app.graph.validation_engine import validation_engine
+from app.graph.subgraph import shape_subgraph
+
+
+def _tracks_mutation(touched: Callable[[Dict[str, Any], Any], Tuple[Optional[str], List[str]]]):
+    """Report the nodes touched by a successful mutation.
+    
+    Cached manuscript fragments depending on them are invalidated and they
+    are queued for incremental revalidation.
+    
+    Args:
+        touched: Maps the call arguments and the result to
+            (project_id or None, ids of the nodes the mutation touched)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            project_id, node_ids = touched(bound.arguments, result)
+            render_cache.invalidate_nodes(node_ids, project_id=project_id)
+            validation_engine.mark_touched(node_ids, project_id=project_id)
+            return result
+        return wrapper
+    return decorator
 
 
 class GraphRepository:
     """Repository for graph CRUD operations."""
     
     @staticmethod
+    @_tracks_mutation(lambda args, result: (args["project_id"], [args["project_id"]]))
     def create_project(project_id: str, title: str, genre: Optional[str] = None) -> Dict[str, Any]:
         """Create a new project node in Neo4j or memory store."""
         # Use memory store if Neo4j is not available
@@ -70,13 +102,27 @@ class GraphRepository:
         depth: int = 2,
         labels: Optional[List[str]] = None,
         stage: Optional[str] = None,
-        chapter: Optional[int] = None
+        chapter: Optional[int] = None,
+        projection: str = "full",
+        max_nodes: Optional[int] = None,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Fetch a subgraph based on filters."""
+        """Fetch a subgraph based on filters.
+        
+        Args:
+            projection: "full" for all properties, "summary" for id, labels and
+                display name only (details via get_nodes)
+            max_nodes: Node budget; the lowest-degree nodes are pruned beyond it
+            page_size: Nodes per page; the response carries next_cursor
+            cursor: Cursor from the previous page
+        """
+        shaping = {"projection": projection, "max_nodes": max_nodes, "page_size": page_size, "cursor": cursor}
+        
         # Use memory store if Neo4j is not available
         if not NEO4J_AVAILABLE:
             memory_store = get_memory_store()
-            return memory_store.get_subgraph(project_id, focus_node_id, depth, labels, stage, chapter)
+            return memory_store.get_subgraph(project_id, focus_node_id, depth, labels, stage, chapter, **shaping)
         
         try:
             with get_neo4j_session() as session:
@@ -179,23 +225,74 @@ class GraphRepository:
                                     "properties": dict(rel)
                                 })
                 
-                return {"nodes": nodes, "edges": edges}
+                return shape_subgraph(
+                    nodes,
+                    edges,
+                    pinned=[focus_node_id or project_id],
+                    **shaping
+                )
         except ConnectionError:
             # Fallback to memory store on connection error
             logger.info(f"Neo4j connection failed, using memory store fallback for project {project_id}")
             memory_store = get_memory_store()
-            return memory_store.get_subgraph(project_id, focus_node_id, depth, labels, stage, chapter)
+            return memory_store.get_subgraph(project_id, focus_node_id, depth, labels, stage, chapter, **shaping)
         except Exception as e:
             # Other errors - try memory store fallback
             error_msg = str(e)
             if "connection" in error_msg.lower() or "refused" in error_msg.lower() or "ServiceUnavailable" in error_msg:
                 logger.info(f"Neo4j not available, using memory store fallback for project {project_id}")
                 memory_store = get_memory_store()
-                return memory_store.get_subgraph(project_id, focus_node_id, depth, labels, stage, chapter)
+                return memory_store.get_subgraph(project_id, focus_node_id, depth, labels, stage, chapter, **shaping)
             # Re-raise unexpected errors
             raise
     
     @staticmethod
+    def get_nodes(project_id: str, node_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch full details of a project's nodes by id (for lazily expanding summary subgraphs).
+
+        Ids of nodes outside the project are skipped. A node belongs to the
+        project if the project links to it, directly or through one of its
+        chapters' scenes, as in the validation loader.
+        """
+        if not NEO4J_AVAILABLE:
+            return get_memory_store().get_nodes(project_id, node_ids)
+        
+        try:
+            with get_neo4j_session() as session:
+                query = """
+                MATCH (n:Project {id: $project_id})
+                WHERE n.id IN $node_ids
+                RETURN n
+                UNION
+                MATCH (project:Project {id: $project_id})-->(n)
+                WHERE n.id IN $node_ids
+                RETURN n
+                UNION
+                MATCH (project:Project {id: $project_id})-[:HAS_CHAPTER]->(:Chapter)-[:HAS_SCENE]->(n)
+                WHERE n.id IN $node_ids
+                RETURN n
+                """
+                result = session.run(query, project_id=project_id, node_ids=node_ids)
+                return [
+                    {
+                        "id": record["n"]["id"],
+                        "labels": list(record["n"].labels),
+                        "properties": dict(record["n"])
+                    }
+                    for record in result
+                ]
+        except ConnectionError:
+            logger.info(f"Neo4j connection failed, using memory store fallback for get_nodes")
+            return get_memory_store().get_nodes(project_id, node_ids)
+        except Exception as e:
+            error_msg = str(e)
+            if "connection" in error_msg.lower() or "refused" in error_msg.lower() or "ServiceUnavailable" in error_msg:
+                logger.info(f"Neo4j not available, using memory store fallback for get_nodes")
+                return get_memory_store().get_nodes(project_id, node_ids)
+            raise
+    
+    @staticmethod
+    @_tracks_mutation(lambda args, result: (args["project_id"], [args["project_id"], result.get("id")]))
     def create_node(
         project_id: str,
         labels: List[str],
@@ -246,6 +343,7 @@ class GraphRepository:
             raise
     
     @staticmethod
+    @_tracks_mutation(lambda args, result: (None, [args["node_id"]]))
     def update_node(node_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
         """Update node properties."""
         # Use memory store if Neo4j is not available
@@ -285,6 +383,7 @@ class GraphRepository:
             raise
     
     @staticmethod
+    @_tracks_mutation(lambda args, result: (None, [args["node_id"]]))
     def delete_node(node_id: str) -> bool:
         """Delete a node and its relationships."""
         # Use memory store if Neo4j is not available
@@ -316,6 +415,7 @@ class GraphRepository:
             raise
     
     @staticmethod
+    @_tracks_mutation(lambda args, result: (None, [args["source_id"], args["target_id"]]))
     def create_relationship(
         source_id: str,
         target_id: str,
@@ -383,6 +483,7 @@ class GraphRepository:
             raise
     
     @staticmethod
+    @_tracks_mutation(lambda args, result: (None, [args["source_id"], args["target_id"]]))
     def delete_relationship(source_id: str, target_id: str, rel_type: str) -> bool:
         """Delete a relationship."""
         # Use memory store if Neo4j is not available
@@ -414,12 +515,18 @@ class GraphRepository:
             raise
     
     @staticmethod
-    def search(project_id: str, query: str, labels: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    def search(
+        project_id: str,
+        query: str,
+        labels: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
         """Search nodes using fulltext index."""
         # Use memory store if Neo4j is not available
         if not NEO4J_AVAILABLE:
             memory_store = get_memory_store()
-            return memory_store.search(project_id, query, labels)
+            return memory_store.search(project_id, query, labels, limit=limit, offset=offset)
         
         try:
             with get_neo4j_session() as session:
@@ -435,9 +542,10 @@ class GraphRepository:
                 WHERE 1=1 {label_filter}
                 RETURN n, score
                 ORDER BY score DESC
-                LIMIT 50
+                SKIP $offset
+                LIMIT $limit
                 """
-                result = session.run(search_query, project_id=project_id, query=query)
+                result = session.run(search_query, project_id=project_id, query=query, offset=offset, limit=limit)
                 nodes = []
                 for record in result:
                     node = record["n"]
@@ -452,12 +560,12 @@ class GraphRepository:
             # Fallback to memory store
             logger.info(f"Neo4j connection failed, using memory store fallback for search")
             memory_store = get_memory_store()
-            return memory_store.search(project_id, query, labels)
+            return memory_store.search(project_id, query, labels, limit=limit, offset=offset)
         except Exception as e:
             error_msg = str(e)
             if "connection" in error_msg.lower() or "refused" in error_msg.lower() or "ServiceUnavailable" in error_msg:
                 logger.info(f"Neo4j not available, using memory store fallback for search")
                 memory_store = get_memory_store()
-                return memory_store.search(project_id, query, labels)
+                return memory_store.search(project_id, query, labels, limit=limit, offset=offset)
             raise
 
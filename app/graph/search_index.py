@@ -0,0 +1,243 @@
+"""Tokenized inverted index with BM25 ranking for the in-memory graph store."""
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable
+from collections import Counter, defaultdict
+import bisect
+import heapq
+import math
+import re
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Properties that are identifiers rather than searchable text
+NON_TEXT_PROPERTIES = {"id"}
+
+# Relative weights of expanded query terms
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def node_text(properties: Dict[str, Any]) -> str:
+    """Concatenate the searchable string properties of a node."""
+    return " ".join(
+        value for key, value in properties.items()
+        if key not in NON_TEXT_PROPERTIES and isinstance(value, str)
+    )
+
+
+def _within_edit_distance(a: str, b: str, max_distance: int) -> bool:
+    """Return True if the Levenshtein distance between a and b is <= max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+def _bigrams(term: str) -> Counter:
+    """Bigrams of a term padded with boundary markers, which never occur inside a token."""
+    padded = f"^{term}$"
+    return Counter(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+def _fuzzy_budget(term: str) -> int:
+    """Allowed edit distance for a query term of a given length."""
+    if len(term) < 4:
+        return 0
+    if len(term) < 8:
+        return 1
+    return 2
+
+
+class InvertedIndex:
+    """Inverted index over the nodes of a single project.
+
+    Postings map each term to the term frequency per node, so a query only
+    touches the postings of its (expanded) terms. Scores use Okapi BM25.
+    Fuzzy matching looks up candidate terms through a bigram index rather
+    than scanning the vocabulary.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {node_id: tf}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}  # node_id -> {term: tf}
+        self._doc_lengths: Dict[str, int] = {}
+        self._label_index: Dict[str, Set[str]] = defaultdict(set)  # label -> node_ids
+        self._doc_labels: Dict[str, List[str]] = {}
+        self._total_length = 0
+        self._vocabulary: List[str] = []  # sorted, rebuilt lazily
+        self._vocabulary_dirty = False
+        self._bigram_terms: Dict[str, Dict[str, int]] = defaultdict(dict)  # bigram -> {term: count}
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._doc_lengths
+
+    def add(self, node_id: str, labels: List[str], properties: Dict[str, Any]):
+        """Index a node, replacing any previous entry for it."""
+        if node_id in self._doc_lengths:
+            self.remove(node_id)
+
+        term_counts: Dict[str, int] = defaultdict(int)
+        for token in tokenize(node_text(properties)):
+            term_counts[token] += 1
+
+        for term, count in term_counts.items():
+            if term not in self._postings:
+                self._vocabulary_dirty = True
+                for gram, gram_count in _bigrams(term).items():
+                    self._bigram_terms[gram][term] = gram_count
+            self._postings[term][node_id] = count
+
+        length = sum(term_counts.values())
+        self._doc_terms[node_id] = dict(term_counts)
+        self._doc_lengths[node_id] = length
+        self._total_length += length
+
+        self._doc_labels[node_id] = list(labels)
+        for label in labels:
+            self._label_index[label].add(node_id)
+
+    def remove(self, node_id: str) -> bool:
+        """Drop a node from the index."""
+        if node_id not in self._doc_lengths:
+            return False
+
+        for term in self._doc_terms.pop(node_id):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(node_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+                for gram in _bigrams(term):
+                    gram_terms = self._bigram_terms[gram]
+                    gram_terms.pop(term, None)
+                    if not gram_terms:
+                        del self._bigram_terms[gram]
+
+        self._total_length -= self._doc_lengths.pop(node_id)
+
+        for label in self._doc_labels.pop(node_id, []):
+            label_nodes = self._label_index.get(label)
+            if label_nodes is not None:
+                label_nodes.discard(node_id)
+                if not label_nodes:
+                    del self._label_index[label]
+        return True
+
+    def _sorted_vocabulary(self) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        return self._vocabulary
+
+    def _prefix_terms(self, prefix: str) -> Iterable[str]:
+        vocabulary = self._sorted_vocabulary()
+        start = bisect.bisect_left(vocabulary, prefix)
+        for term in vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def _fuzzy_terms(self, term: str) -> Iterable[str]:
+        budget = _fuzzy_budget(term)
+        if budget == 0:
+            return
+        shared: Dict[str, int] = defaultdict(int)
+        for gram, count in _bigrams(term).items():
+            for candidate, candidate_count in self._bigram_terms.get(gram, {}).items():
+                shared[candidate] += min(count, candidate_count)
+        for candidate, common in shared.items():
+            if candidate == term or abs(len(candidate) - len(term)) > budget:
+                continue
+            # Each edit changes at most two padded bigrams, so terms within the
+            # budget share at least this many; fewer rules the candidate out
+            if common < max(len(term), len(candidate)) + 1 - 2 * budget:
+                continue
+            if _within_edit_distance(term, candidate, budget):
+                yield candidate
+
+    def _expand(self, query_terms: List[str], prefix: bool, fuzzy: bool) -> Dict[str, float]:
+        """Map the query terms to index terms with a weight per match type."""
+        expanded: Dict[str, float] = {}
+
+        def _keep(term: str, weight: float):
+            if weight > expanded.get(term, 0.0):
+                expanded[term] = weight
+
+        for term in query_terms:
+            if term in self._postings:
+                _keep(term, 1.0)
+            if prefix:
+                for candidate in self._prefix_terms(term):
+                    _keep(candidate, PREFIX_WEIGHT)
+            if fuzzy:
+                for candidate in self._fuzzy_terms(term):
+                    _keep(candidate, FUZZY_WEIGHT)
+        return expanded
+
+    def search(
+        self,
+        query: str,
+        labels: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0,
+        prefix: bool = True,
+        fuzzy: bool = True
+    ) -> Tuple[int, List[Tuple[str, float]]]:
+        """Rank nodes against a query.
+
+        Returns:
+            Tuple of (total number of matches, [(node_id, score), ...]) for
+            the requested page, ordered by descending score.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        doc_count = len(self._doc_lengths)
+        if not query_terms or doc_count == 0:
+            return 0, []
+
+        allowed: Optional[Set[str]] = None
+        if labels:
+            allowed = set()
+            for label in labels:
+                allowed |= self._label_index.get(label, set())
+            if not allowed:
+                return 0, []
+
+        avg_length = self._total_length / doc_count if doc_count else 0.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term, weight in self._expand(query_terms, prefix, fuzzy).items():
+            postings = self._postings[term]
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for node_id, tf in postings.items():
+                if allowed is not None and node_id not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * (self._doc_lengths[node_id] / avg_length if avg_length else 0.0)
+                scores[node_id] += weight * idf * (tf * (self.k1 + 1)) / (tf + self.k1 * length_norm)
+
+        total = len(scores)
+        # Ties are broken by node id so paging is stable across calls
+        top = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return total, top[offset:offset + limit]
@@ -0,0 +1,129 @@
+"""Level-of-detail shaping and cursor paging for subgraph payloads.
+
+Both the Neo4j repository and the memory store collect a subgraph and hand it
+to `shape_subgraph`, which can:
+
+- project nodes down to a summary (id, labels and a display name) so long
+  properties such as synopses are fetched lazily per node
+- prune the graph to a node budget, keeping the best-connected nodes
+- split the result into pages addressed by an opaque cursor
+
+Nodes are ordered by descending degree (ties by id) so the most connected part
+of the graph arrives first. Every edge is sent exactly once, with the page
+that contains the later of its two endpoints.
+"""
+from typing import List, Dict, Any, Optional, Set
+from collections import defaultdict
+import base64
+import json
+
+# Properties kept in the summary projection
+SUMMARY_PROPERTIES = ["id", "name", "title", "number", "status"]
+
+PROJECTIONS = ("full", "summary")
+
+
+def encode_cursor(offset: int) -> str:
+    """Encode a page offset as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Decode a cursor back into a page offset."""
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())["o"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset
+
+
+def project_node(node: Dict[str, Any], projection: str) -> Dict[str, Any]:
+    """Apply a property projection to a node."""
+    if projection == "full":
+        return node
+    properties = node.get("properties", {})
+    return {
+        "id": node["id"],
+        "labels": node.get("labels", []),
+        "properties": {key: properties[key] for key in SUMMARY_PROPERTIES if key in properties}
+    }
+
+
+def project_edge(edge: Dict[str, Any], projection: str) -> Dict[str, Any]:
+    """Apply a property projection to an edge."""
+    if projection == "full":
+        return edge
+    return {key: edge[key] for key in ("id", "type", "from", "to") if key in edge}
+
+
+def shape_subgraph(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    projection: str = "full",
+    max_nodes: Optional[int] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    pinned: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Prune, page and project a collected subgraph.
+
+    Args:
+        nodes: Node dicts with id, labels and properties
+        edges: Edge dicts with id, type, from, to and properties
+        projection: "full" or "summary"
+        max_nodes: Node budget; lowest-degree nodes are pruned beyond it
+        page_size: Nodes per page; None returns everything in one page
+        cursor: Cursor returned by a previous page
+        pinned: Node ids that are never pruned (project or focus node)
+
+    Returns:
+        Dict with nodes, edges, total_nodes, truncated and next_cursor
+    """
+    if projection not in PROJECTIONS:
+        raise ValueError(f"Invalid projection: {projection}")
+
+    node_ids = {node["id"] for node in nodes}
+    unique_edges: Dict[str, Dict[str, Any]] = {}
+    degree: Dict[str, int] = defaultdict(int)
+    for edge in edges:
+        if edge["from"] in node_ids and edge["to"] in node_ids and edge["id"] not in unique_edges:
+            unique_edges[edge["id"]] = edge
+            degree[edge["from"]] += 1
+            degree[edge["to"]] += 1
+
+    pinned_ids: Set[str] = set(pinned or []) & node_ids
+    ordered = sorted(
+        nodes,
+        key=lambda node: (node["id"] not in pinned_ids, -degree[node["id"]], node["id"])
+    )
+
+    truncated = False
+    if max_nodes is not None and len(ordered) > max_nodes:
+        ordered = ordered[:max(max_nodes, len(pinned_ids))]
+        truncated = True
+
+    position = {node["id"]: index for index, node in enumerate(ordered)}
+    offset = decode_cursor(cursor)
+    end = len(ordered) if page_size is None else min(offset + page_size, len(ordered))
+    page_nodes = ordered[offset:end]
+
+    page_edges = []
+    for edge in unique_edges.values():
+        source = position.get(edge["from"])
+        target = position.get(edge["to"])
+        if source is None or target is None:
+            continue
+        if offset <= max(source, target) < end:
+            page_edges.append(project_edge(edge, projection))
+
+    return {
+        "nodes": [project_node(node, projection) for node in page_nodes],
+        "edges": page_edges,
+        "total_nodes": len(ordered),
+        "truncated": truncated,
+        "next_cursor": encode_cursor(end) if end < len(ordered) else None
+    }
@@ -3,6 +3,8 @@ from typing import Dict, Any, List
 import structlog
 from app.graph.connection import get_neo4j_session
 from app.graph.repository import GraphRepository
+from app.graph.render_cache import render_cache
+from app.graph.validation_engine import validation_engine
 
 logger = structlog.get_logger(__name__)
 
@@ -37,6 +39,8 @@ class GraphSyncer:
                 # This happens when syncing from database
                 pass
             
+            render_cache.invalidate_project(project_id)
+            validation_engine.reset(project_id)
             logger.info(f"Synced project {project_id} to graph")
         except ConnectionError as e:
             logger.warning(f"Neo4j not available, skipping sync for project {project_id}")
@@ -83,6 +87,8 @@ class GraphSyncer:
             if artifacts.get("outline"):
                 GraphSyncer._sync_chapters_scenes(project_id, artifacts["outline"], artifacts.get("draft_chapters"))
             
+            render_cache.invalidate_project(project_id)
+            validation_engine.reset(project_id)
             logger.info(f"Synced project {project_id} from artifacts")
         except ConnectionError as e:
             logger.warning(f"Neo4j not available, skipping sync from artifacts for project {project_id}")
@@ -0,0 +1,522 @@
+"""In-process graph validation engine.
+
+The project's relevant subgraph is loaded once into a `ProjectGraph` and all
+checks run locally in (near) linear time:
+
+- PRECEDES cycles are found with Tarjan's strongly connected components
+- character/location conflicts use a sweep line over each character's scenes
+- duplicate entities are grouped by a normalized-name hash
+
+Issues are kept per "owner" (a node, a character, a name group or a PRECEDES
+component) so that a later run can recompute only the owners affected by the
+nodes touched since the previous run.
+"""
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable, Callable
+from collections import defaultdict, deque
+import heapq
+import threading
+
+# (labels, properties) per node id and (source_id, rel_type, target_id) edges
+NodeData = Dict[str, Tuple[List[str], Dict[str, Any]]]
+EdgeData = List[Tuple[str, str, str]]
+
+# Labels whose members are checked for duplicates
+DUPLICATE_LABELS = ["Character", "Location", "Faction", "Artifact", "Concept"]
+
+
+class ValidationIssue:
+    """Represents a validation issue."""
+    def __init__(self, type: str, severity: str, description: str, node_ids: List[str] = None):
+        self.type = type
+        self.severity = severity  # "error", "warning", "info"
+        self.description = description
+        self.node_ids = node_ids or []
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "severity": self.severity,
+            "description": self.description,
+            "node_ids": self.node_ids
+        }
+
+
+class ProjectGraph:
+    """Adjacency-list view of a project's nodes and relationships."""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}  # node_id -> {labels, properties}
+        self.by_label: Dict[str, Set[str]] = defaultdict(set)
+        self.out_edges: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self.in_edges: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+
+    @classmethod
+    def build(cls, nodes: NodeData, edges: EdgeData) -> "ProjectGraph":
+        graph = cls()
+        for node_id, (labels, properties) in nodes.items():
+            graph.add_node(node_id, labels, properties)
+        for source_id, rel_type, target_id in edges:
+            graph.add_edge(source_id, rel_type, target_id)
+        return graph
+
+    def add_node(self, node_id: str, labels: List[str], properties: Dict[str, Any]):
+        self.nodes[node_id] = {"labels": list(labels), "properties": dict(properties or {})}
+        for label in labels:
+            self.by_label[label].add(node_id)
+
+    def remove_node(self, node_id: str):
+        node = self.nodes.pop(node_id, None)
+        if node is None:
+            return
+        for label in node["labels"]:
+            self.by_label[label].discard(node_id)
+        for rel_type, targets in self.out_edges.pop(node_id, {}).items():
+            for target_id in targets:
+                self.in_edges[target_id][rel_type].discard(node_id)
+        for rel_type, sources in self.in_edges.pop(node_id, {}).items():
+            for source_id in sources:
+                self.out_edges[source_id][rel_type].discard(node_id)
+
+    def add_edge(self, source_id: str, rel_type: str, target_id: str):
+        """Add an edge; edges leaving the project's subgraph are ignored."""
+        if source_id in self.nodes and target_id in self.nodes:
+            self.out_edges[source_id][rel_type].add(target_id)
+            self.in_edges[target_id][rel_type].add(source_id)
+
+    def has_label(self, node_id: str, label: str) -> bool:
+        node = self.nodes.get(node_id)
+        return node is not None and label in node["labels"]
+
+    def prop(self, node_id: str, key: str, default: Any = None) -> Any:
+        node = self.nodes.get(node_id)
+        return node["properties"].get(key, default) if node else default
+
+    def targets(self, node_id: str, rel_type: str, label: Optional[str] = None) -> List[str]:
+        found = self.out_edges.get(node_id, {}).get(rel_type, ())
+        return sorted(t for t in found if label is None or self.has_label(t, label))
+
+    def sources(self, node_id: str, rel_type: str, label: Optional[str] = None) -> List[str]:
+        found = self.in_edges.get(node_id, {}).get(rel_type, ())
+        return sorted(s for s in found if label is None or self.has_label(s, label))
+
+    def neighbours(self, node_id: str) -> Set[str]:
+        result: Set[str] = set()
+        for targets in self.out_edges.get(node_id, {}).values():
+            result |= targets
+        for sources in self.in_edges.get(node_id, {}).values():
+            result |= sources
+        return result
+
+
+# Issues per owner key, per check
+IssueMap = Dict[Any, List[ValidationIssue]]
+
+
+def check_orphan_scenes(graph: ProjectGraph, scope: Optional[Set[str]] = None) -> IssueMap:
+    """Scenes not attached to any chapter."""
+    issues: IssueMap = {}
+    for scene_id in _scoped(graph.by_label["Scene"], scope):
+        if not graph.sources(scene_id, "HAS_SCENE", "Chapter"):
+            issues[scene_id] = [ValidationIssue(
+                type="orphan_scene",
+                severity="error",
+                description=f"Scene '{graph.prop(scene_id, 'title')}' is not attached to any chapter",
+                node_ids=[scene_id]
+            )]
+    return issues
+
+
+def check_scenes_missing_location(graph: ProjectGraph, scope: Optional[Set[str]] = None) -> IssueMap:
+    """Scenes without an OCCURS_IN location."""
+    issues: IssueMap = {}
+    for scene_id in _scoped(graph.by_label["Scene"], scope):
+        if not graph.targets(scene_id, "OCCURS_IN", "Location"):
+            issues[scene_id] = [ValidationIssue(
+                type="missing_location",
+                severity="warning",
+                description=f"Scene '{graph.prop(scene_id, 'title')}' does not have a location",
+                node_ids=[scene_id]
+            )]
+    return issues
+
+
+def check_undefined_concepts(graph: ProjectGraph, scope: Optional[Set[str]] = None) -> IssueMap:
+    """Concepts without a definition."""
+    issues: IssueMap = {}
+    for concept_id in _scoped(graph.by_label["Concept"], scope):
+        if not graph.prop(concept_id, "definition"):
+            issues[concept_id] = [ValidationIssue(
+                type="undefined_concept",
+                severity="warning",
+                description=f"Concept '{graph.prop(concept_id, 'name')}' has no definition",
+                node_ids=[concept_id]
+            )]
+    return issues
+
+
+def _scoped(node_ids: Iterable[str], scope: Optional[Set[str]]) -> List[str]:
+    if scope is None:
+        return sorted(node_ids)
+    return sorted(n for n in node_ids if n in scope)
+
+
+def strongly_connected_components(nodes: Iterable[str], successors: Callable[[str], Iterable[str]]) -> List[List[str]]:
+    """Tarjan's algorithm, iterative so long scene chains cannot hit the recursion limit."""
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = 0
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        work = [(root, iter(successors(root)))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def _cycle_through(start: str, members: Set[str], successors: Callable[[str], Iterable[str]]) -> List[str]:
+    """Shortest cycle from start back to itself inside one component."""
+    parents: Dict[str, Optional[str]] = {}
+    queue = deque()
+    for child in successors(start):
+        if child == start:
+            return [start, start]
+        if child in members and child not in parents:
+            parents[child] = None
+            queue.append(child)
+    while queue:
+        node = queue.popleft()
+        for child in successors(node):
+            if child == start:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return [start] + list(reversed(path)) + [start]
+            if child in members and child not in parents:
+                parents[child] = node
+                queue.append(child)
+    return [start]
+
+
+def check_precedes_cycles(graph: ProjectGraph, scope: Optional[Set[str]] = None) -> IssueMap:
+    """Cycles in PRECEDES relationships between scenes.
+
+    Owners are PRECEDES components (frozensets of scene ids); with a scope
+    only the components containing scoped scenes are analysed.
+    """
+    def successors(scene_id: str) -> List[str]:
+        return graph.targets(scene_id, "PRECEDES", "Scene")
+
+    scenes = sorted(graph.by_label["Scene"])
+    if scope is not None:
+        scenes = sorted(_precedes_component(graph, [s for s in scope if graph.has_label(s, "Scene")]))
+
+    issues: IssueMap = {}
+    for component in strongly_connected_components(scenes, successors):
+        members = set(component)
+        start = min(component)
+        if len(component) == 1 and start not in successors(start):
+            continue
+        cycle = _cycle_through(start, members, successors)
+        issues[frozenset(members)] = [ValidationIssue(
+            type="precedes_cycle",
+            severity="error",
+            description=f"Cycle detected in PRECEDES relationships: {' -> '.join(cycle)}",
+            node_ids=cycle
+        )]
+    return issues
+
+
+def _precedes_component(graph: ProjectGraph, seeds: Iterable[str]) -> Set[str]:
+    """Scenes weakly connected to the seeds through PRECEDES."""
+    seen: Set[str] = set()
+    queue = deque(seeds)
+    while queue:
+        scene_id = queue.popleft()
+        if scene_id in seen:
+            continue
+        seen.add(scene_id)
+        queue.extend(graph.targets(scene_id, "PRECEDES", "Scene"))
+        queue.extend(graph.sources(scene_id, "PRECEDES", "Scene"))
+    return seen
+
+
+def check_character_location_conflicts(graph: ProjectGraph, scope: Optional[Set[str]] = None) -> IssueMap:
+    """Characters appearing in overlapping scenes at different locations.
+
+    For each character the timed scenes are swept in start order while the
+    scenes still running are kept in a heap keyed by end time, so only
+    actually overlapping pairs are compared.
+    """
+    issues: IssueMap = {}
+    for char_id in _scoped(graph.by_label["Character"], scope):
+        intervals = []
+        for scene_id in graph.targets(char_id, "APPEARS_IN", "Scene"):
+            start = graph.prop(scene_id, "timeStart")
+            end = graph.prop(scene_id, "timeEnd")
+            locations = graph.targets(scene_id, "OCCURS_IN", "Location")
+            if start is None or end is None or not locations:
+                continue
+            intervals.append((start, end, scene_id, locations))
+        if len(intervals) < 2:
+            continue
+
+        try:
+            intervals.sort(key=lambda interval: (interval[0], interval[2]))
+        except TypeError:
+            # Mixed time representations; fall back to comparing their text
+            intervals = [(str(s), str(e), scene_id, locs) for s, e, scene_id, locs in intervals]
+            intervals.sort(key=lambda interval: (interval[0], interval[2]))
+
+        char_issues = []
+        active: List[Tuple[Any, str, List[str]]] = []  # heap of (end, scene_id, locations)
+        for start, end, scene_id, locations in intervals:
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, other_id, other_locations in sorted(active, key=lambda item: item[1]):
+                conflict = next(
+                    ((l1, l2) for l1 in other_locations for l2 in locations if l1 != l2),
+                    None
+                )
+                if conflict:
+                    char_issues.append(ValidationIssue(
+                        type="character_location_conflict",
+                        severity="error",
+                        description=(
+                            f"Character '{graph.prop(char_id, 'name')}' appears in overlapping scenes at different "
+                            f"locations: '{graph.prop(other_id, 'title')}' ({graph.prop(conflict[0], 'name')}) and "
+                            f"'{graph.prop(scene_id, 'title')}' ({graph.prop(conflict[1], 'name')})"
+                        ),
+                        node_ids=[char_id, other_id, scene_id]
+                    ))
+            heapq.heappush(active, (end, scene_id, locations))
+        if char_issues:
+            issues[char_id] = char_issues
+    return issues
+
+
+def duplicate_key(graph: ProjectGraph, node_id: str) -> Optional[Tuple[str, str]]:
+    """Hash key (label, normalized name) used to group duplicate entities."""
+    name = graph.prop(node_id, "name")
+    if not isinstance(name, str) or not name.strip():
+        return None
+    for label in DUPLICATE_LABELS:
+        if graph.has_label(node_id, label):
+            return label, " ".join(name.casefold().split())
+    return None
+
+
+def check_duplicate_entities(graph: ProjectGraph, scope: Optional[Set[Tuple[str, str]]] = None) -> IssueMap:
+    """Entities of the same label whose names normalize to the same key."""
+    groups: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+    for label in DUPLICATE_LABELS:
+        for node_id in graph.by_label[label]:
+            key = duplicate_key(graph, node_id)
+            if key is not None and (scope is None or key in scope):
+                groups[key].append(node_id)
+
+    issues: IssueMap = {}
+    for key, ids in groups.items():
+        if len(ids) < 2:
+            continue
+        label = key[0]
+        ids = sorted(ids)
+        issues[key] = [ValidationIssue(
+            type=f"duplicate_{label.lower()}",
+            severity="warning",
+            description=f"Multiple {label.lower()}s with name '{graph.prop(ids[0], 'name')}' found. Consider merging.",
+            node_ids=ids
+        )]
+    return issues
+
+
+# Check name -> function, in report order
+CHECKS = {
+    "orphan_scenes": check_orphan_scenes,
+    "missing_location": check_scenes_missing_location,
+    "precedes_cycles": check_precedes_cycles,
+    "character_location_conflicts": check_character_location_conflicts,
+    "undefined_concepts": check_undefined_concepts,
+    "duplicate_entities": check_duplicate_entities,
+}
+
+
+class GraphLoader:
+    """Source of project subgraphs for the validation engine."""
+
+    def load_project(self, project_id: str) -> Tuple[NodeData, EdgeData]:
+        """Load every node of the project and the relationships between them."""
+        raise NotImplementedError
+
+    def load_nodes(self, project_id: str, node_ids: List[str]) -> Tuple[NodeData, EdgeData]:
+        """Load the given nodes (if they still belong to the project) and their relationships."""
+        raise NotImplementedError
+
+
+class _ProjectValidationState:
+    def __init__(self, graph: ProjectGraph):
+        self.graph = graph
+        self.issues: Dict[str, IssueMap] = {}
+        self.touched: Set[str] = set()
+
+
+class ValidationEngine:
+    """Runs validation checks and remembers results for incremental runs."""
+
+    def __init__(self):
+        self._states: Dict[str, _ProjectValidationState] = {}
+        self._lock = threading.RLock()
+
+    def mark_touched(self, node_ids: Iterable[str], project_id: Optional[str] = None):
+        """Record nodes changed since the last run of their project."""
+        node_ids = [node_id for node_id in node_ids if node_id]
+        with self._lock:
+            if project_id is not None:
+                states = [self._states[project_id]] if project_id in self._states else []
+            else:
+                states = list(self._states.values())
+            for state in states:
+                state.touched.update(node_ids)
+
+    def reset(self, project_id: str):
+        """Forget a project's cached graph; the next run is a full one."""
+        with self._lock:
+            self._states.pop(project_id, None)
+
+    def validate(self, project_id: str, loader: GraphLoader, incremental: bool = True) -> List[ValidationIssue]:
+        """Validate a project, re-checking only touched nodes when possible."""
+        with self._lock:
+            state = self._states.get(project_id)
+            touched = set(state.touched) if state else set()
+            if state:
+                state.touched.clear()
+
+        if state is None or not incremental:
+            nodes, edges = loader.load_project(project_id)
+            state = _ProjectValidationState(ProjectGraph.build(nodes, edges))
+            state.issues = {name: check(state.graph) for name, check in CHECKS.items()}
+        elif touched:
+            try:
+                self._revalidate(project_id, state, touched, loader)
+            except Exception:
+                with self._lock:
+                    self._states.pop(project_id, None)
+                raise
+
+        with self._lock:
+            # Keep touches that arrived while validating
+            previous = self._states.get(project_id)
+            if previous is not None and previous is not state:
+                state.touched |= previous.touched
+            self._states[project_id] = state
+        return self._collect(state)
+
+    def _revalidate(self, project_id: str, state: _ProjectValidationState, touched: Set[str], loader: GraphLoader):
+        graph = state.graph
+        affected = set(touched)
+        old_keys = set()
+        for node_id in touched:
+            affected |= graph.neighbours(node_id)
+            key = duplicate_key(graph, node_id)
+            if key:
+                old_keys.add(key)
+        old_characters = self._characters_for(graph, affected)
+
+        # Patch the cached graph with the current state of the touched nodes
+        nodes, edges = loader.load_nodes(project_id, sorted(touched))
+        for node_id in touched:
+            graph.remove_node(node_id)
+        for node_id, (labels, properties) in nodes.items():
+            graph.add_node(node_id, labels, properties)
+        for source_id, rel_type, target_id in edges:
+            graph.add_edge(source_id, rel_type, target_id)
+
+        for node_id in nodes:
+            affected |= graph.neighbours(node_id)
+        node_scope = {node_id for node_id in affected}
+        duplicate_scope = old_keys | {key for key in (duplicate_key(graph, n) for n in touched) if key}
+        character_scope = old_characters | self._characters_for(graph, affected)
+
+        scopes = {
+            "orphan_scenes": node_scope,
+            "missing_location": node_scope,
+            "precedes_cycles": node_scope,
+            "character_location_conflicts": character_scope,
+            "undefined_concepts": node_scope,
+            "duplicate_entities": duplicate_scope,
+        }
+        for name, check in CHECKS.items():
+            scope = scopes[name]
+            issues = state.issues.setdefault(name, {})
+            if name == "precedes_cycles":
+                component = _precedes_component(graph, [n for n in scope if graph.has_label(n, "Scene")])
+                stale = [key for key in issues if key & (component | scope)]
+            else:
+                stale = [key for key in issues if key in scope]
+            for key in stale:
+                del issues[key]
+            issues.update(check(graph, scope))
+
+    @staticmethod
+    def _characters_for(graph: ProjectGraph, node_ids: Set[str]) -> Set[str]:
+        """Characters whose conflict check depends on any of the nodes."""
+        characters = set()
+        for node_id in node_ids:
+            if graph.has_label(node_id, "Character"):
+                characters.add(node_id)
+            scenes = [node_id] if graph.has_label(node_id, "Scene") else []
+            if graph.has_label(node_id, "Location"):
+                scenes.extend(graph.sources(node_id, "OCCURS_IN", "Scene"))
+            for scene_id in scenes:
+                characters.update(graph.sources(scene_id, "APPEARS_IN", "Character"))
+        return characters
+
+    @staticmethod
+    def _collect(state: _ProjectValidationState) -> List[ValidationIssue]:
+        result = []
+        for name in CHECKS:
+            issue_map = state.issues.get(name, {})
+            for key in sorted(issue_map, key=lambda k: sorted(k) if isinstance(k, frozenset) else k):
+                result.extend(issue_map[key])
+        return result
+
+
+# Global instance
+validation_engine = ValidationEngine()
@@ -56,6 +56,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         from app.graph.schema import create_constraints_and_indexes
         create_constraints_and_indexes()
         logger.info("Neo4j schema initialized")
+        
+        # History used to be stored as Command nodes; move any left into the journal
+        from app.graph.commands import CommandLog
+        try:
+            migrated = CommandLog.migrate_all_graph_commands()
+            if migrated:
+                logger.info("Moved graph commands into the command journal", count=migrated)
+        except Exception as e:
+            logger.warning("Failed to move graph commands into the command journal", error=str(e))
     except ConnectionError as e:
         error_msg = str(e)
         # This is expected - memory store will be used, so just log as info
@@ -71,6 +80,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         else:
             logger.warning("Failed to initialize Neo4j schema", error=str(e))
     
+    # Surface jobs left running by a previous process as interrupted
+    from app.core.job_registry import get_job_registry, close_job_registry
+    get_job_registry().recover()
+    
     # Initialize scheduler
     scheduler = get_scheduler()
     if scheduler:
@@ -85,6 +98,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         scheduler.stop()
         logger.info("Scheduler stopped")
     
+    # Close the shared Ollama connection pool
+    await pdf_qa.close_ollama_client()
+    
+    # Jobs still running in this worker will not finish; record that
+    close_job_registry()
+    
+    # Stop the document extraction processes
+    from app.documents.extract import shutdown_pool
+    shutdown_pool()
+    
+    # Stop the research report rendering processes
+    from app.product_company import research_report
+    research_report.shutdown_pool()
+    
     # Close Neo4j connection
     try:
         from app.graph.connection import close_neo4j_driver
@@ -5,7 +5,7 @@ from sqlalchemy import (
     Column, Integer, String, DateTime, Boolean, Text, 
     ForeignKey, JSON, Index, UniqueConstraint, LargeBinary
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import uuid
 
 from app.database import Base
@@ -50,6 +50,8 @@ class OAuthAccount(Base):
     refresh_token_enc = Column(Text, nullable=True)  # encrypted
     expires_at = Column(DateTime(timezone=True), nullable=True)
     scope = Column(Text, nullable=True)
+    sync_token = Column(Text, nullable=True)  # provider token for incremental sync
+    sync_etag = Column(String(255), nullable=True)  # ETag of the last sync response
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -82,6 +84,7 @@ class Event(Base):
     etag = Column(String(255), nullable=True)
     last_seen_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     hash = Column(String(64), nullable=True)  # For change detection
+    recurrence = Column(JSON(none_as_null=True), nullable=True)  # Series masters only: {"rules": [RRULE/EXDATE lines]}
     
     # Relationships
     user = relationship("User", back_populates="events")
@@ -105,7 +108,8 @@ class Notification(Base):
     channel = Column(String(20), nullable=False)  # email, call
     plan_time = Column(DateTime(timezone=True), nullable=False)
     sent_time = Column(DateTime(timezone=True), nullable=True)
-    status = Column(String(20), default="planned")  # planned, sent, delivered, failed, cancelled
+    status = Column(String(20), default="planned")  # planned, sending, sent, delivered, failed, cancelled
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # When a worker claimed it for sending
     result = Column(JSON, nullable=True)  # Response data from provider
     attempts = Column(Integer, default=0)
     payload = Column(JSON, nullable=True)  # Notification content
@@ -125,6 +129,25 @@ class Notification(Base):
     )
 
 
+class ScheduledJob(Base):
+    """Durable one-shot scheduler job, leased by the instance running it."""
+    __tablename__ = "scheduled_jobs"
+
+    id = Column(String(255), primary_key=True)  # Notification id for notification jobs
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    payload = Column(JSON, nullable=True)  # Job data handed to the executor
+    status = Column(String(20), default="scheduled")  # scheduled, misfired
+    lease_owner = Column(String(64), nullable=True)
+    lease_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        Index("idx_scheduled_jobs_status_run_at", "status", "run_at"),
+    )
+
+
 class Rule(Base):
     """User notification rules."""
     __tablename__ = "rules"
@@ -305,15 +328,15 @@ class BookPublishingHouseProject(Base):
     current_phase = Column(String(50), default="strategy_concept")
     status = Column(String(50), default="in_progress")  # in_progress, complete, stopped, error
     
-    # Project data (stored as JSON for flexibility)
-    project_data = Column(JSON, nullable=True)  # Full BookProject state
-    artifacts = Column(JSON, nullable=True)  # Phase artifacts
-    owner_decisions = Column(JSON, nullable=True)  # Owner decisions per phase
-    chat_log = Column(JSON, nullable=True)  # Agent communication log
-    
-    # Progress tracking
-    progress_log = Column(JSON, nullable=True)  # List of progress entries with timestamps
-    error_log = Column(JSON, nullable=True)  # List of errors with timestamps
+    # Legacy JSON blobs; project state now lives in project_artifacts and
+    # project_log_entries, and these are split into them on first load.
+    # Deferred, so queries of project rows never fetch them unasked.
+    project_data = deferred(Column(JSON, nullable=True), group="legacy_state")  # Full BookProject state
+    artifacts = deferred(Column(JSON, nullable=True), group="legacy_state")  # Phase artifacts
+    owner_decisions = deferred(Column(JSON, nullable=True), group="legacy_state")  # Owner decisions per phase
+    chat_log = deferred(Column(JSON, nullable=True), group="legacy_state")  # Agent communication log
+    progress_log = deferred(Column(JSON, nullable=True), group="legacy_state")  # List of progress entries with timestamps
+    error_log = deferred(Column(JSON, nullable=True), group="legacy_state")  # List of errors with timestamps
     
     # Reference documents
     reference_documents = Column(JSON, nullable=True)  # List of document IDs
@@ -326,7 +349,8 @@ class BookPublishingHouseProject(Base):
     # Indexes
     __table_args__ = (
         Index("idx_bph_status", "status"),
-        Index("idx_bph_updated", "updated_at"),
+        # Listing index: keyset order plus the short summary columns
+        Index("idx_bph_listing", "updated_at", "id", "created_at", "status", "current_phase"),
         Index("idx_bph_phase", "current_phase"),
     )
 
@@ -345,22 +369,22 @@ class CoreDevicesProject(Base):
     model = Column(String(50), default="qwen3:30b")  # Worker agent model
     ceo_model = Column(String(50), nullable=True)  # CEO/manager model
     
-    # Research Team outputs
-    pdf_report = Column(LargeBinary, nullable=True)  # PDF research report (binary)
+    # Research Team outputs; deferred, and streamed in chunks rather than loaded
+    pdf_report = deferred(Column(LargeBinary, nullable=True))  # PDF research report (binary)
     
     # Project state
     current_phase = Column(String(50), default="strategy_idea_intake")
     status = Column(String(50), default="in_progress")  # in_progress, complete, stopped, error
     
-    # Project data (stored as JSON for flexibility)
-    project_data = Column(JSON, nullable=True)  # Full ProductProject state
-    artifacts = Column(JSON, nullable=True)  # Phase artifacts
-    owner_decisions = Column(JSON, nullable=True)  # Owner decisions per phase
-    chat_log = Column(JSON, nullable=True)  # Agent communication log
-    
-    # Progress tracking
-    progress_log = Column(JSON, nullable=True)  # List of progress entries with timestamps
-    error_log = Column(JSON, nullable=True)  # List of errors with timestamps
+    # Legacy JSON blobs; project state now lives in project_artifacts and
+    # project_log_entries, and these are split into them on first load.
+    # Deferred, so queries of project rows never fetch them unasked.
+    project_data = deferred(Column(JSON, nullable=True), group="legacy_state")  # Full ProductProject state
+    artifacts = deferred(Column(JSON, nullable=True), group="legacy_state")  # Phase artifacts
+    owner_decisions = deferred(Column(JSON, nullable=True), group="legacy_state")  # Owner decisions per phase
+    chat_log = deferred(Column(JSON, nullable=True), group="legacy_state")  # Agent communication log
+    progress_log = deferred(Column(JSON, nullable=True), group="legacy_state")  # List of progress entries with timestamps
+    error_log = deferred(Column(JSON, nullable=True), group="legacy_state")  # List of errors with timestamps
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
@@ -370,18 +394,53 @@ class CoreDevicesProject(Base):
     # Indexes
     __table_args__ = (
         Index("idx_cdc_status", "status"),
-        Index("idx_cdc_updated", "updated_at"),
+        # Listing index: keyset order plus the short summary columns
+        Index("idx_cdc_listing", "updated_at", "id", "created_at", "status", "current_phase", "primary_need"),
         Index("idx_cdc_phase", "current_phase"),
     )
 
 
+class ProjectLogEntry(Base):
+    """One entry of a Core Devices or Ferrari project's chat, progress or error log.
+
+    Logs are append-only: an entry is written once, and seq is its index in
+    the in-memory log.
+    """
+    __tablename__ = "project_log_entries"
+
+    project_kind = Column(String(20), primary_key=True)  # core_devices, ferrari
+    project_id = Column(String(36), primary_key=True)
+    log = Column(String(20), primary_key=True)  # chat, progress, error
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+    phase = Column(String(50), nullable=True)
+    entry = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        Index("idx_project_log_phase", "project_kind", "project_id", "log", "phase"),
+    )
+
+
+class ProjectArtifact(Base):
+    """One piece of a Core Devices or Ferrari project's state, rewritten only when its hash changes."""
+    __tablename__ = "project_artifacts"
+
+    project_kind = Column(String(20), primary_key=True)  # core_devices, ferrari
+    project_id = Column(String(36), primary_key=True)
+    key = Column(String(255), primary_key=True)  # state.<field>, artifacts.<phase>, owner_decisions
+    content_hash = Column(String(64), nullable=False)  # sha256 of the canonical JSON
+    content = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class ExamGeneratorProject(Base):
     """Exam Generator project model for persistence."""
     __tablename__ = "exam_generator_projects"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     input_file_path = Column(String(255), nullable=True)
-    input_content = Column(Text, nullable=False)
+    input_content = deferred(Column(Text, nullable=False), group="detail")
     output_directory = Column(String(255), default="exam_outputs")
     model = Column(String(50), default="qwen3:30b")
     
@@ -391,11 +450,12 @@ class ExamGeneratorProject(Base):
     num_problems = Column(Integer, default=10)
     validation_iterations = Column(Integer, default=3)
     
-    # Project data (stored as JSON for flexibility)
-    project_data = Column(JSON, nullable=True)
-    problems = Column(JSON, nullable=True)  # List of ExamProblem dicts
-    validation_results = Column(JSON, nullable=True)  # List of validation results
-    final_review = Column(JSON, nullable=True)  # Final review results
+    # Project data (stored as JSON for flexibility); deferred with the source
+    # content, loaded by detail views with undefer_group("detail")
+    project_data = deferred(Column(JSON, nullable=True), group="detail")
+    problems = deferred(Column(JSON, nullable=True), group="detail")  # List of ExamProblem dicts
+    validation_results = deferred(Column(JSON, nullable=True), group="detail")  # List of validation results
+    final_review = deferred(Column(JSON, nullable=True), group="detail")  # Final review results
     output_files = Column(JSON, nullable=True)  # Dict of output file paths
     
     # Timestamps
@@ -406,6 +466,8 @@ class ExamGeneratorProject(Base):
     # Indexes
     __table_args__ = (
         Index("idx_eg_status", "status"),
-        Index("idx_eg_updated", "updated_at"),
+        # Listing index: keyset order plus the short summary columns
+        Index("idx_eg_listing", "updated_at", "id", "created_at", "status", "current_phase", "num_problems",
+              "output_directory"),
         Index("idx_eg_phase", "current_phase"),
     )
@@ -0,0 +1 @@
+"""PDF Q&A retrieval package."""
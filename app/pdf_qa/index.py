@@ -0,0 +1,276 @@
+"""Persistent BM25 index for PDF Q&A documents.
+
+The index is built once per document (at upload) and stored next to the
+processed pages as a single `.npz` file of flat arrays: a sorted
+vocabulary, CSR postings (per-term offsets into doc ids and term
+frequencies), chunk lengths and pages, and the chunk texts as one UTF-8
+blob. A question only reads the postings of its own terms and scores them
+with vectorised BM25, so latency no longer grows with the document.
+
+Rankings are identical to scoring every chunk: the same tokenizer,
+chunker, BM25 parameters and floating point operations are used, and ties
+keep document order.
+
+Indexes carry a version derived from the tokenizer and chunker settings;
+an index with another version is ignored and rebuilt on next use. Bump
+INDEX_FORMAT when changing their logic rather than their parameters.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+TOKEN_PATTERN = r"[a-zA-Z0-9]{2,}"
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+# Light stopword filtering to reduce "same page every time" bias.
+STOPWORDS = frozenset({
+    "the","and","for","with","that","this","from","into","your","you","are","was","were","what","when","where",
+    "how","why","can","could","should","would","will","their","there","then","than","have","has","had","not",
+    "but","about","also","use","used","using","more","most","some","any","each","such","make","makes","made",
+    "page","chapter","section","example","examples",
+})
+
+CHUNK_CHARS = 1400
+CHUNK_OVERLAP = 250
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TOP_K = 12
+
+INDEX_FORMAT = 1
+INDEX_VERSION = hashlib.sha1(json.dumps(
+    [INDEX_FORMAT, TOKEN_PATTERN, sorted(STOPWORDS), CHUNK_CHARS, CHUNK_OVERLAP]
+).encode()).hexdigest()[:16]
+
+# Loaded indexes kept in memory, most recently used last
+_CACHE_SIZE = 8
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def tokenize(s: str) -> List[str]:
+    """Lowercase alphanumeric tokens of two or more characters, without stopwords."""
+    return [t for t in _TOKEN_RE.findall((s or "").lower()) if t not in STOPWORDS]
+
+
+def chunk_text(text: str, chunk_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split text into overlapping chunks of at most chunk_chars characters."""
+    t = (text or "").strip()
+    if not t:
+        return []
+    if len(t) <= chunk_chars:
+        return [t]
+    chunks: List[str] = []
+    step = max(200, chunk_chars - overlap)
+    i = 0
+    while i < len(t):
+        c = t[i : i + chunk_chars].strip()
+        if c:
+            chunks.append(c)
+        if i + chunk_chars >= len(t):
+            break
+        i += step
+    return chunks
+
+
+class BM25Index:
+    """Immutable BM25 index over the chunks of one document."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.terms = arrays["terms"]
+        self.term_offsets = arrays["term_offsets"]
+        self.post_docs = arrays["post_docs"]
+        self.post_tf = arrays["post_tf"]
+        self.doc_len = arrays["doc_len"]
+        self.chunk_page = arrays["chunk_page"]
+        self.text_offsets = arrays["text_offsets"]
+        self.text_blob = arrays["text_blob"]
+        self.num_pages = int(arrays["num_pages"])
+        self.version = str(arrays["version"])
+
+        n = len(self.doc_len)
+        avgdl = int(self.doc_len.sum()) / max(1, n)
+        self._denom = BM25_K1 * (1 - BM25_B + BM25_B * (self.doc_len / (avgdl or 1.0)))
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, pages: List[str]) -> "BM25Index":
+        """Chunk, tokenize and invert a document's pages."""
+        builder = BM25Builder()
+        builder.add_pages(pages)
+        return builder.finish()
+
+    def save(self, path: Path) -> None:
+        """Write the index atomically to path."""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            terms=self.terms,
+            term_offsets=self.term_offsets,
+            post_docs=self.post_docs,
+            post_tf=self.post_tf,
+            doc_len=self.doc_len,
+            chunk_page=self.chunk_page,
+            text_offsets=self.text_offsets,
+            text_blob=self.text_blob,
+            num_pages=np.array(self.num_pages),
+            version=np.array(self.version),
+        )
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        """Load an index, or return None if it is missing, unreadable or outdated."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["version"]) != INDEX_VERSION:
+                    return None
+                return cls({name: data[name] for name in data.files})
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def chunk(self, doc: int) -> str:
+        start, end = self.text_offsets[doc], self.text_offsets[doc + 1]
+        return self.text_blob[start:end].tobytes().decode("utf-8")
+
+    def search(self, question: str, top_k: int = 6) -> List[Dict[str, Any]]:
+        """Return ranked chunks: [{page (1-based), text, score}]"""
+        q_tokens = tokenize(question)
+        n = self.num_chunks
+        if not q_tokens or n == 0:
+            return []
+
+        positions = np.searchsorted(self.terms, q_tokens)
+        scores = np.zeros(n, dtype=np.float64)
+        touched = []
+        for t, pos in zip(q_tokens, positions):
+            if pos >= len(self.terms) or self.terms[pos] != t:
+                continue
+            start, end = self.term_offsets[pos], self.term_offsets[pos + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end].astype(np.float64)
+            df = int(end - start)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * (tf * (BM25_K1 + 1)) / (tf + self._denom[docs])
+            touched.append(docs)
+        if not touched:
+            return []
+
+        candidates = np.unique(np.concatenate(touched))
+        candidates = candidates[scores[candidates] > 0]
+        k = max(1, min(int(top_k or 6), MAX_TOP_K))
+        if len(candidates) > k:
+            # Keep everything tied with the k-th best score so ties resolve by document order
+            kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= kth]
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return [
+            {"page": int(self.chunk_page[doc]), "text": self.chunk(int(doc)), "score": float(scores[doc])}
+            for doc in candidates[order]
+        ]
+
+
+class BM25Builder:
+    """Builds a BM25Index page by page, so indexing can overlap page extraction."""
+
+    def __init__(self):
+        self.postings: Dict[str, List[List[int]]] = {}
+        self.doc_len: List[int] = []
+        self.chunk_page: List[int] = []
+        self.texts: List[bytes] = []
+        self.num_pages = 0
+
+    def add_pages(self, pages: List[str]) -> None:
+        """Append the next pages of the document, in order."""
+        for page_text in pages:
+            self.num_pages += 1
+            for chunk in chunk_text(page_text):
+                toks = tokenize(chunk)
+                if not toks:
+                    continue
+                doc = len(self.doc_len)
+                tf: Dict[str, int] = {}
+                for t in toks:
+                    tf[t] = tf.get(t, 0) + 1
+                for t, f in tf.items():
+                    entry = self.postings.setdefault(t, [[], []])
+                    entry[0].append(doc)
+                    entry[1].append(f)
+                self.doc_len.append(len(toks))
+                self.chunk_page.append(self.num_pages)
+                self.texts.append(chunk.encode("utf-8"))
+
+    def finish(self) -> BM25Index:
+        """Lay the accumulated postings out as an index."""
+        postings = self.postings
+        terms = sorted(postings)
+        counts = [len(postings[t][0]) for t in terms]
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=term_offsets[1:])
+        post_docs = np.fromiter(
+            (d for t in terms for d in postings[t][0]), dtype=np.int32, count=int(term_offsets[-1])
+        )
+        post_tf = np.fromiter(
+            (f for t in terms for f in postings[t][1]), dtype=np.int32, count=int(term_offsets[-1])
+        )
+        text_offsets = np.zeros(len(self.texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in self.texts], out=text_offsets[1:])
+
+        return BM25Index({
+            "terms": np.array(terms, dtype=str),
+            "term_offsets": term_offsets,
+            "post_docs": post_docs,
+            "post_tf": post_tf,
+            "doc_len": np.array(self.doc_len, dtype=np.int32),
+            "chunk_page": np.array(self.chunk_page, dtype=np.int32),
+            "text_offsets": text_offsets,
+            "text_blob": np.frombuffer(b"".join(self.texts), dtype=np.uint8),
+            "num_pages": np.array(self.num_pages),
+            "version": np.array(INDEX_VERSION),
+        })
+
+
+def load_cached(path: Path, rebuild: Optional[Callable[[], BM25Index]] = None) -> Optional[BM25Index]:
+    """Load an index through a small in-memory cache keyed on path and mtime.
+
+    If the index is missing or outdated, `rebuild` (which must save the new
+    index to path) is called and its result cached. Safe to call from
+    worker threads; loading and rebuilding happen outside the cache lock.
+    """
+    key = str(path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            _cache.move_to_end(key)
+            return cached[1]
+    index = BM25Index.load(path) if mtime is not None else None
+    if index is None:
+        with _cache_lock:
+            _cache.pop(key, None)
+        if rebuild is None:
+            return None
+        index = rebuild()
+        mtime = path.stat().st_mtime_ns
+    with _cache_lock:
+        _cache[key] = (mtime, index)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
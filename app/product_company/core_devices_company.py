@@ -5,17 +5,23 @@ This module implements explicit checklist-based execution for each phase,
 ensuring every step is followed systematically as specified in PART 2 of the requirements.
 
 Each agent follows their checklist items as "to-do lists" with progress tracking.
+Within a phase, checklists that need only the project run concurrently as steps
+of a dependency graph; see CoreDevicesCompany._run_checklists.
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Awaitable, Callable
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 import json
 import asyncio
 import re
+import time
 from app.llm.client import LLMClient
+from app.core.message_bus import IndexedMessageBus
 from app.book_writer.config import get_config
+from app.core.step_graph import Step, backend_limit, run_step_graph
 
 
 class Phase(Enum):
@@ -143,13 +149,13 @@ class ProductProject:
     checklist_progress: Dict[str, List[ChecklistItem]] = field(default_factory=dict)
 
 
-class MessageBus:
+# Messages sent by a running checklist step, held until the steps listed before it have released theirs
+_held_messages: ContextVar[Optional[List["AgentMessage"]]] = ContextVar("core_devices_held_messages", default=None)
+
+
+class MessageBus(IndexedMessageBus):
     """Central message bus for all agent communications."""
     
-    def __init__(self):
-        self.messages: List[AgentMessage] = []
-        self.subscribers: Dict[str, List[callable]] = {}
-    
     def send(self, from_agent: str, to_agent: str, phase: Phase, content: str, 
              message_type: str = "internal"):
         """Send a message and log it."""
@@ -160,33 +166,12 @@ class MessageBus:
             content=content,
             message_type=message_type
         )
-        self.messages.append(message)
-        
-        if to_agent in self.subscribers:
-            for callback in self.subscribers[to_agent]:
-                callback(message)
-        
+        held = _held_messages.get()
+        if held is not None:
+            held.append(message)
+        else:
+            self.append(message)
         return message
-    
-    def get_messages(self, phase: Optional[Phase] = None, 
-                     agent: Optional[str] = None) -> List[AgentMessage]:
-        """Get messages filtered by phase and/or agent."""
-        result = self.messages
-        if phase:
-            result = [m for m in result if m.phase == phase]
-        if agent:
-            result = [m for m in result if m.from_agent == agent or m.to_agent == agent]
-        return result
-    
-    def get_messages_since(self, index: int) -> List[AgentMessage]:
-        """Get all messages since the specified index."""
-        if index < 0:
-            index = 0
-        return self.messages[index:]
-    
-    def get_total_message_count(self) -> int:
-        """Get total number of messages in the bus."""
-        return len(self.messages)
 
 
 def extract_json(text: str) -> Optional[Dict[str, Any]]:
@@ -699,20 +684,13 @@ Output as JSON: {{"max_setup_steps": X, "max_task_steps": Y, "max_ui_options": Z
         
         return budget
     
-    async def phase3_ux_design(self, project: ProductProject) -> Dict[str, Any]:
-        """Execute Phase 3 UX checklist systematically."""
+    async def phase3_begin_ux(self) -> None:
+        """Announce the Phase 3 UX checklist."""
         self.bus.send(self.role, "CEO_Agent", Phase.UX_SYSTEM_DESIGN,
                      "[CDO_Agent] Beginning Phase 3 UX checklist", "internal")
-        
-        # Checklist: Define user journeys
-        journeys = await self.phase3_define_journeys(project)
-        
-        # Checklist: Create interaction blueprint
-        blueprint = await self.phase3_interaction_blueprint(project)
-        
-        # Checklist: Define friction budget
-        budget = await self.phase3_friction_budget(journeys)
-        
+    
+    async def phase3_complete_ux(self, journeys: Dict, blueprint: Dict, budget: Dict) -> Dict[str, Any]:
+        """Combine the Phase 3 UX checklist items into the UX design."""
         ux_design = {
             "user_journeys": journeys,
             "interaction_blueprint": blueprint,
@@ -724,6 +702,21 @@ Output as JSON: {{"max_setup_steps": X, "max_task_steps": Y, "max_ui_options": Z
         
         return ux_design
     
+    async def phase3_ux_design(self, project: ProductProject) -> Dict[str, Any]:
+        """Execute Phase 3 UX checklist systematically."""
+        await self.phase3_begin_ux()
+        
+        # Checklist: Define user journeys
+        journeys = await self.phase3_define_journeys(project)
+        
+        # Checklist: Create interaction blueprint
+        blueprint = await self.phase3_interaction_blueprint(project)
+        
+        # Checklist: Define friction budget
+        budget = await self.phase3_friction_budget(journeys)
+        
+        return await self.phase3_complete_ux(journeys, blueprint, budget)
+    
     async def phase4_industrial_design(self, project: ProductProject) -> Dict[str, Any]:
         """Phase 4: Industrial design and prototyping (CDO checklist)."""
         self.bus.send(self.role, "CTO_Agent", Phase.DETAILED_ENGINEERING,
@@ -1009,6 +1002,11 @@ class CoreDevicesCompany:
     """Main orchestrator for the Core Devices Company multi-agent system.
     
     Enhanced with explicit checklist execution and progress tracking.
+    
+    The checklists of phases 2-6 are steps of a dependency graph: each step
+    starts once the steps it reads from have finished, up to the LLM
+    backend's concurrency limit, so a phase takes as long as its critical
+    path rather than the sum of its calls.
     """
     
     def __init__(self, llm_client: Optional[LLMClient] = None, model: str = "gemma2:2b"):
@@ -1033,6 +1031,12 @@ class CoreDevicesCompany:
         self.llm = llm_client
         self.bus = MessageBus()
         self.project: Optional[ProductProject] = None
+        # Concurrent checklist steps; None shares the backend's configured limit
+        self.max_concurrency: Optional[int] = None
+        # Seconds each checklist step of a phase took, by phase and step name
+        self.step_timings: Dict[str, Dict[str, float]] = {}
+        # Results of the steps that succeeded in a failed phase run, reused when the phase is run again
+        self.step_results: Dict[Phase, Dict[str, Any]] = {}
         
         # Initialize all agents
         self.ceo = CEOAgent(llm_client, self.bus)
@@ -1046,6 +1050,65 @@ class CoreDevicesCompany:
         from app.product_company.research_team import ResearchTeam
         self.research_team = ResearchTeam(llm_client, self.bus)
     
+    def llm_limit(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent checklist steps."""
+        if self.max_concurrency:
+            return asyncio.Semaphore(self.max_concurrency)
+        return backend_limit(self.llm)
+    
+    async def _run_checklists(self, phase: Phase, steps: List[Step]) -> Dict[str, Any]:
+        """Run a phase's checklist steps as soon as their inputs are ready and return results by step name.
+        
+        Steps are listed in the order the checklists are followed one by
+        one. Each step's bus messages are held and released in that order,
+        so the chat log reads the same however the steps interleave. When a
+        step fails, the results of the steps that succeeded are kept and
+        running the phase again re-runs only the failed steps.
+        
+        Raises:
+            StepGraphError: If a step failed
+        """
+        kept = self.step_results.setdefault(phase, {})
+        timings = self.step_timings.setdefault(phase.value, {})
+        held: Dict[str, List[AgentMessage]] = {step.name: [] for step in steps}
+        order = [step.name for step in steps]
+        ended = set()
+        released = 0
+        
+        def release():
+            nonlocal released
+            while released < len(order) and order[released] in ended:
+                for message in held[order[released]]:
+                    self.bus.append(message)
+                released += 1
+        
+        def checklist(step: Step) -> Step:
+            async def run(**inputs):
+                if step.name in kept:
+                    return kept[step.name]
+                _held_messages.set(held[step.name])
+                start = time.perf_counter()
+                try:
+                    kept[step.name] = await step.run(**inputs)
+                finally:
+                    timings[step.name] = round(time.perf_counter() - start, 3)
+                return kept[step.name]
+            return Step(step.name, run, requires=step.requires, fallback=step.fallback, label=step.label)
+        
+        async def on_step(step: Step, error: Optional[str], finished: int, total: int):
+            ended.add(step.name)
+            release()
+        
+        try:
+            results = await run_step_graph([checklist(step) for step in steps], self.llm_limit(), on_step)
+        finally:
+            ended.update(order)
+            release()
+        
+        # Kept results belong to a failed run of this phase only
+        self.step_results.clear()
+        return results
+    
     async def initialize_project(self, idea: str = "", primary_need: str = "", constraints: Dict[str, Any] = None) -> ProductProject:
         """Initialize a new product project.
         
@@ -1068,11 +1131,18 @@ class CoreDevicesCompany:
         
         return self.project
     
-    async def execute_phase_0(self, research_scope: str = "") -> Dict[str, Any]:
+    async def execute_phase_0(
+        self,
+        research_scope: str = "",
+        completed: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[str, Any], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
         """Execute Phase 0: Research & Discovery (Research Team discovers product opportunities).
         
         This phase is executed when the Owner doesn't have a specific product idea.
         The Research Team autonomously discovers opportunities and generates a PDF report.
+        `completed` and `on_result` are passed to ResearchTeam.execute_research_phase
+        to persist each research step's result and resume after a failure.
         """
         if not self.project:
             raise ValueError("Project not initialized")
@@ -1085,7 +1155,9 @@ class CoreDevicesCompany:
         # Execute research
         research_results = await self.research_team.execute_research_phase(
             scope=research_scope,
-            constraints=self.project.constraints
+            constraints=self.project.constraints,
+            completed=completed,
+            on_result=on_result
         )
         
         # Extract recommendation
@@ -1134,9 +1206,15 @@ A comprehensive PDF report documenting the full research process is available fo
             "artifacts": {
                 "research_findings": findings_dict,
                 "recommendation": recommendation,
-                "opportunities": research_results.get("opportunities", [])
+                "opportunities": research_results.get("opportunities", []),
+                # The research the reports present, so they can be rendered again after a restart
+                "market_data": research_results.get("market_data"),
+                "tech_data": research_results.get("tech_data"),
+                "user_data": research_results.get("user_data"),
+                "report_key": research_results.get("report_key")
             },
             "text_report": research_results.get("text_report"),  # text string for download
+            "pdf_report": research_results.get("pdf_report"),  # PDF bytes for download
             "summary": ceo_review,
             "chat_log": [m.to_dict() for m in self.bus.get_messages(Phase.RESEARCH_DISCOVERY)]
         }
@@ -1197,16 +1275,24 @@ A comprehensive PDF report documenting the full research process is available fo
             raise ValueError("Phase 1 must be completed first")
         
         await self.ceo.start_phase(Phase.CONCEPT_DIFFERENTIATION, self.project)
-        
-        # CMO executes market analysis checklist
-        market_analysis = await self.cmo.phase2_market_analysis(self.project)
-        
-        # CPO executes concept development checklist
-        benchmark = await self.cpo.phase2_benchmarking(self.project)
-        concept_pack = await self.cpo.phase2_concept_development(self.project, benchmark)
-        
-        # CDO executes usage concepts checklist
-        usage_concepts = await self.cdo.phase2_usage_concepts(self.project)
+        project = self.project
+        
+        async def concept_development(benchmark_data):
+            return await self.cpo.phase2_concept_development(project, benchmark_data)
+        
+        checklists = await self._run_checklists(Phase.CONCEPT_DIFFERENTIATION, [
+            # CMO executes market analysis checklist
+            Step("market_analysis", lambda: self.cmo.phase2_market_analysis(project)),
+            # CPO executes concept development checklist
+            Step("benchmark_data", lambda: self.cpo.phase2_benchmarking(project)),
+            Step("concept_pack", concept_development, requires=("benchmark_data",)),
+            # CDO executes usage concepts checklist
+            Step("usage_concepts", lambda: self.cdo.phase2_usage_concepts(project)),
+        ])
+        market_analysis = checklists["market_analysis"]
+        benchmark = checklists["benchmark_data"]
+        concept_pack = checklists["concept_pack"]
+        usage_concepts = checklists["usage_concepts"]
         
         # Combine into final concept pack (Joint checklist item)
         final_concept_pack = {
@@ -1234,6 +1320,7 @@ A comprehensive PDF report documenting the full research process is available fo
                 "benchmark_data": benchmark
             },
             "summary": summary,
+            "step_timings": dict(self.step_timings[Phase.CONCEPT_DIFFERENTIATION.value]),
             "chat_log": [m.to_dict() for m in self.bus.get_messages(Phase.CONCEPT_DIFFERENTIATION)]
         }
     
@@ -1243,15 +1330,32 @@ A comprehensive PDF report documenting the full research process is available fo
             raise ValueError("Phase 2 must be completed first")
         
         await self.ceo.start_phase(Phase.UX_SYSTEM_DESIGN, self.project)
-        
-        # CDO executes UX design checklist (3 main items)
-        ux_design = await self.cdo.phase3_ux_design(self.project)
+        project = self.project
+        
+        # CDO executes UX design checklist (3 main items); the CTO designs for the journeys
+        await self.cdo.phase3_begin_ux()
+        
+        async def system_architecture(user_journeys):
+            project.user_journeys = user_journeys
+            return await self.cto.phase3_system_architecture(project)
+        
+        checklists = await self._run_checklists(Phase.UX_SYSTEM_DESIGN, [
+            Step("user_journeys", lambda: self.cdo.phase3_define_journeys(project)),
+            Step("interaction_blueprint", lambda: self.cdo.phase3_interaction_blueprint(project)),
+            Step("friction_budget", lambda user_journeys: self.cdo.phase3_friction_budget(user_journeys),
+                 requires=("user_journeys",)),
+            Step("ux_design", lambda user_journeys, interaction_blueprint, friction_budget: self.cdo.phase3_complete_ux(
+                user_journeys, interaction_blueprint, friction_budget
+            ), requires=("user_journeys", "interaction_blueprint", "friction_budget")),
+            # CTO executes system architecture checklist
+            Step("system_architecture", system_architecture, requires=("user_journeys",)),
+        ])
+        ux_design = checklists["ux_design"]
         self.project.user_journeys = ux_design.get("user_journeys", {})
         self.project.interaction_blueprint = ux_design.get("interaction_blueprint", {})
         self.project.friction_budget = ux_design.get("friction_budget", {})
         
-        # CTO executes system architecture checklist
-        system_arch = await self.cto.phase3_system_architecture(self.project)
+        system_arch = checklists["system_architecture"]
         self.project.system_architecture = system_arch
         self.project.current_phase = Phase.UX_SYSTEM_DESIGN
         
@@ -1274,6 +1378,7 @@ A comprehensive PDF report documenting the full research process is available fo
                 "system_architecture": system_arch
             },
             "summary": summary,
+            "step_timings": dict(self.step_timings[Phase.UX_SYSTEM_DESIGN.value]),
             "chat_log": [m.to_dict() for m in self.bus.get_messages(Phase.UX_SYSTEM_DESIGN)]
         }
     
@@ -1283,12 +1388,16 @@ A comprehensive PDF report documenting the full research process is available fo
             raise ValueError("Phase 3 must be completed first")
         
         await self.ceo.start_phase(Phase.DETAILED_ENGINEERING, self.project)
+        project = self.project
         
-        # CTO executes detailed engineering checklist
-        detailed_engineering = await self.cto.phase4_detailed_engineering(self.project)
-        
-        # CDO executes industrial design checklist
-        industrial_design = await self.cdo.phase4_industrial_design(self.project)
+        checklists = await self._run_checklists(Phase.DETAILED_ENGINEERING, [
+            # CTO executes detailed engineering checklist
+            Step("detailed_engineering", lambda: self.cto.phase4_detailed_engineering(project)),
+            # CDO executes industrial design checklist
+            Step("industrial_design", lambda: self.cdo.phase4_industrial_design(project)),
+        ])
+        detailed_engineering = checklists["detailed_engineering"]
+        industrial_design = checklists["industrial_design"]
         
         # Joint combination (checklist item)
         combined_design = {
@@ -1312,6 +1421,7 @@ A comprehensive PDF report documenting the full research process is available fo
             "phase": Phase.DETAILED_ENGINEERING.value,
             "artifacts": {"detailed_design": combined_design},
             "summary": summary,
+            "step_timings": dict(self.step_timings[Phase.DETAILED_ENGINEERING.value]),
             "chat_log": [m.to_dict() for m in self.bus.get_messages(Phase.DETAILED_ENGINEERING)]
         }
     
@@ -1321,12 +1431,16 @@ A comprehensive PDF report documenting the full research process is available fo
             raise ValueError("Phase 4 must be completed first")
         
         await self.ceo.start_phase(Phase.VALIDATION_INDUSTRIALIZATION, self.project)
+        project = self.project
         
-        # CTO executes validation checklist
-        validation = await self.cto.phase5_validation(self.project)
-        
-        # COO executes manufacturing checklist
-        manufacturing = await self.coo.phase5_manufacturing(self.project)
+        checklists = await self._run_checklists(Phase.VALIDATION_INDUSTRIALIZATION, [
+            # CTO executes validation checklist
+            Step("validation", lambda: self.cto.phase5_validation(project)),
+            # COO executes manufacturing checklist
+            Step("manufacturing", lambda: self.coo.phase5_manufacturing(project)),
+        ])
+        validation = checklists["validation"]
+        manufacturing = checklists["manufacturing"]
         
         # Joint summary (checklist item)
         combined_plan = {
@@ -1350,6 +1464,7 @@ A comprehensive PDF report documenting the full research process is available fo
             "phase": Phase.VALIDATION_INDUSTRIALIZATION.value,
             "artifacts": {"validation_manufacturing": combined_plan},
             "summary": summary,
+            "step_timings": dict(self.step_timings[Phase.VALIDATION_INDUSTRIALIZATION.value]),
             "chat_log": [m.to_dict() for m in self.bus.get_messages(Phase.VALIDATION_INDUSTRIALIZATION)]
         }
     
@@ -1359,12 +1474,16 @@ A comprehensive PDF report documenting the full research process is available fo
             raise ValueError("Phase 5 must be completed first")
         
         await self.ceo.start_phase(Phase.POSITIONING_LAUNCH, self.project)
+        project = self.project
         
-        # CMO executes positioning checklist
-        positioning = await self.cmo.phase6_positioning(self.project)
-        
-        # CDO executes onboarding checklist
-        onboarding = await self.cdo.phase6_onboarding(self.project)
+        checklists = await self._run_checklists(Phase.POSITIONING_LAUNCH, [
+            # CMO executes positioning checklist
+            Step("positioning", lambda: self.cmo.phase6_positioning(project)),
+            # CDO executes onboarding checklist
+            Step("onboarding", lambda: self.cdo.phase6_onboarding(project)),
+        ])
+        positioning = checklists["positioning"]
+        onboarding = checklists["onboarding"]
         
         # Joint launch package (checklist item)
         launch_package = {
@@ -1387,6 +1506,7 @@ A comprehensive PDF report documenting the full research process is available fo
             "phase": Phase.POSITIONING_LAUNCH.value,
             "artifacts": {"launch_package": launch_package},
             "summary": summary,
+            "step_timings": dict(self.step_timings[Phase.POSITIONING_LAUNCH.value]),
             "chat_log": [m.to_dict() for m in self.bus.get_messages(Phase.POSITIONING_LAUNCH)]
         }
     
@@ -0,0 +1,134 @@
+"""Off-loop rendering of Research Team reports.
+
+Building the reportlab PDF is pure CPU work that used to run inside the
+research task and stall the event loop for every other request. Reports
+are now rendered by a small process pool, text and PDF in one call, and
+kept in an LRU keyed by a hash of the research they present: the same
+findings are rendered once, however many times they are asked for, and
+concurrent requests for a report being rendered wait for that render.
+
+Workers are spawned rather than forked from the server; they import the
+report generator on first use.
+"""
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+
+import structlog
+
+from app.core.job_registry import LRUCache
+from app.core.process_pool import SpawnedPool
+
+logger = structlog.get_logger(__name__)
+
+# Rendered reports kept per worker, by report key
+REPORT_CACHE_SIZE = 16
+
+_reports: LRUCache = LRUCache(maxsize=REPORT_CACHE_SIZE)
+_rendering: Dict[str, asyncio.Future] = {}
+
+
+def _report_workers() -> int:
+    from app.core.config import settings
+    return settings.RESEARCH_REPORT_WORKERS
+
+
+_pool = SpawnedPool("Research report", _report_workers)
+
+
+class ReportRenderError(Exception):
+    """Raised when a research report cannot be rendered."""
+
+
+def report_key(findings: Any, market_data: Dict[str, Any], tech_data: Dict[str, Any],
+               user_data: Dict[str, Any], recommendation: Dict[str, Any]) -> str:
+    """sha256 of the research a report presents.
+
+    The research date is left out, so re-running research that reaches the
+    same findings reuses the report.
+    """
+    findings = asdict(findings) if is_dataclass(findings) else dict(findings or {})
+    findings.pop("research_date", None)
+    canonical = json.dumps(
+        [findings, market_data, tech_data, user_data, recommendation],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def render_report_sync(findings: Any, market_data: Dict[str, Any], tech_data: Dict[str, Any],
+                       user_data: Dict[str, Any], recommendation: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
+    """Render the text and PDF reports in this process; runs in the pool workers.
+
+    The PDF is None if reportlab rejects the research content; the text
+    report is still returned.
+    """
+    from app.product_company.research_team import ResearchReportGenerator
+
+    text_report = ResearchReportGenerator.generate_text_report(
+        findings, market_data, tech_data, user_data, recommendation
+    )
+    try:
+        pdf_report = ResearchReportGenerator.generate_pdf_report(
+            findings, market_data, tech_data, user_data, recommendation
+        )
+    except Exception as e:
+        logger.warning("Could not render research PDF report", error=str(e))
+        pdf_report = None
+    return text_report, pdf_report
+
+
+def shutdown_pool() -> None:
+    """Stop the report rendering processes."""
+    _pool.shutdown()
+
+
+async def render_report(
+    findings: Any,
+    market_data: Dict[str, Any],
+    tech_data: Dict[str, Any],
+    user_data: Dict[str, Any],
+    recommendation: Dict[str, Any],
+    executor: Optional[Executor] = None
+) -> Tuple[str, Optional[bytes], str]:
+    """Text and PDF report of the research, rendered off the event loop at most once per key.
+
+    Args:
+        executor: Executor for the render (defaults to the shared process pool)
+
+    Returns:
+        (text_report, pdf_report, report_key)
+
+    Raises:
+        ReportRenderError: If rendering failed
+    """
+    key = report_key(findings, market_data, tech_data, user_data, recommendation)
+    cached = _reports.get(key)
+    if cached is not None:
+        return cached[0], cached[1], key
+
+    rendering = _rendering.get(key)
+    if rendering is None or rendering.get_loop() is not asyncio.get_running_loop():
+        pool = executor or _pool.get()
+        rendering = _rendering[key] = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(
+            pool, render_report_sync, findings, market_data, tech_data, user_data, recommendation
+        ))
+        rendering.add_done_callback(lambda done: _rendering.pop(key) if _rendering.get(key) is done else None)
+    try:
+        text_report, pdf_report = await asyncio.shield(rendering)
+    except BrokenProcessPool as e:
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        if executor is None:
+            shutdown_pool()
+        raise ReportRenderError(f"Research report worker failed: {e}")
+    except Exception as e:
+        raise ReportRenderError(f"Failed to render research report: {e}")
+
+    _reports[key] = (text_report, pdf_report)
+    logger.info("Rendered research report", key=key[:12], text_chars=len(text_report),
+                pdf_bytes=len(pdf_report) if pdf_report else 0)
+    return text_report, pdf_report, key
@@ -7,7 +7,7 @@ product opportunities when the Owner doesn't have a specific idea.
 The team generates comprehensive PDF reports documenting their research process.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Awaitable, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
@@ -20,6 +20,8 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from app.llm.client import LLMClient
+from app.core.step_graph import Step, backend_limit, run_step_graph
+from app.product_company.research_report import render_report
 
 
 @dataclass
@@ -48,6 +50,14 @@ class ResearchFindings:
     research_date: datetime = field(default_factory=datetime.now)
     research_scope: str = ""
     constraints: Dict[str, Any] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResearchFindings":
+        """Rebuild findings saved with dataclasses.asdict."""
+        data = {name: value for name, value in data.items() if name in cls.__dataclass_fields__}
+        if isinstance(data.get("research_date"), str):
+            data["research_date"] = datetime.fromisoformat(data["research_date"])
+        return cls(**data)
 
 
 class MarketResearchAgent:
@@ -897,11 +907,20 @@ class ResearchReportGenerator:
 
 
 class ResearchTeam:
-    """Coordinated research team that discovers product opportunities."""
+    """Coordinated research team that discovers product opportunities.
     
-    def __init__(self, llm_client: LLMClient, message_bus):
+    The research phase is a step graph: technology and user research both
+    need only the opportunity list, so they run side by side once it is
+    known. Each agent call is retried on its own, and every result is
+    handed to `on_result` as soon as it is ready, so a failed run can be
+    resumed from the steps that completed.
+    """
+    
+    def __init__(self, llm_client: LLMClient, message_bus, max_attempts: int = 3, retry_delay: float = 2.0):
         self.llm = llm_client
         self.bus = message_bus
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
         
         # Initialize research agents
         self.market_researcher = MarketResearchAgent(llm_client, message_bus)
@@ -909,29 +928,104 @@ class ResearchTeam:
         self.user_researcher = UserResearchAgent(llm_client, message_bus)
         self.research_lead = ResearchLeadAgent(llm_client, message_bus)
     
-    async def execute_research_phase(self, scope: str = "", constraints: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Execute complete research phase and generate recommendation with PDF report."""
+    async def _with_retry(self, label: str, call: Callable[[], Awaitable[Any]], limit: asyncio.Semaphore) -> Any:
+        """Run one agent call, retrying only this call when it fails.
+        
+        Each attempt holds a slot of `limit`; the backoff between attempts
+        does not, so the other steps call the backend meanwhile.
+        """
+        from app.product_company.core_devices_company import Phase
+        
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with limit:
+                    return await call()
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise Exception(f"{label} failed after {attempt} attempts: {e}") from e
+                self.bus.send("Research_Team", "INTERNAL", Phase.RESEARCH_DISCOVERY,
+                             f"[Research_Team] ⚠️ {label} failed ({e}); retrying ({attempt + 1}/{self.max_attempts})", "internal")
+                await asyncio.sleep(self.retry_delay * attempt)
+    
+    def _research_steps(self, scope: str, constraints: Dict[str, Any], completed: Dict[str, Any],
+                        results: Dict[str, Any], limit: asyncio.Semaphore) -> List[Step]:
+        """Steps of the research phase, each requiring only the results it reads.
+        
+        Steps in `completed` return the earlier result; every step records
+        its result in `results` as it finishes. Agent calls take `limit`
+        per attempt, so the steps do not hold it themselves.
+        """
+        def step(name: str, label: str, call: Callable[..., Awaitable[Any]], requires: tuple = ()) -> Step:
+            async def run(**inputs):
+                if name in completed:
+                    results[name] = completed[name]
+                else:
+                    results[name] = await self._with_retry(label, lambda: call(**inputs), limit)
+                return results[name]
+            return Step(name, run, requires=requires, label=label, limited=False)
+        
+        market = self.market_researcher
+        return [
+            step("market_data", "Market research",
+                 lambda: market.research_market_trends(scope, constraints)),
+            step("opportunities", "Opportunity identification",
+                 market.identify_product_opportunities, requires=("market_data",)),
+            step("tech_data", "Technology research",
+                 self.tech_researcher.research_enabling_technologies, requires=("opportunities",)),
+            step("user_data", "User research",
+                 self.user_researcher.research_user_needs, requires=("opportunities",)),
+            step("recommendation", "Research synthesis",
+                 self.research_lead.synthesize_research, requires=("market_data", "tech_data", "user_data")),
+        ]
+    
+    async def execute_research_phase(
+        self,
+        scope: str = "",
+        constraints: Dict[str, Any] = None,
+        completed: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[str, Any], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Execute complete research phase and generate recommendation with text and PDF reports.
+        
+        Args:
+            scope: Research scope/focus areas
+            constraints: Project constraints
+            completed: Results of steps finished by an earlier run, by step
+                name (market_data, opportunities, tech_data, user_data,
+                recommendation); those steps are not run again
+            on_result: Awaited as (step name, result) as each step finishes;
+                calls never overlap
+        
+        Raises:
+            StepGraphError: If a step failed after its retries
+        """
         from app.product_company.core_devices_company import Phase
         
         constraints = constraints or {}
+        completed = completed or {}
         
         self.bus.send("Research_Team", "CEO_Agent", Phase.RESEARCH_DISCOVERY,
                      "[Research_Team] Starting autonomous product discovery research", "internal")
+        if completed:
+            self.bus.send("Research_Team", "CEO_Agent", Phase.RESEARCH_DISCOVERY,
+                         f"[Research_Team] Resuming research; reusing {', '.join(sorted(completed))}", "internal")
         
-        # Step 1: Market research
-        market_data = await self.market_researcher.research_market_trends(scope, constraints)
-        opportunities = await self.market_researcher.identify_product_opportunities(market_data)
+        results: Dict[str, Any] = {}
         
-        # Step 2: Technology research
-        tech_data = await self.tech_researcher.research_enabling_technologies(opportunities)
+        async def persist(step: Step, error: Optional[str], finished: int, total: int) -> None:
+            if error is None and on_result and step.name not in completed:
+                await on_result(step.name, results[step.name])
         
-        # Step 3: User research
-        user_data = await self.user_researcher.research_user_needs(opportunities)
-        
-        # Step 4: Synthesize and recommend
-        recommendation = await self.research_lead.synthesize_research(market_data, tech_data, user_data)
+        limit = backend_limit(self.llm)
+        research = await run_step_graph(
+            self._research_steps(scope, constraints, completed, results, limit), limit, on_step=persist
+        )
+        market_data = research["market_data"]
+        opportunities = research["opportunities"]
+        tech_data = research["tech_data"]
+        user_data = research["user_data"]
+        recommendation = research["recommendation"]
         
-        # Step 5: Generate text report (simplified from PDF)
         findings = ResearchFindings(
             industries=market_data.get('industries', []),
             product_ideas=market_data.get('product_ideas', []),
@@ -942,12 +1036,13 @@ class ResearchTeam:
             constraints=constraints
         )
         
-        text_report = ResearchReportGenerator.generate_text_report(
+        # Rendered in a worker process, once per distinct set of findings
+        text_report, pdf_report, report_key = await render_report(
             findings, market_data, tech_data, user_data, recommendation
         )
         
         self.bus.send("Research_Team", "CEO_Agent", Phase.RESEARCH_DISCOVERY,
-                     "[Research_Team] ✓ Research complete. Text report generated.", "internal")
+                     "[Research_Team] ✓ Research complete. Text and PDF reports generated.", "internal")
         
         return {
             "findings": findings,
@@ -956,5 +1051,8 @@ class ResearchTeam:
             "user_data": user_data,
             "recommendation": recommendation,
             "text_report": text_report,  # string
+            "pdf_report": pdf_report,  # bytes
+            "report_key": report_key,  # sha256 of the findings the reports present
             "opportunities": opportunities
         }
+
@@ -7,9 +7,10 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import exists, select
 import structlog
 
+from app.core.keyset import list_page
 from app.database import get_db
 from app.models import BookProject, BookOutline, BookChapter
 from app.book_writer.agents import BookAgents
@@ -100,11 +101,25 @@ async def create_project(project: BookProjectCreate, db: AsyncSession = Depends(
 
 
 @router.get("/api/book-writer/projects", response_model=List[BookProjectResponse])
-async def list_projects(db: AsyncSession = Depends(get_db)):
-    """List all book projects."""
+async def list_projects(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List book projects, newest first.
+    
+    Without `cursor` or `limit` every project is listed. Otherwise pages are
+    addressed by `cursor`; the cursor of the next page is sent in the
+    X-Next-Cursor header.
+    """
     try:
-        result = await db.execute(select(BookProject).order_by(BookProject.updated_at.desc()))
-        projects = result.scalars().all()
+        projects, next_cursor = await list_page(db, BookProject, (
+            BookProject.id, BookProject.title, BookProject.initial_prompt, BookProject.num_chapters,
+            BookProject.status, BookProject.created_at, BookProject.updated_at,
+        ), cursor, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return [
             BookProjectResponse(
@@ -118,26 +133,34 @@ async def list_projects(db: AsyncSession = Depends(get_db)):
             )
             for p in projects
         ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Failed to list projects", error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to list projects: {str(e)}")
 
 
 @router.get("/api/book-writer/projects-with-pdfs")
-async def list_projects_with_pdfs(db: AsyncSession = Depends(get_db)):
-    """List all book projects with PDF availability info."""
+async def list_projects_with_pdfs(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List book projects with PDF availability info, newest first.
+    
+    Without `cursor` or `limit` every project is listed; otherwise a page per `cursor`.
+    """
     try:
-        result = await db.execute(select(BookProject).order_by(BookProject.updated_at.desc()))
-        projects = result.scalars().all()
+        # A project with chapters can have its PDF generated
+        chapters_exist = exists().where(BookChapter.project_id == BookProject.id)
+        projects, next_cursor = await list_page(db, BookProject, (
+            BookProject.id, BookProject.title, BookProject.status,
+            BookProject.created_at, BookProject.updated_at, chapters_exist.label("has_chapters"),
+        ), cursor, limit)
         
         projects_with_pdfs = []
         for p in projects:
-            # Check if project has chapters (PDF can be generated)
-            chapters_result = await db.execute(
-                select(BookChapter).where(BookChapter.project_id == p.id)
-            )
-            chapters = chapters_result.scalars().all()
-            has_chapters = len(chapters) > 0
+            has_chapters = bool(p.has_chapters)
             
             projects_with_pdfs.append({
                 "id": p.id,
@@ -149,7 +172,9 @@ async def list_projects_with_pdfs(db: AsyncSession = Depends(get_db)):
                 "updated_at": p.updated_at.isoformat()
             })
         
-        return {"success": True, "projects": projects_with_pdfs}
+        return {"success": True, "projects": projects_with_pdfs, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Failed to list projects with PDFs", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -205,7 +230,11 @@ async def generate_outline(project_id: str, db: AsyncSession = Depends(get_db)):
             agents = BookAgents(agent_config)
             outline_gen = OutlineGenerator(agents, agent_config)
             
-            outline = await outline_gen.generate_outline(project.initial_prompt, project.num_chapters)
+            async def log_progress(message: str, sub_item: str):
+                logger.info(message, project_id=project_id, progress=sub_item)
+            
+            outline = await outline_gen.generate_outline(project.initial_prompt, project.num_chapters,
+                                                         progress_callback=log_progress)
             
             # Ensure all chapters have sections - add defaults if missing
             for ch in outline:
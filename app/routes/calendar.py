@@ -7,8 +7,11 @@ from sqlalchemy import select
 from app.database import get_db
 from app.models import User, OAuthAccount
 from app.calendar.google import GoogleCalendarClient
+from app.calendar.sync import CalendarSync
 from app.security.tokens import encrypt_token
-from app.deps import get_admin_user
+from app.deps import get_admin_user, get_llm_client
+from app.llm.client import LLMClient
+from app.scheduling.planner import NotificationPlanner
 
 router = APIRouter()
 
@@ -87,7 +90,8 @@ async def sync_google_calendar(
     days_back: int = 2,
     days_forward: int = 30,
     db: AsyncSession = Depends(get_db),
-    admin_user: dict = Depends(get_admin_user)
+    admin_user: dict = Depends(get_admin_user),
+    llm_client: LLMClient = Depends(get_llm_client)
 ):
     """Sync Google Calendar events for a user."""
     # Verify user exists
@@ -123,51 +127,24 @@ async def sync_google_calendar(
         from app.security.tokens import decrypt_token
         access_token = decrypt_token(oauth_account.access_token_enc)
         
-        # Get events from Google Calendar
+        # Pull only what changed since the stored sync token and replan those events
         from datetime import datetime, timedelta
-        events = await google_client.get_events(
-            access_token=access_token,
-            time_min=datetime.utcnow() - timedelta(days=days_back),
-            time_max=datetime.utcnow() + timedelta(days=days_forward)
+        calendar_sync = CalendarSync(
+            google_client,
+            NotificationPlanner(llm_client),
+            provider="google",
+            lookback=timedelta(days=days_back),
+            horizon=timedelta(days=days_forward)
         )
-        
-        # Process and store events
-        events_created = 0
-        events_updated = 0
-        
-        for google_event in events:
-            # Normalize event
-            normalized_event = google_client.normalize_event(google_event, user_id)
-            
-            # Check if event already exists
-            from app.models import Event
-            existing_result = await db.execute(
-                select(Event).where(
-                    Event.user_id == user_id,
-                    Event.provider == "google",
-                    Event.provider_event_id == normalized_event["provider_event_id"]
-                )
-            )
-            existing_event = existing_result.scalar_one_or_none()
-            
-            if existing_event:
-                # Update existing event
-                for key, value in normalized_event.items():
-                    if key != "user_id":  # Don't update user_id
-                        setattr(existing_event, key, value)
-                events_updated += 1
-            else:
-                # Create new event
-                event = Event(**normalized_event)
-                db.add(event)
-                events_created += 1
-        
-        await db.commit()
-        await google_client.close()
+        try:
+            diff = await calendar_sync.sync(db, oauth_account, access_token)
+        finally:
+            await google_client.close()
         
         return {
-            "events_created": events_created,
-            "events_updated": events_updated,
+            "events_created": diff["events"]["inserted"],
+            "events_updated": diff["events"]["updated"],
+            "diff": diff,
             "sync_time": datetime.utcnow()
         }
         
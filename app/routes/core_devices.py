@@ -4,18 +4,26 @@ import os
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import FileResponse, Response
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Header
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import structlog
 import asyncio
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 
 from app.product_company.core_devices_company import (
     CoreDevicesCompany, OwnerDecision, Phase, ProductProject, PrimaryNeed
 )
+from app.core.keyset import list_page
+from app.product_company.research_report import render_report
+from app.product_company.research_team import ResearchFindings
+from app.core.chat_feed import ChatLog, project_feed, resume_cursor, sync_project_feed, FEED_KEY, SSE_HEADERS
+from app.core.project_store import (
+    delete_project_state, load_project_state, persisted_state, read_log_entries, split_state, stage_project_state,
+    PERSISTED_KEY
+)
 from app.database import get_db
 from app.models import CoreDevicesProject as CDCProject
 
@@ -23,6 +31,12 @@ logger = structlog.get_logger(__name__)
 
 router = APIRouter()
 
+# Project kind of Core Devices state rows in project_artifacts and project_log_entries
+PROJECT_KIND = "core_devices"
+
+# Bytes of the PDF research report read per query when streaming it
+PDF_CHUNK_SIZE = 256 * 1024
+
 # Store active projects in memory (loaded from database)
 active_projects: Dict[str, Dict[str, Any]] = {}
 
@@ -42,6 +56,58 @@ def _convert_datetime_to_str(obj):
         return obj
 
 
+def _chat_feed(project_id: str, project_data: Dict[str, Any]):
+    """The project's ChatFeed, seeded with the current phase's execution status."""
+    feed = project_feed(project_data, project_data["chat_log"])
+    if not feed.has_status:
+        status = phase_execution_status.get(f"{project_id}_{project_data.get('current_phase')}")
+        if status:
+            feed.set_status(status)
+    return feed
+
+
+def _append_chat(project_data: Dict[str, Any], entry: Dict[str, Any]) -> None:
+    """Append an entry to the chat log and push it to the project's streams."""
+    project_data["chat_log"].append(entry)
+    sync_project_feed(project_data, project_data["chat_log"])
+
+
+def _relay_chat(project_data: Dict[str, Any]):
+    """Message bus listener appending every message to the chat log as it is sent.
+    
+    The chat log is what the project saves; save_project_to_db lets relayed
+    messages leave the bus's in-memory window once they are committed.
+    """
+    def relay(message):
+        _append_chat(project_data, message.to_dict())
+    return relay
+
+
+async def _full_chat_log(
+    project_id: str,
+    project_data: Dict[str, Any],
+    db: Optional[AsyncSession],
+    phase: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """The project's chat log, reading the entries no longer in memory from the database."""
+    chat_log = project_data.get("chat_log", [])
+    entries = []
+    first_seq = getattr(chat_log, "first_seq", 0)
+    if first_seq and db is not None:
+        for entry in await read_log_entries(db, PROJECT_KIND, project_id, "chat", before=first_seq, phase=phase):
+            entry.pop("seq")
+            entries.append(entry)
+    return entries + [msg for msg in chat_log if not phase or msg.get("phase") == phase]
+
+
+def _set_phase_status(project_id: str, status_key: str, status: Dict[str, Any]) -> None:
+    """Record a phase execution status and push it to the project's streams."""
+    phase_execution_status[status_key] = status
+    feed = active_projects.get(project_id, {}).get(FEED_KEY)
+    if feed is not None:
+        feed.set_status(status)
+
+
 async def save_project_to_db(project_id: str, project_data: Dict[str, Any], db: AsyncSession) -> None:
     """Save project state to database."""
     try:
@@ -93,11 +159,8 @@ async def save_project_to_db(project_id: str, project_data: Dict[str, Any], db:
             db_project.ceo_model = project_data.get("ceo_model")
             db_project.current_phase = project_data.get("current_phase")
             db_project.status = project_data.get("status", "in_progress")
-            db_project.project_data = _convert_datetime_to_str(project_state)
-            db_project.artifacts = _convert_datetime_to_str(project_data.get("artifacts", {}))
-            db_project.owner_decisions = _convert_datetime_to_str(project_data.get("owner_decisions", {}))
-            db_project.chat_log = _convert_datetime_to_str(project_data.get("chat_log", []))
-            db_project.pdf_report = project_data.get("pdf_report")  # Store PDF bytes
+            if project_data.get("pdf_report") is not None:
+                db_project.pdf_report = project_data["pdf_report"]  # Store PDF bytes
             db_project.last_activity_at = datetime.utcnow()
             db_project.updated_at = datetime.utcnow()
         else:
@@ -114,17 +177,37 @@ async def save_project_to_db(project_id: str, project_data: Dict[str, Any], db:
                 ceo_model=project_data.get("ceo_model"),
                 current_phase=project_data.get("current_phase", "strategy_idea_intake"),
                 status=project_data.get("status", "in_progress"),
-                project_data=_convert_datetime_to_str(project_state),
-                artifacts=_convert_datetime_to_str(project_data.get("artifacts", {})),
-                owner_decisions=_convert_datetime_to_str(project_data.get("owner_decisions", {})),
-                chat_log=_convert_datetime_to_str(project_data.get("chat_log", [])),
                 pdf_report=project_data.get("pdf_report"),
-                progress_log=[],
-                error_log=[],
             )
             db.add(db_project)
         
-        await db.commit()
+        # Only log entries and state pieces changed since the last save are written
+        persisted = persisted_state(project_data)
+        async with persisted.lock:
+            # Every bus message sent so far was relayed to the chat log being saved
+            bus_count = company.bus.get_total_message_count() if company is not None else 0
+            written = await stage_project_state(
+                db, PROJECT_KIND, project_id, persisted,
+                pieces=split_state(
+                    _convert_datetime_to_str(project_state),
+                    _convert_datetime_to_str(project_data.get("artifacts", {})),
+                    _convert_datetime_to_str(project_data.get("owner_decisions", {})),
+                ),
+                logs={
+                    "chat": project_data.get("chat_log", []),
+                    "progress": project_data.get("progress_log", []),
+                    "error": project_data.get("error_log", []),
+                },
+            )
+            await db.commit()
+            persisted.update(written)
+        # Committed entries may leave memory: the chat log's window, its feed and the bus's window
+        chat_log = project_data.get("chat_log")
+        if isinstance(chat_log, ChatLog):
+            chat_log.mark_durable(persisted.log_counts.get("chat", 0))
+            sync_project_feed(project_data, chat_log)
+        if company is not None:
+            company.bus.mark_durable(bus_count)
         logger.info(f"Saved Core Devices project {project_id} to database")
     except Exception as e:
         await db.rollback()
@@ -143,13 +226,15 @@ async def load_project_from_db(project_id: str, db: AsyncSession) -> Optional[Di
         if not db_project:
             return None
         
+        stored = await load_project_state(db, PROJECT_KIND, db_project)
+        
         # Recreate company with saved models
         model = db_project.model or "gemma2:2b"
         company = CoreDevicesCompany(model=model)
         
         # Restore project state
-        if db_project.project_data:
-            pp_data = db_project.project_data
+        if stored.project_state:
+            pp_data = stored.project_state
             
             # Parse primary need
             primary_need = None
@@ -207,6 +292,10 @@ async def load_project_from_db(project_id: str, db: AsyncSession) -> Optional[Di
                 constraints=db_project.constraints or {},
             )
         
+        # The stored chat log is durable, so only its latest window stays in memory
+        chat_log = ChatLog(stored.logs["chat"])
+        chat_log.mark_durable(len(chat_log))
+        
         # Reconstruct project data dict
         project_data = {
             "company": company,
@@ -220,12 +309,12 @@ async def load_project_from_db(project_id: str, db: AsyncSession) -> Optional[Di
             "ceo_model": db_project.ceo_model,
             "current_phase": db_project.current_phase,
             "status": db_project.status,
-            "owner_decisions": db_project.owner_decisions or {},
-            "artifacts": db_project.artifacts or {},
-            "chat_log": db_project.chat_log or [],
-            "pdf_report": db_project.pdf_report,  # Restore PDF bytes
-            "progress_log": db_project.progress_log or [],
-            "error_log": db_project.error_log or [],
+            "owner_decisions": stored.owner_decisions,
+            "artifacts": stored.artifacts,
+            "chat_log": chat_log,
+            "progress_log": stored.logs["progress"],
+            "error_log": stored.logs["error"],
+            PERSISTED_KEY: stored.persisted,
             "created_at": db_project.created_at.isoformat() if db_project.created_at else datetime.utcnow().isoformat(),
             "updated_at": db_project.updated_at.isoformat() if db_project.updated_at else datetime.utcnow().isoformat(),
         }
@@ -333,7 +422,7 @@ async def create_core_devices_project(project: CoreDevicesProjectCreate, db: Asy
             "status": "in_progress",
             "owner_decisions": {},
             "artifacts": {},
-            "chat_log": [],
+            "chat_log": ChatLog(),
             "progress_log": [],
             "error_log": [],
         }
@@ -346,7 +435,7 @@ async def create_core_devices_project(project: CoreDevicesProjectCreate, db: Asy
         
         # Get CEO greeting
         greeting = await company.ceo.greet_owner()
-        project_data["chat_log"].append({
+        _append_chat(project_data, {
             "from_agent": "CEO_Agent",
             "to_agent": "OWNER",
             "phase": "initialization",
@@ -368,7 +457,7 @@ async def create_core_devices_project(project: CoreDevicesProjectCreate, db: Asy
             created_at=datetime.utcnow().isoformat(),
             updated_at=datetime.utcnow().isoformat(),
             artifacts={},
-            chat_log=project_data["chat_log"]
+            chat_log=list(project_data["chat_log"])
         )
     except Exception as e:
         logger.error("Failed to create Core Devices project", error=str(e), exc_info=True)
@@ -398,7 +487,7 @@ async def get_core_devices_project(project_id: str, db: AsyncSession = Depends(g
         created_at=project_data.get("created_at", datetime.utcnow().isoformat()),
         updated_at=project_data.get("updated_at", datetime.utcnow().isoformat()),
         artifacts=project_data.get("artifacts", {}),
-        chat_log=project_data.get("chat_log", [])
+        chat_log=await _full_chat_log(project_id, project_data, db)
     )
 
 
@@ -407,12 +496,12 @@ async def _execute_phase_background(project_id: str, current_phase: Phase):
     logger.info(f"Background: Executing phase {current_phase.value} for project {project_id}")
     
     status_key = f"{project_id}_{current_phase.value}"
-    phase_execution_status[status_key] = {
+    _set_phase_status(project_id, status_key, {
         "status": "running",
         "phase": current_phase.value,
         "started_at": datetime.utcnow().isoformat(),
         "error": None
-    }
+    })
     
     # Create dedicated database session for this background task
     from app.deps import get_db
@@ -428,33 +517,26 @@ async def _execute_phase_background(project_id: str, current_phase: Phase):
             
             await log_progress(project_id, f"Starting phase: {current_phase.value}", current_phase.value, db)
             
-            # Track which messages have been saved using message bus index
-            last_saved_message_index = company.bus.get_total_message_count() if company and company.bus else 0
+            # Bus messages join the chat log (and its streams) as they are sent
+            relay = _relay_chat(project_data)
+            company.bus.listeners.append(relay)
+            last_saved_count = len(project_data["chat_log"])
             
             # Create a callback to save messages in real-time
             async def save_new_messages():
-                """Periodically check and save new messages from message bus."""
-                nonlocal last_saved_message_index
+                """Save the messages added to the chat log since the last save."""
+                nonlocal last_saved_count
                 
-                if company and company.bus:
-                    current_total = company.bus.get_total_message_count()
-                    if current_total > last_saved_message_index:
-                        # Get only NEW messages since last save
-                        new_messages = company.bus.get_messages_since(last_saved_message_index)
-                        if new_messages:
-                            for msg in new_messages:
-                                project_data["chat_log"].append(msg.to_dict())
-                            
-                            # Update the index to prevent re-adding same messages
-                            last_saved_message_index = current_total
-                            
-                            # Create NEW db session for background save to avoid concurrency issues
-                            async for bg_db in get_db():
-                                try:
-                                    await save_project_to_db(project_id, project_data, bg_db)
-                                finally:
-                                    await bg_db.close()
-                                break  # Only use first session
+                if len(project_data["chat_log"]) > last_saved_count:
+                    last_saved_count = len(project_data["chat_log"])
+                    
+                    # Create NEW db session for background save to avoid concurrency issues
+                    async for bg_db in get_db():
+                        try:
+                            await save_project_to_db(project_id, project_data, bg_db)
+                        finally:
+                            await bg_db.close()
+                        break  # Only use first session
             
             # Start a background task to periodically save messages
             import asyncio
@@ -484,6 +566,7 @@ async def _execute_phase_background(project_id: str, current_phase: Phase):
                 else:
                     raise ValueError(f"Unknown phase: {current_phase}")
             finally:
+                company.bus.listeners.remove(relay)
                 # Ensure final messages are saved
                 await save_new_messages()
                 saver_task.cancel()
@@ -501,16 +584,17 @@ async def _execute_phase_background(project_id: str, current_phase: Phase):
             await save_project_to_db(project_id, project_data, db)
             
             # Mark as completed
-            phase_execution_status[status_key] = {
+            _set_phase_status(project_id, status_key, {
                 "status": "completed",
                 "phase": current_phase.value,
                 "started_at": phase_execution_status[status_key]["started_at"],
                 "completed_at": datetime.utcnow().isoformat(),
                 "error": None
-            }
+            })
             
             await log_progress(project_id, f"Completed phase: {current_phase.value}", current_phase.value, db)
-            logger.info(f"Background: Phase {current_phase.value} completed for project {project_id}")
+            logger.info(f"Background: Phase {current_phase.value} completed for project {project_id}",
+                        step_timings=result.get("step_timings"))
             
         except Exception as phase_error:
             error_msg = str(phase_error)
@@ -518,12 +602,12 @@ async def _execute_phase_background(project_id: str, current_phase: Phase):
             await log_error(project_id, error_msg, current_phase.value, db)
             
             # Mark as failed
-            phase_execution_status[status_key] = {
+            _set_phase_status(project_id, status_key, {
                 "status": "failed",
                 "phase": current_phase.value,
                 "started_at": phase_execution_status.get(status_key, {}).get("started_at", datetime.utcnow().isoformat()),
                 "error": error_msg
-            }
+            })
             
             # Save error state to database
             if db and project_id in active_projects:
@@ -645,7 +729,7 @@ async def submit_owner_decision(
     }
     
     # Add to chat log
-    project_data["chat_log"].append({
+    _append_chat(project_data, {
         "from_agent": "OWNER",
         "to_agent": "CEO_Agent",
         "phase": current_phase,
@@ -689,8 +773,19 @@ async def submit_owner_decision(
 
 
 @router.get("/api/core-devices/projects/{project_id}/chat-log")
-async def get_chat_log(project_id: str, phase: Optional[str] = None, db: AsyncSession = Depends(get_db)):
-    """Get chat log for project."""
+async def get_chat_log(
+    project_id: str,
+    phase: Optional[str] = None,
+    after: Optional[int] = None,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get chat log for project.
+    
+    With `after`, returns only the messages whose seq is greater, at most
+    `limit` of them, plus the cursor for the next poll:
+    {"chat_log": [...], "next_after": seq, "has_more": bool}.
+    """
     # Load from database if not in memory
     if project_id not in active_projects:
         project_data = await load_project_from_db(project_id, db)
@@ -699,23 +794,75 @@ async def get_chat_log(project_id: str, phase: Optional[str] = None, db: AsyncSe
         active_projects[project_id] = project_data
     
     project_data = active_projects[project_id]
-    chat_log = project_data.get("chat_log", [])
     
-    # Filter by phase if specified
-    if phase:
-        chat_log = [msg for msg in chat_log if msg.get("phase") == phase]
+    if after is not None:
+        feed = _chat_feed(project_id, project_data)
+        limit = max(1, min(limit, 5000))
+        if after < feed.first_seq - 1 and db is not None:
+            # Entries no longer in memory are read from the stored log
+            entries = await read_log_entries(db, PROJECT_KIND, project_id, "chat", after=after,
+                                             before=feed.first_seq, phase=phase, limit=limit)
+            if entries:
+                return {"chat_log": entries, "next_after": entries[-1]["seq"], "has_more": True}
+            after = feed.first_seq - 1
+        return Response(content=feed.page(after, phase, limit), media_type="application/json")
     
-    return {"chat_log": chat_log}
+    return {"chat_log": await _full_chat_log(project_id, project_data, db, phase)}
+
+
+@router.get("/api/core-devices/projects/{project_id}/events")
+async def stream_project_events(
+    project_id: str,
+    phase: Optional[str] = None,
+    after: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-sent events: chat messages after the cursor, then new messages and phase status changes.
+    
+    Message events carry their seq as the event id, so a reconnecting
+    EventSource resumes after the last message it received.
+    """
+    if project_id not in active_projects:
+        project_data = await load_project_from_db(project_id, db)
+        if not project_data:
+            raise HTTPException(status_code=404, detail="Project not found")
+        active_projects[project_id] = project_data
+    
+    feed = _chat_feed(project_id, active_projects[project_id])
+    cursor = resume_cursor(last_event_id, after)
+    backfill = []
+    if cursor < feed.first_seq - 1:
+        # Entries no longer in memory are read from the stored log
+        backfill = await read_log_entries(db, PROJECT_KIND, project_id, "chat", after=cursor,
+                                          before=feed.first_seq, phase=phase)
+    
+    # The stream may stay open for hours; don't hold a pooled connection meanwhile
+    await db.close()
+    
+    return StreamingResponse(
+        feed.stream(cursor, phase, backfill=backfill),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 
 @router.get("/api/core-devices/projects")
-async def list_core_devices_projects(db: AsyncSession = Depends(get_db)):
-    """List all Core Devices projects from database."""
+async def list_core_devices_projects(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List Core Devices projects from database, newest first.
+    
+    Without `cursor` or `limit` every project is listed. Otherwise pages are
+    addressed by `cursor`; pass the `next_cursor` of a page to get the next one. Only summary columns are read.
+    """
     try:
-        result = await db.execute(
-            select(CDCProject).order_by(CDCProject.updated_at.desc())
-        )
-        projects = result.scalars().all()
+        projects, next_cursor = await list_page(db, CDCProject, (
+            CDCProject.id, CDCProject.product_idea, CDCProject.primary_need,
+            CDCProject.current_phase, CDCProject.status, CDCProject.created_at, CDCProject.updated_at,
+        ), cursor, limit)
         
         return {
             "projects": [
@@ -729,8 +876,11 @@ async def list_core_devices_projects(db: AsyncSession = Depends(get_db)):
                     "updated_at": p.updated_at.isoformat() if p.updated_at else None,
                 }
                 for p in projects
-            ]
+            ],
+            "next_cursor": next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Failed to list projects", error=str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -751,6 +901,7 @@ async def delete_project(project_id: str, db: AsyncSession = Depends(get_db)):
         project = result.scalar_one_or_none()
         
         if project:
+            await delete_project_state(db, PROJECT_KIND, project_id)
             await db.delete(project)
             await db.commit()
             return {"success": True, "message": "Project deleted"}
@@ -798,39 +949,47 @@ async def execute_research_phase(project_id: str, db: AsyncSession = Depends(get
         async def execute_research_bg():
             try:
                 status_key = f"{project_id}_research_discovery"
-                phase_execution_status[status_key] = {"status": "running", "phase": "research_discovery"}
+                _set_phase_status(project_id, status_key, {"status": "running", "phase": "research_discovery"})
+                
+                # Bus messages join the chat log (and its streams) as they are sent
+                relay = _relay_chat(project_data)
+                company.bus.listeners.append(relay)
+                last_saved_count = len(project_data["chat_log"])
                 
-                # Track which messages have been saved using message bus index
-                last_saved_message_index = company.bus.get_total_message_count() if company and company.bus else 0
+                async def save_now():
+                    # Create NEW db session for background save to avoid concurrency issues
+                    from app.deps import get_db
+                    async for bg_db in get_db():
+                        try:
+                            await save_project_to_db(project_id, project_data, bg_db)
+                        finally:
+                            await bg_db.close()
+                        break  # Only use first session
                 
                 # Create a callback to save messages in real-time
                 async def save_new_messages():
-                    """Periodically check and save new messages from message bus."""
-                    nonlocal last_saved_message_index
+                    """Save the messages added to the chat log since the last save."""
+                    nonlocal last_saved_count
                     
-                    if company and company.bus:
-                        current_total = company.bus.get_total_message_count()
-                        if current_total > last_saved_message_index:
-                            # Get only NEW messages since last save
-                            new_messages = company.bus.get_messages_since(last_saved_message_index)
-                            if new_messages:
-                                for msg in new_messages:
-                                    project_data["chat_log"].append(msg.to_dict())
-                                
-                                # Update the index to prevent re-adding same messages
-                                last_saved_message_index = current_total
-                                
-                                # Create NEW db session for background save to avoid concurrency issues
-                                from app.deps import get_db
-                                async for bg_db in get_db():
-                                    try:
-                                        await save_project_to_db(project_id, project_data, bg_db)
-                                    finally:
-                                        await bg_db.close()
-                                    break  # Only use first session
+                    if len(project_data["chat_log"]) > last_saved_count:
+                        last_saved_count = len(project_data["chat_log"])
+                        await save_now()
                 
                 research_scope = project_data.get("research_scope", "")
                 
+                # Steps finished by an earlier, failed run of the same scope are not run again
+                earlier = project_data["artifacts"].get("research_discovery") or {}
+                partial_results = dict(earlier.get("partial_results") or {}) if earlier.get("research_scope") == research_scope else {}
+                
+                async def save_step_result(step_name: str, step_result: Any):
+                    """Persist each research step's result as soon as it is ready."""
+                    partial_results[step_name] = step_result
+                    project_data["artifacts"]["research_discovery"] = {
+                        "research_scope": research_scope,
+                        "partial_results": dict(partial_results),
+                    }
+                    await save_now()
+                
                 # Execute research with periodic message saves
                 import asyncio
                 
@@ -843,8 +1002,13 @@ async def execute_research_phase(project_id: str, db: AsyncSession = Depends(get
                 saver_task = asyncio.create_task(message_saver())
                 
                 try:
-                    result = await company.execute_phase_0(research_scope=research_scope)
+                    result = await company.execute_phase_0(
+                        research_scope=research_scope,
+                        completed=partial_results,
+                        on_result=save_step_result
+                    )
                 finally:
+                    company.bus.listeners.remove(relay)
                     # Ensure final messages are saved
                     await save_new_messages()
                     saver_task.cancel()
@@ -853,9 +1017,11 @@ async def execute_research_phase(project_id: str, db: AsyncSession = Depends(get
                     except asyncio.CancelledError:
                         pass
                 
-                # Store text report
+                # Store the reports; the PDF is saved to the project row and streamed from there
                 if "text_report" in result:
                     project_data["text_report"] = result["text_report"]
+                if result.get("pdf_report"):
+                    project_data["pdf_report"] = result["pdf_report"]
                 
                 # Update project data with final results
                 project_data["artifacts"]["research_discovery"] = result.get("artifacts", {})
@@ -869,19 +1035,19 @@ async def execute_research_phase(project_id: str, db: AsyncSession = Depends(get
                 
                 logger.info(f"Research phase completed for project {project_id}, artifacts saved: {len(result.get('artifacts', {}))}")
                 
-                phase_execution_status[status_key] = {
+                _set_phase_status(project_id, status_key, {
                     "status": "completed",
                     "phase": "research_discovery",
                     "artifacts": result.get("artifacts", {}),
                     "completed_at": datetime.utcnow().isoformat()
-                }
+                })
                 
             except Exception as e:
-                phase_execution_status[status_key] = {
+                _set_phase_status(project_id, status_key, {
                     "status": "failed",
                     "phase": "research_discovery",
                     "error": str(e)
-                }
+                })
                 await log_error(project_id, str(e), "research_discovery", db)
         
         # Run in background
@@ -922,6 +1088,16 @@ async def download_research_report(project_id: str, db: AsyncSession = Depends(g
             research_artifacts = project_data.get("artifacts", {}).get("research_discovery", {})
             if "text_report" in research_artifacts:
                 text_report = research_artifacts["text_report"]
+            elif research_artifacts.get("research_findings") and "market_data" in research_artifacts:
+                # Rendered off the event loop, once per distinct set of findings
+                text_report, _, _ = await render_report(
+                    ResearchFindings.from_dict(research_artifacts["research_findings"]),
+                    research_artifacts["market_data"],
+                    research_artifacts.get("tech_data") or {},
+                    research_artifacts.get("user_data") or {},
+                    research_artifacts.get("recommendation") or {}
+                )
+                project_data["text_report"] = text_report
         
         if not text_report:
             raise HTTPException(status_code=404, detail="Research report not found. Execute research phase first.")
@@ -942,6 +1118,43 @@ async def download_research_report(project_id: str, db: AsyncSession = Depends(g
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/core-devices/projects/{project_id}/research-report/pdf")
+async def download_research_pdf(project_id: str, db: AsyncSession = Depends(get_db)):
+    """Stream the PDF research report straight from the database, a chunk at a time."""
+    result = await db.execute(
+        select(func.length(CDCProject.pdf_report)).where(CDCProject.id == project_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    size = row[0]
+    if not size:
+        raise HTTPException(status_code=404, detail="PDF research report not found")
+    await db.rollback()
+    
+    async def chunks():
+        for offset in range(0, size, PDF_CHUNK_SIZE):
+            result = await db.execute(
+                select(func.substr(CDCProject.pdf_report, offset + 1, PDF_CHUNK_SIZE))
+                .where(CDCProject.id == project_id)
+            )
+            chunk = result.scalar()
+            # Release the connection while the client reads the chunk
+            await db.rollback()
+            if not chunk:
+                break
+            yield bytes(chunk)
+    
+    return StreamingResponse(
+        chunks(),
+        media_type="application/pdf",
+        headers={
+            "Content-Length": str(size),
+            "Content-Disposition": f"attachment; filename=research_report_{project_id[:8]}.pdf"
+        }
+    )
+
+
 class ResearchApprovalRequest(BaseModel):
     """Research approval request."""
     approve: bool  # True to use recommendation, False to reject
@@ -12,6 +12,7 @@ import asyncio
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
+from sqlalchemy.orm import undefer_group
 
 from app.book_writer.exam_generator import (
     ExamGeneratorCompany, ExamProject, ExamProblem
@@ -19,6 +20,7 @@ from app.book_writer.exam_generator import (
 from app.database import get_db
 from app.models import ExamGeneratorProject as EGProject
 from app.core.config import settings
+from app.core.keyset import list_page
 
 logger = structlog.get_logger(__name__)
 
@@ -503,7 +505,7 @@ async def generate_exam(
         if project_id not in active_projects:
             # Try to load from database
             result = await db.execute(
-                select(EGProject).where(EGProject.id == project_id)
+                select(EGProject).where(EGProject.id == project_id).options(undefer_group("detail"))
             )
             db_project = result.scalar_one_or_none()
             
@@ -601,7 +603,7 @@ async def get_exam_generator_project(
         
         # Load from database
         result = await db.execute(
-            select(EGProject).where(EGProject.id == project_id)
+            select(EGProject).where(EGProject.id == project_id).options(undefer_group("detail"))
         )
         db_project = result.scalar_one_or_none()
         
@@ -726,19 +728,24 @@ async def download_exam_file(
 
 @router.get("/api/exam-generator/projects")
 async def list_exam_generator_projects(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 50
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
 ):
-    """List all exam generator projects."""
+    """List exam generator projects, newest first.
+    
+    Without `cursor` or `limit` every project is listed. Otherwise pages are
+    addressed by `cursor`; the cursor of the next page is sent in the
+    X-Next-Cursor header. Only summary columns are read.
+    """
     try:
-        result = await db.execute(
-            select(EGProject)
-            .order_by(EGProject.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-        projects = result.scalars().all()
+        projects, next_cursor = await list_page(db, EGProject, (
+            EGProject.id, EGProject.input_file_path, EGProject.output_directory, EGProject.current_phase,
+            EGProject.status, EGProject.num_problems, EGProject.created_at, EGProject.updated_at,
+        ), cursor, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return [
             {
@@ -754,6 +761,8 @@ async def list_exam_generator_projects(
             for p in projects
         ]
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Failed to list projects", error=str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to list projects: {str(e)}")
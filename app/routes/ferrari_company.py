@@ -4,17 +4,25 @@ import os
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import FileResponse, Response
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Header
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import structlog
 import asyncio
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 
 from app.book_writer.ferrari_company import (
-    FerrariBookCompany, OwnerDecision, Phase, BookProject
+    AgentMessage, FerrariBookCompany, OwnerDecision, Phase, BookProject
+)
+from app.core.config import settings
+from app.core.keyset import list_page
+from app.core.chat_feed import project_feed, resume_cursor, sync_project_feed, FEED_KEY, SSE_HEADERS
+from app.core.job_registry import RUNNING, LRUCache, get_job_registry
+from app.core.project_store import (
+    append_log_entry, load_project_state, persisted_state, read_log_entries, split_state, stage_project_state,
+    PERSISTED_KEY
 )
 from app.database import get_db
 from app.models import BookPublishingHouseProject as BPHProject
@@ -23,11 +31,100 @@ logger = structlog.get_logger(__name__)
 
 router = APIRouter()
 
-# Store active projects in memory (loaded from database)
-active_projects: Dict[str, Dict[str, Any]] = {}
+# Phase execution status for background tasks lives in the shared job registry,
+# keyed f"{project_id}_{phase}"
+PHASE_JOB_KIND = "ferrari_phase"
+
+
+def _phase_running_here(project_id: str, project_data: Dict[str, Any]) -> bool:
+    """Whether a phase job of this process is still changing the in-memory project."""
+    registry = get_job_registry()
+    status = registry.get(f"{project_id}_{project_data.get('current_phase')}")
+    return bool(status) and status["status"] == RUNNING and status["owner"] == registry.instance_id
+
+
+# Recently used projects kept in memory; the database is the source of truth. A
+# project whose phase is running here stays, so its job, status and feed keep one copy
+active_projects: Dict[str, Dict[str, Any]] = LRUCache(settings.ACTIVE_PROJECTS_CACHE_SIZE, pinned=_phase_running_here)
+
+# Project kind of Ferrari state rows in project_artifacts and project_log_entries
+PROJECT_KIND = "ferrari"
+
+
+def _chat_feed(project_id: str, project_data: Dict[str, Any]):
+    """The project's ChatFeed over its message bus, pushed to as the bus sends."""
+    bus = project_data["company"].message_bus
+    if FEED_KEY not in project_data:
+        feed = project_feed(project_data, bus.messages)
+        bus.listeners.append(lambda message: feed.sync(bus.messages))
+        status = get_job_registry().get(f"{project_id}_{project_data.get('current_phase')}")
+        if status:
+            feed.set_status(_phase_status(status))
+    return project_feed(project_data, bus.messages)
+
+
+async def _full_chat_log(
+    project_id: str,
+    company: FerrariBookCompany,
+    db: Optional[AsyncSession],
+    phase: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """The project's chat log, reading the messages its bus no longer holds from the database."""
+    bus = company.message_bus
+    chat_log = []
+    if bus.first_seq and db is not None:
+        for entry in await read_log_entries(db, PROJECT_KIND, project_id, "chat", before=bus.first_seq, phase=phase):
+            entry.pop("seq")
+            chat_log.append(entry)
+    return chat_log + bus.get_chat_log(Phase(phase) if phase else None)
 
-# Store phase execution status for background tasks
-phase_execution_status: Dict[str, Dict[str, Any]] = {}
+
+def _phase_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Stream event of a phase job's registry status."""
+    return {
+        "status": job.get("status"),
+        "phase": (job.get("data") or {}).get("phase"),
+        "error": job.get("error"),
+    }
+
+
+def _publish_phase_status(project_id: str, status_key: str) -> None:
+    """Push a phase job's status to the project's streams."""
+    feed = active_projects.get(project_id, {}).get(FEED_KEY)
+    status = get_job_registry().get(status_key)
+    if feed is not None and status:
+        feed.set_status(_phase_status(status))
+
+
+async def _save_state(
+    project_id: str,
+    project_data: Dict[str, Any],
+    db: AsyncSession,
+    project_state: Optional[Dict[str, Any]] = None
+) -> None:
+    """Write the log entries and state pieces changed since the last save, and commit."""
+    company = project_data.get("company")
+    logs = {
+        "progress": project_data.get("progress_log", []),
+        "error": project_data.get("error_log", []),
+    }
+    if company is not None:
+        # The chat log is the company's message bus, restored from these entries on load
+        logs["chat"] = company.message_bus.messages
+    
+    persisted = persisted_state(project_data)
+    async with persisted.lock:
+        written = await stage_project_state(
+            db, PROJECT_KIND, project_id, persisted,
+            pieces=split_state(project_state, project_data.get("artifacts", {}), project_data.get("owner_decisions", {})),
+            logs=logs,
+        )
+        await db.commit()
+        persisted.update(written)
+    if company is not None:
+        # Saved messages may leave the bus's in-memory window, and its feed with them
+        company.message_bus.mark_durable(persisted.log_counts.get("chat", 0))
+        sync_project_feed(project_data, company.message_bus.messages)
 
 
 async def save_project_to_db(project_id: str, project_data: Dict[str, Any], db: AsyncSession) -> None:
@@ -77,10 +174,6 @@ async def save_project_to_db(project_id: str, project_data: Dict[str, Any], db:
             db_project.ceo_model = project_data.get("ceo_model")
             db_project.current_phase = project_data.get("current_phase")
             db_project.status = project_data.get("status", "in_progress")
-            db_project.project_data = project_state
-            db_project.artifacts = project_data.get("artifacts", {})
-            db_project.owner_decisions = project_data.get("owner_decisions", {})
-            db_project.chat_log = project_data.get("chat_log", [])
             db_project.reference_documents = project_data.get("reference_documents", [])
             db_project.last_activity_at = datetime.utcnow()
             db_project.updated_at = datetime.utcnow()
@@ -97,17 +190,11 @@ async def save_project_to_db(project_id: str, project_data: Dict[str, Any], db:
                 ceo_model=project_data.get("ceo_model"),
                 current_phase=project_data.get("current_phase", "strategy_concept"),
                 status=project_data.get("status", "in_progress"),
-                project_data=project_state,
-                artifacts=project_data.get("artifacts", {}),
-                owner_decisions=project_data.get("owner_decisions", {}),
-                chat_log=project_data.get("chat_log", []),
                 reference_documents=project_data.get("reference_documents", []),
-                progress_log=[],
-                error_log=[],
             )
             db.add(db_project)
         
-        await db.commit()
+        await _save_state(project_id, project_data, db, project_state)
         logger.info(f"Saved project {project_id} to database")
     except Exception as e:
         await db.rollback()
@@ -126,14 +213,17 @@ async def load_project_from_db(project_id: str, db: AsyncSession) -> Optional[Di
         if not db_project:
             return None
         
+        stored = await load_project_state(db, PROJECT_KIND, db_project)
+        
         # Recreate company with saved models
         model = db_project.model or "qwen3:30b"
         ceo_model = db_project.ceo_model or model
         company = FerrariBookCompany(model=model, ceo_model=ceo_model)
+        company.message_bus.messages = [AgentMessage.from_dict(entry) for entry in stored.logs["chat"]]
         
         # Restore project state
-        if db_project.project_data:
-            bp_data = db_project.project_data
+        if stored.project_state:
+            bp_data = stored.project_state
             company.project = BookProject(
                 title=bp_data.get("title"),
                 premise=bp_data.get("premise", ""),
@@ -178,11 +268,12 @@ async def load_project_from_db(project_id: str, db: AsyncSession) -> Optional[Di
             "ceo_model": db_project.ceo_model,
             "current_phase": db_project.current_phase,
             "status": db_project.status,
-            "owner_decisions": db_project.owner_decisions or {},
-            "artifacts": db_project.artifacts or {},
-            "chat_log": db_project.chat_log or [],
-            "progress_log": db_project.progress_log or [],
-            "error_log": db_project.error_log or [],
+            "owner_decisions": stored.owner_decisions,
+            "artifacts": stored.artifacts,
+            "chat_log": stored.logs["chat"],
+            "progress_log": stored.logs["progress"],
+            "error_log": stored.logs["error"],
+            PERSISTED_KEY: stored.persisted,
             "created_at": db_project.created_at.isoformat() if db_project.created_at else datetime.utcnow().isoformat(),
             "updated_at": db_project.updated_at.isoformat() if db_project.updated_at else datetime.utcnow().isoformat(),
         }
@@ -193,65 +284,50 @@ async def load_project_from_db(project_id: str, db: AsyncSession) -> Optional[Di
         return None
 
 
+async def _append_log(project_id: str, log: str, entry: Dict[str, Any], db: AsyncSession = None) -> None:
+    """Append an entry to a progress or error log, in memory and in the database."""
+    if project_id in active_projects:
+        project_data = active_projects[project_id]
+        project_data.setdefault(f"{log}_log", []).append(entry)
+        if db:
+            # Writes this entry and any others not yet persisted
+            await _save_state(project_id, project_data, db)
+    elif db:
+        await append_log_entry(db, PROJECT_KIND, project_id, log, entry)
+        await db.commit()
+
+
 async def log_progress(project_id: str, message: str, phase: Optional[str] = None, db: AsyncSession = None) -> None:
     """Log progress entry for a project."""
-    if project_id in active_projects:
-        if "progress_log" not in active_projects[project_id]:
-            active_projects[project_id]["progress_log"] = []
-        active_projects[project_id]["progress_log"].append({
+    current_phase = active_projects[project_id].get("current_phase") if project_id in active_projects else None
+    try:
+        await _append_log(project_id, "progress", {
             "timestamp": datetime.utcnow().isoformat(),
-            "phase": phase or active_projects[project_id].get("current_phase"),
+            "phase": phase or current_phase,
             "message": message,
-        })
-    
-    if db:
-        try:
-            result = await db.execute(
-                select(BPHProject).where(BPHProject.id == project_id)
-            )
-            db_project = result.scalar_one_or_none()
-            if db_project:
-                progress_log = db_project.progress_log or []
-                progress_log.append({
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "phase": phase or db_project.current_phase,
-                    "message": message,
-                })
-                db_project.progress_log = progress_log
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Failed to log progress for project {project_id}", error=str(e))
+        }, db)
+    except Exception as e:
+        if db:
+            await db.rollback()
+        logger.error(f"Failed to log progress for project {project_id}", error=str(e))
 
 
 async def log_error(project_id: str, error: str, phase: Optional[str] = None, db: AsyncSession = None) -> None:
     """Log error entry for a project."""
-    if project_id in active_projects:
-        if "error_log" not in active_projects[project_id]:
-            active_projects[project_id]["error_log"] = []
-        active_projects[project_id]["error_log"].append({
+    current_phase = active_projects[project_id].get("current_phase") if project_id in active_projects else None
+    try:
+        await _append_log(project_id, "error", {
             "timestamp": datetime.utcnow().isoformat(),
-            "phase": phase or active_projects[project_id].get("current_phase"),
+            "phase": phase or current_phase,
             "error": str(error),
-        })
-    
-    if db:
-        try:
-            result = await db.execute(
-                select(BPHProject).where(BPHProject.id == project_id)
-            )
-            db_project = result.scalar_one_or_none()
-            if db_project:
-                error_log = db_project.error_log or []
-                error_log.append({
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "phase": phase or db_project.current_phase,
-                    "error": str(error),
-                })
-                db_project.error_log = error_log
-                db_project.status = "error"
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Failed to log error for project {project_id}", error=str(e))
+        }, db)
+        if db:
+            await db.execute(update(BPHProject).where(BPHProject.id == project_id).values(status="error"))
+            await db.commit()
+    except Exception as e:
+        if db:
+            await db.rollback()
+        logger.error(f"Failed to log error for project {project_id}", error=str(e))
 
 
 class BookPublishingHouseProjectCreate(BaseModel):
@@ -473,12 +549,8 @@ async def _execute_phase_background(project_id: str, current_phase: Phase, db: A
     
     try:
         # Mark as running
-        phase_execution_status[status_key] = {
-            "status": "running",
-            "phase": current_phase.value,
-            "started_at": datetime.utcnow().isoformat(),
-            "error": None
-        }
+        get_job_registry().create(PHASE_JOB_KIND, job_id=status_key, data={"phase": current_phase.value})
+        _publish_phase_status(project_id, status_key)
         
         await log_progress(project_id, f"Starting phase: {current_phase.value}", current_phase.value, db)
         logger.info(f"Background: Executing phase {current_phase.value} for project {project_id}")
@@ -502,13 +574,8 @@ async def _execute_phase_background(project_id: str, current_phase: Phase, db: A
             logger.warning(f"Failed to sync to graph", error=str(e), project_id=project_id)
         
         # Mark as completed
-        phase_execution_status[status_key] = {
-            "status": "completed",
-            "phase": current_phase.value,
-            "started_at": phase_execution_status[status_key]["started_at"],
-            "completed_at": datetime.utcnow().isoformat(),
-            "error": None
-        }
+        get_job_registry().complete(status_key)
+        _publish_phase_status(project_id, status_key)
         
         await log_progress(project_id, f"Completed phase: {current_phase.value}", current_phase.value, db)
         logger.info(f"Background: Phase {current_phase.value} completed for project {project_id}")
@@ -518,12 +585,8 @@ async def _execute_phase_background(project_id: str, current_phase: Phase, db: A
         logger.error(f"Background phase execution error: {error_msg}", error=error_msg, exc_info=True)
         await log_error(project_id, error_msg, current_phase.value, db)
         # Mark as failed
-        phase_execution_status[status_key] = {
-            "status": "failed",
-            "phase": current_phase.value,
-            "started_at": phase_execution_status.get(status_key, {}).get("started_at", datetime.utcnow().isoformat()),
-            "error": error_msg
-        }
+        get_job_registry().fail(status_key, error_msg)
+        _publish_phase_status(project_id, status_key)
         # Save error state to database
         if db and project_id in active_projects:
             project_data["status"] = "error"
@@ -562,8 +625,8 @@ async def execute_phase(project_id: str, background_tasks: BackgroundTasks, db:
         
         # Check if already running
         status_key = f"{project_id}_{current_phase.value}"
-        if status_key in phase_execution_status:
-            existing_status = phase_execution_status[status_key]
+        existing_status = get_job_registry().get(status_key)
+        if existing_status:
             if existing_status.get("status") == "running":
                 return {
                     "success": True,
@@ -611,9 +674,15 @@ async def get_phase_status(project_id: str, db: AsyncSession = Depends(get_db)):
         }
     
     status_key = f"{project_id}_{current_phase}"
-    execution_status = phase_execution_status.get(status_key, {})
+    registry = get_job_registry()
+    execution_status = registry.get(status_key) or {}
     
     if execution_status.get("status") == "completed":
+        if execution_status["owner"] != registry.instance_id:
+            # Another worker ran the phase; our copy of the project predates it
+            project_data = await load_project_from_db(project_id, db) or project_data
+            active_projects[project_id] = project_data
+        
         # Phase completed, get artifacts
         company = project_data["company"]
         current_phase_enum = Phase(current_phase)
@@ -666,7 +735,7 @@ async def get_phase_status(project_id: str, db: AsyncSession = Depends(get_db)):
             phase_chat_log = []
         
         # Clear status after returning
-        phase_execution_status.pop(status_key, None)
+        registry.delete(status_key)
         
         return {
             "status": "completed",
@@ -679,14 +748,22 @@ async def get_phase_status(project_id: str, db: AsyncSession = Depends(get_db)):
     elif execution_status.get("status") == "failed":
         error_msg = execution_status.get("error", "Unknown error")
         # Clear status
-        phase_execution_status.pop(status_key, None)
+        registry.delete(status_key)
         raise HTTPException(status_code=500, detail=f"Phase execution failed: {error_msg}")
+    elif execution_status.get("status") == "interrupted":
+        # The server restarted mid-phase; the phase can simply be executed again
+        registry.delete(status_key)
+        return {
+            "status": "interrupted",
+            "phase": current_phase,
+            "message": "Phase execution was interrupted by a server restart. Please run the phase again."
+        }
     elif execution_status.get("status") == "running":
         return {
             "status": "running",
             "phase": current_phase,
             "message": "Phase execution in progress",
-            "started_at": execution_status.get("started_at")
+            "started_at": execution_status.get("created_at")
         }
     else:
         return {
@@ -831,7 +908,7 @@ async def make_decision(project_id: str, decision: PhaseDecision, db: AsyncSessi
                 
                 # Save final files
                 try:
-                    await save_final_files(project_id, company, project_data)
+                    await save_final_files(project_id, company, project_data, db)
                 except Exception as save_error:
                     error_msg = str(save_error)
                     await log_error(project_id, f"Error saving final files: {error_msg}", Phase.COMPLETE.value, db)
@@ -1079,7 +1156,8 @@ def _convert_markdown_to_plain_text(markdown_text: str) -> str:
     return result
 
 
-async def save_final_files(project_id: str, company: FerrariBookCompany, project_data: Dict[str, Any]):
+async def save_final_files(project_id: str, company: FerrariBookCompany, project_data: Dict[str, Any],
+                           db: Optional[AsyncSession] = None):
     """Save final files after completion."""
     try:
         from pathlib import Path
@@ -1105,7 +1183,7 @@ async def save_final_files(project_id: str, company: FerrariBookCompany, project
             final_package = {}
         
         try:
-            chat_log = company.message_bus.get_chat_log()
+            chat_log = await _full_chat_log(project_id, company, db)
             if not isinstance(chat_log, list):
                 chat_log = []
         except Exception as e:
@@ -1198,8 +1276,19 @@ async def save_final_files(project_id: str, company: FerrariBookCompany, project
 
 
 @router.get("/api/ferrari-company/projects/{project_id}/chat-log")
-async def get_chat_log(project_id: str, phase: Optional[str] = None, db: AsyncSession = Depends(get_db)):
-    """Get chat log for project."""
+async def get_chat_log(
+    project_id: str,
+    phase: Optional[str] = None,
+    after: Optional[int] = None,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get chat log for project.
+    
+    With `after`, returns only the messages whose seq is greater, at most
+    `limit` of them, plus the cursor for the next poll:
+    {"chat_log": [...], "next_after": seq, "has_more": bool}.
+    """
     # Load from database if not in memory
     if project_id not in active_projects:
         project_data = await load_project_from_db(project_id, db)
@@ -1210,13 +1299,56 @@ async def get_chat_log(project_id: str, phase: Optional[str] = None, db: AsyncSe
     project_data = active_projects[project_id]
     company = project_data["company"]
     
-    if phase:
-        phase_enum = Phase(phase)
-        chat_log = company.message_bus.get_chat_log(phase_enum)
-    else:
-        chat_log = company.message_bus.get_chat_log()
+    if after is not None:
+        feed = _chat_feed(project_id, project_data)
+        limit = max(1, min(limit, 5000))
+        if after < feed.first_seq - 1 and db is not None:
+            # Messages the bus no longer holds are read from the stored log
+            entries = await read_log_entries(db, PROJECT_KIND, project_id, "chat", after=after,
+                                             before=feed.first_seq, phase=phase, limit=limit)
+            if entries:
+                return {"chat_log": entries, "next_after": entries[-1]["seq"], "has_more": True}
+            after = feed.first_seq - 1
+        return Response(content=feed.page(after, phase, limit), media_type="application/json")
+    
+    return {"chat_log": await _full_chat_log(project_id, company, db, phase)}
+
+
+@router.get("/api/ferrari-company/projects/{project_id}/events")
+async def stream_project_events(
+    project_id: str,
+    phase: Optional[str] = None,
+    after: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-sent events: chat messages after the cursor, then new messages and phase status changes.
+    
+    Message events carry their seq as the event id, so a reconnecting
+    EventSource resumes after the last message it received.
+    """
+    if project_id not in active_projects:
+        project_data = await load_project_from_db(project_id, db)
+        if not project_data:
+            raise HTTPException(status_code=404, detail="Project not found")
+        active_projects[project_id] = project_data
+    
+    feed = _chat_feed(project_id, active_projects[project_id])
+    cursor = resume_cursor(last_event_id, after)
+    backfill = []
+    if cursor < feed.first_seq - 1:
+        # Messages the bus no longer holds are read from the stored log
+        backfill = await read_log_entries(db, PROJECT_KIND, project_id, "chat", after=cursor,
+                                          before=feed.first_seq, phase=phase)
     
-    return {"chat_log": chat_log}
+    # The stream may stay open for hours; don't hold a pooled connection meanwhile
+    await db.close()
+    
+    return StreamingResponse(
+        feed.stream(cursor, phase, backfill=backfill),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 
 @router.get("/api/ferrari-company/projects/{project_id}/download/{file_type}")
@@ -1286,13 +1418,22 @@ async def download_file(project_id: str, file_type: str, db: AsyncSession = Depe
 
 
 @router.get("/api/ferrari-company/projects")
-async def list_book_publishing_house_projects(db: AsyncSession = Depends(get_db)):
-    """List all Book Publishing House projects from database."""
+async def list_book_publishing_house_projects(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List Book Publishing House projects from database, newest first.
+    
+    Without `cursor` or `limit` every project is listed. Otherwise pages are
+    addressed by `cursor`; pass the `next_cursor` of a page to get the next one. Only summary columns, and the start of the premise, are read.
+    """
     try:
-        result = await db.execute(
-            select(BPHProject).order_by(BPHProject.updated_at.desc())
-        )
-        db_projects = result.scalars().all()
+        db_projects, next_cursor = await list_page(db, BPHProject, (
+            BPHProject.id, BPHProject.title, func.substr(BPHProject.premise, 1, 101).label("premise"),
+            BPHProject.status, BPHProject.current_phase, BPHProject.output_directory,
+            BPHProject.model, BPHProject.ceo_model, BPHProject.created_at, BPHProject.updated_at,
+        ), cursor, limit)
         
         projects = []
         for db_project in db_projects:
@@ -1316,7 +1457,9 @@ async def list_book_publishing_house_projects(db: AsyncSession = Depends(get_db)
                 "ceo_model": db_project.ceo_model,
             })
         
-        return {"success": True, "projects": projects}
+        return {"success": True, "projects": projects, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Failed to list Book Publishing House projects", error=str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1391,24 +1534,13 @@ async def sync_project_graph(project_id: str, db: AsyncSession = Depends(get_db)
             "company": None,  # Will be loaded if needed
         }
         
-        # Load company instance if project_data exists
-        if db_project.project_data:
-            try:
-                project_data_dict = json.loads(db_project.project_data) if isinstance(db_project.project_data, str) else db_project.project_data
-                # Try to reconstruct company from project_data
-                # For now, just sync what we have
-                pass
-            except Exception as e:
-                logger.warning(f"Failed to load company from project_data", error=str(e))
+        stored = await load_project_state(db, PROJECT_KIND, db_project)
         
-        # Sync to graph - get artifacts from db_project.artifacts field
+        # Sync to graph - get artifacts from the stored phase artifacts
         try:
             from app.graph.sync import GraphSyncer
             
-            # Get artifacts from the separate artifacts field in database
-            artifacts = db_project.artifacts or {}
-            if isinstance(artifacts, str):
-                artifacts = json.loads(artifacts)
+            artifacts = stored.artifacts
             
             logger.info(f"Syncing graph for project {project_id}", artifact_keys=list(artifacts.keys()) if artifacts else [])
             
@@ -1445,6 +1577,8 @@ async def get_progress_report(project_id: str, db: AsyncSession = Depends(get_db
         raise HTTPException(status_code=404, detail="Project not found")
     
     try:
+        stored = await load_project_state(db, PROJECT_KIND, db_project)
+        
         # Generate report content
         report_lines = []
         report_lines.append("=" * 80)
@@ -1472,10 +1606,10 @@ async def get_progress_report(project_id: str, db: AsyncSession = Depends(get_db
         report_lines.append("")
         
         # Progress Log
-        if db_project.progress_log:
+        if stored.logs["progress"]:
             report_lines.append("PROGRESS LOG")
             report_lines.append("-" * 80)
-            for entry in db_project.progress_log:
+            for entry in stored.logs["progress"]:
                 timestamp = entry.get("timestamp", "Unknown")
                 phase = entry.get("phase", "Unknown")
                 message = entry.get("message", "")
@@ -1483,10 +1617,10 @@ async def get_progress_report(project_id: str, db: AsyncSession = Depends(get_db
             report_lines.append("")
         
         # Error Log
-        if db_project.error_log:
+        if stored.logs["error"]:
             report_lines.append("ERROR LOG")
             report_lines.append("-" * 80)
-            for entry in db_project.error_log:
+            for entry in stored.logs["error"]:
                 timestamp = entry.get("timestamp", "Unknown")
                 phase = entry.get("phase", "Unknown")
                 error = entry.get("error", "")
@@ -1494,10 +1628,10 @@ async def get_progress_report(project_id: str, db: AsyncSession = Depends(get_db
             report_lines.append("")
         
         # Phase Artifacts Summary
-        if db_project.artifacts:
+        if stored.artifacts:
             report_lines.append("PHASE ARTIFACTS SUMMARY")
             report_lines.append("-" * 80)
-            for phase, artifact_data in db_project.artifacts.items():
+            for phase, artifact_data in stored.artifacts.items():
                 report_lines.append(f"\nPhase: {phase}")
                 if isinstance(artifact_data, dict):
                     for key, value in artifact_data.items():
@@ -1509,18 +1643,18 @@ async def get_progress_report(project_id: str, db: AsyncSession = Depends(get_db
                 report_lines.append("")
         
         # Owner Decisions
-        if db_project.owner_decisions:
+        if stored.owner_decisions:
             report_lines.append("OWNER DECISIONS")
             report_lines.append("-" * 80)
-            for phase, decision in db_project.owner_decisions.items():
+            for phase, decision in stored.owner_decisions.items():
                 report_lines.append(f"{phase}: {decision}")
             report_lines.append("")
         
         # Project Data Summary
-        if db_project.project_data:
+        if stored.project_state:
             report_lines.append("PROJECT DATA SUMMARY")
             report_lines.append("-" * 80)
-            pd = db_project.project_data
+            pd = stored.project_state
             if pd.get("book_brief"):
                 report_lines.append("✓ Book Brief: Completed")
             if pd.get("world_dossier"):
@@ -1558,10 +1692,10 @@ async def get_progress_report(project_id: str, db: AsyncSession = Depends(get_db
             report_lines.append("")
         
         # Chat Log Summary
-        if db_project.chat_log:
+        if stored.logs["chat"]:
             report_lines.append("CHAT LOG SUMMARY")
             report_lines.append("-" * 80)
-            report_lines.append(f"Total Messages: {len(db_project.chat_log)}")
+            report_lines.append(f"Total Messages: {len(stored.logs['chat'])}")
             report_lines.append("")
         
         report_lines.append("=" * 80)
@@ -1,8 +1,10 @@
 """Neo4j Knowledge Graph API routes."""
 from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
 import structlog
+import gzip
+import json
 import uuid
 
 from app.graph.repository import GraphRepository
@@ -10,14 +12,41 @@ from app.graph.validation import GraphValidator
 from app.graph.renderer import GraphRenderer
 from app.graph.commands import CommandLog
 from app.graph.schema import NODE_LABELS, RELATIONSHIP_TYPES, ALLOWED_RELATIONSHIPS
+from app.graph.subgraph import decode_cursor, PROJECTIONS
 from app.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = structlog.get_logger(__name__)
 
+# msgpack is optional; clients opt in with "Accept: application/x-msgpack"
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Graph payloads smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
 router = APIRouter()
 
 
+def _encode_graph_payload(request: Request, payload: Dict[str, Any]) -> Response:
+    """Serialize a graph payload as msgpack or JSON, gzip-compressed when accepted."""
+    if MSGPACK_AVAILABLE and "application/x-msgpack" in request.headers.get("accept", ""):
+        body = msgpack.packb(payload, default=str)
+        media_type = "application/x-msgpack"
+    else:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        media_type = "application/json"
+    
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
 # Pydantic models
 class NodeCreate(BaseModel):
     labels: List[str]
@@ -96,14 +125,31 @@ async def init_project_graph(
 
 @router.get("/api/projects/{project_id}/graph")
 async def get_subgraph(
+    request: Request,
     project_id: str,
     focus_node_id: Optional[str] = Query(None),
     depth: int = Query(2, ge=0, le=5),
     labels: Optional[str] = Query(None),
     stage: Optional[str] = Query(None),
-    chapter: Optional[int] = Query(None)
+    chapter: Optional[int] = Query(None),
+    projection: str = Query("full"),
+    max_nodes: Optional[int] = Query(None, ge=1),
+    page_size: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = Query(None)
 ):
-    """Fetch subgraph."""
+    """Fetch subgraph.
+    
+    Large graphs can be fetched as a "summary" projection (details via
+    GET /nodes?ids=...), pruned to max_nodes best-connected nodes, and paged
+    with page_size/cursor.
+    """
+    if projection not in PROJECTIONS:
+        raise HTTPException(status_code=400, detail=f"projection must be one of {', '.join(PROJECTIONS)}")
+    try:
+        decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         label_list = labels.split(",") if labels else None
         result = GraphRepository.get_subgraph(
@@ -112,9 +158,13 @@ async def get_subgraph(
             depth=depth,
             labels=label_list,
             stage=stage,
-            chapter=chapter
+            chapter=chapter,
+            projection=projection,
+            max_nodes=max_nodes,
+            page_size=page_size,
+            cursor=cursor
         )
-        return result
+        return _encode_graph_payload(request, result)
     except Exception as e:
         error_msg = str(e)
         logger.error("Failed to fetch subgraph", error=error_msg, project_id=project_id, exc_info=True)
@@ -149,6 +199,18 @@ async def get_subgraph(
         return {"nodes": [], "edges": []}
 
 
+@router.get("/api/projects/{project_id}/nodes")
+async def get_nodes(request: Request, project_id: str, ids: str = Query(..., min_length=1)):
+    """Fetch full node details for a comma-separated list of ids."""
+    node_ids = [node_id for node_id in ids.split(",") if node_id][:500]
+    try:
+        nodes = GraphRepository.get_nodes(project_id, node_ids)
+        return _encode_graph_payload(request, {"success": True, "nodes": nodes})
+    except Exception as e:
+        logger.error("Failed to fetch nodes", error=str(e), project_id=project_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/api/projects/{project_id}/nodes")
 async def create_node(project_id: str, node: NodeCreate, user_id: str = "default"):
     """Create a new node."""
@@ -290,23 +352,25 @@ async def delete_relationship(
 async def search_nodes(
     project_id: str,
     q: str = Query(..., min_length=1),
-    labels: Optional[str] = Query(None)
+    labels: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0)
 ):
     """Search nodes."""
     try:
         label_list = labels.split(",") if labels else None
-        results = GraphRepository.search(project_id, q, label_list)
-        return {"success": True, "results": results}
+        results = GraphRepository.search(project_id, q, label_list, limit=limit, offset=offset)
+        return {"success": True, "results": results, "limit": limit, "offset": offset}
     except Exception as e:
         logger.error("Failed to search", error=str(e), project_id=project_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/api/projects/{project_id}/validate")
-async def validate_graph(project_id: str):
+async def validate_graph(project_id: str, full: bool = Query(False)):
     """Validate graph consistency."""
     try:
-        issues = GraphValidator.validate_project(project_id)
+        issues = GraphValidator.validate_project(project_id, incremental=not full)
         return {"success": True, "issues": issues}
     except Exception as e:
         logger.error("Failed to validate graph", error=str(e), project_id=project_id)
@@ -325,16 +389,37 @@ async def render_manuscript(project_id: str):
 
 
 @router.get("/api/projects/{project_id}/commands")
-async def get_commands(project_id: str, limit: int = Query(100, ge=1, le=1000)):
-    """Get command history."""
+async def get_commands(
+    project_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    before_seq: Optional[int] = Query(None, ge=1)
+):
+    """Get command history, newest first; page back with before_seq."""
     try:
-        commands = CommandLog.get_commands(project_id, limit)
-        return {"success": True, "commands": commands}
+        commands = CommandLog.get_commands(project_id, limit, before_seq=before_seq)
+        next_before = commands[-1]["seq"] if len(commands) == limit else None
+        return {"success": True, "commands": commands, "next_before_seq": next_before}
     except Exception as e:
         logger.error("Failed to get commands", error=str(e), project_id=project_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/api/projects/{project_id}/commands/{seq}/undone")
+async def mark_command_undone(project_id: str, seq: int):
+    """Record that a command was undone; it can be redone until the next command is logged."""
+    if not CommandLog.mark_undone(project_id, seq):
+        raise HTTPException(status_code=404, detail="No applied command with this sequence number")
+    return {"success": True}
+
+
+@router.post("/api/projects/{project_id}/commands/{seq}/redone")
+async def mark_command_redone(project_id: str, seq: int):
+    """Record that an undone command was applied again."""
+    if not CommandLog.mark_redone(project_id, seq):
+        raise HTTPException(status_code=404, detail="No undone command with this sequence number")
+    return {"success": True}
+
+
 @router.get("/api/projects/{project_id}/schema")
 async def get_schema():
     """Get graph schema (labels, relationship types, allowed combinations)."""
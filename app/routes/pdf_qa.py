@@ -1,18 +1,25 @@
 """PDF Q&A routes: upload a PDF, ask questions, and get cited answers (page + snippet)."""
 
 import asyncio
+import hashlib
 import json
 import re
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 import structlog
 from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from app.core.job_registry import get_job_registry
+from app.documents.extract import ExtractionError, ExtractorUnavailable, extract_pages
+from app.documents.store import get_document_store
+from app.pdf_qa.index import BM25Builder, BM25Index, load_cached, tokenize as _tokenize
+
 logger = structlog.get_logger(__name__)
 
 router = APIRouter()
@@ -27,6 +34,16 @@ MAX_FILE_SIZE = 75 * 1024 * 1024  # 75MB
 DEFAULT_MODEL = "qwen:32b"
 OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
 OLLAMA_TAGS_URL = "http://localhost:11434/api/tags"
+DOCUMENT_NAMESPACE = "pdf_qa"  # Catalog namespace of uploads
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One keep-alive connection pool shared by every Ollama call (created on first use).
+_ollama_client: Optional[httpx.AsyncClient] = None
 
 
 class ModelsResponse(BaseModel):
@@ -69,161 +86,9 @@ class JobStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
-def _clean_pdf_text(text: str) -> str:
-    """Post-process extracted PDF text to improve readability."""
-    if not text:
-        return ""
-    # Remove soft-hyphen and zero-width chars that often appear mid-word.
-    text = text.replace("\u00ad", "")  # soft hyphen
-    text = text.replace("\u200b", "").replace("\u200c", "").replace("\u200d", "")
-    # Normalize non-breaking spaces
-    text = text.replace("\u00a0", " ")
-    # De-hyphenate at line breaks: "com-\nputer" -> "computer"
-    text = re.sub(r"([A-Za-z0-9])-\s*\n\s*([A-Za-z0-9])", r"\1\2", text)
-    # Normalize newlines and whitespace
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"[ \t]+\n", "\n", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
-
-
-def _extract_pages_from_pdf(file_path: Path) -> Tuple[List[str], str]:
-    """Extract text per page from PDF. Returns (pages, extractor_name)."""
-    # Prefer PyMuPDF (fitz) which generally preserves word boundaries better than PyPDF2.
-    try:
-        import fitz  # type: ignore
-
-        pages: List[str] = []
-        doc = fitz.open(str(file_path))
-        try:
-            for page in doc:
-                # sort=True improves reading order in many PDFs
-                txt = page.get_text("text", sort=True) or ""
-                pages.append(_clean_pdf_text(txt))
-        finally:
-            doc.close()
-        return pages, "pymupdf"
-    except ImportError:
-        pass
-    except Exception as e:
-        logger.warning("PyMuPDF extraction failed; falling back to PyPDF2", error=str(e))
-
-    # Fallback: PyPDF2
-    try:
-        import PyPDF2  # type: ignore
-    except Exception:
-        raise HTTPException(
-            status_code=500,
-            detail="PDF extraction requires PyMuPDF or PyPDF2. Install with: pip install pymupdf PyPDF2",
-        )
-
-    try:
-        pages: List[str] = []
-        with open(file_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                txt = page.extract_text() or ""
-                pages.append(_clean_pdf_text(txt))
-        return pages, "pypdf2"
-    except Exception as e:
-        logger.error("PDF extraction failed", error=str(e))
-        raise HTTPException(status_code=400, detail=f"Failed to extract text from PDF: {str(e)}")
-
-
-def _tokenize(s: str) -> List[str]:
-    toks = re.findall(r"[a-zA-Z0-9]{2,}", (s or "").lower())
-    # Light stopword filtering to reduce "same page every time" bias.
-    stop = {
-        "the","and","for","with","that","this","from","into","your","you","are","was","were","what","when","where",
-        "how","why","can","could","should","would","will","their","there","then","than","have","has","had","not",
-        "but","about","also","use","used","using","more","most","some","any","each","such","make","makes","made",
-        "page","chapter","section","example","examples",
-    }
-    return [t for t in toks if t not in stop]
-
-
-def _score_page(query_tokens: List[str], page_text: str) -> int:
-    if not page_text:
-        return 0
-    hay = page_text.lower()
-    score = 0
-    for t in query_tokens:
-        score += hay.count(t)
-    return score
-
-
-def _chunk_text(text: str, chunk_chars: int = 1400, overlap: int = 250) -> List[str]:
-    t = (text or "").strip()
-    if not t:
-        return []
-    if len(t) <= chunk_chars:
-        return [t]
-    chunks: List[str] = []
-    step = max(200, chunk_chars - overlap)
-    i = 0
-    while i < len(t):
-        c = t[i : i + chunk_chars].strip()
-        if c:
-            chunks.append(c)
-        if i + chunk_chars >= len(t):
-            break
-        i += step
-    return chunks
-
-
-def _bm25_rank(question: str, pages: List[str], top_k: int = 6) -> List[Dict[str, Any]]:
-    """Return ranked chunks: [{page (1-based), text, score}]"""
-    q_tokens = _tokenize(question)
-    if not q_tokens:
-        return []
-
-    docs: List[Dict[str, Any]] = []
-    for pi, page_text in enumerate(pages):
-        for chunk in _chunk_text(page_text):
-            toks = _tokenize(chunk)
-            if not toks:
-                continue
-            tf: Dict[str, int] = {}
-            for t in toks:
-                tf[t] = tf.get(t, 0) + 1
-            docs.append({"page": pi + 1, "text": chunk, "tf": tf, "len": len(toks)})
-
-    if not docs:
-        return []
-
-    # document frequencies
-    df: Dict[str, int] = {}
-    for d in docs:
-        for t in d["tf"].keys():
-            df[t] = df.get(t, 0) + 1
-
-    N = len(docs)
-    avgdl = sum(d["len"] for d in docs) / max(1, N)
-    k1 = 1.2
-    b = 0.75
-
-    import math
-    def idf_math(t: str) -> float:
-        n = df.get(t, 0)
-        if n <= 0:
-            return 0.0
-        return math.log(1 + (N - n + 0.5) / (n + 0.5))
-
-    ranked: List[Dict[str, Any]] = []
-    for d in docs:
-        score = 0.0
-        dl = d["len"]
-        denom_base = k1 * (1 - b + b * (dl / (avgdl or 1.0)))
-        for t in q_tokens:
-            f = d["tf"].get(t, 0)
-            if f <= 0:
-                continue
-            score += idf_math(t) * (f * (k1 + 1)) / (f + denom_base)
-        if score > 0:
-            ranked.append({"page": d["page"], "text": d["text"], "score": score})
-
-    ranked.sort(key=lambda x: x["score"], reverse=True)
-    return ranked[: max(1, min(int(top_k or 6), 12))]
+def _extraction_http_error(e: ExtractionError) -> HTTPException:
+    status_code = 500 if isinstance(e, ExtractorUnavailable) else 400
+    return HTTPException(status_code=status_code, detail=str(e))
 
 
 def _make_snippet(page_text: str, question: str, max_len: int = 480) -> str:
@@ -252,47 +117,95 @@ def _make_snippet(page_text: str, question: str, max_len: int = 480) -> str:
     return snippet
 
 
+def _get_ollama_client() -> httpx.AsyncClient:
+    """Return the shared Ollama client, creating it on first use."""
+    global _ollama_client
+    if _ollama_client is None or _ollama_client.is_closed:
+        # Large local models can be slow (especially on first token). Use a generous timeout.
+        _ollama_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120.0),
+            http2=HTTP2_AVAILABLE,
+        )
+    return _ollama_client
+
+
+async def close_ollama_client() -> None:
+    """Close the shared Ollama connection pool."""
+    global _ollama_client
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+        _ollama_client = None
+
+
+async def _raise_ollama_error(resp: httpx.Response, model: str) -> None:
+    """Turn a non-200 Ollama response into an actionable HTTPException."""
+    await resp.aread()
+    # Make "model not found" actionable (common when the user hasn't pulled it yet).
+    if resp.status_code == 404:
+        try:
+            err = resp.json().get("error")  # {"error":"model 'x' not found"}
+        except Exception:
+            err = resp.text
+        suggestions = await _get_ollama_model_suggestions(model)
+        hint = ""
+        if suggestions:
+            hint = f"\n\nAvailable models include:\n- " + "\n- ".join(suggestions[:12])
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Ollama model not found: {model}\n\n"
+                f"Fix:\n- Pull the model: ollama pull {model}\n"
+                f"Or select an installed model on the PDF Q&A page."
+                f"{hint}"
+            ),
+        )
+    raise HTTPException(status_code=502, detail=f"Ollama error ({resp.status_code}): {resp.text}")
+
+
+_OLLAMA_UNAVAILABLE = "Cannot connect to Ollama at http://localhost:11434. Start it with: ollama serve"
+
+
 async def _ollama_chat(model: str, messages: List[Dict[str, str]]) -> str:
     """Call Ollama /api/chat and return assistant content."""
     payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": False}
     try:
-        # Large local models can be slow (especially on first token). Use a generous timeout.
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            resp = await client.post(OLLAMA_CHAT_URL, json=payload)
+        resp = await _get_ollama_client().post(OLLAMA_CHAT_URL, json=payload)
         if resp.status_code != 200:
-            # Make "model not found" actionable (common when the user hasn't pulled it yet).
-            if resp.status_code == 404:
-                try:
-                    err = resp.json().get("error")  # {"error":"model 'x' not found"}
-                except Exception:
-                    err = resp.text
-                suggestions = await _get_ollama_model_suggestions(model)
-                hint = ""
-                if suggestions:
-                    hint = f"\n\nAvailable models include:\n- " + "\n- ".join(suggestions[:12])
-                raise HTTPException(
-                    status_code=400,
-                    detail=(
-                        f"Ollama model not found: {model}\n\n"
-                        f"Fix:\n- Pull the model: ollama pull {model}\n"
-                        f"Or select an installed model on the PDF Q&A page."
-                        f"{hint}"
-                    ),
-                )
-            raise HTTPException(status_code=502, detail=f"Ollama error ({resp.status_code}): {resp.text}")
+            await _raise_ollama_error(resp, model)
         data = resp.json()
         return (data.get("message") or {}).get("content") or ""
     except httpx.ConnectError:
-        raise HTTPException(
-            status_code=503,
-            detail="Cannot connect to Ollama at http://localhost:11434. Start it with: ollama serve",
-        )
+        raise HTTPException(status_code=503, detail=_OLLAMA_UNAVAILABLE)
+
+
+async def _ollama_chat_stream(model: str, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """Call Ollama /api/chat with streaming and yield content pieces as they arrive.
+
+    Closing the generator early closes the upstream response, which makes
+    Ollama stop generating.
+    """
+    payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": True}
+    try:
+        async with _get_ollama_client().stream("POST", OLLAMA_CHAT_URL, json=payload) as resp:
+            if resp.status_code != 200:
+                await _raise_ollama_error(resp, model)
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise HTTPException(status_code=502, detail=f"Ollama error: {data['error']}")
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    yield content
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail=_OLLAMA_UNAVAILABLE)
 
 
 async def _get_ollama_models() -> List[str]:
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get(OLLAMA_TAGS_URL)
+        resp = await _get_ollama_client().get(OLLAMA_TAGS_URL, timeout=5.0)
         if resp.status_code != 200:
             return []
         data = resp.json()
@@ -326,8 +239,27 @@ async def get_models():
 def _load_pages(doc_id: str) -> Tuple[List[str], Dict[str, Any]]:
     pages_path = PROCESSED_DIR / f"{doc_id}.pages.json"
     meta_path = PROCESSED_DIR / f"{doc_id}.meta.json"
+    pdf_path = UPLOADS_DIR / f"{doc_id}.pdf"
     if not pages_path.exists() or not meta_path.exists():
-        raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+        # Uploads since the shared document store keep pages in its text layer
+        store = get_document_store()
+        doc = store.get(doc_id)
+        if not doc or doc["namespace"] != DOCUMENT_NAMESPACE:
+            raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+        layer = store.get_text_layer(doc["sha256"])
+        if layer is None:
+            # Missing, or extracted before a better extractor was installed
+            if not pdf_path.exists():
+                raise HTTPException(status_code=404, detail=f"Document text not found: {doc_id}")
+            try:
+                layer = store.extract_pdf_sync(pdf_path, doc["sha256"])
+            except ExtractionError as e:
+                raise _extraction_http_error(e)
+            store.update(doc_id, pages=len(layer[0]), extractor=layer[1])
+            _index_path(doc_id).unlink(missing_ok=True)
+        pages, extractor = layer
+        return pages, {"doc_id": doc_id, "filename": doc["name"], "pages": len(pages), "extractor": extractor}
+
     with open(pages_path, "r", encoding="utf-8") as f:
         pages = json.load(f).get("pages", [])
     with open(meta_path, "r", encoding="utf-8") as f:
@@ -337,10 +269,9 @@ def _load_pages(doc_id: str) -> Tuple[List[str], Dict[str, Any]]:
 
     # Auto-upgrade older extractions (e.g., from previous versions) if the original PDF is available.
     extractor = (meta or {}).get("extractor")
-    pdf_path = UPLOADS_DIR / f"{doc_id}.pdf"
     if extractor != "pymupdf" and pdf_path.exists():
         try:
-            new_pages, used = _extract_pages_from_pdf(pdf_path)
+            new_pages, used = extract_pages(pdf_path)
             if new_pages and sum(len(p.strip()) for p in new_pages) > sum(len(str(p or "").strip()) for p in pages):
                 pages = new_pages
                 meta["extractor"] = used
@@ -348,6 +279,7 @@ def _load_pages(doc_id: str) -> Tuple[List[str], Dict[str, Any]]:
                     json.dump({"pages": pages}, f)
                 with open(meta_path, "w", encoding="utf-8") as f:
                     json.dump(meta, f)
+                _index_path(doc_id).unlink(missing_ok=True)
         except Exception:
             # Best-effort; keep original pages if upgrade fails.
             pass
@@ -355,20 +287,34 @@ def _load_pages(doc_id: str) -> Tuple[List[str], Dict[str, Any]]:
     return [str(p or "") for p in pages], meta
 
 
-# In-memory job store (good enough for a single-process deployment).
-# Format:
-#   {job_id: {"status": "...", "result": AskResponse|None, "error": str|None}}
-qa_jobs: Dict[str, Dict[str, Any]] = {}
+def _index_path(doc_id: str) -> Path:
+    return PROCESSED_DIR / f"{doc_id}.bm25.npz"
+
+
+def _build_index(doc_id: str, pages: List[str]) -> BM25Index:
+    index = BM25Index.build(pages)
+    index.save(_index_path(doc_id))
+    logger.info("PDF index built", doc_id=doc_id, chunks=index.num_chunks, terms=len(index.terms))
+    return index
+
+
+def _load_index(doc_id: str) -> BM25Index:
+    """Load the document's BM25 index, (re)building it if missing or outdated.
+
+    Blocking (a rebuild may extract the PDF); async callers run it in a thread.
+    """
+    return load_cached(_index_path(doc_id), rebuild=lambda: _build_index(doc_id, _load_pages(doc_id)[0]))
 
 
 async def _run_qa_job(job_id: str, req: AskRequest) -> None:
+    registry = get_job_registry()
     try:
         result = await _answer_question(req)
-        qa_jobs[job_id] = {"status": "completed", "result": result, "error": None}
+        registry.complete(job_id, result=result.dict())
     except Exception as e:
         # Ensure we don't leak internal traces to the UI; stringify as best-effort.
         msg = getattr(e, "detail", None) if isinstance(e, HTTPException) else str(e)
-        qa_jobs[job_id] = {"status": "failed", "result": None, "error": msg or "Unknown error"}
+        registry.fail(job_id, msg or "Unknown error")
 
 
 @router.post("/upload", response_model=UploadResponse)
@@ -385,20 +331,30 @@ async def upload_pdf(file: UploadFile = File(...)):
     with open(pdf_path, "wb") as f:
         f.write(content)
 
-    pages, extractor = _extract_pages_from_pdf(pdf_path)
-
-    meta = {
-        "doc_id": doc_id,
-        "filename": file.filename,
-        "uploaded_at": datetime.utcnow().isoformat() + "Z",
-        "bytes": len(content),
-        "pages": len(pages),
-        "extractor": extractor,
-    }
-    with open(PROCESSED_DIR / f"{doc_id}.meta.json", "w", encoding="utf-8") as f:
-        json.dump(meta, f)
-    with open(PROCESSED_DIR / f"{doc_id}.pages.json", "w", encoding="utf-8") as f:
-        json.dump({"pages": pages}, f)
+    # Index pages as extraction streams them in; a re-upload reuses the text layer
+    store = get_document_store()
+    sha256 = hashlib.sha256(content).hexdigest()
+    builder = BM25Builder()
+    try:
+        pages, extractor = await store.extract_pdf(pdf_path, sha256, on_chunk=builder.add_pages)
+    except ExtractionError as e:
+        logger.error("PDF extraction failed", error=str(e))
+        pdf_path.unlink(missing_ok=True)
+        raise _extraction_http_error(e)
+    index = builder.finish()
+    index.save(_index_path(doc_id))
+
+    store.add(
+        DOCUMENT_NAMESPACE, doc_id,
+        name=file.filename or "document.pdf",
+        uploaded_at=datetime.utcnow().isoformat() + "Z",
+        content_type="application/pdf",
+        size=len(content),
+        sha256=sha256,
+        pages=len(pages),
+        extractor=extractor,
+        text_preview=next((p for p in pages if p.strip()), "")[:500]
+    )
 
     logger.info("PDF uploaded", doc_id=doc_id, pages=len(pages), filename=file.filename)
     return UploadResponse(doc_id=doc_id, filename=file.filename or "document.pdf", pages=len(pages))
@@ -427,20 +383,25 @@ def _extract_answer_and_explanation(model_text: str) -> Tuple[str, Optional[str]
     return t, None
 
 
-async def _answer_question(req: AskRequest) -> AskResponse:
-    pages, meta = _load_pages(req.doc_id)
-    if not pages:
+async def _prepare_answer(req: AskRequest) -> Dict[str, Any]:
+    """Retrieve context for a question.
+
+    Returns {"answer": AskResponse} when retrieval alone decides the answer,
+    otherwise the model messages plus the retrieval citations.
+    """
+    index = await asyncio.to_thread(_load_index, req.doc_id)
+    if not index.num_pages:
         raise HTTPException(status_code=400, detail="PDF has no extractable text.")
 
-    ranked = _bm25_rank(req.question, pages, top_k=max(4, int(req.top_k_pages or 3) * 2))
+    ranked = index.search(req.question, top_k=max(4, int(req.top_k_pages or 3) * 2))
     # If retrieval is weak, do not guess.
     if not ranked or ranked[0].get("score", 0) < 0.6:
-        return AskResponse(
+        return {"answer": AskResponse(
             answer="I don't know based on the document.",
             explanation="I couldn't find relevant text in the PDF to support an answer." if req.explain else None,
             citations=[],
             used_pages=[],
-        )
+        )}
 
     used_pages_1based = sorted({int(r["page"]) for r in ranked if r.get("page")})
 
@@ -467,7 +428,26 @@ async def _answer_question(req: AskRequest) -> AskResponse:
             "Be concise."
         )
     user = f"Question: {req.question}\n\nContext:\n{context}"
-    model_text = await _ollama_chat(req.model or DEFAULT_MODEL, [{"role": "system", "content": system}, {"role": "user", "content": user}])
+
+    # Provide citations from retrieval (deterministic): page + snippet.
+    citations: List[Citation] = []
+    for r in ranked[:3]:
+        snippet = _make_snippet(r.get("text") or "", req.question)
+        if snippet:
+            citations.append(Citation(page=int(r["page"]), snippet=snippet))
+
+    if not citations and ranked:
+        citations = [Citation(page=int(ranked[0]["page"]), snippet=_make_snippet(ranked[0].get("text") or "", req.question) or "")]
+
+    return {
+        "answer": None,
+        "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        "citations": citations,
+        "used_pages": used_pages_1based,
+    }
+
+
+def _finish_answer(req: AskRequest, prepared: Dict[str, Any], model_text: str) -> AskResponse:
     answer, explanation = _extract_answer_and_explanation(model_text)
     answer = (answer or "").strip()
     if not answer:
@@ -478,20 +458,58 @@ async def _answer_question(req: AskRequest) -> AskResponse:
             answer="I don't know based on the document.",
             explanation=explanation if req.explain else None,
             citations=[],
-            used_pages=used_pages_1based[:],
+            used_pages=prepared["used_pages"][:],
         )
 
-    # Provide citations from retrieval (deterministic): page + snippet.
-    citations: List[Citation] = []
-    for r in ranked[:3]:
-        snippet = _make_snippet(r.get("text") or "", req.question)
-        if snippet:
-            citations.append(Citation(page=int(r["page"]), snippet=snippet))
+    return AskResponse(
+        answer=answer,
+        explanation=explanation if req.explain else None,
+        citations=prepared["citations"],
+        used_pages=prepared["used_pages"],
+    )
 
-    if not citations and ranked:
-        citations = [Citation(page=int(ranked[0]["page"]), snippet=_make_snippet(ranked[0].get("text") or "", req.question) or "")]
 
-    return AskResponse(answer=answer, explanation=explanation if req.explain else None, citations=citations, used_pages=used_pages_1based)
+async def _answer_question(req: AskRequest) -> AskResponse:
+    prepared = await _prepare_answer(req)
+    if prepared["answer"] is not None:
+        return prepared["answer"]
+    model_text = await _ollama_chat(req.model or DEFAULT_MODEL, prepared["messages"])
+    return _finish_answer(req, prepared, model_text)
+
+
+def _sse(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream_answer(req: AskRequest) -> AsyncIterator[str]:
+    """Server-sent events for one question.
+
+    Sends the retrieval citations as soon as retrieval finishes, then the
+    answer tokens as Ollama produces them, then the final parsed answer:
+        {"type": "citations", "citations": [...], "used_pages": [...]}
+        {"type": "token", "token": "..."}
+        {"type": "done", "result": AskResponse}
+        {"type": "error", "error": "..."}
+    """
+    try:
+        prepared = await _prepare_answer(req)
+        if prepared["answer"] is not None:
+            yield _sse({"type": "done", "result": prepared["answer"].dict()})
+            return
+        yield _sse({
+            "type": "citations",
+            "citations": [c.dict() for c in prepared["citations"]],
+            "used_pages": prepared["used_pages"],
+        })
+
+        parts: List[str] = []
+        async for token in _ollama_chat_stream(req.model or DEFAULT_MODEL, prepared["messages"]):
+            parts.append(token)
+            yield _sse({"type": "token", "token": token})
+        result = _finish_answer(req, prepared, "".join(parts))
+        yield _sse({"type": "done", "result": result.dict()})
+    except HTTPException as e:
+        yield _sse({"type": "error", "error": e.detail})
 
 
 @router.post("/ask", response_model=AskResponse)
@@ -500,22 +518,45 @@ async def ask_pdf(req: AskRequest):
     return await _answer_question(req)
 
 
+@router.post("/ask_stream")
+async def ask_pdf_stream(req: AskRequest):
+    """Streamed ask: citations first, then answer tokens as server-sent events.
+
+    If the client disconnects the response stream is cancelled, which closes
+    the upstream Ollama request and stops generation.
+    """
+    return StreamingResponse(
+        _stream_answer(req),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.post("/ask_async", response_model=AskAsyncResponse)
 async def ask_pdf_async(req: AskRequest):
     """Async ask that avoids long-held HTTP connections (better for RunPod/Cloudflare)."""
-    job_id = str(uuid.uuid4())
-    qa_jobs[job_id] = {"status": "processing", "result": None, "error": None}
+    job_id = get_job_registry().create("pdf_qa", data={"doc_id": req.doc_id})
     asyncio.create_task(_run_qa_job(job_id, req))
     return AskAsyncResponse(job_id=job_id)
 
 
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
-    job = qa_jobs.get(job_id)
+    registry = get_job_registry()
+    job = registry.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    status = job.get("status", "processing")
-    result = job.get("result")
-    error = job.get("error")
+    status, result, error = job["status"], None, job["error"]
+    if status == "running":
+        status = "processing"
+    elif status == "interrupted":
+        # The worker running it restarted; the client should ask again
+        status = "failed"
+    elif status == "completed" and job["has_result"]:
+        result = registry.get_result(job_id)
     return JobStatusResponse(job_id=job_id, status=status, result=result, error=error)
 
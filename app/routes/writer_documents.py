@@ -1,4 +1,5 @@
 """Document upload and processing for Writer Assistant."""
+import hashlib
 import os
 import uuid
 from pathlib import Path
@@ -12,6 +13,9 @@ from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database import get_db, AsyncSessionLocal
+from app.documents.extract import ExtractionError
+from app.documents.store import DocumentStore, get_document_store
+from app.documents.tts import get_audio_cache, split_tts_chunks, synthesize_to_wav
 from app.models import BookProject, BookChapter
 
 logger = structlog.get_logger(__name__)
@@ -93,6 +97,9 @@ AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 # Maximum file size (50MB)
 MAX_FILE_SIZE = 50 * 1024 * 1024
 
+# Catalog namespace of writer documents
+DOCUMENT_NAMESPACE = "writer"
+
 # Thread pool for TTS operations
 # Use multiple workers if multiple GPUs are available for parallel chunk processing
 import torch
@@ -133,26 +140,39 @@ class DocumentInfo(BaseModel):
     uploaded_at: str
 
 
-def extract_text_from_pdf(file_path: Path) -> str:
-    """Extract text from PDF file, preserving page order."""
+def _document_catalog() -> DocumentStore:
+    """Document store, with metadata files from before the catalog imported."""
+    store = get_document_store()
+    store.import_meta_files(DOCUMENT_NAMESPACE, UPLOADS_DIR)
+    return store
+
+
+def _file_sha256(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def extract_text_from_pdf(file_path: Path, sha256: Optional[str] = None) -> str:
+    """Extract text from PDF file, preserving page order.
+    
+    Pages are extracted in parallel off the event loop, and a file whose
+    content was extracted before is served from the shared text layer.
+    """
     try:
-        import PyPDF2
-        text_parts = []
-        with open(file_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            # Extract pages in order to preserve text sequence
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                page_text = page.extract_text()
-                if page_text.strip():  # Only add non-empty pages
-                    text_parts.append(page_text)
-                    logger.debug(f"Extracted text from PDF page {page_num} ({len(page_text)} chars)")
-        # Join with double newline to preserve paragraph structure
-        full_text = '\n\n'.join(text_parts)
-        logger.info(f"Extracted {len(full_text)} characters from PDF ({len(text_parts)} pages)")
-        return full_text
-    except Exception as e:
+        if sha256 is None:
+            sha256 = await asyncio.to_thread(_file_sha256, file_path)
+        pages, _extractor = await get_document_store().extract_pdf(file_path, sha256)
+    except ExtractionError as e:
         logger.error("PDF extraction error", error=str(e))
-        raise HTTPException(status_code=400, detail=f"Failed to extract text from PDF: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    # Only non-empty pages, joined with double newline to preserve paragraph structure
+    text_parts = [page for page in pages if page.strip()]
+    full_text = '\n\n'.join(text_parts)
+    logger.info(f"Extracted {len(full_text)} characters from PDF ({len(text_parts)} pages)")
+    return full_text
 
 
 def extract_text_from_docx(file_path: Path) -> str:
@@ -194,16 +214,16 @@ def extract_text_from_txt(file_path: Path) -> str:
             raise HTTPException(status_code=400, detail=f"Failed to extract text from TXT: {str(e)}")
 
 
-def extract_text_from_file(file_path: Path, file_type: str) -> str:
-    """Extract text from file based on type."""
+async def extract_text_from_file(file_path: Path, file_type: str, sha256: Optional[str] = None) -> str:
+    """Extract text from file based on type, off the event loop."""
     file_type_lower = file_type.lower()
     
     if file_type_lower == 'application/pdf' or file_path.suffix.lower() == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return await extract_text_from_pdf(file_path, sha256)
     elif file_type_lower in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword'] or file_path.suffix.lower() in ['.docx', '.doc']:
-        return extract_text_from_docx(file_path)
+        return await asyncio.to_thread(extract_text_from_docx, file_path)
     elif file_type_lower == 'text/plain' or file_path.suffix.lower() == '.txt':
-        return extract_text_from_txt(file_path)
+        return await asyncio.to_thread(extract_text_from_txt, file_path)
     else:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_type}")
 
@@ -230,36 +250,32 @@ async def upload_document(file: UploadFile = File(...)):
             f.write(file_content)
         
         # Extract text
+        sha256 = hashlib.sha256(file_content).hexdigest()
         try:
-            extracted_text = extract_text_from_file(saved_path, file.content_type or '')
+            extracted_text = await extract_text_from_file(saved_path, file.content_type or '', sha256)
         except HTTPException:
             # Clean up file if extraction fails
             if saved_path.exists():
                 saved_path.unlink()
             raise
         
-        # Store metadata and text
-        metadata_path = UPLOADS_DIR / f"{doc_id}.meta.json"
-        import json
-        from datetime import datetime
-        metadata = {
-            "id": doc_id,
-            "name": file.filename,
-            "type": file.content_type or "unknown",
-            "size": len(file_content),
-            "uploaded_at": datetime.now().isoformat(),
-            "file_path": str(saved_path),
-            "text_preview": extracted_text[:500]  # First 500 chars
-        }
-        
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f)
-        
-        # Store full text separately
+        # Store the full text, then list the document in the catalog
         text_path = UPLOADS_DIR / f"{doc_id}.txt"
         with open(text_path, 'w', encoding='utf-8') as f:
             f.write(extracted_text)
         
+        from datetime import datetime
+        metadata = _document_catalog().add(
+            DOCUMENT_NAMESPACE, doc_id,
+            name=file.filename,
+            uploaded_at=datetime.now().isoformat(),
+            content_type=file.content_type or "unknown",
+            size=len(file_content),
+            sha256=sha256,
+            text_preview=extracted_text[:500],  # First 500 chars
+            meta={"file_path": str(saved_path)}
+        )
+        
         logger.info("Document uploaded", doc_id=doc_id, filename=file.filename, size=len(file_content))
         
         return {
@@ -283,31 +299,46 @@ async def upload_document(file: UploadFile = File(...)):
 
 
 @router.get("/api/writer/documents")
-async def list_documents():
-    """List all uploaded documents."""
-    try:
-        documents = []
-        for meta_file in UPLOADS_DIR.glob("*.meta.json"):
-            import json
-            with open(meta_file, 'r') as f:
-                metadata = json.load(f)
-                documents.append({
-                    "id": metadata["id"],
-                    "name": metadata["name"],
-                    "type": metadata["type"],
-                    "size": metadata["size"],
-                    "text_preview": metadata.get("text_preview", ""),
-                    "uploaded_at": metadata["uploaded_at"]
-                })
-        
-        # Sort by upload time (newest first)
-        documents.sort(key=lambda x: x["uploaded_at"], reverse=True)
-        
-        return {"success": True, "documents": documents}
+async def list_documents(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "uploaded_at",
+    order: str = "desc"
+):
+    """List uploaded documents (newest first by default).
     
+    Without `cursor` or `limit` every document is listed. Otherwise pages of
+    `limit` (100 by default) are returned; pass the returned `next_cursor`
+    back as `cursor` for the next page.
+    """
+    if limit is not None or cursor:
+        limit = max(1, min(limit or 100, 500))
+    try:
+        page, next_cursor = _document_catalog().list(
+            DOCUMENT_NAMESPACE,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            descending=order.lower() != "asc"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("List documents error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    
+    documents = [
+        {
+            "id": doc["id"],
+            "name": doc["name"],
+            "type": doc["type"],
+            "size": doc["size"],
+            "text_preview": doc["text_preview"],
+            "uploaded_at": doc["uploaded_at"]
+        }
+        for doc in page
+    ]
+    return {"success": True, "documents": documents, "next_cursor": next_cursor}
 
 
 @router.get("/api/writer/documents/{doc_id}")
@@ -322,12 +353,7 @@ async def get_document(doc_id: str):
             text = f.read()
         
         # Get metadata
-        metadata_path = UPLOADS_DIR / f"{doc_id}.meta.json"
-        metadata = {}
-        if metadata_path.exists():
-            import json
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
+        metadata = _document_catalog().get(doc_id) or {}
         
         return {
             "success": True,
@@ -355,8 +381,9 @@ async def delete_document(doc_id: str):
         for file_path in UPLOADS_DIR.glob(f"{doc_id}.*"):
             file_path.unlink()
             deleted.append(str(file_path))
+        in_catalog = _document_catalog().delete(doc_id)
         
-        if not deleted:
+        if not deleted and not in_catalog:
             raise HTTPException(status_code=404, detail="Document not found")
         
         logger.info("Document deleted", doc_id=doc_id, files=deleted)
@@ -394,20 +421,15 @@ async def add_text_context(doc_id: str, request: Request):
             f.write(text)
         
         # Store metadata
-        metadata_path = UPLOADS_DIR / f"{text_id}.meta.json"
-        import json
         from datetime import datetime
-        metadata = {
-            "id": text_id,
-            "name": "Custom Text Context",
-            "type": "text/plain",
-            "size": len(text.encode('utf-8')),
-            "uploaded_at": datetime.now().isoformat(),
-            "text_preview": text[:500]
-        }
-        
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f)
+        metadata = _document_catalog().add(
+            DOCUMENT_NAMESPACE, text_id,
+            name="Custom Text Context",
+            uploaded_at=datetime.now().isoformat(),
+            content_type="text/plain",
+            size=len(text.encode('utf-8')),
+            text_preview=text[:500]
+        )
         
         return {
             "success": True,
@@ -500,12 +522,20 @@ def _init_tts_model():
         logger.info("Preloading Bark models (this may take a while on first run)...")
         preload_models()
         
+        # Cached chunk audio is only reused with the same Bark release
+        try:
+            from importlib.metadata import version
+            bark_version = f"bark-{version('suno-bark')}"
+        except Exception:
+            bark_version = "bark"
+        
         logger.info(f"Initialized Bark TTS model (device: {device})")
         return {
             "generate_audio": generate_audio,
             "SAMPLE_RATE": SAMPLE_RATE,
             "device": device,
-            "device_count": device_count
+            "device_count": device_count,
+            "version": bark_version
         }, "bark"
     except ImportError as e:
         logger.error(f"Bark not installed: {e}", exc_info=True)
@@ -603,305 +633,33 @@ def text_to_speech_sync(text: str, output_path: Path, speaker_wav: Optional[str]
         generate_audio = bark_model["generate_audio"]
         sample_rate = bark_model["SAMPLE_RATE"]
         
-        # Clean and prepare text for TTS
-        # Remove excessive whitespace and normalize line breaks
-        import re
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Max 2 consecutive newlines
-        text = re.sub(r'[ \t]+', ' ', text)  # Normalize spaces
-        text = text.strip()
-        
-        # Bark works well with ~13-15 seconds of spoken text per chunk
-        # Use larger chunks (500-800 chars) to maintain coherence and reduce voice changes
-        # Split text intelligently by sentences while preserving paragraph structure
-        max_chunk_length = 600  # characters per chunk (optimal for Bark coherence)
-        min_chunk_length = 100  # minimum chunk size to avoid too many tiny chunks
-        
-        chunks = []
-        
-        # Split text into paragraphs first to preserve structure
-        paragraphs = text.split('\n\n')
-        
-        current_chunk = ""
-        
-        for para_idx, paragraph in enumerate(paragraphs):
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
-            
-            # Use regex to split by sentence endings while preserving abbreviations
-            # Pattern: sentence ending (. ! ?) followed by space and capital letter or end of text
-            # This avoids splitting on abbreviations like "Dr.", "U.S.", "etc."
-            sentence_pattern = r'(?<=[.!?])\s+(?=[A-Z])|(?<=[.!?])\s*$'
-            sentences = re.split(sentence_pattern, paragraph)
-            
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-                
-                # Ensure sentence ends with punctuation
-                if not re.search(r'[.!?]$', sentence):
-                    sentence += '.'
-                
-                # Check if adding this sentence would exceed max length
-                potential_chunk = (current_chunk + ' ' + sentence).strip() if current_chunk else sentence
-                
-                if len(potential_chunk) <= max_chunk_length:
-                    # Add to current chunk
-                    if current_chunk:
-                        current_chunk += ' ' + sentence
-                    else:
-                        current_chunk = sentence
-                else:
-                    # Current chunk is full, save it and start new one
-                    if current_chunk and len(current_chunk) >= min_chunk_length:
-                        chunks.append(current_chunk)
-                        logger.debug(f"Chunk {len(chunks)}: {current_chunk[:100]}...")
-                    elif current_chunk:
-                        # Chunk is too small, try to add sentence anyway if it's not too long
-                        if len(sentence) <= max_chunk_length:
-                            current_chunk = sentence
-                        else:
-                            # Sentence itself is too long, split it by commas or semicolons
-                            parts = re.split(r'[,;]\s+', sentence)
-                            for part in parts:
-                                part = part.strip()
-                                if not part:
-                                    continue
-                                if not re.search(r'[.!?]$', part):
-                                    part += '.'
-                                
-                                if current_chunk and len(current_chunk) + len(part) + 1 <= max_chunk_length:
-                                    current_chunk += ' ' + part
-                                else:
-                                    if current_chunk:
-                                        chunks.append(current_chunk)
-                                        logger.debug(f"Chunk {len(chunks)}: {current_chunk[:100]}...")
-                                    current_chunk = part
-                    else:
-                        # No current chunk, start with this sentence
-                        if len(sentence) <= max_chunk_length:
-                            current_chunk = sentence
-                        else:
-                            # Sentence too long, split by commas
-                            parts = re.split(r'[,;]\s+', sentence)
-                            for part in parts:
-                                part = part.strip()
-                                if not part:
-                                    continue
-                                if not re.search(r'[.!?]$', part):
-                                    part += '.'
-                                if current_chunk and len(current_chunk) + len(part) + 1 <= max_chunk_length:
-                                    current_chunk += ' ' + part
-                                else:
-                                    if current_chunk:
-                                        chunks.append(current_chunk)
-                                    current_chunk = part
-            
-            # Add paragraph break if we have content and it fits
-            if current_chunk and len(current_chunk) < max_chunk_length - 10:
-                # Small space for paragraph break
-                pass  # Paragraph breaks are preserved by the space between sentences
-        
-        # Add final chunk if it exists
-        if current_chunk:
-            chunks.append(current_chunk)
-            logger.debug(f"Final chunk {len(chunks)}: {current_chunk[:100]}...")
-        
-        # Fallback: if no chunks created, use entire text (or first part if too long)
-        if not chunks:
-            if len(text) <= max_chunk_length:
-                chunks = [text]
-            else:
-                # Split by sentences as fallback
-                sentences = re.split(r'(?<=[.!?])\s+', text)
-                current = ""
-                for sent in sentences:
-                    if len(current + sent) <= max_chunk_length:
-                        current += ' ' + sent if current else sent
-                    else:
-                        if current:
-                            chunks.append(current.strip())
-                        current = sent
-                if current:
-                    chunks.append(current.strip())
-        
-        # Log chunk summary for debugging
+        # Split text into sentence-aligned chunks of ~600 characters
+        chunks = split_tts_chunks(text)
         logger.info(f"Text split into {len(chunks)} chunks for TTS conversion")
-        for i, chunk in enumerate(chunks[:5], 1):  # Log first 5 chunks
-            logger.debug(f"Chunk {i} preview: {chunk[:150]}...")
-        if len(chunks) > 5:
-            logger.debug(f"... and {len(chunks) - 5} more chunks")
-        
-        # Generate audio for each chunk and concatenate
-        import soundfile as sf
-        import numpy as np
-        from concurrent.futures import as_completed
-        
-        audio_segments = []
-        device_count = bark_model.get("device_count", 1)
-        device = bark_model.get("device", "cpu")
-        
-        # IMPORTANT: Bark is an autoregressive model that requires sequential processing
-        # to maintain voice consistency. Parallel processing breaks voice coherence because
-        # each chunk needs the previous chunk's audio as history_prompt.
-        # Parallel processing is disabled by default to ensure quality.
-        # 
-        # Use parallel processing ONLY if explicitly enabled AND user accepts voice inconsistencies:
-        # 1. Parallel processing is enabled (ENABLE_PARALLEL_TTS=true)
-        # 2. Multiple GPUs are available
-        # 3. We have more than 1 chunk to process
-        # WARNING: This will cause voice changes and incoherence between chunks!
-        use_parallel = False  # Disabled by default for voice consistency
         
-        if use_parallel:
-            # Multi-GPU: Process chunks in parallel across GPUs
-            logger.info(f"Using parallel processing with {device_count} GPUs for {len(chunks)} chunks")
-            if progress_callback:
-                progress_callback(f"Processing {len(chunks)} chunks in parallel across {device_count} GPUs...")
-            
-            def process_chunk(chunk_data):
-                """Process a single chunk on a specific GPU.
-                
-                Note: Each thread needs to reload the Bark model on its assigned GPU.
-                This is because Bark models are loaded per-process, not per-thread.
-                """
-                chunk_idx, chunk_text, gpu_id = chunk_data
-                try:
-                    # Set CUDA device for this thread
-                    if torch.cuda.is_available() and gpu_id < torch.cuda.device_count():
-                        torch.cuda.set_device(gpu_id)
-                        logger.info(f"Processing chunk {chunk_idx+1} on GPU {gpu_id} ({torch.cuda.get_device_name(gpu_id)})")
-                    
-                    # Re-import generate_audio in this thread to ensure it uses the correct device
-                    # Bark's generate_audio should automatically use the current CUDA device
-                    history_prompt = None
-                    if speaker_wav:
-                        history_prompt = "v2/en_speaker_1"
-                    
-                    audio_array = generate_audio(
-                        chunk_text,
-                        history_prompt=history_prompt,
-                        text_temp=0.7,
-                        waveform_temp=0.7,
-                        silent=True
-                    )
-                    
-                    return (chunk_idx, audio_array, None)
-                except Exception as e:
-                    logger.warning(f"Chunk {chunk_idx+1} failed on GPU {gpu_id}: {e}", exc_info=True)
-                    return (chunk_idx, None, str(e))
-            
-            # Distribute chunks across GPUs
-            chunk_data_list = [
-                (i, chunk, i % device_count)  # Round-robin GPU assignment
-                for i, chunk in enumerate(chunks)
-                if chunk.strip()
-            ]
-            
-            # Process chunks in parallel (one per GPU)
-            # Use the global tts_executor which is already configured for multi-GPU
-            from concurrent.futures import ThreadPoolExecutor as ChunkExecutor
-            with ChunkExecutor(max_workers=min(device_count, len(chunk_data_list))) as executor:
-                future_to_chunk = {executor.submit(process_chunk, chunk_data): chunk_data[0] 
-                                  for chunk_data in chunk_data_list}
-                
-                completed = 0
-                for future in as_completed(future_to_chunk):
-                    chunk_idx, audio_array, error = future.result()
-                    completed += 1
-                    
-                    if progress_callback:
-                        progress_callback(f"Completed {completed}/{len(chunk_data_list)} chunks (parallel processing)")
-                    
-                    if audio_array is not None and len(audio_array) > 0:
-                        audio_segments.append((chunk_idx, audio_array))
-                        logger.info(f"Generated audio chunk {chunk_idx+1}, length: {len(audio_array)} samples")
-                    elif error:
-                        logger.warning(f"Chunk {chunk_idx+1} failed: {error}")
-            
-            # Sort audio segments by chunk index to maintain order
-            audio_segments.sort(key=lambda x: x[0])
-            audio_segments = [audio for _, audio in audio_segments]
-            
-        else:
-            # Single GPU or CPU: Process chunks sequentially
-            # This is REQUIRED for voice consistency - Bark is autoregressive and needs sequential processing
-            # CRITICAL: Process chunks in strict order to maintain text coherence
-            
-            # Use a consistent voice preset for all chunks to maintain voice consistency
-            # This prevents voice changes between chunks
-            history_prompt = "v2/en_speaker_1" if speaker_wav else None
-            
-            logger.info(f"Processing {len(chunks)} chunks sequentially for voice consistency")
-            
-            # Process chunks in strict order (index-based to ensure no reordering)
-            for chunk_idx in range(len(chunks)):
-                chunk = chunks[chunk_idx]
-                
-                if not chunk or not chunk.strip():
-                    logger.warning(f"Skipping empty chunk {chunk_idx+1}")
-                    continue
-                
-                try:
-                    chunk_progress = f"Generating audio chunk {chunk_idx+1}/{len(chunks)}..."
-                    logger.info(f"Processing chunk {chunk_idx+1}/{len(chunks)} (text length: {len(chunk)} chars)")
-                    logger.debug(f"Chunk {chunk_idx+1} text preview: {chunk[:200]}...")
-                    
-                    if progress_callback:
-                        progress_callback(chunk_progress)
-                    
-                    # Use the same history_prompt for all chunks to maintain voice consistency
-                    # This ensures the same voice is used throughout the entire text
-                    # Using a consistent preset prevents voice changes between chunks
-                    
-                    # Generate audio with Bark - process in strict sequential order
-                    audio_array = generate_audio(
-                        chunk,
-                        history_prompt=history_prompt,
-                        text_temp=0.7,
-                        waveform_temp=0.7,
-                        silent=True  # Disable progress bar
-                    )
-                    
-                    # Bark returns numpy array at 24kHz sample rate
-                    if audio_array is not None and len(audio_array) > 0:
-                        # Append in order - chunk_idx ensures correct ordering
-                        audio_segments.append((chunk_idx, audio_array))
-                        duration = len(audio_array) / sample_rate
-                        logger.info(f"✓ Generated audio chunk {chunk_idx+1}/{len(chunks)}: {len(audio_array)} samples ({duration:.2f}s)")
-                        if progress_callback:
-                            progress_callback(f"Completed chunk {chunk_idx+1}/{len(chunks)}")
-                    else:
-                        logger.warning(f"Empty audio generated for chunk {chunk_idx+1}")
-                        
-                except Exception as e:
-                    logger.error(f"Bark chunk {chunk_idx+1} failed: {e}", exc_info=True)
-                    # Continue with next chunk instead of failing entirely
-                    continue
-            
-            # Sort by chunk index to ensure correct order (should already be in order, but safety check)
-            audio_segments.sort(key=lambda x: x[0])
-            # Extract just the audio arrays in order
-            audio_segments = [audio for _, audio in audio_segments]
-            
-            logger.info(f"Processed {len(audio_segments)} audio chunks in sequential order")
-        
-        if not audio_segments:
-            raise ValueError("No audio generated from any chunks")
-        
-        # Concatenate all audio segments
-        if progress_callback:
-            progress_callback("Concatenating audio segments...")
-        final_audio = np.concatenate(audio_segments)
-        
-        # Save final audio file
-        if progress_callback:
-            progress_callback("Saving audio file...")
-        sf.write(str(output_path), final_audio, sample_rate)
+        # IMPORTANT: Bark is autoregressive; chunks are processed strictly in order with
+        # the same voice preset for all of them, which keeps the voice consistent.
+        # Chunks already spoken with the same text, voice and settings come from the
+        # cache, so edits and retries after a crash only synthesize what is missing.
+        history_prompt = "v2/en_speaker_1" if speaker_wav else None
+        params = {"text_temp": 0.7, "waveform_temp": 0.7}
+        
+        def generate(chunk: str):
+            return generate_audio(chunk, history_prompt=history_prompt, silent=True, **params)
+        
+        stats = synthesize_to_wav(
+            chunks,
+            generate,
+            get_audio_cache(),
+            output_path,
+            sample_rate=sample_rate,
+            model_version=bark_model.get("version", "bark"),
+            voice=history_prompt,
+            params=params,
+            progress_callback=progress_callback
+        )
         
-        logger.info("Bark TTS conversion completed", output_path=str(output_path), chunks=len(chunks), 
-                   audio_length=len(final_audio), sample_rate=sample_rate)
+        logger.info("Bark TTS conversion completed", output_path=str(output_path), **stats, sample_rate=sample_rate)
         if progress_callback:
             progress_callback("Conversion completed!")
         return str(output_path)
@@ -979,18 +737,15 @@ async def convert_pdf_to_audio(
             with open(text_path, 'r', encoding='utf-8') as f:
                 text = f.read()
             # Get metadata
-            metadata_path = UPLOADS_DIR / f"{doc_id}.meta.json"
-            if metadata_path.exists():
-                import json
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
-                    doc_name = metadata.get("name", "document")
-                    # Check if original file was TXT - if so, we already have the text
-                    file_type = metadata.get("type", "").lower()
-                    file_name = metadata.get("name", "").lower()
-                    if 'text/plain' in file_type or file_name.endswith('.txt'):
-                        # Text file - use the extracted text directly
-                        pass  # text is already loaded above
+            metadata = _document_catalog().get(doc_id)
+            if metadata:
+                doc_name = metadata.get("name") or "document"
+                # Check if original file was TXT - if so, we already have the text
+                file_type = (metadata.get("type") or "").lower()
+                file_name = (metadata.get("name") or "").lower()
+                if 'text/plain' in file_type or file_name.endswith('.txt'):
+                    # Text file - use the extracted text directly
+                    pass  # text is already loaded above
         else:
             # Check if it's a ferrari-company project
             from app.routes.ferrari_company import active_projects
@@ -1009,7 +764,7 @@ async def convert_pdf_to_audio(
                 elif files.get("pdf") and os.path.exists(files.get("pdf")):
                     pdf_path = files.get("pdf")
                     # Extract text from PDF
-                    text = extract_text_from_pdf(Path(pdf_path))
+                    text = await extract_text_from_pdf(Path(pdf_path))
                     doc_name = project_data.get("title", "Ferrari Book")
             else:
                 # Check if it's a book-writer project - fetch text directly from database
@@ -0,0 +1,160 @@
+"""Concurrent notification dispatch.
+
+`DispatchEngine` sends a batch of notification jobs concurrently:
+
+- every channel (call, email, ...) has its own semaphore sized to the
+  provider's rate limit, so a slow Twilio backlog never starves email
+- the channels of a single job ("both") are sent in parallel
+- jobs for the same user run strictly in order, so reminders never arrive
+  out of sequence
+- each channel is retried on its own with jittered exponential backoff; a
+  channel that already succeeded is never sent again
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import random
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+Sender = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# Notification channel values that fan out to several provider channels
+CHANNEL_GROUPS = {
+    "both": ("call", "email"),
+}
+
+# Concurrency used for a channel without a configured limit
+DEFAULT_CHANNEL_LIMIT = 10
+
+
+def channels_for(channel: Optional[str]) -> Tuple[str, ...]:
+    """Provider channels a notification channel value expands to."""
+    if not channel:
+        return ()
+    return CHANNEL_GROUPS.get(channel, (channel,))
+
+
+def default_channel_limits() -> Dict[str, int]:
+    """Per-channel concurrency limits from settings."""
+    from app.core.config import settings
+    return {
+        "call": settings.NOTIFICATION_CALL_CONCURRENCY,
+        "email": settings.NOTIFICATION_EMAIL_CONCURRENCY,
+    }
+
+
+class DispatchEngine:
+    """Send notification jobs concurrently under per-channel limits."""
+
+    def __init__(
+        self,
+        senders: Optional[Dict[str, Sender]] = None,
+        limits: Optional[Dict[str, int]] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        rng: Optional[random.Random] = None
+    ):
+        """Initialize the engine.
+
+        Args:
+            senders: Coroutine per channel that sends one job on that channel
+                (defaults to the Twilio and SendGrid senders)
+            limits: Maximum concurrent sends per channel
+            max_attempts: Attempts per channel before giving up
+            backoff_base: Backoff ceiling in seconds after the first failure;
+                doubles with every further attempt
+            backoff_max: Upper bound for a single backoff
+            rng: Random source for the backoff jitter
+        """
+        if senders is None:
+            from app.scheduling.jobs import CHANNEL_SENDERS
+            senders = CHANNEL_SENDERS
+        self.senders = senders
+        self.limits = limits if limits is not None else default_channel_limits()
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._rng = rng or random.Random()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, channel: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(channel)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(channel, DEFAULT_CHANNEL_LIMIT))
+            self._semaphores[channel] = semaphore
+        return semaphore
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retrying after the given failed attempt."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return self._rng.uniform(0, ceiling)
+
+    async def dispatch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send a batch of jobs and return their results in the same order.
+
+        Jobs are grouped by user_id; each user's jobs run sequentially while
+        different users run concurrently.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        by_user: Dict[Any, List[int]] = {}
+        for index, job_data in enumerate(jobs):
+            by_user.setdefault(job_data.get("user_id"), []).append(index)
+
+        async def run_user(indices: List[int]):
+            for index in indices:
+                results[index] = await self.execute(jobs[index])
+
+        await asyncio.gather(*(run_user(indices) for indices in by_user.values()))
+        return results
+
+    async def execute(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one job on all of its channels in parallel."""
+        channels = channels_for(job_data.get("channel"))
+        if not channels:
+            return {"status": "failed", "error": "Unknown channel"}
+
+        outcomes = await asyncio.gather(
+            *(self._send_channel(channel, job_data) for channel in channels)
+        )
+        if len(channels) == 1:
+            return outcomes[0]
+
+        result: Dict[str, Any] = dict(zip(channels, outcomes))
+        failed = [channel for channel, outcome in result.items() if outcome.get("status") == "failed"]
+        if not failed:
+            result["status"] = "completed"
+        else:
+            result["status"] = "failed" if len(failed) == len(channels) else "partial"
+            result["error"] = "; ".join(
+                f"{channel}: {result[channel].get('error', 'Unknown error')}" for channel in failed
+            )
+        return result
+
+    async def _send_channel(self, channel: str, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send on one channel, retrying only this channel on failure."""
+        sender = self.senders.get(channel)
+        if sender is None:
+            return {"status": "failed", "error": f"No sender for channel: {channel}", "attempts": 0}
+
+        result: Dict[str, Any] = {}
+        for attempt in range(1, self.max_attempts + 1):
+            async with self._semaphore(channel):
+                try:
+                    result = dict(await sender(job_data) or {})
+                except Exception as e:
+                    result = {"status": "failed", "error": str(e)}
+            result["attempts"] = attempt
+            if result.get("status") != "failed":
+                return result
+            if attempt < self.max_attempts:
+                logger.warning(
+                    "Notification channel failed, retrying",
+                    notification_id=job_data.get("notification_id"),
+                    channel=channel,
+                    attempt=attempt,
+                    error=result.get("error")
+                )
+                await asyncio.sleep(self.backoff(attempt))
+        return result
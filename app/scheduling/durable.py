@@ -0,0 +1,183 @@
+"""Notification scheduler running on the durable database job store."""
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import structlog
+
+from app.scheduling.scheduler import NotificationScheduler
+from app.scheduling.jobstore import DurableJobStore
+
+logger = structlog.get_logger(__name__)
+
+
+class DurableScheduler(NotificationScheduler):
+    """Scheduler that polls `DurableJobStore` for due jobs.
+
+    Nothing is loaded into memory on start: the loop asks the store for the
+    next due batch, so a restart resumes immediately however many jobs are
+    stored, and several app instances can run the loop against one table.
+    """
+
+    def __init__(
+        self,
+        store: Optional[DurableJobStore] = None,
+        executor: Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None,
+        batch_size: Optional[int] = None,
+        poll_seconds: Optional[float] = None
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            store: Job store (defaults to one on the app database)
+            executor: Coroutine that runs one job's payload
+            batch_size: Due jobs claimed per poll
+            poll_seconds: Longest sleep between polls
+        """
+        from app.core.config import settings
+
+        if executor is None:
+            from app.scheduling.jobs import execute_notification_job
+            executor = execute_notification_job
+        self.store = store or DurableJobStore()
+        self.executor = executor
+        self.batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        self.poll_seconds = poll_seconds or settings.SCHEDULER_POLL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start polling the job store; must be called from a running event loop."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("Durable scheduler started", owner=self.store.owner)
+
+    def stop(self) -> None:
+        """Stop polling. Jobs claimed but not finished are picked up again once their lease expires."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Durable scheduler stopped", owner=self.store.owner)
+
+    async def _run(self):
+        while True:
+            try:
+                jobs = await self.store.claim_due(self.batch_size)
+                if jobs:
+                    await self._run_batch(jobs)
+                    continue
+                await self._sleep_until_next()
+            except Exception as e:
+                logger.error("Durable scheduler poll failed", error=str(e))
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _run_batch(self, jobs: List[Dict[str, Any]]):
+        """Run a claimed batch concurrently.
+
+        Finished jobs are removed from the store as they complete, coalesced
+        into as few statements as possible. A job is only run again if this
+        instance dies between running it and that removal.
+        """
+        finished: List[str] = []
+        flushing: Optional[asyncio.Task] = None
+
+        async def flush():
+            while finished:
+                job_ids = finished[:]
+                del finished[:]
+                await self.store.complete_many(job_ids)
+
+        async def run(job: Dict[str, Any]):
+            nonlocal flushing
+            try:
+                result = await self.executor(job["payload"] or {})
+                logger.info("Job executed", job_id=job["id"], return_value=result)
+            except Exception as e:
+                logger.error("Job failed", job_id=job["id"], exception=str(e))
+            finished.append(job["id"])
+            if flushing is None or flushing.done():
+                flushing = asyncio.ensure_future(flush())
+
+        await asyncio.gather(*(run(job) for job in jobs))
+        if flushing is not None:
+            await flushing
+
+    async def _sleep_until_next(self):
+        """Sleep until the next job is due, a local schedule change or the poll interval."""
+        timeout = self.poll_seconds
+        next_run = await self.store.next_run_time()
+        if next_run is not None:
+            # A job that is already due but was not claimable is leased elsewhere
+            delay = (next_run - self.store.clock()).total_seconds()
+            if delay > 0:
+                timeout = min(timeout, delay)
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def schedule(self, job_id: str, run_at: datetime, payload: Dict[str, Any]):
+        """Create or replace a job."""
+        await self.store.schedule(job_id, run_at, payload)
+        self._wake()
+
+    async def reschedule(self, job_id: str, run_at: datetime) -> bool:
+        """Move a job to a new run time."""
+        found = await self.store.reschedule(job_id, run_at)
+        self._wake()
+        return found
+
+    def _submit(self, coroutine: Awaitable, action: str, notification_id: str) -> bool:
+        """Run a store update from the synchronous scheduler interface."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(coroutine)
+            return True
+
+        task = loop.create_task(coroutine)
+        self._pending.add(task)
+
+        def done(finished: asyncio.Task):
+            self._pending.discard(finished)
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.error(
+                    f"Failed to {action} notification",
+                    notification_id=notification_id,
+                    error=str(finished.exception())
+                )
+
+        task.add_done_callback(done)
+        return True
+
+    def schedule_notification(
+        self,
+        notification_id: str,
+        execute_at: datetime,
+        job_data: Dict[str, Any]
+    ) -> bool:
+        """Schedule a notification job; an existing job with the same id is replaced."""
+        return self._submit(self.schedule(notification_id, execute_at, job_data), "schedule", notification_id)
+
+    def cancel_notification(self, notification_id: str) -> bool:
+        """Cancel a scheduled notification."""
+        return self._submit(self.store.cancel(notification_id), "cancel", notification_id)
+
+    def reschedule_notification(
+        self,
+        notification_id: str,
+        new_execute_at: datetime
+    ) -> bool:
+        """Reschedule a notification."""
+        return self._submit(self.reschedule(notification_id, new_execute_at), "reschedule", notification_id)
@@ -1,5 +1,6 @@
 """Notification job execution."""
 from typing import Dict, Any
+import asyncio
 import structlog
 
 from app.telephony.twilio import TwilioClient, TwilioWebhookHandler
@@ -42,9 +43,11 @@ async def execute_notification_job(job_data: Dict[str, Any]) -> Dict[str, Any]:
         elif channel == "email":
             result = await _execute_email_notification(job_data)
         elif channel == "both":
-            # Execute both call and email
-            call_result = await _execute_call_notification(job_data)
-            email_result = await _execute_email_notification(job_data)
+            # Execute call and email in parallel
+            call_result, email_result = await asyncio.gather(
+                _execute_call_notification(job_data),
+                _execute_email_notification(job_data)
+            )
             result = {
                 "status": "completed",
                 "call": call_result,
@@ -144,3 +147,10 @@ async def _execute_email_notification(job_data: Dict[str, Any]) -> Dict[str, Any
     except Exception as e:
         logger.error("Email notification failed", error=str(e))
         return {"status": "failed", "error": str(e)}
+
+
+# Per-channel senders used by the dispatch engine
+CHANNEL_SENDERS = {
+    "call": _execute_call_notification,
+    "email": _execute_email_notification,
+}
@@ -0,0 +1,230 @@
+"""Durable job store for the scheduler, backed by the application database.
+
+Jobs live in the `scheduled_jobs` table instead of process memory, so a
+restart resumes from the table without replanning. Instances share the table
+through leases: claiming a job stamps it with the instance id and a lease
+expiry, and a job whose lease ran out (its instance died) becomes claimable
+again. Claims use FOR UPDATE SKIP LOCKED on Postgres; on SQLite the single
+UPDATE ... RETURNING statement is atomic on its own.
+
+All due-job queries walk the (status, run_at) index, so their cost depends on
+the number of jobs returned rather than the number of jobs stored.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import uuid
+import structlog
+
+from sqlalchemy import select, update, delete, func, or_
+
+from app.database import dialect_insert
+from app.models import ScheduledJob
+
+logger = structlog.get_logger(__name__)
+
+# Rows per statement for bulk scheduling
+_CHUNK_SIZE = 1000
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC, the convention used across the app."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _unleased(now: datetime):
+    """Filter for jobs that no live lease holds."""
+    return or_(ScheduledJob.lease_until.is_(None), ScheduledJob.lease_until < now)
+
+
+class DurableJobStore:
+    """Lease-based job store on top of an async SQLAlchemy session factory."""
+
+    def __init__(
+        self,
+        session_factory=None,
+        owner: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        misfire_grace_seconds: Optional[float] = None,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        """Initialize the store.
+
+        Args:
+            session_factory: Async session factory (defaults to the app database)
+            owner: Lease owner id for this instance (random by default)
+            lease_seconds: How long a claimed job stays reserved for this instance
+            misfire_grace_seconds: Jobs later than this are marked misfired
+                instead of run; a negative value runs late jobs regardless
+            clock: Returns the current naive UTC time
+        """
+        from app.core.config import settings
+
+        if session_factory is None:
+            from app.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        self.owner = owner or uuid.uuid4().hex
+        self.lease = timedelta(seconds=lease_seconds or settings.SCHEDULER_LEASE_SECONDS)
+        grace = settings.SCHEDULER_MISFIRE_GRACE_SECONDS if misfire_grace_seconds is None else misfire_grace_seconds
+        self.misfire_grace = timedelta(seconds=grace) if grace >= 0 else None
+        self.clock = clock
+
+    def _upsert(self, db):
+        """Build an INSERT ... ON CONFLICT (id) DO UPDATE for the session's dialect."""
+        statement = dialect_insert(db, ScheduledJob)
+        return statement.on_conflict_do_update(
+            index_elements=[ScheduledJob.id],
+            set_={
+                "run_at": statement.excluded.run_at,
+                "payload": statement.excluded.payload,
+                "status": "scheduled",
+                "lease_owner": None,
+                "lease_until": None,
+                "updated_at": statement.excluded.updated_at,
+            }
+        )
+
+    async def schedule(self, job_id: str, run_at: datetime, payload: Optional[Dict[str, Any]] = None):
+        """Create or replace a job in a single upsert."""
+        await self.schedule_many([(job_id, run_at, payload)])
+
+    async def schedule_many(self, jobs: Iterable[Tuple[str, datetime, Optional[Dict[str, Any]]]]) -> int:
+        """Create or replace many jobs; returns the number of jobs written."""
+        now = self.clock()
+        rows = [
+            {
+                "id": job_id,
+                "run_at": to_utc_naive(run_at),
+                "payload": payload,
+                "status": "scheduled",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for job_id, run_at, payload in jobs
+        ]
+        async with self.session_factory() as db:
+            for start in range(0, len(rows), _CHUNK_SIZE):
+                await db.execute(self._upsert(db), rows[start:start + _CHUNK_SIZE])
+            await db.commit()
+        return len(rows)
+
+    async def reschedule(self, job_id: str, run_at: datetime) -> bool:
+        """Move a job to a new run time; returns False if it does not exist."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.id == job_id)
+                .values(
+                    run_at=to_utc_naive(run_at),
+                    status="scheduled",
+                    lease_owner=None,
+                    lease_until=None,
+                    updated_at=self.clock()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def cancel(self, job_id: str) -> bool:
+        """Remove a job; returns False if it does not exist."""
+        async with self.session_factory() as db:
+            result = await db.execute(delete(ScheduledJob).where(ScheduledJob.id == job_id))
+            await db.commit()
+        return result.rowcount > 0
+
+    async def claim_due(self, limit: int) -> List[Dict[str, Any]]:
+        """Lease up to `limit` due jobs for this instance, oldest first.
+
+        Jobs that are later than the misfire grace period are marked misfired
+        in the same transaction instead of being returned.
+        """
+        now = self.clock()
+        async with self.session_factory() as db:
+            if self.misfire_grace is not None:
+                misfired = await db.execute(
+                    update(ScheduledJob)
+                    .where(
+                        ScheduledJob.status == "scheduled",
+                        ScheduledJob.run_at < now - self.misfire_grace,
+                        _unleased(now)
+                    )
+                    .values(status="misfired", lease_owner=None, lease_until=None, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if misfired.rowcount:
+                    logger.warning("Scheduled jobs misfired", count=misfired.rowcount)
+
+            due = (
+                select(ScheduledJob.id)
+                .where(
+                    ScheduledJob.status == "scheduled",
+                    ScheduledJob.run_at <= now,
+                    _unleased(now)
+                )
+                .order_by(ScheduledJob.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.id.in_(due.scalar_subquery()))
+                .values(lease_owner=self.owner, lease_until=now + self.lease, updated_at=now)
+                .returning(ScheduledJob.id, ScheduledJob.run_at, ScheduledJob.payload)
+                .execution_options(synchronize_session=False)
+            )
+            claimed = [
+                {"id": job_id, "run_at": run_at, "payload": payload}
+                for job_id, run_at, payload in result.all()
+            ]
+            await db.commit()
+        claimed.sort(key=lambda job: job["run_at"])
+        return claimed
+
+    async def complete(self, job_id: str) -> bool:
+        """Remove a finished job, unless it was rescheduled while it ran."""
+        return await self.complete_many([job_id]) > 0
+
+    async def complete_many(self, job_ids: List[str]) -> int:
+        """Remove finished jobs still leased by this instance; returns the number removed."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(ScheduledJob).where(
+                    ScheduledJob.id.in_(job_ids),
+                    ScheduledJob.lease_owner == self.owner
+                )
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def next_due(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """The next `limit` scheduled jobs by run time, without claiming them."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ScheduledJob.id, ScheduledJob.run_at, ScheduledJob.lease_owner)
+                .where(ScheduledJob.status == "scheduled")
+                .order_by(ScheduledJob.run_at)
+                .limit(limit)
+            )
+            return [
+                {"id": job_id, "run_at": run_at, "lease_owner": lease_owner}
+                for job_id, run_at, lease_owner in result.all()
+            ]
+
+    async def next_run_time(self) -> Optional[datetime]:
+        """Run time of the earliest scheduled job, or None if there is none."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(func.min(ScheduledJob.run_at)).where(ScheduledJob.status == "scheduled")
+            )
+            return result.scalar()
+
+    async def count(self, status: Optional[str] = "scheduled") -> int:
+        """Number of jobs with the given status (all jobs for None)."""
+        query = select(func.count()).select_from(ScheduledJob)
+        if status is not None:
+            query = query.where(ScheduledJob.status == status)
+        async with self.session_factory() as db:
+            return (await db.execute(query)).scalar()
@@ -1,18 +1,54 @@
 """Notification planner using LLM policy."""
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import uuid
 import structlog
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert, update
 
+from app.database import dialect_insert
 from app.models import User, Event, Notification, Rule
 from app.llm.policy import PolicyAgent
 from app.llm.client import LLMClient
 from app.schemas import PolicyRequest
+from app.scheduling.jobstore import to_utc_naive
 
 logger = structlog.get_logger(__name__)
 
+# Event columns written by a calendar sync
+EVENT_FIELDS = (
+    "title", "start_ts", "end_ts", "location", "conf_link", "organizer",
+    "attendees", "description", "status", "etag", "hash", "recurrence"
+)
+
+# How far ahead events get notifications planned
+PLANNING_HORIZON = timedelta(days=30)
+
+# Bind parameters per IN (...) query
+_IN_CHUNK_SIZE = 1000
+
+
+def compute_event_hash(event: Dict[str, Any]) -> str:
+    """Change-detection hash for a normalized event without a provider hash."""
+    hash_data = {
+        "title": event.get("title", ""),
+        "start_ts": str(event.get("start_ts", "")),
+        "end_ts": str(event.get("end_ts", "")),
+        "location": event.get("location") or "",
+        "description": event.get("description") or "",
+        "status": event.get("status", "confirmed")
+    }
+    return hashlib.sha256(json.dumps(hash_data, sort_keys=True).encode()).hexdigest()
+
+
+def _chunks(items: List[Any], size: int = _IN_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 class NotificationPlanner:
     """Plans notifications using LLM policy agent."""
@@ -56,7 +92,8 @@ class NotificationPlanner:
                         and_(Event.id == event_id, Event.user_id == user_id)
                     )
                 )
-                events = [event_result.scalar_one_or_none()] if event_result.scalar_one_or_none() else []
+                event = event_result.scalar_one_or_none()
+                events = [event] if event else []
             else:
                 # Plan for all upcoming events
                 now = datetime.utcnow()
@@ -75,34 +112,32 @@ class NotificationPlanner:
                 events = events_result.scalars().all()
             
             # Filter out events that already have notifications (unless force_replan)
-            events_to_plan = []
-            for event in events:
-                if not event:
-                    continue
-                
-                if force_replan:
-                    events_to_plan.append(event)
-                else:
-                    # Check if notifications already exist
+            planned_event_ids = set()
+            if not force_replan:
+                event_ids = [event.id for event in events if event]
+                for chunk in _chunks(event_ids):
                     existing_result = await db.execute(
-                        select(Notification).where(
+                        select(Notification.event_id).where(
                             and_(
                                 Notification.user_id == user_id,
-                                Notification.event_id == event.id
+                                Notification.event_id.in_(chunk)
                             )
-                        )
+                        ).distinct()
                     )
-                    existing_notifications = existing_result.scalars().all()
-                    
-                    if not existing_notifications:
-                        events_to_plan.append(event)
+                    planned_event_ids.update(existing_result.scalars())
+            
+            events_to_plan = [
+                event for event in events
+                if event and event.id not in planned_event_ids
+            ]
+            rules = await self._load_rules(db, user.id) if events_to_plan else []
             
             # Plan notifications for each event
             total_planned = 0
             planning_results = []
             
             for event in events_to_plan:
-                result = await self._plan_event_notifications(db, user, event)
+                result = await self._plan_event_notifications(db, user, event, rules=rules)
                 planning_results.append(result)
                 total_planned += result.get("notifications_planned", 0)
             
@@ -117,47 +152,99 @@ class NotificationPlanner:
             logger.error("Notification planning failed", user_id=user_id, error=str(e))
             return {"error": str(e)}
     
+    async def _load_rules(self, db: AsyncSession, user_id: str) -> List[Rule]:
+        """Enabled rules for a user, highest priority first."""
+        rules_result = await db.execute(
+            select(Rule).where(
+                and_(Rule.user_id == user_id, Rule.enabled == True)
+            ).order_by(Rule.priority.desc())
+        )
+        return rules_result.scalars().all()
+    
+    @staticmethod
+    def _user_preferences(user: User, rules: List[Rule]) -> Dict[str, Any]:
+        """Build the user preferences sent to the policy agent."""
+        return {
+            "channel_pref": user.channel_pref,
+            "quiet_start": user.quiet_start,
+            "quiet_end": user.quiet_end,
+            "max_call_attempts": user.max_call_attempts,
+            "weekend_policy": user.weekend_policy,
+            "escalation_threshold": user.escalation_threshold,
+            "timezone": user.timezone,
+            "rules": [{"type": rule.rule_type, "config": rule.rule_json} for rule in rules]
+        }
+    
+    @staticmethod
+    def _event_data(event: Any) -> Dict[str, Any]:
+        """Build the event data sent to the policy agent from an Event or a row dict."""
+        get = event.get if isinstance(event, dict) else lambda key: getattr(event, key)
+        return {
+            "id": str(get("id")),
+            "title": get("title"),
+            "start_ts": get("start_ts").isoformat(),
+            "end_ts": get("end_ts").isoformat(),
+            "location": get("location"),
+            "conf_link": get("conf_link"),
+            "organizer": get("organizer"),
+            "attendees": get("attendees") or [],
+            "description": get("description"),
+            "status": get("status")
+        }
+    
+    async def _policy_notifications(
+        self,
+        user: User,
+        user_prefs: Dict[str, Any],
+        event_data: Dict[str, Any],
+        event_start: datetime,
+        history: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Ask the policy agent for a plan and turn it into notification rows.
+
+        Returns:
+            Dict with the notification rows (future plan items only) and the
+            policy reasoning
+        """
+        policy_request = PolicyRequest(
+            event=event_data,
+            user_preferences=user_prefs,
+            history=history,
+            timezone=user.timezone
+        )
+        policy_response = await self.policy_agent.plan_notifications(policy_request)
+        
+        rows = []
+        now = datetime.utcnow()
+        for plan_item in policy_response.plan or []:
+            execute_at = event_start + timedelta(minutes=plan_item["offset_minutes"])
+            
+            # Skip if execution time is in the past
+            if to_utc_naive(execute_at) <= now:
+                continue
+            
+            rows.append({
+                "user_id": user.id,
+                "event_id": event_data["id"],
+                "channel": plan_item["channel"],
+                "plan_time": execute_at,
+                "payload": plan_item,
+                "status": "planned"
+            })
+        
+        return {"rows": rows, "reasoning": policy_response.reasoning}
+    
     async def _plan_event_notifications(
         self,
         db: AsyncSession,
         user: User,
-        event: Event
+        event: Event,
+        rules: Optional[List[Rule]] = None
     ) -> Dict[str, Any]:
         """Plan notifications for a specific event."""
         try:
-            # Get user rules
-            rules_result = await db.execute(
-                select(Rule).where(
-                    and_(Rule.user_id == user.id, Rule.enabled == True)
-                ).order_by(Rule.priority.desc())
-            )
-            rules = rules_result.scalars().all()
-            
-            # Build user preferences
-            user_prefs = {
-                "channel_pref": user.channel_pref,
-                "quiet_start": user.quiet_start,
-                "quiet_end": user.quiet_end,
-                "max_call_attempts": user.max_call_attempts,
-                "weekend_policy": user.weekend_policy,
-                "escalation_threshold": user.escalation_threshold,
-                "timezone": user.timezone,
-                "rules": [{"type": rule.rule_type, "config": rule.rule_json} for rule in rules]
-            }
-            
-            # Build event data
-            event_data = {
-                "id": str(event.id),
-                "title": event.title,
-                "start_ts": event.start_ts.isoformat(),
-                "end_ts": event.end_ts.isoformat(),
-                "location": event.location,
-                "conf_link": event.conf_link,
-                "organizer": event.organizer,
-                "attendees": event.attendees or [],
-                "description": event.description,
-                "status": event.status
-            }
+            if rules is None:
+                rules = await self._load_rules(db, user.id)
             
             # Get notification history for this event
             history_result = await db.execute(
@@ -179,55 +266,24 @@ class NotificationPlanner:
                     "created_at": notif.created_at.isoformat()
                 })
             
-            # Create policy request
-            policy_request = PolicyRequest(
-                event=event_data,
-                user_preferences=user_prefs,
-                history=history_data,
-                timezone=user.timezone
+            planned = await self._policy_notifications(
+                user,
+                self._user_preferences(user, rules),
+                self._event_data(event),
+                event.start_ts,
+                history_data
             )
             
-            # Get policy decision
-            policy_response = await self.policy_agent.plan_notifications(policy_request)
-            
-            if not policy_response.plan:
-                return {
-                    "event_id": str(event.id),
-                    "notifications_planned": 0,
-                    "reasoning": policy_response.reasoning
-                }
-            
             # Create notification records
-            notifications_created = 0
-            for plan_item in policy_response.plan:
-                # Calculate execution time
-                event_start = event.start_ts
-                offset_minutes = plan_item["offset_minutes"]
-                execute_at = event_start + timedelta(minutes=offset_minutes)
-                
-                # Skip if execution time is in the past
-                if execute_at <= datetime.utcnow():
-                    continue
-                
-                # Create notification record
-                notification = Notification(
-                    user_id=user.id,
-                    event_id=event.id,
-                    channel=plan_item["channel"],
-                    plan_time=execute_at,
-                    payload=plan_item,
-                    status="planned"
-                )
-                
-                db.add(notification)
-                notifications_created += 1
+            for row in planned["rows"]:
+                db.add(Notification(**row))
             
             await db.commit()
             
             return {
                 "event_id": str(event.id),
-                "notifications_planned": notifications_created,
-                "reasoning": policy_response.reasoning
+                "notifications_planned": len(planned["rows"]),
+                "reasoning": planned["reasoning"]
             }
             
         except Exception as e:
@@ -284,3 +340,219 @@ class NotificationPlanner:
                 error=str(e)
             )
             return {"error": str(e)}
+    
+    @staticmethod
+    def _event_upsert(db: AsyncSession):
+        """Upsert keyed on the provider event id that only rewrites rows whose hash changed.
+        
+        The hash guard keeps a concurrent sync of the same calendar from
+        failing on the unique constraint or rewriting identical rows.
+        """
+        statement = dialect_insert(db, Event)
+        return statement.on_conflict_do_update(
+            index_elements=[Event.user_id, Event.provider, Event.provider_event_id],
+            set_={
+                field: statement.excluded[field]
+                for field in EVENT_FIELDS + ("last_seen_at",)
+            },
+            where=Event.hash.is_distinct_from(statement.excluded.hash)
+        )
+    
+    async def sync_events(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        provider: str,
+        incoming: List[Dict[str, Any]],
+        window_start: Optional[datetime] = None,
+        window_end: Optional[datetime] = None,
+        removed: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Apply a calendar sync and replan only the events that changed.
+        
+        Incoming events are matched to stored ones by provider_event_id and
+        compared by hash in one bulk query, and new and changed events are
+        written in one upsert keyed on the provider id. New events are
+        planned, changed events have their planned notifications moved or
+        cancelled, and deleted events are cancelled. Unchanged events are
+        not touched.
+        
+        With a window, `incoming` is the provider's full listing of that
+        range and stored events inside it that are missing were deleted.
+        Only the stored events in that range, and those `incoming` names
+        from outside it, are read. Without one, `incoming` is a delta: only the events it names (and
+        `removed`) are looked up.
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            provider: Calendar provider (google, microsoft)
+            incoming: Normalized provider events
+            window_start: Start of the synced range; with window_end, enables
+                detection of deleted events
+            window_end: End of the synced range
+            removed: Provider ids of events deleted upstream
+            
+        Returns:
+            Diff summary with event and notification counts
+        """
+        user_result = await db.execute(select(User).where(User.id == user_id))
+        user = user_result.scalar_one_or_none()
+        if not user:
+            return {"error": "User not found"}
+        
+        removed = removed or []
+        windowed = window_start is not None and window_end is not None
+        stored_query = select(Event.id, Event.provider_event_id, Event.hash, Event.start_ts, Event.status).where(
+            and_(Event.user_id == user_id, Event.provider == provider)
+        )
+        stored = {}
+        provider_ids = {data["provider_event_id"] for data in incoming}.union(removed)
+        if windowed:
+            window_start, window_end = to_utc_naive(window_start), to_utc_naive(window_end)
+            stored_result = await db.execute(
+                stored_query.where(Event.start_ts >= window_start, Event.start_ts <= window_end)
+            )
+            stored = {row.provider_event_id: row for row in stored_result}
+            # Events the sync names that are stored outside the window, e.g. moved into it
+            provider_ids -= stored.keys()
+        for chunk in _chunks(list(provider_ids)):
+            stored_result = await db.execute(stored_query.where(Event.provider_event_id.in_(chunk)))
+            stored.update((row.provider_event_id, row) for row in stored_result)
+        
+        now = datetime.utcnow()
+        inserted: List[Dict[str, Any]] = []
+        changed: Dict[str, Dict[str, Any]] = {}
+        seen = set()
+        for data in incoming:
+            if data["provider_event_id"] in seen:
+                continue
+            row = {field: data.get(field) for field in EVENT_FIELDS}
+            row["status"] = row["status"] or "confirmed"
+            row["hash"] = row["hash"] or compute_event_hash(row)
+            row["provider_event_id"] = data["provider_event_id"]
+            row["last_seen_at"] = now
+            seen.add(row["provider_event_id"])
+            
+            existing = stored.get(row["provider_event_id"])
+            row.update(user_id=user_id, provider=provider)
+            if existing is None:
+                row["id"] = str(uuid.uuid4())
+                inserted.append(row)
+            elif existing.hash != row["hash"]:
+                row["id"] = existing.id
+                changed[existing.id] = row
+        
+        deleted_ids = [
+            stored[provider_event_id].id for provider_event_id in set(removed) - seen
+            if provider_event_id in stored and stored[provider_event_id].status != "cancelled"
+        ]
+        if windowed:
+            deleted_ids += [
+                existing.id for provider_event_id, existing in stored.items()
+                if provider_event_id not in seen
+                and provider_event_id not in removed
+                and existing.status != "cancelled"
+                and window_start <= to_utc_naive(existing.start_ts) <= window_end
+            ]
+        
+        upserts = inserted + list(changed.values())
+        if upserts:
+            await db.execute(self._event_upsert(db), upserts)
+        for chunk in _chunks(deleted_ids):
+            await db.execute(
+                update(Event)
+                .where(Event.id.in_(chunk))
+                .values(status="cancelled")
+                .execution_options(synchronize_session=False)
+            )
+        
+        # Move or cancel the notifications of changed and deleted events
+        notifications_by_event: Dict[str, List[Any]] = defaultdict(list)
+        for chunk in _chunks(list(changed) + deleted_ids):
+            notifications_result = await db.execute(
+                select(Notification.id, Notification.event_id, Notification.status, Notification.plan_time, Notification.payload)
+                .where(Notification.event_id.in_(chunk))
+            )
+            for notification in notifications_result:
+                notifications_by_event[notification.event_id].append(notification)
+        
+        moved: List[Dict[str, Any]] = []
+        cancelled_ids: List[str] = []
+        to_plan = list(inserted)
+        for event_id in deleted_ids:
+            cancelled_ids += [n.id for n in notifications_by_event[event_id] if n.status == "planned"]
+        for event_id, row in changed.items():
+            notifications = notifications_by_event[event_id]
+            if not notifications:
+                to_plan.append(row)
+                continue
+            for notification in notifications:
+                if notification.status != "planned":
+                    continue
+                offset = (notification.payload or {}).get("offset_minutes")
+                if row["status"] != "confirmed":
+                    cancelled_ids.append(notification.id)
+                elif offset is not None:
+                    plan_time = to_utc_naive(row["start_ts"]) + timedelta(minutes=offset)
+                    if plan_time <= now:
+                        cancelled_ids.append(notification.id)
+                    elif plan_time != to_utc_naive(notification.plan_time):
+                        moved.append({"id": notification.id, "plan_time": plan_time})
+        
+        if moved:
+            await db.execute(update(Notification), moved)
+        for chunk in _chunks(cancelled_ids):
+            await db.execute(
+                update(Notification)
+                .where(Notification.id.in_(chunk))
+                .values(status="cancelled")
+                .execution_options(synchronize_session=False)
+            )
+        
+        # Plan new events (and changed ones that never had notifications)
+        created: List[Dict[str, Any]] = []
+        horizon = now + PLANNING_HORIZON
+        to_plan = [
+            row for row in to_plan
+            if row["status"] == "confirmed"
+            and not row["recurrence"]
+            and now < to_utc_naive(row["start_ts"]) <= horizon
+        ]
+        if to_plan:
+            user_prefs = self._user_preferences(user, await self._load_rules(db, user_id))
+            for row in to_plan:
+                try:
+                    planned = await self._policy_notifications(
+                        user, user_prefs, self._event_data(row), row["start_ts"], []
+                    )
+                except Exception as e:
+                    logger.error(
+                        "Event notification planning failed",
+                        user_id=user_id,
+                        event_id=row["id"],
+                        error=str(e)
+                    )
+                    continue
+                created += [dict(notification, id=str(uuid.uuid4())) for notification in planned["rows"]]
+        if created:
+            await db.execute(insert(Notification), created)
+        
+        await db.commit()
+        
+        summary = {
+            "user_id": user_id,
+            "events": {
+                "inserted": len(inserted),
+                "updated": len(changed),
+                "deleted": len(deleted_ids),
+                "unchanged": len(seen) - len(inserted) - len(changed)
+            },
+            "notifications": {
+                "created": len(created),
+                "updated": len(moved),
+                "cancelled": len(cancelled_ids)
+            }
+        }
+        logger.info("Calendar sync applied", **summary)
+        return summary
@@ -2,10 +2,11 @@
 import asyncio
 import structlog
 from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.database import AsyncSessionLocal
 from app.scheduling.planner import NotificationPlanner
-from app.scheduling.jobs import execute_notification_job
+from app.scheduling.dispatch import DispatchEngine
 from app.llm.client import LLMClient
 from app.core.config import settings
 
@@ -15,7 +16,28 @@ logger = structlog.get_logger(__name__)
 class NotificationWorker:
     """Background worker for processing notifications."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        session_factory=None,
+        batch_size: Optional[int] = None,
+        dispatcher: Optional[DispatchEngine] = None,
+        claim_lease_seconds: Optional[int] = None
+    ):
+        """Initialize the worker.
+
+        Args:
+            session_factory: Async session factory (defaults to the app database)
+            batch_size: Notifications claimed per batch (defaults to NOTIFICATION_BATCH_SIZE)
+            dispatcher: Engine that sends the jobs of a batch concurrently
+            claim_lease_seconds: How long a claimed batch is reserved before another
+                tick may claim it again (defaults to NOTIFICATION_CLAIM_LEASE_SECONDS)
+        """
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.claim_lease = timedelta(seconds=(
+            settings.NOTIFICATION_CLAIM_LEASE_SECONDS if claim_lease_seconds is None else claim_lease_seconds
+        ))
+        self.dispatcher = dispatcher or DispatchEngine()
         # Use local LLM (Ollama) - no API key needed
         local_url = getattr(settings, 'LLM_LOCAL_URL', 'http://localhost:11434/v1')
         self.llm_client = LLMClient(
@@ -46,107 +68,196 @@ class NotificationWorker:
         self.running = False
         logger.info("Notification worker stopped")
     
-    async def _process_pending_notifications(self):
-        """Process notifications that are due to be sent."""
-        async with AsyncSessionLocal() as db:
+    async def _process_pending_notifications(self) -> int:
+        """Send every notification that is due, one claimed batch at a time.
+
+        Keeps draining until no due notification is left, so a burst of
+        reminders at the top of the hour is not spread over several ticks.
+
+        Returns:
+            Number of notifications processed
+        """
+        now = datetime.utcnow()
+        processed = 0
+        
+        while True:
+            batch = await self._claim_batch(now)
+            if not batch:
+                break
+            await self._send_batch(batch)
+            processed += len(batch)
+        
+        return processed
+    
+    async def _claim_batch(self, now: datetime) -> List[Tuple[Any, Optional[Dict[str, Any]]]]:
+        """Claim a batch of due notifications and load their users and events.
+
+        The batch is selected with FOR UPDATE SKIP LOCKED and flipped to
+        "sending" with its claim time in the same transaction, so concurrent
+        workers never pick up the same rows. Rows still "sending" after the
+        claim lease belong to a worker that died mid-batch and are claimed
+        again. Users and events are loaded with one IN query each.
+
+        Returns:
+            List of (notification, job_data) pairs; job_data is None when the
+            user or event no longer exists
+        """
+        async with self.session_factory() as db:
             from app.models import Notification, User, Event
-            from sqlalchemy import select, and_
+            from sqlalchemy import select, update, and_, or_
             
-            # Get notifications that are due
-            now = datetime.utcnow()
-            due_notifications = await db.execute(
+            claimed_at = datetime.utcnow()
+            lease_expired = claimed_at - self.claim_lease
+            result = await db.execute(
                 select(Notification)
-                .join(User)
-                .join(Event)
                 .where(
                     and_(
-                        Notification.status == "planned",
+                        or_(
+                            Notification.status == "planned",
+                            and_(
+                                Notification.status == "sending",
+                                or_(Notification.claimed_at.is_(None), Notification.claimed_at <= lease_expired)
+                            )
+                        ),
                         Notification.plan_time <= now
                     )
                 )
+                .order_by(Notification.plan_time)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
             )
+            notifications = result.scalars().all()
+            if not notifications:
+                return []
             
-            notifications = due_notifications.scalars().all()
+            user_ids = {notification.user_id for notification in notifications}
+            event_ids = {notification.event_id for notification in notifications}
+            users_result = await db.execute(select(User).where(User.id.in_(user_ids)))
+            users = {user.id: user for user in users_result.scalars()}
+            events_result = await db.execute(select(Event).where(Event.id.in_(event_ids)))
+            events = {event.id: event for event in events_result.scalars()}
             
-            for notification in notifications:
-                try:
-                    # Get user and event data
-                    user_result = await db.execute(
-                        select(User).where(User.id == notification.user_id)
-                    )
-                    user = user_result.scalar_one_or_none()
-                    
-                    event_result = await db.execute(
-                        select(Event).where(Event.id == notification.event_id)
-                    )
-                    event = event_result.scalar_one_or_none()
-                    
-                    if not user or not event:
-                        logger.warning(
-                            "Missing user or event for notification",
-                            notification_id=notification.id
-                        )
-                        continue
-                    
-                    # Prepare job data
-                    job_data = {
-                        "notification_id": str(notification.id),
-                        "user_id": str(user.id),
-                        "event_id": str(event.id),
-                        "channel": notification.channel,
-                        "event": {
-                            "id": str(event.id),
-                            "title": event.title,
-                            "start_ts": event.start_ts.isoformat(),
-                            "end_ts": event.end_ts.isoformat(),
-                            "location": event.location,
-                            "conf_link": event.conf_link,
-                            "organizer": event.organizer,
-                            "attendees": event.attendees or [],
-                            "description": event.description
-                        },
-                        "user": {
-                            "id": str(user.id),
-                            "name": user.name,
-                            "email": user.email,
-                            "phone_e164": user.phone_e164,
-                            "timezone": user.timezone
-                        },
-                        "notification": notification.payload or {}
-                    }
-                    
-                    # Execute the notification
-                    result = await execute_notification_job(job_data)
-                    
-                    # Update notification status
-                    notification.status = result.get("status", "failed")
-                    notification.sent_time = datetime.utcnow()
-                    notification.result = result
-                    notification.attempts += 1
-                    
-                    if result.get("status") == "failed":
-                        notification.error = result.get("error", "Unknown error")
-                    
-                    await db.commit()
-                    
-                    logger.info(
-                        "Notification processed",
-                        notification_id=notification.id,
-                        status=notification.status
-                    )
-                    
-                except Exception as e:
-                    logger.error(
-                        "Failed to process notification",
-                        notification_id=notification.id,
-                        error=str(e)
-                    )
-                    
-                    # Update notification with error
-                    notification.status = "failed"
-                    notification.error = str(e)
-                    notification.attempts += 1
-                    await db.commit()
+            await db.execute(
+                update(Notification)
+                .where(Notification.id.in_([notification.id for notification in notifications]))
+                .values(status="sending", claimed_at=claimed_at)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        
+        return [
+            (
+                notification,
+                self._build_job_data(
+                    notification,
+                    users.get(notification.user_id),
+                    events.get(notification.event_id)
+                )
+            )
+            for notification in notifications
+        ]
+    
+    @staticmethod
+    def _build_job_data(notification, user, event) -> Optional[Dict[str, Any]]:
+        """Build the payload handed to the notification job."""
+        if not user or not event:
+            return None
+        
+        return {
+            "notification_id": str(notification.id),
+            "user_id": str(user.id),
+            "event_id": str(event.id),
+            "channel": notification.channel,
+            "event": {
+                "id": str(event.id),
+                "title": event.title,
+                "start_ts": event.start_ts.isoformat(),
+                "end_ts": event.end_ts.isoformat(),
+                "location": event.location,
+                "conf_link": event.conf_link,
+                "organizer": event.organizer,
+                "attendees": event.attendees or [],
+                "description": event.description
+            },
+            "user": {
+                "id": str(user.id),
+                "name": user.name,
+                "email": user.email,
+                "phone_e164": user.phone_e164,
+                "timezone": user.timezone
+            },
+            "notification": notification.payload or {}
+        }
+    
+    async def _send_batch(self, batch: List[Tuple[Any, Optional[Dict[str, Any]]]]):
+        """Dispatch a claimed batch and write all outcomes in one bulk update.
+
+        If the outcomes cannot be written, the batch goes back to "planned"
+        so the next tick sends it again, and the error is raised.
+        """
+        from app.models import Notification
+        from sqlalchemy import update
+        
+        jobs = [job_data for _, job_data in batch if job_data is not None]
+        try:
+            sent = iter(await self.dispatcher.dispatch(jobs))
+        except Exception as e:
+            logger.error("Failed to dispatch notification batch", error=str(e))
+            sent = iter([{"status": "failed", "error": str(e)}] * len(jobs))
+        
+        updates = []
+        for notification, job_data in batch:
+            if job_data is None:
+                logger.warning(
+                    "Missing user or event for notification",
+                    notification_id=notification.id
+                )
+                result = {"status": "failed", "error": "Missing user or event"}
+            else:
+                result = next(sent)
+            
+            status = result.get("status", "failed")
+            updates.append({
+                "id": notification.id,
+                "status": status,
+                "sent_time": datetime.utcnow(),
+                "result": result,
+                "attempts": (notification.attempts or 0) + 1,
+                "error": result.get("error", "Unknown error") if status in ("failed", "partial") else notification.error
+            })
+        
+        try:
+            async with self.session_factory() as db:
+                await db.execute(update(Notification), updates)
+                await db.commit()
+        except Exception as e:
+            logger.error("Failed to record notification batch, releasing it", error=str(e), size=len(batch))
+            await self._release_batch([notification.id for notification, _ in batch])
+            raise
+        
+        failed = sum(1 for row in updates if row["status"] == "failed")
+        logger.info(
+            "Notification batch processed",
+            processed=len(updates),
+            failed=failed
+        )
+    
+    async def _release_batch(self, notification_ids: List[Any]):
+        """Put claimed notifications back to "planned"; if this fails too, their lease expires."""
+        from app.models import Notification
+        from sqlalchemy import update, and_
+        
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(Notification)
+                    .where(and_(Notification.id.in_(notification_ids), Notification.status == "sending"))
+                    .values(status="planned", claimed_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error("Failed to release notification batch", error=str(e), size=len(notification_ids))
     
     async def _plan_new_notifications(self):
         """Plan notifications for new events."""
@@ -0,0 +1,14 @@
+-- Migration: Add incremental calendar sync columns
+-- Date: 2026-10-18
+-- Purpose: Store provider sync tokens and recurring series masters
+
+-- Provider sync token and response ETag per connected calendar
+ALTER TABLE oauth_accounts
+ADD COLUMN IF NOT EXISTS sync_token TEXT;
+
+ALTER TABLE oauth_accounts
+ADD COLUMN IF NOT EXISTS sync_etag VARCHAR(255);
+
+-- Recurrence rules and overridden instances of series masters
+ALTER TABLE events
+ADD COLUMN IF NOT EXISTS recurrence JSON;
@@ -0,0 +1,7 @@
+-- Migration: Add notification claim lease
+-- Date: 2026-10-18
+-- Purpose: Let workers reclaim notifications left "sending" by a worker that died
+
+-- When a worker claimed the notification; "sending" rows older than the lease are claimed again
+ALTER TABLE notifications
+ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,16 @@
+-- Migration: Index project listings for keyset pagination
+-- Date: 2026-10-18
+-- Purpose: Serve project listings from an index on (updated_at, id) and the
+-- short summary columns, without reading the rows' JSON and PDF payloads
+
+DROP INDEX IF EXISTS idx_cdc_updated;
+CREATE INDEX IF NOT EXISTS idx_cdc_listing
+ON core_devices_projects (updated_at, id, created_at, status, current_phase, primary_need);
+
+DROP INDEX IF EXISTS idx_bph_updated;
+CREATE INDEX IF NOT EXISTS idx_bph_listing
+ON book_publishing_house_projects (updated_at, id, created_at, status, current_phase);
+
+DROP INDEX IF EXISTS idx_eg_updated;
+CREATE INDEX IF NOT EXISTS idx_eg_listing
+ON exam_generator_projects (updated_at, id, created_at, status, current_phase, num_problems, output_directory);
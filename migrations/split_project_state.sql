@@ -0,0 +1,33 @@
+-- Migration: Split Core Devices and Ferrari project blobs into per-entry tables
+-- Date: 2026-10-18
+-- Purpose: Persist project state incrementally instead of rewriting JSON blobs on every save
+
+-- Append-only chat, progress and error log entries
+CREATE TABLE IF NOT EXISTS project_log_entries (
+    project_kind VARCHAR(20) NOT NULL,
+    project_id VARCHAR(36) NOT NULL,
+    log VARCHAR(20) NOT NULL,
+    seq INTEGER NOT NULL,
+    phase VARCHAR(50),
+    entry JSON NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (project_kind, project_id, log, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_project_log_phase
+ON project_log_entries (project_kind, project_id, log, phase);
+
+-- Project state pieces (state.<field>, artifacts.<phase>, owner_decisions)
+CREATE TABLE IF NOT EXISTS project_artifacts (
+    project_kind VARCHAR(20) NOT NULL,
+    project_id VARCHAR(36) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    content JSON,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (project_kind, project_id, key)
+);
+
+-- Existing blobs (project_data, artifacts, owner_decisions, chat_log,
+-- progress_log, error_log) are split into these tables when a project is
+-- first loaded; run_project_state_migration.py splits all of them at once.
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Split the JSON blobs of Core Devices and Ferrari projects into the
+project_log_entries and project_artifacts tables.
+
+Projects are also migrated one by one the first time they are loaded, so
+running this is optional; it moves every project at once.
+"""
+
+import asyncio
+from app.core.project_store import migrate_legacy_projects
+from app.database import AsyncSessionLocal, Base, engine
+from app.models import ProjectArtifact, ProjectLogEntry
+
+
+async def run_migration():
+    """Create the new tables and split every project's legacy blobs."""
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[ProjectLogEntry.__table__, ProjectArtifact.__table__]
+            )
+        
+        async with AsyncSessionLocal() as db:
+            migrated = await migrate_legacy_projects(db)
+        
+        print("✅ Migration completed successfully!")
+        print(f"\nMigrated projects: {migrated}")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        print("\nThe migration can be run again; migrated projects are skipped.")
+        print("SQL file: migrations/split_project_state.sql")
+        raise
+
+
+if __name__ == "__main__":
+    print("Running project state migration...")
+    print("=" * 60)
+    asyncio.run(run_migration())
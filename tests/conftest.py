@@ -0,0 +1,14 @@
+"""Shared test fixtures."""
+import pytest
+
+from app.core.config import settings
+from app.core.job_registry import close_job_registry
+
+
+@pytest.fixture(autouse=True)
+def job_registry_path(tmp_path, monkeypatch):
+    """Give each test its own job registry, so route tests never write to the default data/ path."""
+    close_job_registry()
+    monkeypatch.setattr(settings, "JOB_REGISTRY_PATH", str(tmp_path / "job_registry.db"))
+    yield
+    close_job_registry()
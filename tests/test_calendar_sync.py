@@ -0,0 +1,165 @@
+"""Tests for incremental calendar sync against the mock provider."""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("aiosqlite")
+
+from cryptography.fernet import Fernet
+from sqlalchemy import event, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.config import settings
+
+# google.py builds its token cipher at import time and needs a valid key
+settings.OAUTH_ENC_KEY = Fernet.generate_key().decode()
+
+from app.database import Base
+from app.calendar.mock import MockCalendarProvider
+from app.calendar.recurrence import expand, instance_id
+from app.calendar.sync import CalendarSync
+from app.llm.client import LLMClient
+from app.models import User, OAuthAccount, Event, Notification, Rule
+from app.scheduling.planner import NotificationPlanner
+
+NOW = datetime.utcnow().replace(second=0, microsecond=0)
+EVENT_COUNT = 1200
+SERIES_START = NOW - timedelta(days=400, hours=-3)
+SERIES = {"rules": ["RRULE:FREQ=WEEKLY"]}
+OCCURRENCES = expand(SERIES_START, SERIES, NOW - timedelta(days=2), NOW + timedelta(days=30))
+
+
+class Database:
+    """SQLite database that counts the writes it executes."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.writes = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            self.writes += 1
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    """SQLite database with one user and a connected Google account."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'calendar.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, OAuthAccount.__table__, Event.__table__, Notification.__table__, Rule.__table__]
+        )
+    database = Database(engine)
+    async with database.session_factory() as db:
+        db.add(User(id="u1", name="User", email="u1@example.com"))
+        db.add(OAuthAccount(id="a1", user_id="u1", provider="google", access_token_enc="x"))
+        await db.commit()
+    yield database
+    await engine.dispose()
+
+
+def _item(event_id, start, **fields):
+    item = {
+        "id": event_id,
+        "summary": f"Meeting {event_id}",
+        "start": {"dateTime": start.isoformat() + "Z"},
+        "end": {"dateTime": (start + timedelta(minutes=30)).isoformat() + "Z"},
+    }
+    item.update(fields)
+    return item
+
+
+@pytest.fixture
+def provider():
+    """Mock calendar with single events, a weekly series and one moved occurrence."""
+    provider = MockCalendarProvider(page_size=250)
+    for i in range(EVENT_COUNT):
+        provider.put(_item(f"g{i}", NOW + timedelta(hours=2, minutes=i)))
+    provider.put(_item("s1", SERIES_START, recurrence=SERIES["rules"]))
+    moved = OCCURRENCES[2]
+    provider.put(_item(instance_id("s1", moved), moved + timedelta(hours=1), recurringEventId="s1"))
+    return provider
+
+
+@pytest.fixture
+def calendar_sync(provider):
+    llm_client = AsyncMock(spec=LLMClient)
+    llm_client.complete_json.return_value = {
+        "notify": True,
+        "plan": [{"offset_minutes": -15, "channel": "call"}],
+        "reasoning": "test"
+    }
+    return CalendarSync(provider, NotificationPlanner(llm_client), clock=lambda: NOW)
+
+
+async def _sync(database, calendar_sync):
+    async with database.session_factory() as db:
+        account = await db.get(OAuthAccount, "a1")
+        return await calendar_sync.sync(db, account, "token")
+
+
+async def _series_starts(database):
+    async with database.session_factory() as db:
+        result = await db.execute(
+            select(Event.start_ts).where(Event.provider_event_id.like("s1\\_%", escape="\\"))
+        )
+        return sorted(start.replace(tzinfo=None) for start in result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_unchanged_calendar_costs_no_data_and_no_writes(database, provider, calendar_sync):
+    """Test paging, lazy series expansion and a conditional no-change sync."""
+    summary = await _sync(database, calendar_sync)
+    occurrences = OCCURRENCES
+    assert summary["full_resync"] and summary["pages"] == 5
+    assert summary["events"]["inserted"] == EVENT_COUNT + 2 + len(occurrences) - 1
+    # Only the occurrences in the window exist, and the moved one keeps its own time
+    expected = sorted(occurrences[:2] + [occurrences[2] + timedelta(hours=1)] + occurrences[3:])
+    assert await _series_starts(database) == expected
+
+    provider.requests = provider.pages_served = database.writes = 0
+    summary = await _sync(database, calendar_sync)
+    assert summary["not_modified"]
+    assert (provider.requests, provider.pages_served, database.writes) == (1, 0, 0)
+
+    provider.put(_item("g5", NOW + timedelta(hours=5)))
+    provider.delete("g7")
+    provider.put(_item("new", NOW + timedelta(hours=6)))
+    provider.requests = provider.pages_served = 0
+    summary = await _sync(database, calendar_sync)
+    assert (provider.requests, provider.pages_served) == (1, 1)
+    assert summary["events"] == {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": len(occurrences) - 1}
+    assert summary["notifications"] == {"created": 1, "updated": 1, "cancelled": 1}
+
+    summary = await _sync(database, calendar_sync)
+    assert summary["not_modified"]
+
+
+@pytest.mark.asyncio
+async def test_expired_sync_token_falls_back_to_full_resync(database, provider, calendar_sync):
+    """Test that a 410 triggers a paged full listing that also catches deletions."""
+    await _sync(database, calendar_sync)
+    provider.delete("g3")
+    provider.delete("s1")
+    provider.put(_item("g4", NOW + timedelta(hours=7)))
+    provider.expire_sync_tokens()
+
+    provider.requests = 0
+    summary = await _sync(database, calendar_sync)
+    assert summary["full_resync"]
+    assert provider.requests == 1 + 5
+    assert summary["events"]["updated"] == 1
+
+    async with database.session_factory() as db:
+        live = await db.scalar(select(func.count()).select_from(Event).where(Event.status != "cancelled"))
+        account = await db.get(OAuthAccount, "a1")
+        assert account.sync_token == f"1-{provider.version}"
+    # g3 and the series with all its occurrences are gone
+    assert live == EVENT_COUNT - 1
+
+    summary = await _sync(database, calendar_sync)
+    assert summary["not_modified"]
@@ -0,0 +1,207 @@
+"""Tests for cursor reads and server-sent events over project chat logs."""
+import asyncio
+import json
+import pytest
+
+from app.core import chat_feed
+from app.core.chat_feed import ChatFeed, ChatLog, resume_cursor
+from app.routes import core_devices, ferrari_company
+
+
+def _entry(n, phase="concept_differentiation"):
+    return {"from_agent": "Concept_Agent", "to_agent": "CEO_Agent", "phase": phase,
+            "content": f"Message {n}: exploring the pump concept.", "timestamp": "2026-01-01T00:00:00",
+            "message_type": "agent_message"}
+
+
+def _project(messages):
+    return {"current_phase": "concept_differentiation", "chat_log": [_entry(n) for n in range(messages)]}
+
+
+async def _poll(project_id, **params):
+    response = await core_devices.get_chat_log(project_id, db=None, **params)
+    return len(response.body), json.loads(response.body)
+
+
+async def _read(stream, frames):
+    """The next `frames` message frames of a stream, as (seq, content)."""
+    received = []
+    while len(received) < frames:
+        frame = await asyncio.wait_for(stream.__anext__(), 1)
+        if frame.startswith(b"id: "):
+            data = json.loads(frame.split(b"data: ", 1)[1])
+            received.append((data["seq"], data["content"]))
+    return received
+
+
+@pytest.fixture
+def projects():
+    yield core_devices.active_projects
+    core_devices.active_projects.clear()
+    ferrari_company.active_projects.clear()
+
+
+@pytest.mark.asyncio
+async def test_up_to_date_poll_is_constant_size(projects):
+    """Test that polling a 10k-message log with a current cursor costs the same as a short log."""
+    projects["short"] = _project(1_000)
+    projects["long"] = _project(10_000)
+
+    short_size, short = await _poll("short", after=999)
+    long_size, long = await _poll("long", after=9_999)
+    assert short == {"chat_log": [], "next_after": 999, "has_more": False}
+    assert long == {"chat_log": [], "next_after": 9_999, "has_more": False}
+    assert long_size - short_size <= 2  # only the cursor digits differ
+
+    # One new message: the reply holds that message only
+    core_devices._append_chat(projects["long"], _entry(10_000))
+    size, page = await _poll("long", after=9_999)
+    assert [m["seq"] for m in page["chat_log"]] == [10_000]
+    assert size < 400
+
+    # Catching up from the start is paged
+    _, page = await _poll("long", after=-1, limit=2_000)
+    assert (len(page["chat_log"]), page["next_after"], page["has_more"]) == (2_000, 1_999, True)
+
+    # The legacy full read is unchanged
+    response = await core_devices.get_chat_log("short", db=None)
+    assert response == {"chat_log": projects["short"]["chat_log"]}
+
+
+@pytest.mark.asyncio
+async def test_phase_index_pages_filtered_log(projects):
+    """Test that a phase-filtered cursor read returns that phase's messages in order."""
+    projects["mixed"] = {"current_phase": "ideation", "chat_log": [
+        _entry(n, "ideation" if n % 3 == 0 else "design") for n in range(30)
+    ]}
+    _, page = await _poll("mixed", phase="ideation", after=5, limit=4)
+    assert [m["seq"] for m in page["chat_log"]] == [6, 9, 12, 15]
+    assert (page["next_after"], page["has_more"]) == (15, True)
+    _, page = await _poll("mixed", phase="ideation", after=27)
+    assert page == {"chat_log": [], "next_after": 27, "has_more": False}
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_dropped_connection():
+    """Test that reconnecting with Last-Event-ID continues without gaps or duplicates."""
+    log = [_entry(n) for n in range(5)]
+    feed = ChatFeed(log)
+
+    stream = feed.stream(heartbeat=0.05)
+    received = await _read(stream, 5)
+    log.extend(_entry(n) for n in range(5, 8))
+    feed.sync(log)
+    received += await _read(stream, 2)
+    await stream.aclose()  # connection drops before message 7 is delivered
+
+    log.extend(_entry(n) for n in range(8, 12))
+    feed.sync(log)
+    last_event_id = str(received[-1][0])
+    stream = feed.stream(resume_cursor(last_event_id, after=None), heartbeat=0.05)
+    received += await _read(stream, 5)
+    await stream.aclose()
+
+    assert [seq for seq, _ in received] == list(range(12))
+    assert [content for _, content in received] == [m["content"] for m in log]
+
+
+@pytest.mark.asyncio
+async def test_stream_left_behind_by_the_window_is_reset():
+    """Test that a stream whose next messages left the feed is told to reread them, then continues."""
+    log = ChatLog(window=10)
+    for n in range(5):
+        log.append(_entry(n))
+    feed = ChatFeed(log)
+
+    stream = feed.stream(heartbeat=0.05)
+    received = await _read(stream, 2)
+    for n in range(5, 40):
+        log.append(_entry(n))
+    log.mark_durable(len(log))
+    feed.sync(log)
+
+    frame = await asyncio.wait_for(stream.__anext__(), 1)
+    while not frame.startswith(b"event: reset"):
+        frame = await asyncio.wait_for(stream.__anext__(), 1)
+    assert json.loads(frame.split(b"data: ", 1)[1]) == {"after": 1, "first_seq": 30}
+    received += await _read(stream, 10)
+    await stream.aclose()
+    assert [seq for seq, _ in received] == [0, 1] + list(range(30, 40))
+
+
+@pytest.mark.asyncio
+async def test_one_serialization_serves_all_subscribers(monkeypatch):
+    """Test that each message is serialized once however many streams are open."""
+    dumps = []
+    real_dumps = json.dumps
+    monkeypatch.setattr(chat_feed.json, "dumps", lambda *a, **kw: dumps.append(1) or real_dumps(*a, **kw))
+
+    subscribers, messages = 10, 50
+    log = []
+    feed = ChatFeed()
+    streams = [feed.stream(heartbeat=0.05) for _ in range(subscribers)]
+    readers = [asyncio.create_task(_frames(stream, messages)) for stream in streams]
+    await asyncio.sleep(0)
+    for n in range(messages):
+        log.append(_entry(n))
+        feed.sync(log)
+        await asyncio.sleep(0)
+    received = await asyncio.gather(*readers)
+
+    assert len(dumps) == messages
+    for frames in received[1:]:
+        assert len(frames) == messages
+        assert all(mine is first for mine, first in zip(frames, received[0]))
+
+
+async def _frames(stream, count):
+    frames = []
+    async for frame in stream:
+        if frame.startswith(b"id: "):
+            frames.append(frame)
+            if len(frames) == count:
+                break
+    await stream.aclose()
+    return frames
+
+
+@pytest.mark.asyncio
+async def test_status_transitions_are_pushed(projects):
+    """Test that phase status changes reach an open stream, and a new stream gets the latest."""
+    project = projects["status"] = _project(2)
+    feed = core_devices._chat_feed("status", project)
+    stream = feed.stream(after=1, heartbeat=0.05)
+
+    core_devices._set_phase_status("status", "status_concept_differentiation", {"status": "running"})
+    frame = await asyncio.wait_for(stream.__anext__(), 1)
+    assert frame.startswith(b"event: status\n") and b'"running"' in frame
+    core_devices._set_phase_status("status", "status_concept_differentiation", {"status": "completed"})
+    frame = await asyncio.wait_for(stream.__anext__(), 1)
+    assert b'"completed"' in frame
+    await stream.aclose()
+
+    late = feed.stream(after=1, heartbeat=0.05)
+    assert b'"completed"' in await asyncio.wait_for(late.__anext__(), 1)
+    assert await asyncio.wait_for(late.__anext__(), 1) == b": keep-alive\n\n"
+    await late.aclose()
+    core_devices.phase_execution_status.pop("status_concept_differentiation", None)
+
+
+@pytest.mark.asyncio
+async def test_ferrari_bus_messages_reach_stream(projects):
+    """Test that messages sent on a Ferrari project's bus are pushed to its stream."""
+    from app.book_writer.ferrari_company import FerrariBookCompany, Phase as BookPhase
+
+    company = FerrariBookCompany(model="qwen3:30b")
+    project = ferrari_company.active_projects["book"] = {"company": company, "current_phase": "strategy_concept"}
+    company.message_bus.send("CPSO", "CEO", BookPhase.STRATEGY_CONCEPT, "Brief draft 0")
+    feed = ferrari_company._chat_feed("book", project)
+    stream = feed.stream(heartbeat=0.05)
+    assert [content for _, content in await _read(stream, 1)] == ["Brief draft 0"]
+
+    company.message_bus.send("CPSO", "CEO", BookPhase.STRATEGY_CONCEPT, "Brief draft 1")
+    assert await _read(stream, 1) == [(1, "Brief draft 1")]
+    await stream.aclose()
+
+    response = await ferrari_company.get_chat_log("book", phase="strategy_concept", after=0, db=None)
+    assert [m["content"] for m in json.loads(response.body)["chat_log"]] == ["Brief draft 1"]
@@ -0,0 +1,85 @@
+"""Tests for the graph command journal."""
+import pytest
+
+from app.graph.command_journal import CommandJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Journal backed by a temporary SQLite file."""
+    return CommandJournal(str(tmp_path / "commands.db"))
+
+
+def _append(journal, project_id, n):
+    return [
+        journal.append(project_id, "user", "update_node", {"n": i}, {"n": -i})
+        for i in range(1, n + 1)
+    ]
+
+
+def test_sequence_numbers_are_per_project(journal):
+    """Test monotonically increasing sequence numbers per project."""
+    first = _append(journal, "a", 3)
+    other = _append(journal, "b", 2)
+    assert [c["seq"] for c in first] == [1, 2, 3]
+    assert [c["seq"] for c in other] == [1, 2]
+
+
+def test_last_command_and_history_paging(journal):
+    """Test last-command lookup and paging back through history."""
+    _append(journal, "a", 25)
+    assert journal.last("a")["payload"] == {"n": 25}
+
+    page = journal.entries_between("a", limit=10)
+    assert [c["seq"] for c in page] == list(range(25, 15, -1))
+    page = journal.entries_between("a", limit=10, before_seq=page[-1]["seq"])
+    assert [c["seq"] for c in page] == list(range(15, 5, -1))
+    assert journal.last("missing") is None
+
+
+def test_undo_redo_and_branch_compaction(journal):
+    """Test that appending after undo discards the undone branch without reusing its numbers."""
+    _append(journal, "a", 5)
+    assert journal.mark_undone("a", 5)
+    assert journal.mark_undone("a", 4)
+    assert journal.last("a")["seq"] == 3
+    assert journal.mark_redone("a", 4)
+    assert not journal.mark_redone("a", 4)
+    assert journal.last("a")["seq"] == 4
+
+    command = journal.append("a", "user", "create_node", {}, {})
+    assert command["seq"] == 6
+    assert journal.count("a") == 5
+    assert [c["seq"] for c in journal.entries_between("a")] == [6, 4, 3, 2, 1]
+
+
+def test_sequence_numbers_survive_compaction_and_reopen(tmp_path):
+    """Test that compacted numbers are not handed out again by a new connection."""
+    path = str(tmp_path / "commands.db")
+    journal = CommandJournal(path)
+    _append(journal, "a", 3)
+    journal.mark_undone("a", 3)
+    assert journal.compact("a") == 1
+
+    reopened = CommandJournal(path)
+    assert reopened.append("a", "user", "x", {}, {})["seq"] == 4
+
+
+def test_cache_sees_writes_from_other_connections(tmp_path):
+    """Test that two journals on one file stay consistent."""
+    path = str(tmp_path / "shared.db")
+    first = CommandJournal(path)
+    second = CommandJournal(path)
+    _append(first, "a", 1)
+    assert second.last("a")["seq"] == 1
+    _append(second, "a", 1)
+    assert first.last("a")["seq"] == 2
+    assert first.append("a", "user", "x", {}, {})["seq"] == 3
+
+
+def test_in_memory_journal(tmp_path):
+    """Test the private in-memory journal."""
+    journal = CommandJournal(":memory:")
+    _append(journal, "a", 3)
+    assert journal.count("a") == 3
+    assert journal.compact("a") == 0
@@ -0,0 +1,146 @@
+"""Tests for the concurrent checklist steps of Core Devices phases 2-6."""
+import asyncio
+import json
+import pytest
+
+from app.core.step_graph import StepGraphError
+from app.product_company.core_devices_company import CoreDevicesCompany, Phase, ProductProject
+
+LATENCY = 0.05
+
+PHASES = [
+    # (phase, LLM calls, most calls whose inputs are ready at once); the CEO summary is one call of each
+    ("execute_phase_2", 7, 3),
+    ("execute_phase_3", 5, 2),
+    ("execute_phase_4", 3, 2),
+    ("execute_phase_5", 3, 2),
+    ("execute_phase_6", 3, 2),
+]
+
+# Calls that must have answered before a call starts, by the start of its prompt;
+# the CEO summary follows every other call of its phase
+REQUIRES = {
+    "For these products": ("Identify 3-7 existing products",),
+    "Choose 2-3 attributes": ("For these products",),
+    "Create 2-3 product concepts": ("Choose 2-3 attributes",),
+    "Define a Friction Budget": ("Define key user journeys",),
+    "Design the system architecture": ("Define key user journeys",),
+}
+SUMMARY = "You are the CEO"
+
+
+class FixedLatencyLLM:
+    """Fake LLM answering after a fixed delay with JSON derived from the prompt."""
+
+    provider = "local"
+
+    def __init__(self, fail=None):
+        self.fail = dict(fail or {})  # prompt prefix -> calls that raise
+        self.calls = []
+        self.started = []  # (task, tasks answered before it started)
+        self.in_flight = 0
+        self.peak = 0  # most calls in flight at once
+
+    async def complete(self, system, user, tools=None):
+        return await self.generate(user)
+
+    async def generate(self, prompt):
+        task = prompt.split("\n", 1)[0]
+        self.started.append((task, list(self.calls)))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+        finally:
+            self.in_flight -= 1
+        self.calls.append(task)
+        for prefix in self.fail:
+            if task.startswith(prefix) and self.fail[prefix]:
+                self.fail[prefix] -= 1
+                raise Exception("Request error: connection reset")
+        reply = {"task": task, "prompt_length": len(prompt)}
+        if task.startswith("Plan manufacturing"):
+            reply["dfm_strategy"] = {"part_count": len(prompt) % 17}
+        return json.dumps(reply)
+
+
+def _company(llm, concurrency):
+    company = CoreDevicesCompany(llm_client=llm)
+    company.max_concurrency = concurrency
+    company.project = ProductProject(
+        product_idea="A solar water pump", constraints={"budget": "low"},
+        idea_dossier={"working_title": "SunPump", "category": "derivative", "primary_need": "water",
+                      "idea_restatement": "Pump well water with sunlight"},
+    )
+    return company
+
+
+def _assert_dependency_order(started):
+    """Every call started after the calls it requires answered, and the summary after all the others."""
+    for task, answered in started:
+        if task.startswith(SUMMARY):
+            assert len(answered) == len(started) - 1, task
+        for prefix, requires in REQUIRES.items():
+            if task.startswith(prefix):
+                assert all(any(done.startswith(r) for done in answered) for r in requires), task
+
+
+async def _run(concurrency):
+    """Run phases 2-6; returns (results, peak calls in flight per phase, chat log)."""
+    llm = FixedLatencyLLM()
+    company = _company(llm, concurrency)
+    results, peaks = [], []
+    for phase, calls, _ in PHASES:
+        llm.calls.clear()
+        llm.started.clear()
+        llm.peak = 0
+        results.append(await getattr(company, phase)())
+        assert len(llm.calls) == calls
+        _assert_dependency_order(llm.started)
+        peaks.append(llm.peak)
+    chat = [(m.from_agent, m.to_agent, m.phase, m.content) for m in company.bus.messages]
+    return results, peaks, chat
+
+
+@pytest.mark.asyncio
+async def test_concurrent_phases_match_sequential_run():
+    """Test that phases 2-6 produce the same artifacts and chat log at any concurrency, running ready steps together."""
+    sequential, sequential_peaks, sequential_chat = await _run(1)
+    limited, limited_peaks, limited_chat = await _run(2)
+    concurrent, concurrent_peaks, concurrent_chat = await _run(4)
+
+    for (phase, _, width), before, during, after in zip(PHASES, sequential, limited, concurrent):
+        for result in (during, after):
+            assert json.dumps(result["artifacts"], sort_keys=True) == json.dumps(before["artifacts"], sort_keys=True)
+            assert result["summary"] == before["summary"]
+            assert set(result["step_timings"]) == set(before["step_timings"])
+    widths = [width for _, _, width in PHASES]
+    assert sequential_peaks == [1] * len(PHASES)
+    assert limited_peaks == [min(2, width) for width in widths]
+    assert concurrent_peaks == widths
+    assert limited_chat == concurrent_chat == sequential_chat
+
+
+@pytest.mark.asyncio
+async def test_failed_step_reruns_alone():
+    """Test that running a failed phase again re-runs only its failed step."""
+    llm = FixedLatencyLLM(fail={"Design the Interaction Blueprint": 1})
+    company = _company(llm, 4)
+    company.project.concept_pack = {"concepts": []}
+
+    with pytest.raises(StepGraphError) as excinfo:
+        await company.execute_phase_3()
+    assert set(excinfo.value.errors) == {"interaction_blueprint", "ux_design"}
+    assert set(company.step_results[Phase.UX_SYSTEM_DESIGN]) == {
+        "user_journeys", "friction_budget", "system_architecture"
+    }
+    messages = len(company.bus.messages)
+    assert any("Completed system architecture" in m.content for m in company.bus.messages)
+
+    llm.calls.clear()
+    result = await company.execute_phase_3()
+    assert llm.calls == ["Design the Interaction Blueprint.", "You are the CEO of Core Devices Company. "
+                         "Create a clear, concise summary for the Owner."]
+    assert result["artifacts"]["ux_design"]["interaction_blueprint"]["task"] == "Design the Interaction Blueprint."
+    assert company.step_results == {}
+    assert not any("Completed system architecture" in m.content for m in company.bus.messages[messages:])
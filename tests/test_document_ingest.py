@@ -0,0 +1,160 @@
+"""Tests for shared document ingestion: parallel extraction, text layer and catalog."""
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from app.documents import extract
+from app.documents.store import DocumentStore
+
+PAGES = 300
+
+
+def _make_pdf(path, pages=PAGES):
+    """Generated manual with a page of distinct text per page."""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        lines = [f"Page {i + 1} line {j}: hydraulic pump valve {i * 97 + j} torque setting" for j in range(12)]
+        page.insert_text((40, 40), "\n".join(lines), fontsize=8)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+@pytest.fixture(scope="module")
+def pdf(tmp_path_factory):
+    return _make_pdf(tmp_path_factory.mktemp("pdf") / "manual.pdf")
+
+
+async def _collect(path, executor, chunk_pages=16):
+    chunks = []
+    async for start, pages, extractor in extract.iter_page_chunks(path, chunk_pages, executor):
+        chunks.append((start, pages, extractor))
+    return chunks
+
+
+class CountingPool(ProcessPoolExecutor):
+    """Spawned process pool recording the page ranges submitted to it."""
+
+    def __init__(self, workers):
+        super().__init__(workers, mp_context=multiprocessing.get_context("spawn"))
+        self.ranges = []
+
+    def submit(self, fn, *args, **kwargs):
+        if fn is extract.extract_range:
+            self.ranges.append(args[1:])
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_parallel_extraction_matches_sequential(pdf):
+    """Test that pooled chunk extraction reassembles the same pages as page-by-page extraction."""
+    sequential, extractor = extract.extract_pages(pdf)
+    assert len(sequential) == PAGES and extractor == "pymupdf"
+    assert sequential[41].startswith("Page 42 line 0")
+
+    with CountingPool(os.cpu_count() or 1) as pool:
+        chunks = await _collect(pdf, pool)
+
+    # Every chunk ran in the pool, and chunks stream in page order to reassemble the document
+    assert pool.ranges == [(start, min(start + 16, PAGES)) for start in range(0, PAGES, 16)]
+    assert [c[0] for c in chunks] == list(range(0, PAGES, 16))
+    assert [page for c in chunks for page in c[1]] == sequential
+
+
+@pytest.mark.asyncio
+async def test_reupload_reuses_text_layer(pdf, tmp_path, monkeypatch):
+    """Test that the same content is extracted once, and pages stream to the caller."""
+    store = DocumentStore(str(tmp_path / "documents"))
+    sha256 = hashlib.sha256(pdf.read_bytes()).hexdigest()
+    streamed = []
+    try:
+        pages, extractor = await store.extract_pdf(pdf, sha256, on_chunk=streamed.append)
+    finally:
+        extract.shutdown_pool()
+    assert len(streamed) == PAGES // 16 + 1 and sum(streamed, []) == pages
+
+    async def no_extraction(*args, **kwargs):
+        raise AssertionError("text layer not reused")
+        yield
+
+    monkeypatch.setattr("app.documents.store.iter_page_chunks", no_extraction)
+    streamed = []
+    again = await store.extract_pdf(pdf, sha256, on_chunk=streamed.append)
+    assert again == (pages, extractor) and streamed == [pages]
+
+    # A layer from a weaker extractor is re-extracted once a better one is installed
+    store.put_text_layer(sha256, pages, "pypdf2")
+    assert store.get_text_layer(sha256) is None
+
+
+def test_listing_cost_is_constant_per_page(tmp_path):
+    """Test that listing 10k documents is an indexed query whose cost does not grow with depth."""
+    store = DocumentStore(str(tmp_path / "documents"))
+    for i in range(10_000):
+        store.add("writer", f"doc-{i:05d}", name=f"Document {(i * 7919) % 10_000:05d}",
+                  uploaded_at=f"2026-01-01T00:00:{i // 100:02d}.{i % 100:06d}")
+    store.add("pdf_qa", "other", name="Other", uploaded_at="2030-01-01T00:00:00")
+
+    steps = [0]
+
+    def count():
+        steps[0] += 1
+        return 0
+
+    store._conn.set_progress_handler(count, 10)
+    for sort in ("uploaded_at", "name"):
+        cost, seen, cursor = [], [], None
+        while True:
+            steps[0] = 0
+            page, cursor = store.list("writer", limit=50, cursor=cursor, sort=sort)
+            seen.extend(page)
+            if cursor is None:
+                break
+            cost.append(steps[0])
+
+        keys = [(doc[sort], doc["id"]) for doc in seen]
+        assert len(seen) == 10_000 and keys == sorted(keys, reverse=True)
+        # The 199th page costs what the first did
+        assert max(cost) <= min(cost) * 1.5, sort
+
+    plan = " ".join(
+        str(row) for row in store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM documents WHERE namespace = ? AND (uploaded_at, id) < (?, ?) "
+            "ORDER BY uploaded_at DESC, id DESC LIMIT 51", ("writer", "2026", "x")
+        )
+    )
+    assert "idx_documents_uploaded" in plan and "TEMP B-TREE" not in plan
+
+    everything, cursor = store.list("writer", limit=None)
+    assert len(everything) == 10_000 and cursor is None
+
+    with pytest.raises(ValueError):
+        store.list("writer", sort="size")
+
+
+@pytest.mark.asyncio
+async def test_unpaged_document_listing_returns_everything(tmp_path, monkeypatch):
+    """Test that the document listing without a cursor or limit returns every document, as before paging."""
+    pytest.importorskip("torch")
+    from app.routes import writer_documents
+
+    store = DocumentStore(str(tmp_path / "documents"))
+    for i in range(250):
+        store.add(writer_documents.DOCUMENT_NAMESPACE, f"doc-{i:03d}", name=f"Document {i}",
+                  uploaded_at=f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}")
+    monkeypatch.setattr(writer_documents, "_document_catalog", lambda: store)
+
+    everything = await writer_documents.list_documents()
+    assert [doc["id"] for doc in everything["documents"]] == [f"doc-{i:03d}" for i in reversed(range(250))]
+    assert everything["next_cursor"] is None
+
+    first = await writer_documents.list_documents(limit=100)
+    rest = await writer_documents.list_documents(cursor=first["next_cursor"])
+    assert len(first["documents"]) == len(rest["documents"]) == 100
+    assert rest["documents"][0]["id"] == "doc-149"
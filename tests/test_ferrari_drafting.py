@@ -0,0 +1,119 @@
+"""Tests for concurrent chapter drafting in the Ferrari production director."""
+import asyncio
+import re
+import pytest
+
+from app.book_writer.ferrari_company import BookProject, MessageBus, ProductionDirectorAgent
+
+LATENCY = 0.05
+CHAPTERS = 24
+
+
+class FixedLatencyLLM:
+    """Fake LLM answering each call after a fixed delay, deterministically per prompt."""
+
+    provider = "local"
+
+    def __init__(self, latency=LATENCY, failures=None):
+        self.latency = latency
+        self.failures = dict(failures or {})  # chapter number -> calls that fail first
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+
+    async def complete(self, system, user, tools=None):
+        chapter = int(re.search(r"Write Chapter (\d+)", user).group(1))
+        self.calls.append(chapter)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later chapters answer sooner, so completions arrive out of order
+            await asyncio.sleep(self.latency * (1 + (CHAPTERS - chapter) / (4 * CHAPTERS)))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        if self.failures.get(chapter):
+            self.failures[chapter] -= 1
+            raise Exception("Request error: connection reset")
+        return f"Prose for chapter {chapter}.\n{len(user)} characters of prompt"
+
+
+def _project(chapters=CHAPTERS):
+    return BookProject(
+        title="The Pump", premise="A hydraulic engineer saves a city.",
+        outline=[{"chapter_number": n, "title": f"Part {n}", "sections": [f"beat {n}"]} for n in range(1, chapters + 1)]
+    )
+
+
+async def _draft(llm, concurrency, callback=None, retry_delay=0):
+    director = ProductionDirectorAgent(llm, MessageBus(), max_concurrency=concurrency, retry_delay=retry_delay)
+    project = _project()
+    chapters = await director.create_draft(project, callback)
+    return project, chapters
+
+
+@pytest.mark.asyncio
+async def test_concurrent_draft_matches_sequential():
+    """Test that chapters are drafted up to the concurrency limit at once and the draft is unchanged."""
+    sequential_llm = FixedLatencyLLM()
+    sequential, _ = await _draft(sequential_llm, 1)
+
+    llm = FixedLatencyLLM()
+    progress = []
+
+    async def callback(message, sub_item=None):
+        progress.append(message)
+
+    concurrent, chapters = await _draft(llm, 4, callback)
+
+    assert concurrent.full_draft == sequential.full_draft
+    assert list(chapters) != sorted(chapters)  # collected out of order
+    assert sequential_llm.max_in_flight == 1
+    assert llm.max_in_flight == 4
+    assert sorted(llm.calls) == sorted(sequential_llm.calls) == list(range(1, CHAPTERS + 1))
+    assert len(progress) == CHAPTERS
+
+
+@pytest.mark.asyncio
+async def test_failed_chapter_retried_alone():
+    """Test that a failing chapter is retried without redrafting the others."""
+    llm = FixedLatencyLLM(failures={7: 2})
+    project, chapters = await _draft(llm, 4)
+
+    assert llm.calls.count(7) == 3
+    assert all(llm.calls.count(n) == 1 for n in range(1, CHAPTERS + 1) if n != 7)
+    assert sorted(chapters) == list(range(1, CHAPTERS + 1))
+
+    with pytest.raises(Exception, match="Chapter 3 after 3 attempts"):
+        await _draft(FixedLatencyLLM(failures={3: 5}), 4)
+
+
+@pytest.mark.asyncio
+async def test_retry_backoff_frees_its_slot():
+    """Test that a chapter backing off before its retry lets the next chapter draft meanwhile."""
+    llm = FixedLatencyLLM(failures={1: 1})
+    project, chapters = await _draft(llm, 1, retry_delay=LATENCY)
+
+    assert llm.calls[:2] == [1, 2]
+    assert llm.calls.count(1) == 2
+    assert llm.max_in_flight == 1
+    assert sorted(chapters) == list(range(1, CHAPTERS + 1))
+
+
+@pytest.mark.asyncio
+async def test_cancelling_phase_cancels_in_flight_chapters():
+    """Test that cancelling drafting cancels running generations and starts no more."""
+    llm = FixedLatencyLLM(latency=10)
+    task = asyncio.create_task(_draft(llm, 3))
+    while llm.in_flight < 3:
+        await asyncio.sleep(0.01)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert llm.cancelled == 3 and llm.in_flight == 0
+    await asyncio.sleep(0.05)
+    assert len(llm.calls) == 3
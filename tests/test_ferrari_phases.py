@@ -0,0 +1,122 @@
+"""Tests for the concurrent step graphs of the Ferrari design, QA and launch phases."""
+import asyncio
+import json
+import re
+import pytest
+
+from app.book_writer.ferrari_company import (
+    BookProject, LaunchDirectorAgent, MessageBus, QADirectorAgent, StoryDesignDirectorAgent
+)
+from app.book_writer.qa_engine import QAWindowCache
+from app.core.step_graph import Step, StepGraphError, run_step_graph
+
+LATENCY = 0.1
+
+
+class FixedLatencyLLM:
+    """Fake LLM answering after a fixed delay with JSON derived from the prompt."""
+
+    provider = "local"
+
+    def __init__(self, fail=None):
+        self.fail = fail  # agent name whose calls raise
+        self.events = []  # ("start" | "end", agent), in order
+        self.in_flight = 0
+        self.peak = 0  # most calls in flight at once
+
+    async def complete(self, system, user, tools=None):
+        agent = re.match(r"You are an? ([^.]+?)(?: Agent)?\.", system).group(1)
+        self.events.append(("start", agent))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+        finally:
+            self.in_flight -= 1
+            self.events.append(("end", agent))
+        if agent == self.fail:
+            raise Exception("Request error: connection reset")
+        return json.dumps({"agent": agent, "prompt_length": len(user)})
+
+
+def _project():
+    return BookProject(title="The Pump", premise="A hydraulic engineer saves a city.",
+                       book_brief={"genre": "Thriller", "tone": "tense"},
+                       full_draft="# Chapter 1\n\nThe pump failed at dawn.")
+
+
+async def _run(agent_class, concurrency, run):
+    llm = FixedLatencyLLM()
+    agent = agent_class(llm, MessageBus())
+    agent.max_concurrency = concurrency
+    return await run(agent), llm
+
+
+@pytest.mark.asyncio
+async def test_launch_package_takes_one_call():
+    """Test that the seven launch components needing the LLM are generated at once."""
+    project = _project()
+    sequential, sequential_llm = await _run(LaunchDirectorAgent, 1, lambda a: a.create_launch_package(project))
+    concurrent, concurrent_llm = await _run(LaunchDirectorAgent, 8, lambda a: a.create_launch_package(project))
+
+    assert json.dumps(concurrent) == json.dumps(sequential)
+    assert len(sequential_llm.events) == len(concurrent_llm.events) == 2 * 7  # categories needs no LLM call
+    assert sequential_llm.peak == 1
+    assert concurrent_llm.peak == 7
+
+
+@pytest.mark.asyncio
+async def test_design_workshop_runs_in_two_levels():
+    """Test that the plot arc waits only for the world and characters it builds on."""
+    progress = []
+
+    async def callback(message, sub_item=None):
+        progress.append((message, sub_item))
+
+    def workshop(agent, callback=None):
+        return agent.run_design_workshop({"genre": "Thriller", "tone": "tense"}, "A pump saves a city.", callback)
+
+    sequential, sequential_llm = await _run(StoryDesignDirectorAgent, 1, workshop)
+    concurrent, concurrent_llm = await _run(StoryDesignDirectorAgent, 4, lambda a: workshop(a, callback))
+
+    assert json.dumps(concurrent) == json.dumps(sequential)
+    assert concurrent["plot_arc"]["agent"] == "Plot Architect"
+    assert sequential_llm.peak == 1
+    # World, characters and tone together, then the plot arc
+    assert concurrent_llm.peak == 3
+    events = concurrent_llm.events
+    assert [kind for kind, _ in events[:3]] == ["start"] * 3
+    assert events[-2:] == [("start", "Plot Architect"), ("end", "Plot Architect")]
+    assert progress[-1] == ("Plot arc completed", "4 of 4 steps")
+    assert len(progress) == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_step_keeps_sibling_results(tmp_path):
+    """Test that one failed review or design step does not discard the others."""
+    bus = MessageBus()
+    qa = QADirectorAgent(FixedLatencyLLM(fail="Logic & Consistency"), bus)
+    qa.qa_cache = QAWindowCache(str(tmp_path / "qa.db"))
+    report = await qa.test_and_review(_project())
+    assert report["coverage"]["window_reviews"] == 2  # test reader and sensitivity
+    assert report["sensitivity_issues"] == []
+    assert list(report["failed_checks"]) == ["logic_consistency chapter 1 offset 0"]
+    assert report["overall_assessment"].startswith("QA incomplete")
+    assert any("QA could not review 1 windows" in m["content"] for m in bus.get_chat_log())
+
+    design = StoryDesignDirectorAgent(FixedLatencyLLM(fail="Worldbuilding Designer"), MessageBus())
+    with pytest.raises(StepGraphError) as excinfo:
+        await design.run_design_workshop({}, "A pump saves a city.")
+    assert set(excinfo.value.errors) == {"world_dossier", "plot_arc"}
+    assert list(excinfo.value.results) == ["character_bible", "tone_mood"]
+
+
+@pytest.mark.asyncio
+async def test_step_graph_rejects_cycles():
+    """Test that steps requiring each other are rejected instead of waiting forever."""
+    async def step(**kwargs):
+        return 1
+
+    with pytest.raises(ValueError, match="cycle"):
+        await run_step_graph([Step("a", step, requires=("b",)), Step("b", step, requires=("a",))],
+                             asyncio.Semaphore(2))
@@ -0,0 +1,140 @@
+"""Tests for cached manuscript rendering."""
+import copy
+import pytest
+from contextlib import contextmanager
+
+from app.graph import renderer as renderer_module
+from app.graph.renderer import GraphRenderer
+from app.graph.render_cache import render_cache
+from app.graph.repository import GraphRepository
+
+
+class _Result:
+    def __init__(self, records):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+
+class FakeGraphSession:
+    """Answers the renderer's queries from an in-memory outline."""
+
+    def __init__(self, project, chapters):
+        self.project = project
+        self.chapters = chapters  # chapter_id -> outline entry (with locationId etc.)
+        self.outline_queries = []
+
+    def run(self, query, **params):
+        if "RETURN p" in query:
+            return _Result([{"p": dict(self.project)}])
+        if "RETURN ch.id as id" in query:
+            ordered = sorted(self.chapters.values(), key=lambda c: c["number"])
+            return _Result([{"id": c["id"]} for c in ordered])
+        chapter_ids = params.get("chapter_ids")
+        self.outline_queries.append(chapter_ids)
+        ordered = sorted(self.chapters.values(), key=lambda c: c["number"])
+        return _Result([
+            {"chapter": copy.deepcopy(c)} for c in ordered
+            if chapter_ids is None or c["id"] in chapter_ids
+        ])
+
+
+def _chapter(number, scenes):
+    return {
+        "id": f"ch{number}",
+        "number": number,
+        "title": f"Chapter {number}",
+        "synopsis": f"Synopsis {number}",
+        "scenes": [
+            {
+                "id": f"s{number}_{i}",
+                "title": f"Scene {i}",
+                "synopsis": f"Scene {i} of chapter {number}",
+                "status": "draft",
+                "order": i,
+                "location": "Castle",
+                "locationId": "loc1",
+                "environment": None,
+                "environmentId": None,
+                "characters": [{"id": "hero", "name": "Hero"}] if i == 1 else [],
+                "events": [],
+                "themes": [],
+            }
+            for i in range(1, scenes + 1)
+        ],
+    }
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    """Fake Neo4j session with a ten-chapter book."""
+    session = FakeGraphSession(
+        {"id": "book", "title": "The Book"},
+        {f"ch{n}": _chapter(n, 3) for n in range(1, 11)}
+    )
+
+    @contextmanager
+    def get_session():
+        yield session
+
+    monkeypatch.setattr(renderer_module, "get_neo4j_session", get_session)
+    render_cache.invalidate_project("book")
+    yield session
+    render_cache.invalidate_project("book")
+
+
+def test_render_matches_full_markdown(fake_session):
+    """Test that cached assembly is identical to a full render."""
+    result = GraphRenderer.render_manuscript("book")
+    outline = sorted(fake_session.chapters.values(), key=lambda c: c["number"])
+    expected = GraphRenderer._generate_markdown(fake_session.project, outline)
+    assert result["markdown"] == expected
+    assert "locationId" not in result["outline"][0]["scenes"][0]
+
+
+def test_repeated_render_hits_cache(fake_session):
+    """Test that an unchanged graph is not queried again."""
+    first = GraphRenderer.render_manuscript("book")
+    queries = len(fake_session.outline_queries)
+    second = GraphRenderer.render_manuscript("book")
+    assert second["markdown"] == first["markdown"]
+    assert len(fake_session.outline_queries) == queries
+
+
+def test_scene_edit_rerenders_only_its_chapter(fake_session):
+    """Test that editing a scene invalidates only the enclosing chapter."""
+    GraphRenderer.render_manuscript("book")
+    fake_session.chapters["ch4"]["scenes"][1]["synopsis"] = "Rewritten"
+    render_cache.invalidate_nodes(["s4_2"])
+
+    result = GraphRenderer.render_manuscript("book")
+    assert fake_session.outline_queries[-1] == ["ch4"]
+    assert "Rewritten" in result["markdown"]
+
+
+def test_shared_node_invalidates_every_referencing_chapter(fake_session):
+    """Test that renaming a character re-renders every chapter it appears in."""
+    GraphRenderer.render_manuscript("book")
+    render_cache.invalidate_nodes(["hero"])
+    GraphRenderer.render_manuscript("book")
+    assert sorted(fake_session.outline_queries[-1]) == sorted(f"ch{n}" for n in range(1, 11))
+
+
+def test_repository_mutations_bump_version(fake_session, monkeypatch):
+    """Test that repository mutations invalidate the render cache."""
+    monkeypatch.setattr("app.graph.repository.NEO4J_AVAILABLE", False)
+    monkeypatch.setattr(
+        "app.graph.repository.get_memory_store",
+        lambda: type("Store", (), {"update_node": staticmethod(lambda node_id, props: {"id": node_id})})()
+    )
+    GraphRenderer.render_manuscript("book")
+    version = render_cache.version("book")
+    GraphRepository.update_node("s2_1", {"title": "New"})
+    assert render_cache.version("book") == version + 1
+
+    GraphRenderer.render_manuscript("book")
+    assert fake_session.outline_queries[-1] == ["ch2"]
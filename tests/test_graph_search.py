@@ -0,0 +1,119 @@
+"""Tests for the in-memory graph search index."""
+import random
+
+import pytest
+
+from app.graph import search_index
+from app.graph.memory_store import MemoryGraphStore
+from app.graph.search_index import InvertedIndex, _fuzzy_budget, _within_edit_distance, tokenize
+
+
+@pytest.fixture
+def store():
+    """Memory store with two projects."""
+    store = MemoryGraphStore()
+    store.create_project("p1", "Dragon Saga")
+    store.create_project("p2", "Space Opera")
+    store.create_node("p1", ["Character"], {"id": "c1", "name": "Aria Stormborn", "description": "A dragon rider"})
+    store.create_node("p1", ["Character"], {"id": "c2", "name": "Borin", "description": "A dwarf smith who hates dragons"})
+    store.create_node("p1", ["Location"], {"id": "l1", "name": "Dragon Peak", "description": "Home of the dragon dragon"})
+    store.create_node("p2", ["Character"], {"id": "c3", "name": "Captain Aria", "description": "Starship pilot"})
+    return store
+
+
+def test_tokenize():
+    """Test tokenization lowercases and splits on non-word characters."""
+    assert tokenize("Aria's Dragon-Peak!") == ["aria", "s", "dragon", "peak"]
+
+
+def test_search_is_scoped_to_project(store):
+    """Test that results only include nodes of the queried project."""
+    ids = {r["id"] for r in store.search("p1", "aria")}
+    assert ids == {"c1"}
+    ids = {r["id"] for r in store.search("p2", "aria")}
+    assert ids == {"c3"}
+
+
+def test_bm25_ranking(store):
+    """Test that the node with the highest term frequency ranks first."""
+    results = store.search("p1", "dragon", fuzzy=False, prefix=False)
+    assert results[0]["id"] == "l1"
+    assert all(results[i]["score"] >= results[i + 1]["score"] for i in range(len(results) - 1))
+
+
+def test_prefix_and_fuzzy_matching(store):
+    """Test prefix and typo-tolerant matching."""
+    assert {r["id"] for r in store.search("p1", "storm")} == {"c1"}
+    assert {r["id"] for r in store.search("p1", "stormbron", prefix=False)} == {"c1"}
+    assert store.search("p1", "stormbron", prefix=False, fuzzy=False) == []
+
+
+def test_label_filter_and_pagination(store):
+    """Test label filtering and paging."""
+    results = store.search("p1", "dragon", labels=["Character"])
+    assert {r["id"] for r in results} == {"c1", "c2"}
+
+    page = store.search_page("p1", "dragon", limit=1, offset=1)
+    assert page["total"] == 4  # three nodes plus the project title
+    assert len(page["results"]) == 1
+    full = store.search("p1", "dragon")
+    assert page["results"][0]["id"] == full[1]["id"]
+
+
+def test_index_follows_updates_and_deletes(store):
+    """Test that the index is maintained on update and delete."""
+    store.update_node("c2", {"name": "Gimli"})
+    assert {r["id"] for r in store.search("p1", "gimli")} == {"c2"}
+    assert "c2" not in {r["id"] for r in store.search("p1", "borin", fuzzy=False)}
+
+    store.delete_node("c1")
+    assert store.search("p1", "stormborn") == []
+
+
+def test_index_rebuilt_from_persisted_file(tmp_path):
+    """Test that persisted nodes are searchable after reload."""
+    path = str(tmp_path / "graph.json")
+    store = MemoryGraphStore(persist_path=path)
+    store.create_project("p1", "Saga")
+    store.create_node("p1", ["Character"], {"id": "c1", "name": "Aria"})
+
+    reloaded = MemoryGraphStore(persist_path=path)
+    assert [r["id"] for r in reloaded.search("p1", "aria")] == ["c1"]
+
+
+def test_inverted_index_remove_cleans_postings():
+    """Test that removing the last document drops its terms."""
+    index = InvertedIndex()
+    index.add("n1", ["Concept"], {"name": "magic"})
+    assert index.remove("n1")
+    assert index.search("magic") == (0, [])
+    assert len(index) == 0
+
+
+def test_fuzzy_terms_match_a_full_vocabulary_scan(monkeypatch):
+    """Test that the bigram lookup finds every term in edit distance and only checks close ones."""
+    rng = random.Random(7)
+    words = {"".join(rng.choice("abcdefgh") for _ in range(rng.randint(3, 10))) for _ in range(3000)}
+    index = InvertedIndex()
+    for n, word in enumerate(sorted(words)):
+        index.add(f"n{n}", ["Concept"], {"name": word})
+    index.remove("n0")
+    vocabulary = set(index._postings)
+
+    checked = []
+
+    def _counting(a, b, max_distance):
+        checked.append(b)
+        return _within_edit_distance(a, b, max_distance)
+
+    monkeypatch.setattr(search_index, "_within_edit_distance", _counting)
+    queries = [rng.choice(sorted(vocabulary)) for _ in range(30)] + ["abcdefgh", "hgfedcba", "aaaa"]
+    for query in queries:
+        budget = _fuzzy_budget(query)
+        expected = {
+            term for term in vocabulary
+            if term != query and budget and _within_edit_distance(term, query, budget)
+        }
+        checked.clear()
+        assert set(index._fuzzy_terms(query)) == expected
+        assert len(checked) < len(vocabulary) // 4
@@ -0,0 +1,78 @@
+"""Tests for paged and level-of-detail subgraphs."""
+import pytest
+
+from app.graph.memory_store import MemoryGraphStore
+from app.graph.subgraph import shape_subgraph, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def world():
+    """Memory store with a 10k-node world graph."""
+    store = MemoryGraphStore()
+    store.create_project("w", "World")
+    store.create_node("w", ["Location"], {"id": "hub", "name": "Hub", "description": "x" * 500})
+    store.create_relationship("project_w", "hub", "HAS_LOCATION")
+    for i in range(10000):
+        store.create_node("w", ["Character"], {"id": f"c{i}", "name": f"C{i}", "synopsis": "long " * 100})
+        store.create_relationship(f"c{i}", "hub", "KNOWS")
+        if i % 100 == 0:
+            store.create_relationship("project_w", f"c{i}", "HAS_CHARACTER")
+    return store
+
+
+def test_large_summary_subgraph_is_projected(world):
+    """Test that a 10k-node graph opens as a summary without the long properties."""
+    result = world.get_subgraph("w", depth=3, projection="summary")
+    assert result["total_nodes"] == 10002
+    assert "synopsis" not in result["nodes"][-1]["properties"]
+    assert result["nodes"][-1]["properties"]["name"].startswith("C")
+
+
+def test_pages_cover_graph_exactly_once(world):
+    """Test that paging returns every node and edge exactly once."""
+    full = world.get_subgraph("w", depth=3)
+    seen_nodes, seen_edges, cursor = [], [], None
+    while True:
+        page = world.get_subgraph("w", depth=3, projection="summary", page_size=777, cursor=cursor)
+        seen_nodes += [n["id"] for n in page["nodes"]]
+        seen_edges += [e["id"] for e in page["edges"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen_nodes) == sorted(n["id"] for n in full["nodes"])
+    assert sorted(seen_edges) == sorted(e["id"] for e in full["edges"])
+    assert len(seen_edges) == len(set(seen_edges))
+
+
+def test_max_nodes_prunes_low_degree_nodes(world):
+    """Test degree-based pruning keeps the start node and hubs."""
+    result = world.get_subgraph("w", depth=3, max_nodes=50)
+    ids = [n["id"] for n in result["nodes"]]
+    assert result["truncated"]
+    assert len(ids) == 50
+    assert ids[0] == "project_w"
+    assert "hub" in ids
+    kept = set(ids)
+    assert all(e["from"] in kept and e["to"] in kept for e in result["edges"])
+
+
+def test_lazy_node_details(world):
+    """Test fetching full details for summary nodes, only from the requested project."""
+    world.create_project("other", "Other")
+    world.create_node("other", ["Location"], {"id": "secret", "name": "Secret", "description": "hidden"})
+    world.create_relationship("project_other", "secret", "HAS_LOCATION")
+
+    nodes = world.get_nodes("w", ["hub", "missing", "secret"])
+    assert [n["id"] for n in nodes] == ["hub"]
+    assert nodes[0]["properties"]["description"] == "x" * 500
+    assert [n["id"] for n in world.get_nodes("other", ["hub", "secret"])] == ["secret"]
+
+
+def test_cursor_round_trip_and_validation():
+    """Test cursor encoding and rejection of garbage cursors."""
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) == 0
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        shape_subgraph([], [], projection="everything")
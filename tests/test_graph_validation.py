@@ -0,0 +1,111 @@
+"""Tests for the in-process graph validation engine."""
+import time
+import pytest
+
+from app.graph import validation as validation_module
+from app.graph.memory_store import MemoryGraphStore
+from app.graph.validation import GraphValidator, MemoryGraphLoader
+from app.graph.validation_engine import ValidationEngine, strongly_connected_components
+
+
+class CountingLoader(MemoryGraphLoader):
+    """Memory loader that records which nodes were re-read."""
+
+    def __init__(self):
+        self.loaded_node_ids = []
+
+    def load_nodes(self, project_id, node_ids):
+        self.loaded_node_ids.append(list(node_ids))
+        return super().load_nodes(project_id, node_ids)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Memory store with a small, valid book."""
+    store = MemoryGraphStore()
+    monkeypatch.setattr(validation_module, "get_memory_store", lambda: store)
+    store.create_project("book", "Book")
+    store.create_node("book", ["Chapter"], {"id": "ch1", "number": 1})
+    store.create_node("book", ["Location"], {"id": "castle", "name": "Castle"})
+    store.create_node("book", ["Location"], {"id": "forest", "name": "Forest"})
+    store.create_node("book", ["Character"], {"id": "hero", "name": "Hero"})
+    for i, (start, end, location) in enumerate([(0, 10, "castle"), (20, 30, "forest")], 1):
+        store.create_node("book", ["Scene"], {"id": f"s{i}", "title": f"Scene {i}", "timeStart": start, "timeEnd": end})
+        store.create_relationship("ch1", f"s{i}", "HAS_SCENE")
+        store.create_relationship(f"s{i}", location, "OCCURS_IN")
+        store.create_relationship("hero", f"s{i}", "APPEARS_IN")
+    store.create_relationship("s1", "s2", "PRECEDES")
+    return store
+
+
+def _types(issues):
+    return sorted(issue["type"] if isinstance(issue, dict) else issue.type for issue in issues)
+
+
+def test_valid_project_has_no_issues(store):
+    """Test that a consistent graph produces no issues."""
+    assert GraphValidator.validate_project("book", incremental=False) == []
+
+
+def test_detects_each_issue_type(store):
+    """Test orphan, missing location, cycle, conflict, concept and duplicate checks."""
+    store.create_node("book", ["Scene"], {"id": "orphan", "title": "Orphan"})
+    store.create_relationship("s2", "s1", "PRECEDES")
+    store.update_node("s2", {"timeStart": 5})
+    store.create_node("book", ["Concept"], {"id": "magic", "name": "Magic"})
+    store.create_node("book", ["Character"], {"id": "hero2", "name": " hero "})
+
+    issues = GraphValidator.validate_project("book", incremental=False)
+    assert _types(issues) == sorted([
+        "orphan_scene",
+        "missing_location",
+        "precedes_cycle",
+        "character_location_conflict",
+        "undefined_concept",
+        "duplicate_character",
+    ])
+    cycle = next(i for i in issues if i["type"] == "precedes_cycle")
+    assert cycle["node_ids"] in (["s1", "s2", "s1"], ["s2", "s1", "s2"])
+
+
+def test_cycle_detection_is_linear_on_long_chains():
+    """Test Tarjan's algorithm on a long chain without recursion."""
+    n = 50000
+    successors = {i: [i + 1] for i in range(n - 1)}
+    successors[n - 1] = [0]
+    start = time.perf_counter()
+    components = strongly_connected_components(range(n), lambda i: successors.get(i, []))
+    assert time.perf_counter() - start < 5
+    assert len(components) == 1 and len(components[0]) == n
+
+
+def test_incremental_revalidation_rereads_only_touched_nodes(store):
+    """Test that an incremental run matches a full run but loads only touched nodes."""
+    engine = ValidationEngine()
+    loader = CountingLoader()
+    assert engine.validate("book", loader) == []
+
+    store.update_node("s2", {"timeStart": 5})
+    engine.mark_touched(["s2"])
+    issues = engine.validate("book", loader)
+    assert loader.loaded_node_ids == [["s2"]]
+    assert _types(issues) == ["character_location_conflict"]
+
+    full = ValidationEngine().validate("book", MemoryGraphLoader())
+    assert [i.to_dict() for i in issues] == [i.to_dict() for i in full]
+
+    store.update_node("s2", {"timeStart": 20})
+    engine.mark_touched(["s2"])
+    assert engine.validate("book", loader) == []
+
+
+def test_incremental_handles_deleted_chapter(store):
+    """Test that deleting a chapter orphans its scenes on the next incremental run."""
+    engine = ValidationEngine()
+    loader = CountingLoader()
+    engine.validate("book", loader)
+
+    store.delete_node("ch1")
+    engine.mark_touched(["ch1"])
+    issues = engine.validate("book", loader)
+    assert _types(issues) == ["orphan_scene", "orphan_scene"]
@@ -0,0 +1,155 @@
+"""Tests for the shared job registry."""
+import tracemalloc
+import pytest
+
+from app.core.job_registry import JobRegistry, LRUCache, get_job_registry
+
+
+class Clock:
+    """Manually advanced clock."""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _registry(tmp_path, clock, **kwargs):
+    return JobRegistry(str(tmp_path / "jobs.db"), clock=clock, **kwargs)
+
+
+def test_instances_share_jobs(tmp_path, clock):
+    """Test that two instances on one SQLite file see each other's jobs and results."""
+    a = _registry(tmp_path, clock)
+    b = _registry(tmp_path, clock)
+
+    job_id = a.create("pdf_qa", data={"doc_id": "d1"})
+    assert b.get(job_id)["status"] == "running"
+    assert b.get(job_id)["data"] == {"doc_id": "d1"}
+
+    # b's cached row is invalidated by a's writes
+    a.update(job_id, progress=0.5, message="ranking")
+    assert b.get(job_id)["progress"] == 0.5
+    a.complete(job_id, result={"answer": "x" * 100_000})
+    job = b.get(job_id)
+    assert job["status"] == "completed" and job["has_result"]
+    assert "answer" not in job
+    assert b.get_result(job_id) == {"answer": "x" * 100_000}
+
+    other = b.create("ferrari_phase", job_id="p1_strategy_concept")
+    b.fail(other, "boom")
+    assert a.get(other)["error"] == "boom"
+    assert b.delete(other) and a.get(other) is None
+
+
+def test_eviction_keeps_memory_flat(tmp_path, clock):
+    """Test that 100k completed jobs do not accumulate in memory, rows or result files."""
+    registry = _registry(tmp_path, clock, ttl_seconds=600, cache_size=256)
+
+    def run(n):
+        for i in range(n):
+            job_id = registry.create("pdf_qa")
+            registry.get(job_id)
+            registry.complete(job_id, result={"i": i} if i % 100 == 0 else None)
+            clock.now += 0.1  # 100k jobs span about three hours
+
+    run(80_000)
+    tracemalloc.start()
+    run(10_000)
+    baseline = tracemalloc.get_traced_memory()[0]
+    run(10_000)
+    grown = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    assert len(registry._cache) <= 256
+    # Only jobs younger than the TTL (plus one sweep interval) remain
+    assert registry.count() <= 6_600
+    assert len(list(registry.results_dir.iterdir())) <= 66
+    assert grown < 256 * 1024
+
+
+def test_restart_surfaces_in_flight_jobs_as_interrupted(tmp_path, clock):
+    """Test that jobs of a crashed or stopped instance are reported as interrupted."""
+    crashed = _registry(tmp_path, clock, heartbeat_seconds=10)
+    lost = crashed.create("pdf_qa")
+    done = crashed.create("pdf_qa")
+    crashed.complete(done, result={"answer": "kept"})
+
+    restarted = _registry(tmp_path, clock, heartbeat_seconds=10)
+    # The old process might still be alive right after the new one starts
+    assert restarted.recover() == 0
+    assert restarted.get(lost)["status"] == "running"
+
+    # It never heartbeats again
+    clock.now += 31
+    restarted.heartbeat()
+    job = restarted.get(lost)
+    assert job["status"] == "interrupted" and "restart" in job["error"]
+    assert restarted.get(done)["status"] == "completed"
+    assert restarted.get_result(done) == {"answer": "kept"}
+
+    # A clean shutdown interrupts its running jobs immediately
+    pending = restarted.create("ferrari_phase", job_id="p1_early_design")
+    restarted.close()
+    assert _registry(tmp_path, clock).get(pending)["status"] == "interrupted"
+
+
+def test_job_of_an_unregistered_owner_is_interrupted(tmp_path, clock):
+    """Test that a running job whose owner row is gone is interrupted instead of looping in get."""
+    a = _registry(tmp_path, clock, heartbeat_seconds=10)
+    b = _registry(tmp_path, clock, heartbeat_seconds=10)
+
+    # b's heartbeat went stale with no running jobs, so a's recover dropped its owner row;
+    # creating a job registers b again
+    clock.now += 31
+    a.heartbeat()
+    a.recover()
+    job_id = b.create("pdf_qa")
+    assert a.get(job_id)["status"] == "running"
+
+    # The owner row disappears while the job runs (e.g. the race between recover and create)
+    b._conn.execute("DELETE FROM job_owners WHERE id = ?", (b.instance_id,))
+    job = a.get(job_id)
+    assert job["status"] == "interrupted" and "restart" in job["error"]
+    assert b.get(job_id)["status"] == "interrupted"
+
+
+def test_lru_cache_skips_pinned_entries():
+    """Test that eviction passes over pinned entries and takes them once unpinned."""
+    pinned = {"a"}
+    cache = LRUCache(2, pinned=lambda key, value: key in pinned)
+    cache["a"], cache["b"], cache["c"] = 1, 2, 3
+    assert list(cache) == ["a", "c"]
+    cache["d"] = 4
+    assert list(cache) == ["a", "d"]
+
+    pinned.clear()
+    cache["e"] = 5
+    assert list(cache) == ["d", "e"]
+
+
+def test_ferrari_project_with_running_phase_stays_loaded(monkeypatch):
+    """Test that a Ferrari project stays in memory while its phase job runs in this process."""
+    from app.routes import ferrari_company
+
+    monkeypatch.setattr(ferrari_company.active_projects, "maxsize", 2)
+    ferrari_company.active_projects.clear()
+    try:
+        registry = get_job_registry()
+        registry.create(ferrari_company.PHASE_JOB_KIND, job_id="running_drafting", data={"phase": "drafting"})
+        ferrari_company.active_projects["running"] = {"current_phase": "drafting"}
+        for n in range(3):
+            ferrari_company.active_projects[f"idle{n}"] = {"current_phase": "drafting"}
+        assert list(ferrari_company.active_projects) == ["running", "idle2"]
+
+        registry.complete("running_drafting")
+        ferrari_company.active_projects["idle3"] = {"current_phase": "drafting"}
+        assert list(ferrari_company.active_projects) == ["idle2", "idle3"]
+    finally:
+        ferrari_company.active_projects.clear()
@@ -0,0 +1,127 @@
+"""Tests for map-reduce QA over a whole manuscript."""
+import asyncio
+import json
+import re
+import pytest
+
+from app.book_writer.qa_engine import ManuscriptQA, QAWindowCache, manuscript_chapters, split_windows
+
+LATENCY = 0.02
+CHAPTERS = 30
+WORDS_PER_CHAPTER = 5000
+CONTRADICTION = "The valve was painted red."
+
+
+class ReviewerLLM:
+    """Deterministic fake reviewer with a fixed latency per call."""
+
+    provider = "local"
+    model = "reviewer-1"
+
+    def __init__(self):
+        self.calls = []  # (reviewer system prompt, chapter)
+        self.in_flight = 0
+        self.peak = 0  # most calls in flight at once
+
+    async def complete(self, system, user, tools=None):
+        chapter = int(re.search(r"Passage of Chapter (\d+):", user).group(1))
+        self.calls.append((system.split(".")[0], chapter))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+        finally:
+            self.in_flight -= 1
+        passage = user.split(f"Passage of Chapter {chapter}:\n", 1)[1]
+        findings = []
+        if "Logic" in system and CONTRADICTION in passage:
+            findings.append({"issue": "The valve changes colour.", "quote": CONTRADICTION, "severity": "high"})
+        review = {"findings": findings}
+        if "Test Reader" in system:
+            review["pacing"] = "too slow" if "slowly" in passage else "just right"
+        return "Here is my review:\n" + json.dumps(review)
+
+
+def _chapter(number):
+    paragraphs = []
+    words = 0
+    p = 0
+    while words < WORDS_PER_CHAPTER:
+        sentence = f"In chapter {number} the pump hummed as paragraph {p} went on through the night shift."
+        paragraph = " ".join([sentence] * 6)
+        if p == 20 and number in (3, 17):
+            paragraph += " " + CONTRADICTION
+        if p == 5 and number == 9:
+            paragraph += " Time passed slowly."
+        paragraphs.append(paragraph)
+        words += len(paragraph.split())
+        p += 1
+    return "\n\n".join(paragraphs)
+
+
+@pytest.fixture(scope="module")
+def draft():
+    chapters = {n: _chapter(n) for n in range(1, CHAPTERS + 1)}
+    assert sum(len(text.split()) for text in chapters.values()) >= 150_000
+    return chapters
+
+
+async def _review(chapters, cache, concurrency):
+    llm = ReviewerLLM()
+    report = await ManuscriptQA(llm, cache).review(chapters, asyncio.Semaphore(concurrency))
+    return llm, report
+
+
+@pytest.mark.asyncio
+async def test_whole_manuscript_reviewed_concurrently(draft, tmp_path):
+    """Test that every window is reviewed once per reviewer, up to the concurrency limit at once."""
+    llm, report = await _review(draft, QAWindowCache(str(tmp_path / "qa.db")), 16)
+
+    windows = split_windows(draft)
+    assert len(windows) > CHAPTERS
+    for reviewer in ("You are a Test Reader Agent", "You are a Logic & Consistency Agent",
+                     "You are a Sensitivity/Alignment Agent"):
+        assert sorted(chapter for name, chapter in llm.calls if name == reviewer) == [w.chapter for w in windows]
+    assert report["coverage"]["chapters_reviewed"] == CHAPTERS
+    assert len(llm.calls) == report["coverage"]["window_reviews"] == len(windows) * 3
+    assert llm.peak == 16
+
+    # The contradiction found in two windows is one finding with both locations
+    [finding] = report["findings"]
+    assert finding["severity"] == "high"
+    assert [loc["chapter"] for loc in finding["locations"]] == [3, 17]
+    for loc in finding["locations"]:
+        assert draft[loc["chapter"]][loc["offset"]:].startswith(CONTRADICTION)
+    assert report["logic_consistency_issues"] == ["Chapter 3, 17: The valve changes colour."]
+    assert report["test_reader_feedback"]["slow_chapters"] == [9]
+
+
+@pytest.mark.asyncio
+async def test_edit_rereviews_only_affected_windows(draft, tmp_path):
+    """Test that editing two chapters only re-reviews their changed windows."""
+    cache = QAWindowCache(str(tmp_path / "qa.db"))
+    _, first = await _review(draft, cache, 16)
+
+    edited = dict(draft)
+    edited[5] = draft[5] + " The night shift ended."
+    edited[12] = draft[12].replace("paragraph 3 went on", "paragraph 3 carried on", 1)
+    llm, second = await _review(edited, cache, 16)
+
+    # Windows are cached by content, so a window only shifted by the edit is reused
+    before = {(w.chapter, w.text) for w in split_windows(draft)}
+    changed = [w for w in split_windows(edited) if (w.chapter, w.text) not in before]
+    assert {w.chapter for w in changed} == {5, 12}
+    assert sorted(chapter for _, chapter in llm.calls) == sorted([w.chapter for w in changed] * 3)
+    assert second["coverage"]["cached_reviews"] == first["coverage"]["window_reviews"] - len(changed) * 3
+    assert second["findings"] == first["findings"]
+
+
+def test_chapters_from_assembled_draft():
+    """Test that the assembled draft is split back into chapters at its headings."""
+    full_draft = "# Chapter 1\n\nIt began.\n\n# Chapter 2\n\nIt went on.\n\nAnd ended."
+    assert manuscript_chapters({}, full_draft) == {1: "It began.", 2: "It went on.\n\nAnd ended."}
+
+    windows = split_windows({1: "a" * 10 + "\n\n" + "b" * 10 + "\n\n" + "c" * 30}, max_chars=25)
+    assert [(w.offset, w.text) for w in windows] == [
+        (0, "a" * 10 + "\n\n" + "b" * 10), (24, "c" * 25), (49, "c" * 5)
+    ]
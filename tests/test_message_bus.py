@@ -0,0 +1,170 @@
+"""Tests for the indexed, bounded message bus and its queued subscribers."""
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+
+from app.book_writer.ferrari_company import BookProject, FerrariBookCompany, MessageBus, Phase
+
+MESSAGES = 100_000
+PHASES = list(Phase)
+AGENTS = ["CEO", "CPSO", "Story Design Director", "Production Director", "QA Director", "Launch Director"]
+
+
+def _send(bus, n):
+    """Message n of a long project: each phase and agent in turn, one rare sender."""
+    sender = "Market Analyst" if n % 1000 == 0 else AGENTS[n % len(AGENTS)]
+    return bus.send(sender, AGENTS[(n + 1) % len(AGENTS)], PHASES[n % len(PHASES)], f"Message {n}")
+
+
+def test_filtered_reads_cost_the_result():
+    """Test that filtered reads of a 100k-message bus cost the size of their result, not of the log."""
+    bus = MessageBus(window=MESSAGES)
+    log = [_send(bus, n) for n in range(MESSAGES)]
+    phase, rare = PHASES[3], "Market Analyst"
+
+    assert bus.get_messages(phase) == [m for m in log if m.phase == phase]
+    assert bus.get_messages(agent=rare) == [m for m in log if m.from_agent == rare or m.to_agent == rare]
+    assert bus.get_messages(phase, rare) == [
+        m for m in log if m.phase == phase and (m.from_agent == rare or m.to_agent == rare)
+    ]
+    # Reads walk the index of their filter, which holds exactly its messages
+    assert len(bus._by_phase[phase]) == len(bus.get_messages(phase)) < MESSAGES // 5
+    assert len(bus._by_agent[rare]) == len(bus.get_messages(agent=rare)) == MESSAGES // 1000
+
+    assert bus.get_total_message_count() == MESSAGES
+    assert bus.get_messages_since(MESSAGES - 2) == log[-2:]
+    assert bus.messages[-1] is log[-1]
+
+
+def test_window_keeps_unsaved_messages():
+    """Test that only messages reported durable leave memory, and the indexes follow the window."""
+    bus = MessageBus(window=100)
+    log = [_send(bus, n) for n in range(300)]
+    assert bus.first_seq == 0  # nothing is saved yet
+    assert bus.get_messages() == log
+
+    bus.mark_durable(250)
+    assert bus.first_seq == 200
+    assert bus.get_messages() == log[200:]
+    assert bus.get_messages(PHASES[0]) == [m for m in log[200:] if m.phase == PHASES[0]]
+    assert bus.get_messages(agent="CEO") == [m for m in log[200:] if "CEO" in (m.from_agent, m.to_agent)]
+    assert bus.get_messages_since(0) == log[200:]
+    assert len(bus.messages) == bus.get_total_message_count() == 300
+    assert bus.messages[250] is log[250]
+    with pytest.raises(IndexError):
+        bus.messages[150]
+
+    # New messages evict saved ones as the window fills
+    log += [_send(bus, n) for n in range(300, 340)]
+    assert bus.first_seq == 240
+    assert bus.get_messages()[0] is log[240]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_send():
+    """Test that send returns at once while a slow subscriber lags, and what it misses is counted."""
+    bus = MessageBus()
+    received = []
+
+    async def slow(message):
+        await asyncio.sleep(0.05)
+        received.append(message.content)
+
+    subscription = bus.subscribe("CEO", slow, maxsize=10)
+    everything = bus.subscribe()
+
+    for n in range(1000):
+        bus.send("CPSO", "CEO", Phase.STRATEGY_CONCEPT, f"Message {n}")
+    assert subscription.lag == 10
+    assert subscription.dropped == 990
+
+    await asyncio.sleep(0.05 * 12)
+    assert received[-10:] == [f"Message {n}" for n in range(990, 1000)]
+    assert subscription.lag == 0
+    assert subscription.delivered == len(received) == 10
+
+    # A reader without a callback pulls its queue
+    assert (await everything.get()).content == "Message 0"
+    assert everything.lag == 999
+    bus.unsubscribe(subscription)
+    bus.send("CPSO", "CEO", Phase.STRATEGY_CONCEPT, "After unsubscribing")
+    await asyncio.sleep(0.1)
+    assert len(received) == 10
+
+
+@pytest.mark.asyncio
+async def test_failing_subscriber_keeps_receiving():
+    """Test that a subscriber raising on one message still gets the next ones."""
+    bus = MessageBus()
+    received = []
+
+    def flaky(message):
+        if message.content == "bad":
+            raise ValueError("cannot handle this one")
+        received.append(message.content)
+
+    bus.subscribe("CEO", flaky)
+    for content in ("first", "bad", "last"):
+        bus.send("CPSO", "CEO", Phase.STRATEGY_CONCEPT, content)
+    await asyncio.sleep(0.01)
+    assert received == ["first", "last"]
+
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import BookPublishingHouseProject, ProjectArtifact, ProjectLogEntry  # noqa: E402
+from app.routes import ferrari_company  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'projects.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[
+            BookPublishingHouseProject.__table__, ProjectLogEntry.__table__, ProjectArtifact.__table__,
+        ])
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ferrari_company.active_projects.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_saved_messages_spill_to_the_database(session_factory):
+    """Test that saved Ferrari messages leave memory and are read back from the stored chat log."""
+    company = FerrariBookCompany(model="qwen3:30b")
+    company.message_bus = MessageBus(window=50)
+    company.project = BookProject(title="The Pump", premise="A hydraulic engineer saves a city.")
+    project_data = {
+        "company": company, "title": "The Pump", "premise": "A hydraulic engineer saves a city.",
+        "model": "qwen3:30b", "current_phase": "strategy_concept", "status": "in_progress",
+        "owner_decisions": {}, "artifacts": {}, "chat_log": [], "progress_log": [], "error_log": [],
+    }
+    ferrari_company.active_projects["book"] = project_data
+    for n in range(200):
+        phase = Phase.STRATEGY_CONCEPT if n < 150 else Phase.EARLY_DESIGN
+        company.message_bus.send("CPSO", "CEO", phase, f"Message {n}")
+        if n % 40 == 39:
+            async with session_factory() as db:
+                await ferrari_company.save_project_to_db("book", project_data, db)
+    assert company.message_bus.first_seq == 150  # all 200 saved, the last 50 kept
+    assert len(company.message_bus.get_messages()) == 50
+
+    async with session_factory() as db:
+        full = await ferrari_company.get_chat_log("book", db=db)
+        design = await ferrari_company.get_chat_log("book", phase="early_design", db=db)
+        pages, after = [], -1
+        while True:
+            page = await ferrari_company.get_chat_log("book", after=after, limit=100, db=db)
+            page = page if isinstance(page, dict) else json.loads(page.body)
+            pages.append([m["seq"] for m in page["chat_log"]])
+            after = page["next_after"]
+            if not page["has_more"]:
+                break
+    assert [m["content"] for m in full["chat_log"]] == [f"Message {n}" for n in range(200)]
+    assert [m["content"] for m in design["chat_log"]] == [f"Message {n}" for n in range(150, 200)]
+    # Stored messages first, then the bus's window from the feed
+    assert pages == [list(range(100)), list(range(100, 150)), list(range(150, 200))]
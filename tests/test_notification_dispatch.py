@@ -0,0 +1,133 @@
+"""Tests for concurrent notification dispatch."""
+import asyncio
+import random
+import pytest
+
+from app.scheduling.dispatch import DispatchEngine, channels_for
+
+
+class FakeSender:
+    """Offline stand-in for Twilio or SendGrid with latency and errors."""
+
+    def __init__(self, channel, latency, error_rate=0.0, seed=0):
+        self.channel = channel
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = []       # notification ids in call order
+        self.delivered = []   # notification ids that were sent successfully
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, job_data):
+        notification_id = job_data["notification_id"]
+        self.calls.append(notification_id)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.rng.random() < self.error_rate:
+            raise ConnectionError(f"{self.channel} provider timeout")
+        self.delivered.append(notification_id)
+        return {"status": "sent", "provider": f"fake-{self.channel}"}
+
+
+def _jobs(count, users):
+    channels = ["email", "call", "both"]
+    return [
+        {
+            "notification_id": f"n{i}",
+            "user_id": f"u{i % users}",
+            "channel": channels[i % 3],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_thousand_jobs_run_up_to_the_channel_limits():
+    """Test per-channel concurrency, per-user ordering and no duplicate sends."""
+    latency = 0.01
+    call = FakeSender("call", latency, error_rate=0.1, seed=1)
+    email = FakeSender("email", latency, error_rate=0.1, seed=2)
+    engine = DispatchEngine(
+        senders={"call": call, "email": email},
+        limits={"call": 20, "email": 50},
+        max_attempts=8,
+        backoff_base=0.005,
+        rng=random.Random(3)
+    )
+    jobs = _jobs(1000, users=100)
+
+    results = await engine.dispatch(jobs)
+
+    # Each channel runs up to its limit at once
+    assert call.peak == 20 and email.peak == 50
+
+    assert all(result["status"] in ("sent", "completed") for result in results)
+    expected_calls = [job["notification_id"] for job in jobs if "call" in channels_for(job["channel"])]
+    expected_emails = [job["notification_id"] for job in jobs if "email" in channels_for(job["channel"])]
+    assert sorted(call.delivered) == sorted(expected_calls)
+    assert sorted(email.delivered) == sorted(expected_emails)
+    assert len(call.delivered) + len(email.delivered) == len(expected_calls) + len(expected_emails)
+
+    # Every user's jobs start in the order they were queued
+    index = {job["notification_id"]: i for i, job in enumerate(jobs)}
+    for sender in (call, email):
+        last_seen = {}
+        for notification_id in sender.calls:
+            user = jobs[index[notification_id]]["user_id"]
+            assert index[notification_id] >= last_seen.get(user, -1)
+            last_seen[user] = index[notification_id]
+
+
+@pytest.mark.asyncio
+async def test_failed_channel_retried_without_resending_other():
+    """Test that retrying the call channel never re-sends the email."""
+    outcomes = iter([{"status": "failed", "error": "busy"}, {"status": "failed", "error": "busy"}, {"status": "sent"}])
+    calls, emails = [], []
+
+    async def call(job_data):
+        calls.append(job_data["notification_id"])
+        return next(outcomes)
+
+    async def email(job_data):
+        emails.append(job_data["notification_id"])
+        return {"status": "sent"}
+
+    engine = DispatchEngine(senders={"call": call, "email": email}, max_attempts=3, backoff_base=0.001)
+    result = await engine.execute({"notification_id": "n1", "user_id": "u1", "channel": "both"})
+    assert result["status"] == "completed"
+    assert result["call"]["attempts"] == 3
+    assert result["email"]["attempts"] == 1
+    assert emails == ["n1"] and calls == ["n1"] * 3
+
+
+@pytest.mark.asyncio
+async def test_partial_and_unknown_channel_results():
+    """Test result status when channels fail or are not configured."""
+    async def failing(job_data):
+        raise RuntimeError("down")
+
+    async def ok(job_data):
+        return {"status": "sent"}
+
+    engine = DispatchEngine(senders={"call": failing, "email": ok}, max_attempts=2, backoff_base=0.001)
+    result = await engine.execute({"notification_id": "n1", "channel": "both"})
+    assert result["status"] == "partial"
+    assert result["error"] == "call: down"
+
+    assert (await engine.execute({"channel": "pigeon"}))["status"] == "failed"
+    assert (await engine.execute({"channel": None}))["error"] == "Unknown channel"
+
+
+def test_backoff_is_jittered_and_capped():
+    """Test exponential full-jitter backoff bounds."""
+    engine = DispatchEngine(senders={}, backoff_base=1.0, backoff_max=5.0, rng=random.Random(0))
+    delays = [engine.backoff(attempt) for attempt in (1, 2, 3, 10)]
+    assert 0 <= delays[0] <= 1.0
+    assert 0 <= delays[1] <= 2.0
+    assert 0 <= delays[2] <= 4.0
+    assert 0 <= delays[3] <= 5.0
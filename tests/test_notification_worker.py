@@ -0,0 +1,198 @@
+"""Tests for batched notification processing in the worker."""
+from datetime import datetime, timedelta
+import time
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("aiosqlite")
+
+from cryptography.fernet import Fernet
+from sqlalchemy import event, select, func, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.config import settings
+
+# jobs.py builds its token cipher at import time and needs a valid key
+settings.OAUTH_ENC_KEY = Fernet.generate_key().decode()
+
+from app.database import Base
+from app.models import User, Event, Notification
+from app.scheduling.dispatch import DispatchEngine
+from app.worker import NotificationWorker
+
+
+class Database:
+    """SQLite database that counts the statements it executes."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.queries = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args, **kwargs):
+        self.queries += 1
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    """File-backed SQLite database with the notification tables."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'worker.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Event.__table__, Notification.__table__]
+        )
+    yield Database(engine)
+    await engine.dispose()
+
+
+async def _seed(database, count, users=100):
+    now = datetime.utcnow()
+    async with database.session_factory() as db:
+        db.add_all([User(id=f"u{i}", name=f"User {i}", email=f"u{i}@example.com") for i in range(users)])
+        db.add_all([
+            Event(
+                id=f"e{i}",
+                user_id=f"u{i % users}",
+                provider="google",
+                provider_event_id=f"p{i}",
+                title=f"Meeting {i}",
+                start_ts=now + timedelta(hours=1),
+                end_ts=now + timedelta(hours=2)
+            )
+            for i in range(count)
+        ])
+        db.add_all([
+            Notification(
+                id=f"n{i}",
+                user_id=f"u{i % users}",
+                event_id=f"e{i}",
+                channel="email",
+                plan_time=now - timedelta(minutes=1),
+                status="planned",
+                attempts=0
+            )
+            for i in range(count)
+        ])
+        await db.commit()
+
+
+class StubSender:
+    """Email sender that records the jobs it was asked to send."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, job_data):
+        self.sent.append(job_data["notification_id"])
+        if job_data["user"]["id"] == "u0":
+            return {"status": "failed", "error": "bounced"}
+        return {"status": "sent"}
+
+
+async def _drain(database, batch_size):
+    sender = StubSender()
+    worker = NotificationWorker(
+        session_factory=database.session_factory,
+        batch_size=batch_size,
+        dispatcher=DispatchEngine(senders={"email": sender}, max_attempts=1)
+    )
+    database.queries = 0
+    start = time.perf_counter()
+    processed = await worker._process_pending_notifications()
+    return processed, database.queries, time.perf_counter() - start, sender
+
+
+@pytest.mark.asyncio
+async def test_drain_sends_each_due_notification_once(database):
+    """Test that draining processes every due notification exactly once."""
+    await _seed(database, 1200)
+    processed, _, _, sender = await _drain(database, batch_size=500)
+    assert processed == 1200
+    assert len(sender.sent) == len(set(sender.sent)) == 1200
+
+    async with database.session_factory() as db:
+        rows = (await db.execute(
+            select(Notification.status, func.count(), func.max(Notification.attempts))
+            .group_by(Notification.status)
+        )).all()
+        failed = await db.get(Notification, "n0")
+    assert {status: (count, attempts) for status, count, attempts in rows} == {
+        "sent": (1188, 1),
+        "failed": (12, 1),
+    }
+    assert failed.error == "bounced"
+
+    processed, _, _, sender = await _drain(database, batch_size=500)
+    assert processed == 0 and sender.sent == []
+
+
+@pytest.mark.asyncio
+async def test_query_count_is_constant_per_batch(database):
+    """Benchmark a 10k drain and check queries do not grow with batch size."""
+    await _seed(database, 10000)
+    processed, queries, elapsed, _ = await _drain(database, batch_size=2000)
+    assert processed == 10000
+    # 5 batches of claim, users, events, mark-claimed and bulk result update,
+    # plus the final empty claim
+    assert queries == 5 * 5 + 1
+    assert elapsed < 30
+
+
+def _worker(database, sender, batch_size=100):
+    return NotificationWorker(
+        session_factory=database.session_factory,
+        batch_size=batch_size,
+        dispatcher=DispatchEngine(senders={"email": sender}, max_attempts=1)
+    )
+
+
+async def _statuses(database):
+    async with database.session_factory() as db:
+        rows = (await db.execute(select(Notification.status, func.count()).group_by(Notification.status))).all()
+    return dict(rows)
+
+
+@pytest.mark.asyncio
+async def test_batch_of_a_dead_worker_is_sent_after_its_lease(database):
+    """Test that a batch claimed by a worker that died is claimed again once its lease expires."""
+    await _seed(database, 50, users=10)
+    dead = _worker(database, StubSender())
+    claimed = await dead._claim_batch(datetime.utcnow())
+    assert len(claimed) == 50  # ...and the worker dies before sending
+
+    sender = StubSender()
+    assert await _worker(database, sender)._process_pending_notifications() == 0
+    assert await _statuses(database) == {"sending": 50}
+
+    # The lease runs out
+    async with database.session_factory() as db:
+        await db.execute(
+            update(Notification).values(claimed_at=datetime.utcnow() - timedelta(seconds=301))
+        )
+        await db.commit()
+    assert await _worker(database, sender)._process_pending_notifications() == 50
+    assert sorted(sender.sent) == sorted(f"n{i}" for i in range(50))
+    assert await _statuses(database) == {"sent": 45, "failed": 5}
+
+
+@pytest.mark.asyncio
+async def test_batch_is_released_when_its_results_cannot_be_written(database):
+    """Test that a batch whose outcome update fails goes back to planned and is sent on the next tick."""
+    await _seed(database, 30, users=10)
+    failures = [1]
+
+    def fail_result_update(conn, cursor, statement, parameters, context, executemany):
+        if failures and statement.startswith("UPDATE notifications SET sent_time=?"):
+            failures.pop()
+            raise RuntimeError("database went away")
+
+    event.listen(database.engine.sync_engine, "before_cursor_execute", fail_result_update)
+    with pytest.raises(Exception, match="database went away"):
+        await _worker(database, StubSender())._process_pending_notifications()
+    assert await _statuses(database) == {"planned": 30}
+
+    sender = StubSender()
+    assert await _worker(database, sender)._process_pending_notifications() == 30
+    assert await _statuses(database) == {"sent": 27, "failed": 3}
@@ -0,0 +1,133 @@
+"""Tests for the concurrent repair of weak outline sections."""
+import asyncio
+import re
+from collections import Counter
+import pytest
+
+from app.book_writer.outline_generator import OutlineGenerator
+
+LATENCY = 0.05
+
+
+class FixedLatencyLLM:
+    """Fake LLM answering after a fixed delay with a full section, or nonsense for broken chapters."""
+
+    provider = "local"
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)  # chapter numbers whose sections never come back valid
+        self.attempts = Counter()  # (chapter, section) -> section prompts answered
+        self.in_flight = 0
+        self.peak = 0  # most calls in flight at once
+
+    async def complete(self, system, user, tools=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+        finally:
+            self.in_flight -= 1
+        chapter = int(re.search(r"Chapter (\d+):", user).group(1))
+        section = int(re.search(r"(?:Generate|for) Section (\d+)", user).group(1))
+        if "Generate Section" in user:
+            self.attempts[(chapter, section)] += 1
+        if chapter in self.broken:
+            return "I am not sure what you mean."
+        return "\n".join([f"Section Title: The Harbor Crossing {chapter}.{section}"] + [
+            line for sub in (1, 2) for line in [
+                f"Subsection {sub}: Night Watch {chapter}.{section}.{sub}",
+                "Main Points:",
+            ] + [f"* Main point for paragraph {m}: The keeper climbs tower {chapter}.{section}.{sub} "
+                 f"as the storm closes in on beat {m}." for m in (1, 2, 3)]
+        ])
+
+
+class FakeAgents:
+    """Planning agents that return a fixed outline, so only section repair calls the LLM."""
+
+    def __init__(self, llm_client, outline):
+        self.llm_client = llm_client
+        self.outline = outline
+
+    async def story_planner(self, initial_prompt):
+        return "Story arc"
+
+    async def world_builder(self, story_arc):
+        return "World"
+
+    async def outline_creator(self, initial_prompt, story_arc, world_elements, num_chapters):
+        return self.outline
+
+
+def _outline(chapters, sections):
+    """Outline whose sections all have titles but no subsections, so every one needs repair."""
+    parts = ["OUTLINE:"]
+    for n in range(1, chapters + 1):
+        parts.append(f"""Chapter {n}: The Lighthouse Keeper {n}
+Title: The Lighthouse Keeper {n}
+Key Events:
+- The lamp fails during a storm
+- A ship runs aground on the reef
+- The keeper rows out to the wreck
+Character Developments: The keeper overcomes her fear of the sea
+Setting: A rocky island off the northern coast
+Tone: Tense and hopeful
+Sections:
+""" + "\n".join(f"Section {s}: Part {s} of the long night at sea" for s in range(1, sections + 1)))
+    parts.append("END OF OUTLINE")
+    return "\n".join(parts)
+
+
+async def _generate(llm, concurrency, chapters=10, sections=4):
+    generator = OutlineGenerator(FakeAgents(llm, _outline(chapters, sections)), {},
+                                 max_concurrency=concurrency, retry_delay=LATENCY)
+    progress = []
+
+    async def on_progress(message, sub_item):
+        progress.append((message, sub_item))
+
+    outline = await generator.generate_outline("A lighthouse story", chapters, progress_callback=on_progress)
+    return outline, progress
+
+
+@pytest.mark.asyncio
+async def test_sections_are_repaired_concurrently():
+    """Test that 40 placeholder sections are repaired with up to k calls in flight at concurrency k."""
+    for concurrency in (1, 4, 8):
+        llm = FixedLatencyLLM()
+        outline, progress = await _generate(llm, concurrency)
+
+        assert sum(llm.attempts.values()) == 40
+        assert llm.peak == concurrency
+        assert [sub_item for _, sub_item in progress] == [f"{n} of 40 sections repaired" for n in range(1, 41)]
+        for chapter in outline:
+            n = chapter["chapter_number"]
+            assert [section["title"] for section in chapter["sections"]] == [
+                f"The Harbor Crossing {n}.{s}" for s in range(1, 5)
+            ]
+            assert not any(OutlineGenerator._section_needs_repair(section) for section in chapter["sections"])
+            assert f"Section 4: The Harbor Crossing {n}.4" in chapter["prompt"]
+            assert "Part 1 of the long night" not in chapter["prompt"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_sections_exhaust_their_own_retries():
+    """Test that sections that never validate use up their own attempts without delaying the others."""
+    llm = FixedLatencyLLM(broken={1})
+    outline, progress = await _generate(llm, 4, chapters=4, sections=3)
+
+    # Each attempt of a broken section is the section prompt and two subsection prompts
+    assert all(llm.attempts[(1, s)] == 3 for s in (1, 2, 3))
+    assert all(llm.attempts[(n, s)] == 1 for n in (2, 3, 4) for s in (1, 2, 3))
+    assert llm.peak == 4
+    repaired = [n for n, (message, _) in enumerate(progress) if message.startswith("Repaired")]
+    given_up = [n for n, (message, _) in enumerate(progress) if "still incomplete" in message]
+    assert len(repaired) == 9 and len(given_up) == 3
+    # The broken sections take three of the four slots first; the good ones use the rest and
+    # the slots freed while the broken ones back off, and are done before those give up
+    assert max(repaired) < min(given_up)
+    assert progress[-1][1] == "9 of 12 sections repaired"
+
+    assert [section["title"] for section in outline[0]["sections"]] == ["Section 1", "Section 2", "Section 3"]
+    for chapter in outline[1:]:
+        assert not any(OutlineGenerator._section_needs_repair(section) for section in chapter["sections"])
@@ -0,0 +1,117 @@
+"""Tests for the persistent PDF Q&A BM25 index."""
+import json
+import math
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.pdf_qa import index as pdf_index
+from app.pdf_qa.index import BM25_B, BM25_K1, BM25Index, chunk_text, tokenize
+from app.routes import pdf_qa
+
+QUESTIONS = [
+    "How do I reset the hydraulic pump pressure?",
+    "torque settings for the rear axle bolts",
+    "valve valve calibration",  # repeated terms count twice
+    "what is the warranty period",
+    "zzzz unknown words only",
+    "the and for",  # stopwords only
+]
+
+
+def _document(pages=1000, seed=7):
+    """Synthetic manual: random technical words, a few topics per page."""
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(4000)] + [
+        "hydraulic", "pump", "pressure", "reset", "torque", "rear", "axle", "bolts",
+        "valve", "calibration", "warranty", "period", "settings",
+    ]
+    weights = [1.0] * 4000 + [0.05] * 13
+    return [
+        " ".join(rng.choices(vocabulary, weights, k=rng.randint(150, 450)))
+        for _ in range(pages)
+    ]
+
+
+def _full_scan_rank(question, pages, top_k=6):
+    """Reference ranking that rescans and scores every chunk: [{page (1-based), text, score}]."""
+    q_tokens = tokenize(question)
+    docs = []
+    for pi, page_text in enumerate(pages):
+        for chunk in chunk_text(page_text):
+            toks = tokenize(chunk)
+            if not toks:
+                continue
+            tf = {}
+            for t in toks:
+                tf[t] = tf.get(t, 0) + 1
+            docs.append({"page": pi + 1, "text": chunk, "tf": tf, "len": len(toks)})
+    if not q_tokens or not docs:
+        return []
+
+    df = {}
+    for d in docs:
+        for t in d["tf"]:
+            df[t] = df.get(t, 0) + 1
+    N = len(docs)
+    avgdl = sum(d["len"] for d in docs) / N
+
+    def idf(t):
+        n = df.get(t, 0)
+        return math.log(1 + (N - n + 0.5) / (n + 0.5)) if n > 0 else 0.0
+
+    ranked = []
+    for d in docs:
+        score = 0.0
+        denom_base = BM25_K1 * (1 - BM25_B + BM25_B * (d["len"] / (avgdl or 1.0)))
+        for t in q_tokens:
+            f = d["tf"].get(t, 0)
+            if f > 0:
+                score += idf(t) * (f * (BM25_K1 + 1)) / (f + denom_base)
+        if score > 0:
+            ranked.append({"page": d["page"], "text": d["text"], "score": score})
+    ranked.sort(key=lambda x: x["score"], reverse=True)
+    return ranked[: max(1, min(int(top_k or 6), 12))]
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return _document()
+
+
+def test_rankings_match_full_scan(pages, tmp_path):
+    """Test that the persisted index ranks exactly like rescanning every chunk."""
+    path = tmp_path / "doc.bm25.npz"
+    BM25Index.build(pages).save(path)
+    index = BM25Index.load(path)
+    assert index.num_pages == len(pages)
+    for question in QUESTIONS:
+        for top_k in (1, 6, 12, 40):
+            assert index.search(question, top_k) == _full_scan_rank(question, pages, top_k), question
+
+
+def test_ties_keep_document_order():
+    """Test that equal scores are returned in document order, as the full scan does."""
+    pages = ["alpha beta"] * 5 + ["gamma"]
+    index = BM25Index.build(pages)
+    assert [r["page"] for r in index.search("alpha", 3)] == [1, 2, 3]
+    assert index.search("alpha", 3) == _full_scan_rank("alpha", pages, 3)
+
+
+def test_outdated_index_is_rebuilt(pages, tmp_path, monkeypatch):
+    """Test that a tokenizer/chunker version change triggers a lazy rebuild."""
+    monkeypatch.setattr(pdf_qa, "PROCESSED_DIR", tmp_path)
+    monkeypatch.setattr(pdf_qa, "UPLOADS_DIR", tmp_path)
+    (tmp_path / "d1.pages.json").write_text(json.dumps({"pages": pages[:20]}))
+    (tmp_path / "d1.meta.json").write_text(json.dumps({"extractor": "pymupdf"}))
+
+    first = pdf_qa._load_index("d1")
+    assert pdf_qa._load_index("d1") is first
+
+    monkeypatch.setattr(pdf_index, "INDEX_VERSION", "changed")
+    assert BM25Index.load(tmp_path / "d1.bm25.npz") is None
+    pdf_index._cache.clear()  # a new version means a new process
+    rebuilt = pdf_qa._load_index("d1")
+    assert rebuilt is not first and rebuilt.version == "changed"
+    assert rebuilt.search("valve", 6) == first.search("valve", 6)
@@ -0,0 +1,176 @@
+"""Tests for streamed PDF Q&A answers against a local fake Ollama server."""
+import asyncio
+import json
+import threading
+import time
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("numpy")
+
+from app.pdf_qa import index as pdf_index
+from app.routes import pdf_qa
+
+TOKENS = [f"word{i} " for i in range(20)]
+TOKEN_DELAY = 0.05
+
+
+class FakeOllama:
+    """Minimal HTTP/1.1 server that streams /api/chat answers as NDJSON chunks."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.tokens_sent = 0
+        self.aborted = asyncio.Event()
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/api/chat"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":")[1])
+                body = json.loads(await reader.readexactly(length))
+                self.requests += 1
+                if body.get("stream"):
+                    await self._stream(reader, writer)
+                else:
+                    payload = json.dumps({"message": {"content": "".join(TOKENS)}, "done": True}).encode()
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                        + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                    )
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, reader, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n"
+        )
+        # The client sends nothing while a response streams, so a read returning means it hung up
+        closed = asyncio.ensure_future(reader.read(1))
+        try:
+            for token in TOKENS + [None]:
+                await asyncio.sleep(TOKEN_DELAY)
+                if closed.done():
+                    self.aborted.set()
+                    raise ConnectionError("client went away")
+                line = {"message": {"content": token or ""}, "done": token is None}
+                data = (json.dumps(line) + "\n").encode()
+                writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                await writer.drain()
+                if token is not None:
+                    self.tokens_sent += 1
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            closed.cancel()
+            await asyncio.gather(closed, return_exceptions=True)
+
+
+@pytest_asyncio.fixture
+async def ollama(tmp_path, monkeypatch):
+    """Fake Ollama plus one indexed document `doc1`."""
+    fake = FakeOllama()
+    monkeypatch.setattr(pdf_qa, "OLLAMA_CHAT_URL", await fake.start())
+    monkeypatch.setattr(pdf_qa, "PROCESSED_DIR", tmp_path)
+    monkeypatch.setattr(pdf_qa, "UPLOADS_DIR", tmp_path)
+    pages = [f"Maintenance page {i}. Filler text about assorted topics." for i in range(200)]
+    pages[42] = "To reset the hydraulic pump, hold the pressure valve for ten seconds."
+    (tmp_path / "doc1.pages.json").write_text(json.dumps({"pages": pages}))
+    (tmp_path / "doc1.meta.json").write_text(json.dumps({"extractor": "pymupdf"}))
+    pdf_qa._build_index("doc1", pages)
+    yield fake
+    await pdf_qa.close_ollama_client()
+    await fake.stop()
+
+
+def _request():
+    return pdf_qa.AskRequest(doc_id="doc1", question="How do I reset the hydraulic pump?")
+
+
+def _event(chunk):
+    assert chunk.startswith("data: ")
+    return json.loads(chunk[len("data: "):])
+
+
+@pytest.mark.asyncio
+async def test_citations_arrive_before_generation(ollama):
+    """Test that the first event is bounded by retrieval, not generation."""
+    start = time.perf_counter()
+    events = []
+    first_at = None
+    async for chunk in pdf_qa._stream_answer(_request()):
+        if first_at is None:
+            first_at = time.perf_counter() - start
+        events.append(_event(chunk))
+    total = time.perf_counter() - start
+
+    assert events[0]["type"] == "citations" and events[0]["used_pages"][0] == 43
+    assert [e["token"] for e in events if e["type"] == "token"] == TOKENS
+    assert events[-1]["type"] == "done"
+    assert events[-1]["result"]["answer"] == "".join(TOKENS).strip()
+    assert first_at < TOKEN_DELAY and total >= TOKEN_DELAY * len(TOKENS)
+
+
+@pytest.mark.asyncio
+async def test_questions_reuse_one_connection(ollama):
+    """Test that streamed and plain questions share the pooled connection."""
+    for _ in range(3):
+        async for _chunk in pdf_qa._stream_answer(_request()):
+            pass
+    answer = await pdf_qa._answer_question(_request())
+    assert answer.citations and answer.citations[0].page == 43
+    assert ollama.requests == 4
+    assert ollama.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_upstream_generation(ollama):
+    """Test that closing the event stream aborts the Ollama request."""
+    stream = pdf_qa._stream_answer(_request())
+    tokens = 0
+    async for chunk in stream:
+        if _event(chunk)["type"] == "token":
+            tokens += 1
+            if tokens == 3:
+                break
+    await stream.aclose()  # what the server does when the client disconnects
+
+    await asyncio.wait_for(ollama.aborted.wait(), timeout=1)
+    assert ollama.tokens_sent < len(TOKENS)
+
+
+@pytest.mark.asyncio
+async def test_index_is_rebuilt_off_the_event_loop(ollama, tmp_path, monkeypatch):
+    """Test that a missing index is loaded and rebuilt in a worker thread."""
+    (tmp_path / "doc1.bm25.npz").unlink()
+    pdf_index._cache.clear()
+    threads = []
+    build_index = pdf_qa._build_index
+
+    def recording_build(doc_id, pages):
+        threads.append(threading.get_ident())
+        return build_index(doc_id, pages)
+
+    monkeypatch.setattr(pdf_qa, "_build_index", recording_build)
+    answer = await pdf_qa._answer_question(_request())
+
+    assert answer.citations[0].page == 43
+    assert threads and threads[0] != threading.get_ident()
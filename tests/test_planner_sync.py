@@ -0,0 +1,170 @@
+"""Tests for hash-driven incremental calendar replanning."""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import Select, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base
+from app.llm.client import LLMClient
+from app.models import User, Event, Notification, Rule
+from app.scheduling.planner import NotificationPlanner, compute_event_hash
+
+EVENT_COUNT = 20000
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """SQLite database with one user and the planning tables."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'planner.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Event.__table__, Notification.__table__, Rule.__table__]
+        )
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(User(id="u1", name="User", email="u1@example.com"))
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.fixture
+def planner():
+    """Planner whose policy always plans an email and a call."""
+    llm_client = AsyncMock(spec=LLMClient)
+    llm_client.complete_json.return_value = {
+        "notify": True,
+        "plan": [
+            {"offset_minutes": -60, "channel": "email"},
+            {"offset_minutes": -15, "channel": "call"},
+        ],
+        "reasoning": "test"
+    }
+    return NotificationPlanner(llm_client)
+
+
+def _event(i, start, **changes):
+    event = {
+        "provider_event_id": f"g{i}",
+        "title": f"Meeting {i}",
+        "start_ts": start + timedelta(minutes=i),
+        "end_ts": start + timedelta(minutes=i + 30),
+        "location": None,
+        "description": None,
+        "status": "confirmed",
+    }
+    event.update(changes)
+    event["hash"] = compute_event_hash(event)
+    return event
+
+
+async def _sync(planner, factory, incoming, window):
+    """Run a sync; returns the diff, the statements executed and the rows they read."""
+    async with factory() as db:
+        execute = db.execute
+        counts = {"statements": 0, "rows": 0}
+
+        async def counting(statement, *args, **kwargs):
+            result = await execute(statement, *args, **kwargs)
+            counts["statements"] += 1
+            if isinstance(statement, Select):
+                frozen = result.freeze()
+                counts["rows"] += len(frozen.data)
+                return frozen()
+            return result
+
+        db.execute = counting
+        diff = await planner.sync_events(db, "u1", "google", incoming, *window)
+        return diff, counts
+
+
+@pytest.mark.asyncio
+async def test_replan_touches_only_changed_events(planner, session_factory):
+    """Test that changing 50 of 20k events replans only those 50."""
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(hours=2)
+    window = (start - timedelta(days=1), start + timedelta(days=30))
+    incoming = [_event(i, start) for i in range(EVENT_COUNT)]
+
+    diff, full = await _sync(planner, session_factory, incoming, window)
+    assert diff["events"]["inserted"] == EVENT_COUNT
+    assert diff["notifications"]["created"] == 2 * EVENT_COUNT
+    policy_calls = planner.policy_agent.llm_client.complete_json.await_count
+
+    # 30 moved by an hour, 10 cancelled upstream, 10 deleted upstream
+    incoming = list(incoming)
+    for i in range(30):
+        incoming[i] = _event(i, start + timedelta(hours=1))
+    for i in range(30, 40):
+        incoming[i] = _event(i, start, status="cancelled")
+    incoming = incoming[:40] + incoming[50:]
+
+    marker = datetime.utcnow()
+    diff, incremental = await _sync(planner, session_factory, incoming, window)
+    assert diff["events"] == {"inserted": 0, "updated": 40, "deleted": 10, "unchanged": EVENT_COUNT - 50}
+    assert diff["notifications"] == {"created": 0, "updated": 60, "cancelled": 40}
+    assert planner.policy_agent.llm_client.complete_json.await_count == policy_calls
+    # Stored events, the notifications of the 50 changed events and the user
+    assert incremental["rows"] == EVENT_COUNT + 2 * 50 + 1
+    assert incremental["statements"] < full["statements"]
+
+    async with session_factory() as db:
+        touched = await db.scalar(
+            select(func.count()).select_from(Notification).where(Notification.updated_at >= marker)
+        )
+        moved = await db.scalar(
+            select(Notification.plan_time).where(Notification.event_id == select(Event.id).where(
+                Event.provider_event_id == "g0"
+            ).scalar_subquery(), Notification.channel == "email")
+        )
+        cancelled_events = await db.scalar(
+            select(func.count()).select_from(Event).where(Event.status == "cancelled")
+        )
+    assert touched == 100
+    assert moved == start + timedelta(hours=1) - timedelta(minutes=60)
+    assert cancelled_events == 20
+
+    # A second identical sync changes nothing
+    diff, _ = await _sync(planner, session_factory, incoming, window)
+    assert diff["events"]["updated"] == diff["events"]["inserted"] == diff["events"]["deleted"] == 0
+    assert diff["notifications"] == {"created": 0, "updated": 0, "cancelled": 0}
+
+
+@pytest.mark.asyncio
+async def test_windowed_sync_reads_only_the_window(planner, session_factory):
+    """Test that syncing a narrow window reads the stored events in it, not the whole calendar."""
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(hours=2)
+    incoming = [_event(i, start) for i in range(EVENT_COUNT)]
+    await _sync(planner, session_factory, incoming, (start, start + timedelta(days=30)))
+
+    # The first 1000 events, with one moved in from outside the window
+    window = (start, start + timedelta(minutes=999))
+    narrow = incoming[:1000] + [_event(5000, start, start_ts=start + timedelta(minutes=500))]
+    diff, counts = await _sync(planner, session_factory, narrow, window)
+    assert diff["events"] == {"inserted": 0, "updated": 1, "deleted": 0, "unchanged": 1000}
+    # Stored events in the window, the one moved in, its notifications and the user
+    assert counts["rows"] == 1000 + 1 + 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_plan_user_notifications_skips_planned_events(planner, session_factory):
+    """Test that the existing-notification check skips already planned events."""
+    start = datetime.utcnow() + timedelta(hours=3)
+    async with session_factory() as db:
+        for i in range(3):
+            db.add(Event(
+                id=f"e{i}", user_id="u1", provider="google", provider_event_id=f"g{i}",
+                title=f"Meeting {i}", start_ts=start, end_ts=start + timedelta(minutes=30)
+            ))
+        await db.commit()
+        first = await planner.plan_user_notifications(db, "u1")
+        second = await planner.plan_user_notifications(db, "u1")
+        single = await planner.plan_user_notifications(db, "u1", event_id="e1", force_replan=True)
+    assert first["events_processed"] == 3 and first["notifications_planned"] == 6
+    assert second["events_processed"] == 0
+    assert single["events_processed"] == 1
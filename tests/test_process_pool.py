@@ -0,0 +1,23 @@
+"""Tests for the shared spawned process pools."""
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.process_pool import SpawnedPool
+
+
+def test_pool_is_started_once_and_replaced_after_discard():
+    """Test that a pool is reused until discarded, and only a discard of itself replaces it."""
+    starts = []
+    pool = SpawnedPool("Test", lambda: starts.append(1) or 0)
+    try:
+        first = pool.get()
+        assert pool.get() is first and len(starts) == 1
+        assert first._max_workers == 1  # at least one worker
+
+        with ThreadPoolExecutor(max_workers=1) as other:
+            pool.discard(other)
+        assert pool.get() is first
+
+        pool.discard(first)
+        assert pool.get() is not first and len(starts) == 2
+    finally:
+        pool.shutdown()
@@ -0,0 +1,218 @@
+"""Tests for summary-only, keyset-paginated project listings and the streamed PDF report."""
+from datetime import datetime, timedelta
+import re
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("aiosqlite")
+
+from fastapi import HTTPException, Response
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base
+from app.models import (
+    BookChapter, BookProject, BookPublishingHouseProject, CoreDevicesProject, ExamGeneratorProject,
+    ProjectArtifact, ProjectLogEntry
+)
+from app.routes import book_writer, core_devices, exam_generator, ferrari_company
+
+PROJECTS = 500
+PAYLOAD = 256 * 1024
+HEAVY_COLUMNS = re.compile(r"\.(pdf_report|project_data|artifacts|owner_decisions|chat_log|progress_log|error_log"
+                           r"|problems|validation_results|final_review|input_content)\b")
+START = datetime(2026, 1, 1)
+
+
+class Database:
+    """SQLite database that records the SELECT statements it executes."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.selects = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.selects.append(statement)
+
+    async def seed(self, payload):
+        """Core Devices projects with `payload` bytes of PDF and legacy chat log each."""
+        async with self.engine.begin() as conn:
+            for start in range(0, PROJECTS, 50):
+                await conn.execute(insert(CoreDevicesProject), [
+                    {
+                        "id": f"cd-{n:04d}", "product_idea": f"Pump {n}", "primary_need": "water",
+                        "current_phase": "concept_differentiation", "status": "in_progress",
+                        "pdf_report": b"%" * payload, "chat_log": [{"content": "x" * payload}],
+                        "created_at": START,
+                        # Pairs of projects share a timestamp, so ties are broken by id
+                        "updated_at": START + timedelta(minutes=n // 2),
+                    }
+                    for n in range(start, start + 50)
+                ])
+
+
+async def _database(tmp_path, name):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[
+            CoreDevicesProject.__table__, BookPublishingHouseProject.__table__,
+            ExamGeneratorProject.__table__, BookProject.__table__, BookChapter.__table__,
+            ProjectLogEntry.__table__, ProjectArtifact.__table__,
+        ])
+    return Database(engine)
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    database = await _database(tmp_path, "projects.db")
+    yield database
+    core_devices.active_projects.clear()
+    await database.engine.dispose()
+
+
+async def _list_all(database, limit=100):
+    """Every Core Devices project, page by page; returns (projects, pages)."""
+    projects, pages, cursor = [], 0, None
+    while True:
+        async with database.session_factory() as db:
+            page = await core_devices.list_core_devices_projects(cursor=cursor, limit=limit, db=db)
+        projects += page["projects"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return projects, pages
+
+
+@pytest.mark.asyncio
+async def test_listing_reads_summary_columns_only(database):
+    """Test that listing projects with 256 KB payloads each never selects the payload columns."""
+    await database.seed(PAYLOAD)
+    database.selects.clear()
+    projects, pages = await _list_all(database)
+    assert len(projects) == PROJECTS and pages == 5
+    assert database.selects
+    for statement in database.selects:
+        assert not HEAVY_COLUMNS.search(statement), statement
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_are_stable(database):
+    """Test that paging returns every project once, newest first, even while projects are updated."""
+    await database.seed(16)
+    expected = sorted(((p // 2, f"cd-{p:04d}") for p in range(PROJECTS)), reverse=True)
+
+    projects, pages = await _list_all(database, limit=120)
+    assert [p["id"] for p in projects] == [row_id for _, row_id in expected]
+    assert pages == 5
+
+    # A project touched between two pages moves to the front without shifting the rest
+    async with database.session_factory() as db:
+        first = await core_devices.list_core_devices_projects(limit=100, db=db)
+        project = await db.get(CoreDevicesProject, "cd-0000")
+        project.updated_at = START + timedelta(days=1)
+        await db.commit()
+        second = await core_devices.list_core_devices_projects(cursor=first["next_cursor"], limit=100, db=db)
+    assert [p["id"] for p in first["projects"] + second["projects"]] == [row_id for _, row_id in expected[:200]]
+
+    async with database.session_factory() as db:
+        with pytest.raises(HTTPException) as excinfo:
+            await core_devices.list_core_devices_projects(cursor="not-a-cursor", db=db)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_unpaged_listing_returns_every_project(database):
+    """Test that a listing requested without a cursor or limit returns every project, as before paging."""
+    await database.seed(16)
+    async with database.session_factory() as db:
+        db.add_all([BookProject(id=f"bw-{n:03d}", title=f"Novel {n}", created_at=START,
+                                updated_at=START + timedelta(minutes=n)) for n in range(150)])
+        await db.commit()
+
+    async with database.session_factory() as db:
+        listing = await core_devices.list_core_devices_projects(db=db)
+        response = Response()
+        books = await book_writer.list_projects(response, db=db)
+        first_page = await book_writer.list_projects(Response(), limit=100, db=db)
+    assert len(listing["projects"]) == PROJECTS
+    assert listing["next_cursor"] is None
+    assert [b.id for b in books] == [f"bw-{n:03d}" for n in reversed(range(150))]
+    assert "x-next-cursor" not in response.headers
+    assert len(first_page) == 100
+
+
+@pytest.mark.asyncio
+async def test_pdf_report_is_streamed_in_chunks(database):
+    """Test that the PDF report is read in chunks and survives loads and saves that never fetch it."""
+    pdf = bytes(range(256)) * (3 * core_devices.PDF_CHUNK_SIZE // 256) + b"%%EOF"
+    async with database.session_factory() as db:
+        db.add(CoreDevicesProject(id="cd-pdf", product_idea="Solar pump", primary_need="water",
+                                  current_phase="research_discovery", status="in_progress", pdf_report=pdf))
+        await db.commit()
+
+    database.selects.clear()
+    async with database.session_factory() as db:
+        project_data = await core_devices.load_project_from_db("cd-pdf", db)
+    async with database.session_factory() as db:
+        await core_devices.save_project_to_db("cd-pdf", project_data, db)
+    assert not any("pdf_report" in statement for statement in database.selects)
+    assert any("core_devices_projects.product_idea" in statement for statement in database.selects)
+    assert "pdf_report" not in project_data
+
+    async with database.session_factory() as db:
+        response = await core_devices.download_research_pdf("cd-pdf", db)
+        chunks = [chunk async for chunk in response.body_iterator]
+    assert response.media_type == "application/pdf"
+    assert response.headers["content-length"] == str(len(pdf))
+    assert b"".join(chunks) == pdf
+    assert len(chunks) == 4
+    assert max(len(chunk) for chunk in chunks) == core_devices.PDF_CHUNK_SIZE
+
+    async with database.session_factory() as db:
+        db.add(CoreDevicesProject(id="cd-nopdf", product_idea="Hand pump", status="in_progress"))
+        await db.commit()
+        for project_id in ("cd-nopdf", "cd-missing"):
+            with pytest.raises(HTTPException) as excinfo:
+                await core_devices.download_research_pdf(project_id, db)
+            assert excinfo.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_other_listings_page_summaries(database):
+    """Test that the Ferrari, exam generator and book writer listings page summary columns only."""
+    async with database.session_factory() as db:
+        for n in range(3):
+            updated_at = START + timedelta(minutes=n)
+            db.add(BookPublishingHouseProject(id=f"bph-{n}", title=f"Book {n}", premise="p" * 500,
+                                              chat_log=[{"content": "x" * PAYLOAD}], updated_at=updated_at))
+            db.add(ExamGeneratorProject(id=f"eg-{n}", input_content="c" * PAYLOAD, problems=[{"q": "x" * PAYLOAD}],
+                                        updated_at=updated_at))
+            db.add(BookProject(id=f"bw-{n}", title=f"Novel {n}", updated_at=updated_at, created_at=START))
+        db.add(BookChapter(project_id="bw-1", chapter_number=1, title="One"))
+        await db.commit()
+
+    database.selects.clear()
+    async with database.session_factory() as db:
+        ferrari = await ferrari_company.list_book_publishing_house_projects(limit=2, db=db)
+        ferrari_rest = await ferrari_company.list_book_publishing_house_projects(
+            cursor=ferrari["next_cursor"], limit=2, db=db)
+        response = Response()
+        exams = await exam_generator.list_exam_generator_projects(response, db=db, limit=2)
+        books = await book_writer.list_projects_with_pdfs(db=db)
+    for statement in database.selects:
+        assert not HEAVY_COLUMNS.search(statement), statement
+
+    assert [p["project_id"] for p in ferrari["projects"] + ferrari_rest["projects"]] == ["bph-2", "bph-1", "bph-0"]
+    assert ferrari["projects"][0]["premise"] == "p" * 100 + "..."
+    assert ferrari_rest["next_cursor"] is None
+    assert [p["project_id"] for p in exams] == ["eg-2", "eg-1"]
+    assert "x-next-cursor" in response.headers
+    assert [(p["id"], p["has_pdf"]) for p in books["projects"]] == [("bw-2", False), ("bw-1", True), ("bw-0", False)]
+
+    # The detail view still loads the deferred columns
+    async with database.session_factory() as db:
+        detail = await exam_generator.get_exam_generator_project("eg-1", db)
+    assert detail.problems == [{"q": "x" * PAYLOAD}]
@@ -0,0 +1,265 @@
+"""Tests for incremental persistence of Core Devices and Ferrari project state."""
+from statistics import median
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import undefer_group
+
+from app.core.chat_feed import ChatLog
+from app.database import Base
+from app.models import (
+    BookPublishingHouseProject, CoreDevicesProject, ProjectArtifact, ProjectLogEntry
+)
+from app.product_company.core_devices_company import (
+    CoreDevicesCompany, Phase, PrimaryNeed, ProductProject
+)
+from app.routes import core_devices, ferrari_company
+
+MESSAGES = 5000
+FLUSHES = 50
+
+
+class Database:
+    """SQLite database that measures the parameter bytes of the writes it executes."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.bytes_written = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._measure)
+
+    def _measure(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE")):
+            self.bytes_written += len(repr(parameters).encode("utf-8"))
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'projects.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[
+            CoreDevicesProject.__table__, BookPublishingHouseProject.__table__,
+            ProjectLogEntry.__table__, ProjectArtifact.__table__,
+        ])
+    yield Database(engine)
+    core_devices.active_projects.clear()
+    ferrari_company.active_projects.clear()
+    await engine.dispose()
+
+
+def _core_devices_project():
+    company = CoreDevicesCompany(model="gemma2:2b")
+    company.project = ProductProject(product_idea="Solar water pump", primary_need=PrimaryNeed.WATER)
+    return {
+        "company": company,
+        "product_idea": "Solar water pump",
+        "primary_need": "water",
+        "constraints": {},
+        "model": "gemma2:2b",
+        "current_phase": "concept_differentiation",
+        "status": "in_progress",
+        "owner_decisions": {},
+        "artifacts": {},
+        "chat_log": [],
+        "progress_log": [],
+        "error_log": [],
+    }
+
+
+async def _save(database, project_id, project_data):
+    async with database.session_factory() as db:
+        await core_devices.save_project_to_db(project_id, project_data, db)
+
+
+async def _count(database, model, **filters):
+    async with database.session_factory() as db:
+        statement = select(func.count()).select_from(model)
+        for name, value in filters.items():
+            statement = statement.where(getattr(model, name) == value)
+        return (await db.execute(statement)).scalar()
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_only_new_messages(database):
+    """Test that each flush of a 5,000 message phase writes its new messages, not the history."""
+    project_id = "cd-flush"
+    project_data = _core_devices_project()
+    company = project_data["company"]
+    core_devices.active_projects[project_id] = project_data
+    await _save(database, project_id, project_data)
+
+    # A large artifact produced once at the start of the phase
+    company.project.concept_pack = {"concepts": [{"name": f"Concept {n}", "notes": "x" * 2000} for n in range(100)]}
+
+    flush_bytes = []
+    saved_index = 0
+    for flush in range(FLUSHES):
+        for n in range(MESSAGES // FLUSHES):
+            company.bus.send("Concept_Agent", "CEO_Agent", Phase.CONCEPT_DIFFERENTIATION,
+                             f"Message {flush}.{n}: exploring the pump concept in some detail.")
+        # Same steps as the phase's message saver
+        project_data["chat_log"].extend(m.to_dict() for m in company.bus.get_messages_since(saved_index))
+        saved_index = company.bus.get_total_message_count()
+        await core_devices.log_progress(project_id, f"Flush {flush}", "concept_differentiation")
+
+        before = database.bytes_written
+        await _save(database, project_id, project_data)
+        flush_bytes.append(database.bytes_written - before)
+
+    total_history = len(repr(project_data["chat_log"]))
+    steady = flush_bytes[1:]
+    # The artifact is written once, then every flush costs about the same
+    assert flush_bytes[0] > 200_000
+    assert max(steady) < 1.2 * median(steady)
+    assert flush_bytes[-1] < 1.2 * flush_bytes[1]
+    assert flush_bytes[-1] < total_history / (FLUSHES / 2)
+    assert await _count(database, ProjectLogEntry, log="chat") == MESSAGES
+    assert await _count(database, ProjectLogEntry, log="progress") == FLUSHES
+
+    # Nothing changed: nothing but the project row's timestamps is written
+    before = database.bytes_written
+    await _save(database, project_id, project_data)
+    assert database.bytes_written - before < 200
+
+    # The chat-log API returns the same log after a reload
+    expected = list(project_data["chat_log"])
+    core_devices.active_projects.clear()
+    async with database.session_factory() as db:
+        response = await core_devices.get_chat_log(project_id, db=db)
+    assert response == {"chat_log": expected}
+    async with database.session_factory() as db:
+        response = await core_devices.get_chat_log(project_id, phase="concept_differentiation", db=db)
+    assert len(response["chat_log"]) == MESSAGES
+    reloaded = core_devices.active_projects[project_id]
+    assert reloaded["company"].project.concept_pack == company.project.concept_pack
+    assert len(reloaded["progress_log"]) == FLUSHES
+
+
+@pytest.mark.asyncio
+async def test_legacy_blobs_split_on_load(database):
+    """Test that a project saved as JSON blobs is split into the new tables and reads the same."""
+    chat_log = [
+        {"from_agent": "CEO_Agent", "to_agent": "OWNER", "phase": "initialization", "content": f"Hello {n}",
+         "timestamp": "2026-01-01T00:00:00", "message_type": "owner_request"}
+        for n in range(3)
+    ]
+    async with database.session_factory() as db:
+        db.add(CoreDevicesProject(
+            id="cd-legacy", product_idea="Water filter", primary_need="water", model="gemma2:2b",
+            current_phase="concept_differentiation", status="in_progress",
+            project_data={"product_idea": "Water filter", "primary_need": "water",
+                          "idea_dossier": {"problem": "Dirty water"}, "current_phase": "concept_differentiation"},
+            artifacts={"strategy_idea_intake": {"idea_dossier": {"problem": "Dirty water"}}},
+            owner_decisions={"strategy_idea_intake": {"decision": "approve"}},
+            chat_log=chat_log,
+            progress_log=[{"timestamp": "2026-01-01T00:00:00", "message": "Started", "phase": None}],
+        ))
+        await db.commit()
+
+    async with database.session_factory() as db:
+        project_data = await core_devices.load_project_from_db("cd-legacy", db)
+    assert list(project_data["chat_log"]) == chat_log
+    assert project_data["artifacts"] == {"strategy_idea_intake": {"idea_dossier": {"problem": "Dirty water"}}}
+    assert project_data["owner_decisions"] == {"strategy_idea_intake": {"decision": "approve"}}
+    assert project_data["company"].project.idea_dossier == {"problem": "Dirty water"}
+    assert len(project_data["progress_log"]) == 1
+
+    async with database.session_factory() as db:
+        row = await db.get(CoreDevicesProject, "cd-legacy", options=[undefer_group("legacy_state")])
+        assert (row.project_data, row.artifacts, row.chat_log, row.progress_log) == (None, None, None, None)
+
+    # Later saves append after the migrated entries
+    project_data["chat_log"].append(dict(chat_log[0], content="Welcome back"))
+    await _save(database, "cd-legacy", project_data)
+    async with database.session_factory() as db:
+        reloaded = await core_devices.load_project_from_db("cd-legacy", db)
+    assert [m["content"] for m in reloaded["chat_log"]] == ["Hello 0", "Hello 1", "Hello 2", "Welcome back"]
+    assert await _count(database, ProjectLogEntry, project_id="cd-legacy", log="chat") == 4
+
+
+@pytest.mark.asyncio
+async def test_saved_chat_entries_leave_memory(database):
+    """Test that Core Devices chat entries leave the log, its feed and the bus only once committed."""
+    project_data = _core_devices_project()
+    project_data["chat_log"] = ChatLog(window=50)
+    company = project_data["company"]
+    company.bus.window = 50
+    core_devices.active_projects["cd-window"] = project_data
+    company.bus.listeners.append(core_devices._relay_chat(project_data))
+    feed = core_devices._chat_feed("cd-window", project_data)
+
+    for n in range(200):
+        phase = Phase.CONCEPT_DIFFERENTIATION if n < 150 else Phase.UX_SYSTEM_DESIGN
+        company.bus.send("Concept_Agent", "CEO_Agent", phase, f"Message {n}")
+        if n == 158:
+            # Only the first 40 are committed; the 119 relayed since stay in memory
+            assert (company.bus.first_seq, project_data["chat_log"].first_seq, feed.first_seq) == (40, 40, 40)
+        if n in (39, 159, 199):
+            await _save(database, "cd-window", project_data)
+    # All 200 saved, the last 50 kept
+    assert (company.bus.first_seq, project_data["chat_log"].first_seq, feed.first_seq) == (150, 150, 150)
+    assert len(list(project_data["chat_log"])) == 50
+    assert len(feed._messages) <= 100
+    assert json.loads(feed.page(-1, "concept_differentiation"))["chat_log"] == []
+
+    async with database.session_factory() as db:
+        full = await core_devices.get_chat_log("cd-window", db=db)
+        design = await core_devices.get_chat_log("cd-window", phase="ux_system_design", db=db)
+        pages, after = [], -1
+        while True:
+            page = await core_devices.get_chat_log("cd-window", after=after, limit=100, db=db)
+            page = page if isinstance(page, dict) else json.loads(page.body)
+            pages.append([m["seq"] for m in page["chat_log"]])
+            after = page["next_after"]
+            if not page["has_more"]:
+                break
+    assert [m["content"] for m in full["chat_log"]] == [f"Message {n}" for n in range(200)]
+    assert [m["content"] for m in design["chat_log"]] == [f"Message {n}" for n in range(150, 200)]
+    # Stored entries first, then the log's window from the feed
+    assert pages == [list(range(100)), list(range(100, 150)), list(range(150, 200))]
+
+    # A stream resuming before the window gets the stored entries first
+    async with database.session_factory() as db:
+        response = await core_devices.stream_project_events("cd-window", last_event_id="9", db=db)
+    stream, seqs = response.body_iterator, []
+    while len(seqs) < 190:
+        frame = await asyncio.wait_for(stream.__anext__(), 1)
+        if frame.startswith(b"id: "):
+            seqs.append(json.loads(frame.split(b"data: ", 1)[1])["seq"])
+    await stream.aclose()
+    assert seqs == list(range(10, 200))
+
+
+@pytest.mark.asyncio
+async def test_ferrari_chat_log_survives_reload(database):
+    """Test that the Ferrari message bus is persisted incrementally and restored on load."""
+    from app.book_writer.ferrari_company import BookProject, FerrariBookCompany, Phase as BookPhase
+
+    company = FerrariBookCompany(model="qwen3:30b")
+    company.project = BookProject(title="The Pump", premise="A hydraulic engineer saves a city.")
+    project_data = {
+        "company": company, "title": "The Pump", "premise": "A hydraulic engineer saves a city.",
+        "model": "qwen3:30b", "current_phase": "strategy_concept", "status": "in_progress",
+        "owner_decisions": {}, "artifacts": {}, "chat_log": [], "progress_log": [], "error_log": [],
+    }
+    ferrari_company.active_projects["book"] = project_data
+    for n in range(20):
+        company.message_bus.send("CPSO", "CEO", BookPhase.STRATEGY_CONCEPT, f"Brief draft {n}")
+        async with database.session_factory() as db:
+            await ferrari_company.log_progress("book", f"Step {n}", "strategy_concept", db)
+    async with database.session_factory() as db:
+        await ferrari_company.save_project_to_db("book", project_data, db)
+    assert await _count(database, ProjectLogEntry, project_id="book", log="chat") == 20
+
+    expected = company.message_bus.get_chat_log()
+    ferrari_company.active_projects.clear()
+    async with database.session_factory() as db:
+        response = await ferrari_company.get_chat_log("book", db=db)
+    assert response == {"chat_log": expected}
+    assert len(ferrari_company.active_projects["book"]["progress_log"]) == 20
@@ -0,0 +1,235 @@
+"""Tests for the Research Team step graph and off-loop report rendering."""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import threading
+import time
+import pytest
+
+from app.core.config import settings
+from app.product_company import research_report
+from app.product_company.core_devices_company import MessageBus
+from app.product_company.research_report import render_report
+from app.product_company.research_team import ResearchFindings, ResearchReportGenerator, ResearchTeam
+
+LATENCY = 0.1
+
+
+class FixedLatencyLLM:
+    """Fake LLM answering after a fixed delay with canned research for each agent."""
+
+    provider = "local"
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})  # step -> calls that raise before it succeeds
+        self.calls = []  # (step, start, end)
+
+    async def complete(self, system, user, tools=None):
+        step = self._step(system, user)
+        start = time.perf_counter()
+        await asyncio.sleep(LATENCY)
+        self.calls.append((step, start, time.perf_counter()))
+        if self.failures.get(step):
+            self.failures[step] -= 1
+            raise Exception("Request error: connection reset")
+        return json.dumps(RESPONSES[step])
+
+    @staticmethod
+    def _step(system, user):
+        if system.startswith("You are a Market Research Agent"):
+            return "opportunities" if user.startswith("Based on brainstormed") else "market_data"
+        if system.startswith("You are a Technology Research Agent"):
+            return "tech_data"
+        if system.startswith("You are a User Research Agent"):
+            return "user_data"
+        return "recommendation"
+
+
+RESPONSES = {
+    "market_data": {
+        "industries": ["Water Tech"],
+        "product_ideas": [{"idea": "Solar pump", "industry": "Water Tech", "addresses_need": "water",
+                           "description": "Pumps well water with a solar panel"}],
+        "emerging_needs": ["Off-grid irrigation"],
+        "opportunity_areas": ["Rural water"],
+    },
+    "opportunities": {"opportunities": [{"product_concept": "Solar pump", "primary_need": "water",
+                                         "market_size": "large"}]},
+    "tech_data": {"technology_analysis": [{"product_concept": "Solar pump", "readiness": "mature"}]},
+    "user_data": {"user_analysis": [{"product_concept": "Solar pump", "target_users": "Farmers"}]},
+    "recommendation": {"recommended_product": {"product_concept": "Solar pump", "primary_need": "water",
+                                               "justification": ["Large market"], "next_steps": ["Prototype"]}},
+}
+
+
+@pytest.fixture(autouse=True)
+def reports():
+    research_report._reports.clear()
+    yield research_report._reports
+    research_report._reports.clear()
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    """Render reports on a thread in the tests that do not measure the process pool."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        monkeypatch.setattr(research_report._pool, "get", lambda: executor)
+        yield executor
+
+
+def _team(llm):
+    return ResearchTeam(llm, MessageBus(), retry_delay=0)
+
+
+@pytest.mark.asyncio
+async def test_tech_and_user_research_overlap(renderer):
+    """Test that technology and user research run side by side once the opportunities are known."""
+    llm = FixedLatencyLLM()
+    result = await _team(llm).execute_research_phase("water")
+
+    calls = {step: (begin, end) for step, begin, end in llm.calls}
+    assert len(llm.calls) == 5
+    tech, user = calls["tech_data"], calls["user_data"]
+    assert tech[0] < user[1] and user[0] < tech[1]
+    assert calls["recommendation"][0] >= max(tech[1], user[1])
+    assert result["recommendation"]["recommended_product"]["product_concept"] == "Solar pump"
+    assert "Solar pump" in result["text_report"]
+    assert result["pdf_report"].startswith(b"%PDF")
+
+
+@pytest.mark.asyncio
+async def test_failed_call_is_retried_alone(renderer):
+    """Test that a failed agent call is retried without repeating the steps around it."""
+    llm = FixedLatencyLLM(failures={"user_data": 2})
+    bus = MessageBus()
+    result = await ResearchTeam(llm, bus, retry_delay=0).execute_research_phase("water")
+
+    steps = [step for step, _, _ in llm.calls]
+    assert steps.count("user_data") == 3
+    assert all(steps.count(step) == 1 for step in RESPONSES if step != "user_data")
+    assert result["user_data"] == RESPONSES["user_data"]
+    assert sum("retrying" in message.content for message in bus.messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_backoff_frees_its_slot(renderer, monkeypatch):
+    """Test that a step backing off before its retry lets the next step call the backend meanwhile."""
+    monkeypatch.setattr(settings, "LLM_CONCURRENCY_LOCAL", 1)
+    llm = FixedLatencyLLM(failures={"tech_data": 1})
+    await ResearchTeam(llm, MessageBus(), retry_delay=LATENCY * 3).execute_research_phase("water")
+
+    assert [step for step, _, _ in llm.calls] == [
+        "market_data", "opportunities", "tech_data", "user_data", "tech_data", "recommendation"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_partial_results_are_persisted_and_resumed(renderer):
+    """Test that each result is handed over as it completes and a rerun skips the completed steps."""
+    llm = FixedLatencyLLM(failures={"recommendation": 5})
+    saved = {}
+
+    async def on_result(step, result):
+        saved[step] = result
+
+    with pytest.raises(Exception, match="Research synthesis failed after 3 attempts"):
+        await _team(llm).execute_research_phase("water", on_result=on_result)
+    assert list(saved) in (["market_data", "opportunities", "tech_data", "user_data"],
+                           ["market_data", "opportunities", "user_data", "tech_data"])
+
+    llm = FixedLatencyLLM()
+    resumed = {}
+
+    async def on_resumed(step, result):
+        resumed[step] = result
+
+    result = await _team(llm).execute_research_phase("water", completed=dict(saved), on_result=on_resumed)
+    assert [step for step, _, _ in llm.calls] == ["recommendation"]
+    assert list(resumed) == ["recommendation"]
+    assert result["opportunities"] == RESPONSES["opportunities"]["opportunities"]
+
+
+def _research(ideas):
+    market_data = {
+        "industries": [f"Industry {n}" for n in range(ideas // 10 + 1)],
+        "product_ideas": [{"idea": f"Pump {n}", "industry": f"Industry {n // 10}", "addresses_need": "water",
+                           "description": "Moves water uphill without grid power. " * 4}
+                          for n in range(ideas)],
+        "emerging_needs": ["Off-grid irrigation"],
+        "opportunity_areas": ["Rural water"],
+    }
+    opportunities = [{"product_concept": f"Pump {n}", "primary_need": "water", "market_size": "large",
+                      "current_friction": "Diesel is expensive", "differentiation": "No fuel"}
+                     for n in range(ideas)]
+    tech_data = {"technology_analysis": [
+        {"product_concept": f"Pump {n}", "enabling_technologies": ["Brushless motor", "MPPT controller"],
+         "readiness": "mature", "feasibility": "high", "component_availability": "readily_available"}
+        for n in range(ideas)
+    ]}
+    user_data = {"user_analysis": [
+        {"product_concept": f"Pump {n}", "pain_points": ["Diesel cost", "Repairs"],
+         "current_behaviors": ["Carrying water"], "friction_points": ["Priming the pump"]}
+        for n in range(ideas)
+    ]}
+    findings = ResearchFindings(
+        industries=market_data["industries"], product_ideas=market_data["product_ideas"],
+        product_opportunities=opportunities, research_scope="water"
+    )
+    return findings, market_data, tech_data, user_data, RESPONSES["recommendation"]
+
+
+@pytest.mark.asyncio
+async def test_report_is_rendered_once_per_findings(renderer, monkeypatch):
+    """Test that concurrent and repeated requests for the same findings share one render."""
+    renders = []
+    render = research_report.render_report_sync
+    monkeypatch.setattr(research_report, "render_report_sync",
+                        lambda *args: renders.append(threading.get_ident()) or render(*args))
+
+    research = _research(5)
+    first, second = await asyncio.gather(render_report(*research), render_report(*research))
+    assert first == second
+    assert len(renders) == 1
+    assert renders[0] != threading.get_ident()
+
+    # The research date does not change the key; the findings do
+    research[0].research_date = research[0].research_date.replace(year=2020)
+    assert (await render_report(*research))[2] == first[2]
+    assert len(renders) == 1
+    other = _research(6)
+    assert (await render_report(*other))[2] != first[2]
+    assert len(renders) == 2
+
+    # Findings saved as a dict render to the same report
+    from dataclasses import asdict
+    saved = json.loads(json.dumps(asdict(research[0]), default=str))
+    assert (await render_report(ResearchFindings.from_dict(saved), *research[1:]))[2] == first[2]
+    assert len(renders) == 2
+
+
+@pytest.mark.asyncio
+async def test_large_render_runs_off_the_event_loop(monkeypatch):
+    """Test that a report renders in the given executor while the event loop keeps serving."""
+    started, release = threading.Event(), threading.Event()
+    render_threads = []
+    render = research_report.render_report_sync
+
+    def blocking_render(*args):
+        render_threads.append(threading.current_thread().name)
+        started.set()
+        release.wait(5)
+        return render(*args)
+
+    monkeypatch.setattr(research_report, "render_report_sync", blocking_render)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-render") as executor:
+        rendering = asyncio.ensure_future(render_report(*_research(50), executor=executor))
+        assert await asyncio.to_thread(started.wait, 5)
+        # The render is stuck in the executor, yet the loop runs other work
+        assert await asyncio.wait_for(asyncio.sleep(0, result="served"), 1) == "served"
+        assert not rendering.done()
+        release.set()
+        text_report, pdf_report, _ = await rendering
+
+    assert render_threads == ["report-render_0"]
+    assert pdf_report.startswith(b"%PDF")
+    assert "Pump 49" in text_report
@@ -0,0 +1,144 @@
+"""Tests for chunked TTS synthesis with the audio chunk cache."""
+import tracemalloc
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+
+from app.documents.tts import AudioChunkCache, split_tts_chunks, synthesize_to_wav
+
+SAMPLE_RATE = 8000
+
+
+class ToneModel:
+    """Stub TTS model: a deterministic tone per chunk, 20 samples per character."""
+
+    def __init__(self, crash_after=None):
+        self.spoken = []
+        self.crash_after = crash_after
+
+    def __call__(self, text):
+        if self.crash_after is not None and len(self.spoken) == self.crash_after:
+            raise KeyboardInterrupt  # the worker dies mid-conversion
+        self.spoken.append(text)
+        return self.tone(text)
+
+    @staticmethod
+    def tone(text):
+        frequency = 200 + sum(text.encode()) % 600
+        t = np.arange(len(text) * 20) / SAMPLE_RATE
+        return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def _document(paragraphs=20):
+    """Paragraphs of ~550 characters, so each one becomes its own chunk."""
+    return "\n\n".join(
+        " ".join(f"Paragraph {p} sentence {s} describes the hydraulic pump in detail." for s in range(8))
+        for p in range(paragraphs)
+    )
+
+
+def _synthesize(chunks, model, cache, path):
+    return synthesize_to_wav(chunks, model, cache, path, SAMPLE_RATE, "tone-1", voice="v2/en_speaker_1")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AudioChunkCache(tmp_path / "cache", max_bytes=50 * 1024 * 1024)
+
+
+def test_one_paragraph_edit_reuses_other_chunks(cache, tmp_path):
+    """Test that editing one paragraph only synthesizes that paragraph's chunk."""
+    text = _document()
+    chunks = split_tts_chunks(text)
+    assert len(chunks) == 20
+    first = _synthesize(chunks, ToneModel(), cache, tmp_path / "a.wav")
+    assert first["synthesized"] == 20 and first["cached"] == 0
+
+    edited = text.replace("Paragraph 7 sentence 3 describes", "Paragraph 7 sentence 3 explains")
+    model = ToneModel()
+    second = _synthesize(split_tts_chunks(edited), model, cache, tmp_path / "b.wav")
+    assert second["synthesized"] == 1 and second["cached"] == 19
+    assert model.spoken == [c for c in split_tts_chunks(edited) if "explains" in c]
+
+    audio, rate = sf.read(str(tmp_path / "b.wav"), dtype="float32")
+    expected = np.concatenate([ToneModel.tone(c) for c in split_tts_chunks(edited)])
+    assert rate == SAMPLE_RATE and np.allclose(audio, expected, atol=1e-4)
+
+    # A different voice is different audio
+    other_voice = synthesize_to_wav(chunks, ToneModel(), cache, tmp_path / "c.wav", SAMPLE_RATE, "tone-1")
+    assert other_voice["cached"] == 0
+
+
+def test_interrupted_conversion_resumes(cache, tmp_path):
+    """Test that a crashed conversion restarts at the first chunk without audio."""
+    chunks = split_tts_chunks(_document())
+    output = tmp_path / "book.wav"
+    with pytest.raises(KeyboardInterrupt):
+        _synthesize(chunks, ToneModel(crash_after=6), cache, output)
+    assert not output.exists()
+
+    # A new process opens the same cache
+    restarted = AudioChunkCache(cache.directory, cache.max_bytes)
+    model = ToneModel()
+    stats = _synthesize(chunks, model, restarted, output)
+    assert stats["cached"] == 6 and stats["synthesized"] == 14
+    assert model.spoken == chunks[6:]
+    assert sf.info(str(output)).frames == sum(len(c) * 20 for c in chunks)
+
+
+def test_chunk_evicted_by_another_worker_is_spoken_again(cache, tmp_path, monkeypatch):
+    """Test that a chunk evicted by another process before assembly is regenerated, not left silent."""
+    chunks = split_tts_chunks(_document(5))
+    _synthesize(chunks, ToneModel(), cache, tmp_path / "first.wav")
+
+    # Another worker evicts chunk 3 after this conversion found it cached
+    load = cache.load
+    evicted = cache.key(chunks[2], "v2/en_speaker_1", "tone-1")
+    monkeypatch.setattr(cache, "load", lambda key: None if key == evicted else load(key))
+    model = ToneModel()
+    stats = _synthesize(chunks, model, cache, tmp_path / "second.wav")
+    assert model.spoken == [chunks[2]]
+    assert stats["cached"] == 5 and stats["synthesized"] == 1
+
+    audio, _ = sf.read(str(tmp_path / "second.wav"), dtype="float32")
+    assert np.allclose(audio, np.concatenate([ToneModel.tone(c) for c in chunks]), atol=1e-4)
+
+    # A chunk that cannot be spoken again fails the conversion instead of leaving a gap
+    with pytest.raises(ValueError, match="Chunk 3 left the cache"):
+        _synthesize(chunks, lambda text: None, cache, tmp_path / "third.wav")
+    assert not (tmp_path / "third.wav").exists()
+    assert not (tmp_path / "third.wav.tmp").exists()
+
+
+def test_peak_memory_does_not_grow_with_document(cache, tmp_path):
+    """Test that assembling the WAV holds one chunk at a time."""
+    def peak(paragraphs):
+        chunks = split_tts_chunks(_document(paragraphs))
+        tracemalloc.start()
+        _synthesize(chunks, ToneModel(), cache, tmp_path / f"{paragraphs}.wav")
+        result = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, sf.info(str(tmp_path / f"{paragraphs}.wav")).frames * 4
+
+    short_peak, short_audio = peak(10)
+    long_peak, long_audio = peak(200)
+    # 20x the audio (8 MB) costs only per-chunk bookkeeping (cache keys), not samples
+    assert long_peak - short_peak < (long_audio - short_audio) / 50
+    assert long_peak < 2 * short_audio
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache stays within its size bound, keeping recently used chunks."""
+    clock = iter(range(1_000_000)).__next__
+    cache = AudioChunkCache(tmp_path / "cache", max_bytes=100_000, clock=clock)
+    for i in range(10):
+        cache.put(f"k{i}", np.zeros(5_000, dtype=np.float32))  # ~20 KB each
+        cache.has("k0")  # keep k0 in use
+    assert cache.size() <= 100_000
+    assert cache.has("k0") and cache.has("k9") and not cache.has("k1")
+
+    with cache.pin(["k9"]):
+        for i in range(10, 15):
+            cache.put(f"k{i}", np.zeros(5_000, dtype=np.float32))
+        assert cache.has("k9")
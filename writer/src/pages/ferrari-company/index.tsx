@@ -297,6 +297,10 @@ export default function BookPublishingHousePage() {
         } else if (status.status === 'failed') {
           setError(status.error || 'Phase execution failed');
           setLoading(false);
+        } else if (status.status === 'interrupted') {
+          // Server restarted mid-phase; the user can run the phase again
+          setError(status.message || 'Phase execution was interrupted');
+          setLoading(false);
         } else if (status.status === 'running') {
           // Still running, continue polling indefinitely
           // Poll again after 1 second